@@ -52,6 +52,9 @@ export const ENDPOINTS = {
     // File download
     DOWNLOAD: "/mjr/am/download",
 
+    // Grid thumbnails (server-side, cached)
+    THUMB: "/mjr/am/thumb",
+
     // Drag-out (OS) helpers
     BATCH_ZIP_CREATE: "/mjr/am/batch-zip",
 
@@ -313,6 +316,20 @@ export function buildSearchURL(params = {}) {
     return `${ENDPOINTS.SEARCH}?q=${encodeURIComponent(q)}&limit=${limit}&offset=${offset}`;
 }
 
+/**
+ * Build cached thumbnail URL for an image/video asset ("" when the asset has no filepath).
+ */
+export function buildAssetThumbURL(asset, size = 256) {
+    const rawPath = String(asset?.filepath || asset?.path || "").trim();
+    if (!rawPath) return "";
+    let url = `${ENDPOINTS.THUMB}?filepath=${encodeURIComponent(rawPath)}&size=${Number(size) || 256}`;
+    const version = asset?.mtime ?? asset?.mtime_ns;
+    if (version !== undefined && version !== null && version !== "") {
+        url += `&v=${encodeURIComponent(String(version))}`;
+    }
+    return url;
+}
+
 /**
  * Build download URL for asset
  */
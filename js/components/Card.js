@@ -3,7 +3,7 @@
  * @ts-check
  */
 
-import { buildAssetViewURL } from "../api/endpoints.js";
+import { buildAssetThumbURL, buildAssetViewURL } from "../api/endpoints.js";
 import { createFileBadge, createRatingBadge, createTagsBadge, createWorkflowDot } from "./Badges.js";
 import { formatDuration, formatDate, formatTime } from "../utils/format.js";
 import { APP_CONFIG } from "../app/config.js";
@@ -776,7 +776,8 @@ function createThumbnail(asset, viewUrl) {
 
     if (asset.kind === "image") {
         const img = document.createElement("img");
-        img.src = viewUrl;
+        const thumbUrl = buildAssetThumbURL(asset);
+        img.src = thumbUrl || viewUrl;
         img.alt = asset.filename || "Asset Image";
         img.classList.add("mjr-thumb-media");
         try {
@@ -786,6 +787,12 @@ function createThumbnail(asset, viewUrl) {
         
         // Critical: Handle broken images
         img.onerror = () => {
+             // Thumbnail unavailable (unsupported format, service down): fall back to the original.
+             if (thumbUrl && viewUrl && !img.dataset.mjrThumbFallback) {
+                 img.dataset.mjrThumbFallback = "1";
+                 img.src = viewUrl;
+                 return;
+             }
              img.style.display = "none";
              const err = document.createElement("div");
              err.className = "mjr-thumb-error";
@@ -799,7 +806,9 @@ function createThumbnail(asset, viewUrl) {
         // Create video element lazily to avoid eager network/decoder cost on large grids
         const video = document.createElement("video");
         const poster =
-            String(asset?.thumbnail_url || asset?.thumb_url || asset?.poster || "").trim() || null;
+            String(asset?.thumbnail_url || asset?.thumb_url || asset?.poster || "").trim() ||
+            buildAssetThumbURL(asset) ||
+            null;
         video.muted = true;
         video.loop = true;
         video.autoplay = false;
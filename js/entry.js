@@ -131,6 +131,9 @@ app.registerExtension({
                 if (api._mjrEnrichmentStatusHandler) {
                     api.removeEventListener("mjr-enrichment-status", api._mjrEnrichmentStatusHandler);
                 }
+                if (api._mjrRatingTagsSyncHandler) {
+                    api.removeEventListener("mjr-rating-tags-sync", api._mjrRatingTagsSyncHandler);
+                }
                 if (api._mjrDbRestoreStatusHandler) {
                     api.removeEventListener("mjr-db-restore-status", api._mjrDbRestoreStatusHandler);
                 }
@@ -203,6 +206,15 @@ app.registerExtension({
             };
             api.addEventListener("mjr-scan-complete", api._mjrScanCompleteHandler);
 
+            // Rating/tags file sync progress ({ active, done, failed, pending }).
+            api._mjrRatingTagsSyncHandler = (event) => {
+                try {
+                    const detail = event?.detail || {};
+                    window.dispatchEvent(new CustomEvent("mjr-rating-tags-sync", { detail }));
+                } catch {}
+            };
+            api.addEventListener("mjr-rating-tags-sync", api._mjrRatingTagsSyncHandler);
+
             api._mjrEnrichmentStatusHandler = (event) => {
                 try {
                     const detail = event?.detail || {};
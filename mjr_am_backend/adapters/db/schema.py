@@ -3,13 +3,14 @@ Database schema and migrations.
 """
 import hashlib
 import re
+import time
 from typing import List
 
 from ...shared import Result, get_logger, log_success
 
 logger = get_logger(__name__)
 
-CURRENT_SCHEMA_VERSION = 8
+CURRENT_SCHEMA_VERSION = 18
 # Schema version history (high-level):
 # 1: initial assets + metadata tables
 # 2-4: incremental columns and FTS/search support
@@ -17,6 +18,16 @@ CURRENT_SCHEMA_VERSION = 8
 # 6: asset sources (output/input/custom) + custom root id
 # 7: metadata FTS (tags/metadata_raw) to improve search UX
 # 8: duplicate analysis hashes (content_hash/phash/hash_state)
+# 9: directory scan journal (prune unchanged directories on incremental scans)
+# 10: materialized generation columns on asset_metadata (workflow_type, model_name, sampler, ...)
+# 11: content-addressed blobs table (zlib workflow/prompt graphs) + asset_metadata.prompt_hash
+# 12: metadata FTS split into tags (asset_metadata_fts) and prompt (asset_prompt_fts) indexes, column-scoped triggers
+# 13: near-duplicate phash band index (asset_phash_index) + precomputed similar pairs (asset_phash_pairs)
+# 14: trigger-maintained asset counters per (source, root_id, kind) (asset_stats)
+# 15: per local day rollup of asset counts (asset_day_stats) for the calendar histogram
+# 16: assets.scope_root (stamped from the scope_roots registry) and generated assets.dir_path for equality scoping
+# 17: asset_day_stats keyed by scope_root (matches the root-scoped scan) instead of (source, root_id)
+# 18: asset_stats keyed by scope_root as well
 
 # Schema definition
 SCHEMA_V1 = """
@@ -44,20 +55,31 @@ CREATE TABLE IF NOT EXISTS assets (
     indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     content_hash TEXT,
     phash TEXT,
-    hash_state TEXT
+    hash_state TEXT,
+    scope_root TEXT,  -- innermost registered scope root containing filepath (see scope_roots)
+    dir_path TEXT GENERATED ALWAYS AS (rtrim(rtrim(filepath, replace(replace(filepath, '/', ''), '\\', '')), '/\\')) VIRTUAL
 );
 
 CREATE TABLE IF NOT EXISTS asset_metadata (
     asset_id INTEGER PRIMARY KEY,
     rating INTEGER DEFAULT 0,
     tags TEXT DEFAULT '',  -- JSON array stored as string
-     tags_text TEXT DEFAULT '',  -- Legacy text column
-     metadata_text TEXT DEFAULT '',  -- Full metadata text for FTS
-    workflow_hash TEXT,
+    tags_text TEXT DEFAULT '',  -- Tags + model/LoRA names for the tags FTS index
+    metadata_text TEXT DEFAULT '',  -- Prompt text for the prompt FTS index
+    workflow_hash TEXT,  -- blobs.hash of the workflow graph
+    prompt_hash TEXT,  -- blobs.hash of the prompt graph
     has_workflow BOOLEAN DEFAULT 0,
     has_generation_data BOOLEAN DEFAULT 0,
     metadata_quality TEXT DEFAULT 'none',  -- full, partial, degraded, none
     metadata_raw TEXT DEFAULT '{}',  -- Full raw metadata as JSON
+    -- Generation fields materialized from metadata_raw for indexed filtering
+    workflow_type TEXT,
+    model_name TEXT COLLATE NOCASE,
+    sampler TEXT COLLATE NOCASE,
+    seed INTEGER,
+    steps INTEGER,
+    cfg REAL,
+    generation_time_ms INTEGER,
     FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE
 );
 
@@ -72,6 +94,83 @@ CREATE TABLE IF NOT EXISTS scan_journal (
     FOREIGN KEY (filepath) REFERENCES assets(filepath) ON DELETE CASCADE
 );
 
+-- Directory journal: last listed state per directory, so incremental scans can skip
+-- listing directories whose entry set has not changed
+CREATE TABLE IF NOT EXISTS scan_dir_journal (
+    root_path TEXT NOT NULL,
+    dir_path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    child_count INTEGER DEFAULT 0,
+    subdirs TEXT DEFAULT '[]',  -- JSON array of child directory names
+    files TEXT DEFAULT '[]',  -- JSON array of [name, mtime_ns, size] per indexable file
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (root_path, dir_path)
+);
+
+-- Content-addressed store for large JSON graphs (workflow / prompt), shared by
+-- asset_metadata and metadata_cache rows that reference them as {"$blob": hash}
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,  -- sha256 of the canonical (sorted, compact) JSON
+    codec TEXT DEFAULT 'zlib',
+    raw_size INTEGER DEFAULT 0,
+    data BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Near-duplicate index: each 64-bit phash split into four 16-bit bands (multi-index
+-- hashing). Two hashes within Hamming distance d have a band within d // 4 of each other.
+CREATE TABLE IF NOT EXISTS asset_phash_index (
+    asset_id INTEGER PRIMARY KEY,
+    phash INTEGER NOT NULL,  -- assets.phash as a signed 64-bit integer
+    b0 INTEGER NOT NULL,
+    b1 INTEGER NOT NULL,
+    b2 INTEGER NOT NULL,
+    b3 INTEGER NOT NULL,
+    FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE
+);
+
+-- Similar-image pairs found while indexing phashes (left_id < right_id)
+CREATE TABLE IF NOT EXISTS asset_phash_pairs (
+    left_id INTEGER NOT NULL,
+    right_id INTEGER NOT NULL,
+    distance INTEGER NOT NULL,
+    PRIMARY KEY (left_id, right_id),
+    FOREIGN KEY (left_id) REFERENCES assets(id) ON DELETE CASCADE,
+    FOREIGN KEY (right_id) REFERENCES assets(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Asset counters per (scope_root, kind), kept current by the asset_stats_* triggers so
+-- health counters never scan assets. Unstamped assets count under ''.
+CREATE TABLE IF NOT EXISTS asset_stats (
+    scope_root TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    rated INTEGER NOT NULL DEFAULT 0,
+    with_workflow INTEGER NOT NULL DEFAULT 0,
+    with_generation_data INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope_root, kind)
+) WITHOUT ROWID;
+
+-- Asset counts per local calendar day (of mtime), scope_root and kind, so a root's days
+-- are the rows of its scope keys (unstamped assets count under ''). The day depends on the
+-- process timezone; it is rebuilt when that changes (see ASSET_DAY_STATS_TZ_KEY).
+CREATE TABLE IF NOT EXISTS asset_day_stats (
+    scope_root TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL,
+    day TEXT NOT NULL,  -- YYYY-MM-DD, local time
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope_root, kind, day)
+) WITHOUT ROWID;
+
+-- Root directories scoped queries have been asked about. Each asset's scope_root is the
+-- longest registered root its filepath is under, so "everything under R" is an equality
+-- seek on R and the registered roots nested under it.
+CREATE TABLE IF NOT EXISTS scope_roots (
+    root TEXT PRIMARY KEY,  -- resolved directory, no trailing separator
+    prefix TEXT NOT NULL,  -- root + path separator
+    registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS metadata_cache (
     filepath TEXT PRIMARY KEY,
     state_hash TEXT,
@@ -82,6 +181,9 @@ CREATE TABLE IF NOT EXISTS metadata_cache (
 );
 """
 
+# Parent directory of assets.filepath (either separator), kept by SQLite as a generated column.
+ASSET_DIR_PATH_SQL = "rtrim(rtrim(filepath, replace(replace(filepath, '/', ''), '\\', '')), '/\\')"
+
 # Migration from v1 to v2: Add metadata_raw column
 COLUMN_DEFINITIONS = {
     "assets": [
@@ -98,16 +200,27 @@ COLUMN_DEFINITIONS = {
         ("content_hash", "content_hash TEXT"),
         ("phash", "phash TEXT"),
         ("hash_state", "hash_state TEXT"),
+        ("scope_root", "scope_root TEXT"),
+        ("dir_path", f"dir_path TEXT GENERATED ALWAYS AS ({ASSET_DIR_PATH_SQL}) VIRTUAL"),
     ],
     "asset_metadata": [
         ("rating", "rating INTEGER DEFAULT 0"),
         ("tags", "tags TEXT DEFAULT ''"),
         ("tags_text", "tags_text TEXT DEFAULT ''"),
+        ("metadata_text", "metadata_text TEXT DEFAULT ''"),
         ("workflow_hash", "workflow_hash TEXT"),
+        ("prompt_hash", "prompt_hash TEXT"),
         ("has_workflow", "has_workflow BOOLEAN DEFAULT 0"),
         ("has_generation_data", "has_generation_data BOOLEAN DEFAULT 0"),
         ("metadata_quality", "metadata_quality TEXT DEFAULT 'none'"),
         ("metadata_raw", "metadata_raw TEXT DEFAULT '{}'"),
+        ("workflow_type", "workflow_type TEXT"),
+        ("model_name", "model_name TEXT COLLATE NOCASE"),
+        ("sampler", "sampler TEXT COLLATE NOCASE"),
+        ("seed", "seed INTEGER"),
+        ("steps", "steps INTEGER"),
+        ("cfg", "cfg REAL"),
+        ("generation_time_ms", "generation_time_ms INTEGER"),
     ],
     "scan_journal": [
         ("dir_path", "dir_path TEXT"),
@@ -116,6 +229,12 @@ COLUMN_DEFINITIONS = {
         ("size", "size INTEGER"),
         ("last_seen", "last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
     ],
+    "scan_dir_journal": [
+        ("child_count", "child_count INTEGER DEFAULT 0"),
+        ("subdirs", "subdirs TEXT DEFAULT '[]'"),
+        ("files", "files TEXT DEFAULT '[]'"),
+        ("last_seen", "last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+    ],
     "metadata_cache": [
         ("state_hash", "state_hash TEXT"),
         ("metadata_hash", "metadata_hash TEXT"),
@@ -135,7 +254,11 @@ CREATE VIRTUAL TABLE IF NOT EXISTS assets_fts USING fts5(
 CREATE VIRTUAL TABLE IF NOT EXISTS asset_metadata_fts USING fts5(
     tags,
     tags_text,
-     metadata_text,
+    content=''
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS asset_prompt_fts USING fts5(
+    metadata_text,
     content=''
 );
 
@@ -150,14 +273,26 @@ CREATE INDEX IF NOT EXISTS idx_assets_source_root_id ON assets(source, root_id);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_assets_filepath_source_root ON assets(filepath, source, root_id);
 CREATE INDEX IF NOT EXISTS idx_metadata_rating ON asset_metadata(rating);
 CREATE INDEX IF NOT EXISTS idx_metadata_workflow_hash ON asset_metadata(workflow_hash);
+CREATE INDEX IF NOT EXISTS idx_metadata_prompt_hash ON asset_metadata(prompt_hash);
 CREATE INDEX IF NOT EXISTS idx_metadata_quality_workflow ON asset_metadata(metadata_quality, has_workflow);
+CREATE INDEX IF NOT EXISTS idx_metadata_workflow_type ON asset_metadata(workflow_type);
+CREATE INDEX IF NOT EXISTS idx_metadata_model_name ON asset_metadata(model_name);
+CREATE INDEX IF NOT EXISTS idx_metadata_sampler ON asset_metadata(sampler);
 CREATE INDEX IF NOT EXISTS idx_assets_source_mtime_desc ON assets(source, mtime DESC);
 CREATE INDEX IF NOT EXISTS idx_assets_content_hash ON assets(content_hash);
 CREATE INDEX IF NOT EXISTS idx_assets_phash ON assets(phash);
 CREATE INDEX IF NOT EXISTS idx_assets_hash_state ON assets(hash_state);
+CREATE INDEX IF NOT EXISTS idx_phash_index_b0 ON asset_phash_index(b0);
+CREATE INDEX IF NOT EXISTS idx_phash_index_b1 ON asset_phash_index(b1);
+CREATE INDEX IF NOT EXISTS idx_phash_index_b2 ON asset_phash_index(b2);
+CREATE INDEX IF NOT EXISTS idx_phash_index_b3 ON asset_phash_index(b3);
+CREATE INDEX IF NOT EXISTS idx_phash_pairs_right ON asset_phash_pairs(right_id);
+CREATE INDEX IF NOT EXISTS idx_phash_pairs_distance ON asset_phash_pairs(distance, left_id, right_id);
 CREATE INDEX IF NOT EXISTS idx_asset_metadata_has_workflow_true ON asset_metadata(has_workflow) WHERE has_workflow = 1;
 CREATE INDEX IF NOT EXISTS idx_asset_metadata_has_generation_data_true ON asset_metadata(has_generation_data) WHERE has_generation_data = 1;
 CREATE INDEX IF NOT EXISTS idx_assets_list_cover ON assets(source, mtime DESC, id, filename, filepath, kind);
+CREATE INDEX IF NOT EXISTS idx_assets_scope_root_mtime ON assets(scope_root, mtime DESC, id);
+CREATE INDEX IF NOT EXISTS idx_assets_dir_path_mtime ON assets(dir_path, mtime DESC, id);
 
 CREATE INDEX IF NOT EXISTS idx_scan_journal_dir ON scan_journal(dir_path);
 CREATE INDEX IF NOT EXISTS idx_metadata_cache_state ON metadata_cache(state_hash);
@@ -176,22 +311,260 @@ CREATE TRIGGER IF NOT EXISTS assets_fts_update AFTER UPDATE ON assets BEGIN
     WHERE rowid = new.id;
 END;
 
+-- A changed (or cleared) phash drops the asset from the near-duplicate index; the
+-- duplicates service re-indexes it when the new hash is computed.
+CREATE TRIGGER IF NOT EXISTS assets_phash_index_invalidate AFTER UPDATE OF phash ON assets
+WHEN old.phash IS NOT new.phash BEGIN
+    DELETE FROM asset_phash_index WHERE asset_id = old.id;
+    DELETE FROM asset_phash_pairs WHERE left_id = old.id OR right_id = old.id;
+END;
+
+"""
+
+# Metadata FTS triggers. Both indexes are contentless, so a 'delete' must pass the
+# values that were indexed. Updates are scoped to the indexed columns and skipped
+# when they did not change: rating/flag/metadata_raw writes never touch FTS.
+METADATA_FTS_TRIGGERS = """
 CREATE TRIGGER IF NOT EXISTS asset_metadata_fts_insert AFTER INSERT ON asset_metadata BEGIN
-     INSERT INTO asset_metadata_fts(rowid, tags, tags_text, metadata_text)
-     VALUES (new.asset_id, COALESCE(new.tags, ''), COALESCE(new.tags_text, ''), COALESCE(new.metadata_text, ''));
+    INSERT INTO asset_metadata_fts(rowid, tags, tags_text)
+    VALUES (new.asset_id, COALESCE(new.tags, ''), COALESCE(new.tags_text, ''));
+    INSERT INTO asset_prompt_fts(rowid, metadata_text)
+    SELECT new.asset_id, new.metadata_text WHERE COALESCE(new.metadata_text, '') <> '';
 END;
 
 CREATE TRIGGER IF NOT EXISTS asset_metadata_fts_delete AFTER DELETE ON asset_metadata BEGIN
-    INSERT INTO asset_metadata_fts(asset_metadata_fts, rowid) VALUES('delete', old.asset_id);
+    INSERT INTO asset_metadata_fts(asset_metadata_fts, rowid, tags, tags_text)
+    VALUES ('delete', old.asset_id, COALESCE(old.tags, ''), COALESCE(old.tags_text, ''));
+    INSERT INTO asset_prompt_fts(asset_prompt_fts, rowid, metadata_text)
+    SELECT 'delete', old.asset_id, old.metadata_text WHERE COALESCE(old.metadata_text, '') <> '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_metadata_fts_update AFTER UPDATE OF tags, tags_text ON asset_metadata
+WHEN old.tags IS NOT new.tags OR old.tags_text IS NOT new.tags_text BEGIN
+    INSERT INTO asset_metadata_fts(asset_metadata_fts, rowid, tags, tags_text)
+    VALUES ('delete', old.asset_id, COALESCE(old.tags, ''), COALESCE(old.tags_text, ''));
+    INSERT INTO asset_metadata_fts(rowid, tags, tags_text)
+    VALUES (new.asset_id, COALESCE(new.tags, ''), COALESCE(new.tags_text, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_prompt_fts_update AFTER UPDATE OF metadata_text ON asset_metadata
+WHEN old.metadata_text IS NOT new.metadata_text BEGIN
+    INSERT INTO asset_prompt_fts(asset_prompt_fts, rowid, metadata_text)
+    SELECT 'delete', old.asset_id, old.metadata_text WHERE COALESCE(old.metadata_text, '') <> '';
+    INSERT INTO asset_prompt_fts(rowid, metadata_text)
+    SELECT new.asset_id, new.metadata_text WHERE COALESCE(new.metadata_text, '') <> '';
+END;
+"""
+
+INDEXES_AND_TRIGGERS += METADATA_FTS_TRIGGERS
+
+# asset_stats maintenance. The asset delete trigger runs BEFORE the delete so the
+# asset's metadata flags are still readable (the FK cascade removes them first);
+# the metadata delete trigger therefore only counts rows whose asset still exists.
+ASSET_STATS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS asset_stats_assets_insert AFTER INSERT ON assets BEGIN
+    INSERT INTO asset_stats(scope_root, kind, total, rated, with_workflow, with_generation_data)
+    SELECT COALESCE(new.scope_root, ''), new.kind, 1,
+           COALESCE(m.rating, 0) > 0, COALESCE(m.has_workflow, 0) = 1, COALESCE(m.has_generation_data, 0) = 1
+    FROM (SELECT 1) LEFT JOIN asset_metadata m ON m.asset_id = new.id
+    WHERE 1
+    ON CONFLICT(scope_root, kind) DO UPDATE SET
+        total = total + excluded.total,
+        rated = rated + excluded.rated,
+        with_workflow = with_workflow + excluded.with_workflow,
+        with_generation_data = with_generation_data + excluded.with_generation_data;
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_stats_assets_delete BEFORE DELETE ON assets BEGIN
+    UPDATE asset_stats SET
+        total = total - 1,
+        rated = rated - COALESCE((SELECT COALESCE(rating, 0) > 0 FROM asset_metadata WHERE asset_id = old.id), 0),
+        with_workflow = with_workflow - COALESCE((SELECT COALESCE(has_workflow, 0) = 1 FROM asset_metadata WHERE asset_id = old.id), 0),
+        with_generation_data = with_generation_data - COALESCE((SELECT COALESCE(has_generation_data, 0) = 1 FROM asset_metadata WHERE asset_id = old.id), 0)
+    WHERE scope_root = COALESCE(old.scope_root, '') AND kind = old.kind;
 END;
 
-CREATE TRIGGER IF NOT EXISTS asset_metadata_fts_update AFTER UPDATE ON asset_metadata BEGIN
-    INSERT INTO asset_metadata_fts(asset_metadata_fts, rowid) VALUES('delete', old.asset_id);
-     INSERT INTO asset_metadata_fts(rowid, tags, tags_text, metadata_text)
-     VALUES (new.asset_id, COALESCE(new.tags, ''), COALESCE(new.tags_text, ''), COALESCE(new.metadata_text, ''));
+CREATE TRIGGER IF NOT EXISTS asset_stats_assets_rekey AFTER UPDATE OF scope_root, kind ON assets
+WHEN COALESCE(old.scope_root, '') IS NOT COALESCE(new.scope_root, '')
+  OR old.kind IS NOT new.kind BEGIN
+    UPDATE asset_stats SET
+        total = total - 1,
+        rated = rated - COALESCE((SELECT COALESCE(rating, 0) > 0 FROM asset_metadata WHERE asset_id = old.id), 0),
+        with_workflow = with_workflow - COALESCE((SELECT COALESCE(has_workflow, 0) = 1 FROM asset_metadata WHERE asset_id = old.id), 0),
+        with_generation_data = with_generation_data - COALESCE((SELECT COALESCE(has_generation_data, 0) = 1 FROM asset_metadata WHERE asset_id = old.id), 0)
+    WHERE scope_root = COALESCE(old.scope_root, '') AND kind = old.kind;
+    INSERT INTO asset_stats(scope_root, kind, total, rated, with_workflow, with_generation_data)
+    SELECT COALESCE(new.scope_root, ''), new.kind, 1,
+           COALESCE(m.rating, 0) > 0, COALESCE(m.has_workflow, 0) = 1, COALESCE(m.has_generation_data, 0) = 1
+    FROM (SELECT 1) LEFT JOIN asset_metadata m ON m.asset_id = new.id
+    WHERE 1
+    ON CONFLICT(scope_root, kind) DO UPDATE SET
+        total = total + excluded.total,
+        rated = rated + excluded.rated,
+        with_workflow = with_workflow + excluded.with_workflow,
+        with_generation_data = with_generation_data + excluded.with_generation_data;
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_stats_metadata_insert AFTER INSERT ON asset_metadata
+WHEN COALESCE(new.rating, 0) > 0 OR COALESCE(new.has_workflow, 0) = 1 OR COALESCE(new.has_generation_data, 0) = 1 BEGIN
+    UPDATE asset_stats SET
+        rated = rated + (COALESCE(new.rating, 0) > 0),
+        with_workflow = with_workflow + (COALESCE(new.has_workflow, 0) = 1),
+        with_generation_data = with_generation_data + (COALESCE(new.has_generation_data, 0) = 1)
+    WHERE (scope_root, kind) = (SELECT COALESCE(scope_root, ''), kind FROM assets WHERE id = new.asset_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_stats_metadata_update AFTER UPDATE OF rating, has_workflow, has_generation_data ON asset_metadata
+WHEN (COALESCE(old.rating, 0) > 0) IS NOT (COALESCE(new.rating, 0) > 0)
+  OR (COALESCE(old.has_workflow, 0) = 1) IS NOT (COALESCE(new.has_workflow, 0) = 1)
+  OR (COALESCE(old.has_generation_data, 0) = 1) IS NOT (COALESCE(new.has_generation_data, 0) = 1) BEGIN
+    UPDATE asset_stats SET
+        rated = rated + (COALESCE(new.rating, 0) > 0) - (COALESCE(old.rating, 0) > 0),
+        with_workflow = with_workflow + (COALESCE(new.has_workflow, 0) = 1) - (COALESCE(old.has_workflow, 0) = 1),
+        with_generation_data = with_generation_data
+            + (COALESCE(new.has_generation_data, 0) = 1) - (COALESCE(old.has_generation_data, 0) = 1)
+    WHERE (scope_root, kind) = (SELECT COALESCE(scope_root, ''), kind FROM assets WHERE id = new.asset_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_stats_metadata_delete AFTER DELETE ON asset_metadata
+WHEN COALESCE(old.rating, 0) > 0 OR COALESCE(old.has_workflow, 0) = 1 OR COALESCE(old.has_generation_data, 0) = 1 BEGIN
+    UPDATE asset_stats SET
+        rated = rated - (COALESCE(old.rating, 0) > 0),
+        with_workflow = with_workflow - (COALESCE(old.has_workflow, 0) = 1),
+        with_generation_data = with_generation_data - (COALESCE(old.has_generation_data, 0) = 1)
+    WHERE (scope_root, kind) = (SELECT COALESCE(scope_root, ''), kind FROM assets WHERE id = old.asset_id);
 END;
 """
 
+INDEXES_AND_TRIGGERS += ASSET_STATS_TRIGGERS
+
+# strftime() is NULL for mtimes outside years 0000-9999; such rows have no calendar day
+# and are left out of the rollup rather than failing the assets write.
+ASSET_DAY_STATS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS asset_day_stats_insert AFTER INSERT ON assets
+WHEN strftime('%Y-%m-%d', new.mtime, 'unixepoch', 'localtime') IS NOT NULL BEGIN
+    INSERT INTO asset_day_stats(scope_root, kind, day, total)
+    VALUES (COALESCE(new.scope_root, ''), new.kind, strftime('%Y-%m-%d', new.mtime, 'unixepoch', 'localtime'), 1)
+    ON CONFLICT(scope_root, kind, day) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_day_stats_delete AFTER DELETE ON assets BEGIN
+    UPDATE asset_day_stats SET total = total - 1
+    WHERE scope_root = COALESCE(old.scope_root, '') AND kind = old.kind
+      AND day = strftime('%Y-%m-%d', old.mtime, 'unixepoch', 'localtime');
+END;
+
+CREATE TRIGGER IF NOT EXISTS asset_day_stats_update AFTER UPDATE OF mtime, scope_root, kind ON assets
+WHEN strftime('%Y-%m-%d', old.mtime, 'unixepoch', 'localtime') IS NOT strftime('%Y-%m-%d', new.mtime, 'unixepoch', 'localtime')
+  OR COALESCE(old.scope_root, '') IS NOT COALESCE(new.scope_root, '')
+  OR old.kind IS NOT new.kind BEGIN
+    UPDATE asset_day_stats SET total = total - 1
+    WHERE scope_root = COALESCE(old.scope_root, '') AND kind = old.kind
+      AND day = strftime('%Y-%m-%d', old.mtime, 'unixepoch', 'localtime');
+    INSERT INTO asset_day_stats(scope_root, kind, day, total)
+    SELECT COALESCE(new.scope_root, ''), new.kind, strftime('%Y-%m-%d', new.mtime, 'unixepoch', 'localtime'), 1
+    WHERE strftime('%Y-%m-%d', new.mtime, 'unixepoch', 'localtime') IS NOT NULL
+    ON CONFLICT(scope_root, kind, day) DO UPDATE SET total = total + 1;
+END;
+"""
+
+INDEXES_AND_TRIGGERS += ASSET_DAY_STATS_TRIGGERS
+
+# Timezone asset_day_stats was last built for; the rollup is only used while it matches.
+ASSET_DAY_STATS_TZ_KEY = "asset_day_stats_tz"
+
+
+def local_tz_fingerprint() -> str:
+    """Identify the process timezone (names and offsets, so DST rules changes count too)."""
+    return f"{'/'.join(time.tzname)}|{time.timezone}|{time.altzone}|{time.daylight}"
+
+
+async def asset_day_stats_rebuild_pending(db) -> bool:
+    """True when asset_day_stats was never built or was built for another timezone."""
+    result = await db.aquery("SELECT value FROM metadata WHERE key = ? LIMIT 1", (ASSET_DAY_STATS_TZ_KEY,))
+    current = (result.data[0] or {}).get("value") if result.ok and result.data else None
+    return current != local_tz_fingerprint()
+
+
+async def rebuild_asset_day_stats(db) -> Result[int]:
+    """
+    Rebuild asset_day_stats for the current timezone in one transaction.
+
+    Returns the number of day rows written.
+    """
+    try:
+        async with db.atransaction(mode="immediate") as tx:
+            if not tx.ok:
+                return Result.Err("DB_ERROR", tx.error or "Failed to begin transaction")
+            await db.aexecute("DELETE FROM asset_day_stats")
+            await db.aexecute(
+                """
+                INSERT INTO asset_day_stats(scope_root, kind, day, total)
+                SELECT COALESCE(scope_root, ''), kind, strftime('%Y-%m-%d', mtime, 'unixepoch', 'localtime'), COUNT(*)
+                FROM assets
+                WHERE strftime('%Y-%m-%d', mtime, 'unixepoch', 'localtime') IS NOT NULL
+                GROUP BY 1, 2, 3
+                """
+            )
+            await db.aexecute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                (ASSET_DAY_STATS_TZ_KEY, local_tz_fingerprint()),
+            )
+        if not tx.ok:
+            return Result.Err("DB_ERROR", tx.error or "Commit failed")
+    except Exception as exc:
+        logger.warning("Failed to rebuild asset_day_stats: %s", exc)
+        return Result.Err("DB_ERROR", str(exc))
+    count = await db.aquery("SELECT COUNT(*) AS n FROM asset_day_stats")
+    return Result.Ok(int(count.data[0]["n"]) if count.ok and count.data else 0)
+
+
+# Metadata key set once asset_stats has been rebuilt from the assets table; until then
+# counters are computed by scanning.
+ASSET_STATS_RECONCILED_KEY = "asset_stats_reconciled_at"
+
+
+async def asset_stats_reconcile_pending(db) -> bool:
+    """True when asset_stats has never been rebuilt from assets (e.g. DB created before v14)."""
+    result = await db.aquery("SELECT 1 FROM metadata WHERE key = ? LIMIT 1", (ASSET_STATS_RECONCILED_KEY,))
+    return not (result.ok and result.data)
+
+
+async def reconcile_asset_stats(db) -> Result[int]:
+    """
+    Rebuild asset_stats from assets/asset_metadata in one transaction.
+
+    Returns the number of counter rows written.
+    """
+    try:
+        async with db.atransaction(mode="immediate") as tx:
+            if not tx.ok:
+                return Result.Err("DB_ERROR", tx.error or "Failed to begin transaction")
+            await db.aexecute("DELETE FROM asset_stats")
+            await db.aexecute(
+                """
+                INSERT INTO asset_stats(scope_root, kind, total, rated, with_workflow, with_generation_data)
+                SELECT COALESCE(a.scope_root, ''), a.kind, COUNT(*),
+                       SUM(COALESCE(m.rating, 0) > 0),
+                       SUM(COALESCE(m.has_workflow, 0) = 1),
+                       SUM(COALESCE(m.has_generation_data, 0) = 1)
+                FROM assets a
+                LEFT JOIN asset_metadata m ON m.asset_id = a.id
+                GROUP BY 1, 2
+                """
+            )
+            await db.aexecute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, datetime('now'))",
+                (ASSET_STATS_RECONCILED_KEY,),
+            )
+        if not tx.ok:
+            return Result.Err("DB_ERROR", tx.error or "Commit failed")
+    except Exception as exc:
+        logger.warning("Failed to reconcile asset_stats: %s", exc)
+        return Result.Err("DB_ERROR", str(exc))
+    count = await db.aquery("SELECT COUNT(*) AS n FROM asset_stats")
+    return Result.Ok(int(count.data[0]["n"]) if count.ok and count.data else 0)
+
 _SAFE_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
 
@@ -202,7 +575,8 @@ def _is_safe_identifier(value: str) -> bool:
 async def _get_table_columns(db, table_name: str) -> Result[List[str]]:
     if not _is_safe_identifier(table_name):
         return Result.Err("INVALID_INPUT", f"Invalid table name: {table_name}")
-    result = await db.aquery(f"PRAGMA table_info('{table_name}')")
+    # table_xinfo also lists generated columns (e.g. assets.dir_path).
+    result = await db.aquery(f"PRAGMA table_xinfo('{table_name}')")
     if not result.ok:
         return Result.Err("PRAGMA_FAILED", f"Unable to inspect {table_name}: {result.error}")
     return Result.Ok([row["name"] for row in result.data or []])
@@ -266,6 +640,7 @@ async def ensure_tables_exist(db) -> Result[bool]:
 async def ensure_indexes_and_triggers(db) -> Result[bool]:
     """Ensure indexes/triggers exist and repair FTS metadata (best-effort)."""
     logger.info("Ensuring indexes/triggers exist...")
+    await _rekey_rollup_tables(db)
     result = await db.aexecutescript(INDEXES_AND_TRIGGERS)
     if not result.ok:
         logger.error("Failed to ensure indexes/triggers: %s", result.error)
@@ -281,6 +656,49 @@ async def ensure_indexes_and_triggers(db) -> Result[bool]:
     return result
 
 
+# Rollup tables once keyed by (source, root_id): their triggers and the metadata key
+# whose absence makes the table unused until rebuilt.
+_ROLLUP_REKEYS = (
+    (
+        "asset_stats",
+        (
+            "asset_stats_assets_insert",
+            "asset_stats_assets_delete",
+            "asset_stats_assets_rekey",
+            "asset_stats_metadata_insert",
+            "asset_stats_metadata_update",
+            "asset_stats_metadata_delete",
+        ),
+        ASSET_STATS_RECONCILED_KEY,
+    ),
+    (
+        "asset_day_stats",
+        ("asset_day_stats_insert", "asset_day_stats_delete", "asset_day_stats_update"),
+        ASSET_DAY_STATS_TZ_KEY,
+    ),
+)
+
+
+async def _rekey_rollup_tables(db) -> None:
+    """
+    Replace (source, root_id)-keyed rollup tables (before schema 17/18) and their triggers.
+
+    Each table is recreated empty and its marker cleared, so it stays unused until
+    `reconcile_asset_stats` / `rebuild_asset_day_stats` refill it.
+    """
+    for table, triggers, marker_key in _ROLLUP_REKEYS:
+        try:
+            if not await table_has_column(db, table, "source"):
+                continue
+            logger.info("Re-keying %s by scope_root", table)
+            drops = "".join(f"DROP TRIGGER IF EXISTS {name};\n" for name in triggers)
+            await db.aexecutescript(f"{drops}DROP TABLE IF EXISTS {table};")
+            await db.aexecute("DELETE FROM metadata WHERE key = ?", (marker_key,))
+            await db.aexecutescript(SCHEMA_V1)
+        except Exception as exc:
+            logger.debug("%s re-key skipped: %s", table, exc)
+
+
 async def _fts_has_column(db, table: str, col: str) -> bool:
     """Check if an FTS table has a specific column."""
     try:
@@ -292,13 +710,19 @@ async def _fts_has_column(db, table: str, col: str) -> bool:
         return False
 
 
-async def _repair_asset_metadata_fts(db) -> Result[bool]:
+async def _repair_asset_metadata_fts(db, force: bool = False) -> Result[bool]:
     """
-    Repair legacy/incorrect FTS definition for asset metadata.
+    Repair legacy/incorrect FTS definitions for asset metadata.
 
     Older versions used `content_rowid='asset_id'` on a contentless table, which can
-    break updates with errors like "no such column: T.asset_id".
-    Also check for missing `tags_text` column in existing FTS tables.
+    break updates with errors like "no such column: T.asset_id", and indexed
+    `metadata_text` in the same table as the tags. Also check for a missing
+    `tags_text` column and for unscoped update triggers (which re-indexed the row
+    on every asset_metadata write and left stale tokens behind).
+
+    Args:
+        db: Sqlite instance
+        force: Repopulate both indexes even when the definitions look current
     """
     try:
         table_row = await db.aquery("SELECT sql FROM sqlite_master WHERE type='table' AND name='asset_metadata_fts' LIMIT 1")
@@ -311,16 +735,17 @@ async def _repair_asset_metadata_fts(db) -> Result[bool]:
         trig_sql = ""
         if trig_row.ok and trig_row.data:
             trig_sql = str(trig_row.data[0].get("sql") or "")
-        trig_lower = trig_sql.lower()
+        trig_lower = " ".join(trig_sql.lower().split())
 
         needs_table_rebuild = ("content_rowid" in ddl_lower and "asset_id" in ddl_lower)
-        needs_trigger_rebuild = ("update asset_metadata_fts" in trig_lower)
+        needs_trigger_rebuild = ("update asset_metadata_fts" in trig_lower) or ("update of tags" not in trig_lower)
         missing_tags_text = not await _fts_has_column(db, "asset_metadata_fts", "tags_text")
+        legacy_metadata_text = await _fts_has_column(db, "asset_metadata_fts", "metadata_text")
 
-        if missing_tags_text:
+        if missing_tags_text or legacy_metadata_text:
             needs_table_rebuild = True
 
-        if not (needs_table_rebuild or needs_trigger_rebuild):
+        if not (force or needs_table_rebuild or needs_trigger_rebuild):
             return Result.Ok(True)
     except Exception:
         return Result.Ok(True)
@@ -331,17 +756,18 @@ async def _repair_asset_metadata_fts(db) -> Result[bool]:
         async with db.atransaction(mode="immediate") as tx:
             if not tx.ok:
                 return Result.Err("DB_ERROR", tx.error or "Failed to begin transaction")
+            await db.aexecutescript(
+                """
+                DROP TRIGGER IF EXISTS asset_metadata_fts_insert;
+                DROP TRIGGER IF EXISTS asset_metadata_fts_delete;
+                DROP TRIGGER IF EXISTS asset_metadata_fts_update;
+                DROP TRIGGER IF EXISTS asset_prompt_fts_update;
+                """
+            )
             if needs_table_rebuild:
                 await db.aexecutescript(
                     """
-                    DROP TRIGGER IF EXISTS asset_metadata_fts_insert;
-                    DROP TRIGGER IF EXISTS asset_metadata_fts_delete;
-                    DROP TRIGGER IF EXISTS asset_metadata_fts_update;
                     DROP TABLE IF EXISTS asset_metadata_fts;
-                    """
-                )
-                await db.aexecutescript(
-                    """
                     CREATE VIRTUAL TABLE IF NOT EXISTS asset_metadata_fts USING fts5(
                         tags,
                         tags_text,
@@ -349,40 +775,29 @@ async def _repair_asset_metadata_fts(db) -> Result[bool]:
                     );
                     """
                 )
-            else:
-                await db.aexecutescript(
-                    """
-                    DROP TRIGGER IF EXISTS asset_metadata_fts_insert;
-                    DROP TRIGGER IF EXISTS asset_metadata_fts_delete;
-                    DROP TRIGGER IF EXISTS asset_metadata_fts_update;
-                    """
-                )
-
             await db.aexecutescript(
                 """
-                CREATE TRIGGER IF NOT EXISTS asset_metadata_fts_insert AFTER INSERT ON asset_metadata BEGIN
-                    INSERT INTO asset_metadata_fts(rowid, tags, tags_text)
-                    VALUES (new.asset_id, COALESCE(new.tags, ''), COALESCE(new.tags_text, ''));
-                END;
-
-                CREATE TRIGGER IF NOT EXISTS asset_metadata_fts_delete AFTER DELETE ON asset_metadata BEGIN
-                    INSERT INTO asset_metadata_fts(asset_metadata_fts, rowid) VALUES('delete', old.asset_id);
-                END;
-
-                CREATE TRIGGER IF NOT EXISTS asset_metadata_fts_update AFTER UPDATE ON asset_metadata BEGIN
-                    INSERT INTO asset_metadata_fts(asset_metadata_fts, rowid) VALUES('delete', old.asset_id);
-                    INSERT INTO asset_metadata_fts(rowid, tags, tags_text)
-                    VALUES (new.asset_id, COALESCE(new.tags, ''), COALESCE(new.tags_text, ''));
-                END;
+                CREATE VIRTUAL TABLE IF NOT EXISTS asset_prompt_fts USING fts5(
+                    metadata_text,
+                    content=''
+                );
                 """
             )
+            await db.aexecutescript(METADATA_FTS_TRIGGERS)
 
+            # Contentless tables cannot be DELETEd from; 'delete-all' clears them.
             await db.aexecutescript(
                 """
-                DELETE FROM asset_metadata_fts;
+                INSERT INTO asset_metadata_fts(asset_metadata_fts) VALUES('delete-all');
                 INSERT INTO asset_metadata_fts(rowid, tags, tags_text)
                 SELECT asset_id, COALESCE(tags, ''), COALESCE(tags_text, '')
                 FROM asset_metadata;
+
+                INSERT INTO asset_prompt_fts(asset_prompt_fts) VALUES('delete-all');
+                INSERT INTO asset_prompt_fts(rowid, metadata_text)
+                SELECT asset_id, metadata_text
+                FROM asset_metadata
+                WHERE COALESCE(metadata_text, '') <> '';
                 """
             )
         if not tx.ok:
@@ -446,6 +861,19 @@ async def _ensure_schema(db) -> Result[bool]:
     if not result.ok:
         return result
 
+    # An empty index has nothing to reconcile: the triggers keep the rollups exact from here.
+    try:
+        if await asset_stats_reconcile_pending(db):
+            any_asset = await db.aquery("SELECT 1 FROM assets LIMIT 1")
+            if any_asset.ok and not any_asset.data:
+                await reconcile_asset_stats(db)
+        if await asset_day_stats_rebuild_pending(db):
+            any_asset = await db.aquery("SELECT 1 FROM assets LIMIT 1")
+            if any_asset.ok and not any_asset.data:
+                await rebuild_asset_day_stats(db)
+    except Exception as exc:
+        logger.debug("Rollup table initialization skipped: %s", exc)
+
     version_result = await db.aset_schema_version(CURRENT_SCHEMA_VERSION)
     if not version_result.ok:
         logger.error("Failed to set schema version: %s", version_result.error)
@@ -597,7 +1025,7 @@ async def rebuild_fts(db) -> Result[bool]:
         logger.error(f"Failed to rebuild assets_fts: {result.error}")
         return result
 
-    repair_result = await _repair_asset_metadata_fts(db)
+    repair_result = await _repair_asset_metadata_fts(db, force=True)
     if repair_result is not None and not repair_result.ok:
         logger.error(f"Failed to rebuild asset_metadata_fts: {repair_result.error}")
         return repair_result
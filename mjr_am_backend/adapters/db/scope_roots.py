@@ -0,0 +1,206 @@
+"""
+Scope root registry: equality-seekable "assets under root R" predicates.
+
+Every asset carries `scope_root`, the longest registered root its filepath is under
+('' when none, NULL when not stamped yet). Registered roots that contain a given
+path form a chain, so a file is under R exactly when its scope_root is R or a
+registered root nested under R. Scoped queries therefore become
+`scope_root IN (...)` seeks on idx_assets_scope_root_mtime instead of
+`filepath LIKE 'R/%'` scans.
+
+Roots are registered on first use (which restamps the assets under them through
+the filepath index) and never removed.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+
+from ...shared import Result, get_logger
+
+logger = get_logger(__name__)
+
+# Assets stamped per statement by `stamp_unscoped_assets`.
+STAMP_BATCH_SIZE = 5000
+
+
+def scope_root_sql(path_expr: str) -> str:
+    """SQL expression for the scope_root of `path_expr` (a column or `?`), '' when unscoped."""
+    return (
+        "COALESCE((SELECT r.root FROM scope_roots r"
+        f" WHERE substr({path_expr}, 1, length(r.prefix)) = r.prefix"
+        " ORDER BY length(r.root) DESC LIMIT 1), '')"
+    )
+
+
+def normalize_scope_root(root: Any) -> Optional[str]:
+    """Resolved root directory without trailing separator, or None when invalid."""
+    if not root:
+        return None
+    try:
+        return str(Path(str(root)).resolve(strict=False))
+    except (OSError, RuntimeError, ValueError):
+        return None
+
+
+def scope_root_prefix(root: str) -> str:
+    return root if root.endswith(os.sep) else root + os.sep
+
+
+def _is_under(candidate: str, root: str) -> bool:
+    return candidate == root or candidate.startswith(scope_root_prefix(root))
+
+
+def _escape_like_pattern(pattern: str) -> str:
+    return pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _normalize_all(roots: Iterable[Any]) -> List[str]:
+    out: List[str] = []
+    for root in roots or []:
+        key = normalize_scope_root(root)
+        if key and key not in out:
+            out.append(key)
+    return out
+
+
+async def _registry_state(db) -> Result[Tuple[List[str], bool]]:
+    """(registered roots, whether any asset is still unstamped) in one query."""
+    result = await db.aquery(
+        """
+        SELECT
+            (SELECT json_group_array(root) FROM scope_roots) AS roots,
+            EXISTS(SELECT 1 FROM assets WHERE scope_root IS NULL) AS unstamped
+        """
+    )
+    if not result.ok or not result.data:
+        return Result.Err("DB_ERROR", result.error or "Failed to read scope roots")
+    row = result.data[0] or {}
+    try:
+        registered = [str(r) for r in json.loads(row.get("roots") or "[]")]
+    except (TypeError, ValueError):
+        registered = []
+    return Result.Ok((registered, bool(row.get("unstamped"))))
+
+
+async def _register_missing(db, missing: List[str]) -> Result[int]:
+    try:
+        async with db.atransaction(mode="immediate") as tx:
+            if not tx.ok:
+                return Result.Err("DB_ERROR", tx.error or "Failed to begin transaction")
+            for root in missing:
+                prefix = scope_root_prefix(root)
+                await db.aexecute(
+                    "INSERT OR IGNORE INTO scope_roots (root, prefix) VALUES (?, ?)",
+                    (root, prefix),
+                )
+                # Files under `root` are a filepath index range; keep stamps of roots nested deeper.
+                await db.aexecute(
+                    """
+                    UPDATE assets SET scope_root = ?
+                    WHERE filepath >= ? AND filepath < ?
+                      AND (scope_root IS NULL OR length(scope_root) < ?)
+                    """,
+                    (root, prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1), len(root)),
+                )
+        if not tx.ok:
+            return Result.Err("DB_ERROR", tx.error or "Commit failed")
+    except Exception as exc:
+        logger.warning("Failed to register scope roots: %s", exc)
+        return Result.Err("DB_ERROR", str(exc))
+    logger.info("Registered scope roots: %s", ", ".join(missing))
+    return Result.Ok(len(missing))
+
+
+async def register_scope_roots(db, roots: Iterable[Any]) -> Result[int]:
+    """
+    Register `roots` and restamp the assets under them (idempotent).
+
+    Returns the number of roots that were not registered yet.
+    """
+    keys = _normalize_all(roots)
+    if not keys:
+        return Result.Ok(0)
+    state = await _registry_state(db)
+    if not state.ok or state.data is None:
+        return Result.Err(state.code or "DB_ERROR", state.error or "Failed to read scope roots")
+    registered = set(state.data[0])
+    missing = [k for k in keys if k not in registered]
+    if not missing:
+        return Result.Ok(0)
+    return await _register_missing(db, missing)
+
+
+async def stamp_unscoped_assets(db, batch_size: int = STAMP_BATCH_SIZE) -> Result[int]:
+    """
+    Stamp assets whose scope_root is still NULL (rows indexed before schema v16).
+
+    Works in batches so writers are not blocked for the whole backfill. Returns the
+    number of assets stamped.
+    """
+    batch_size = max(1, int(batch_size or STAMP_BATCH_SIZE))
+    total = 0
+    while True:
+        result = await db.aexecute(
+            f"""
+            UPDATE assets SET scope_root = {scope_root_sql("assets.filepath")}
+            WHERE id IN (SELECT id FROM assets WHERE scope_root IS NULL LIMIT ?)
+            """,
+            (batch_size,),
+        )
+        if not result.ok:
+            return Result.Err("DB_ERROR", result.error or "Failed to stamp scope roots")
+        changed = int(result.data or 0)
+        total += changed
+        if changed < batch_size:
+            return Result.Ok(total)
+
+
+async def scope_root_keys(db, roots: Iterable[Any]) -> Result[Tuple[List[str], bool]]:
+    """
+    (scope_root values of the assets at or under any of `roots`, whether unstamped rows exist).
+
+    Unregistered roots are registered first. While unstamped rows exist, matching on
+    these keys alone misses them (see `scope_roots_where`).
+    """
+    keys = _normalize_all(roots)
+    if not keys:
+        return Result.Err("INVALID_INPUT", "Missing or invalid roots")
+    state = await _registry_state(db)
+    if not state.ok or state.data is None:
+        return Result.Err(state.code or "DB_ERROR", state.error or "Failed to read scope roots")
+    registered, unstamped = state.data
+    missing = [k for k in keys if k not in registered]
+    if missing:
+        reg = await _register_missing(db, missing)
+        if not reg.ok:
+            return Result.Err(reg.code or "DB_ERROR", reg.error or "Failed to register scope roots")
+        registered = [*registered, *missing]
+    return Result.Ok((sorted({s for s in registered for k in keys if _is_under(s, k)}), unstamped))
+
+
+async def scope_roots_where(db, roots: Iterable[Any], alias: str = "a") -> Result[Tuple[str, List[Any]]]:
+    """
+    WHERE fragment matching the assets at or under any of `roots`.
+
+    Unregistered roots are registered first. Rows not stamped yet (written by code
+    that does not set scope_root) are matched by filepath prefix, and only when such
+    rows exist, so the common case is a plain index seek.
+    """
+    resolved = await scope_root_keys(db, roots)
+    if not resolved.ok or resolved.data is None:
+        return Result.Err(resolved.code or "DB_ERROR", resolved.error or "Failed to read scope roots")
+    scope_keys, unstamped = resolved.data
+    keys = _normalize_all(roots)
+    params: List[Any] = list(scope_keys)
+    if len(scope_keys) == 1:
+        clause = f"{alias}.scope_root = ?"
+    else:
+        clause = f"{alias}.scope_root IN ({', '.join('?' for _ in scope_keys)})"
+    if unstamped:
+        legacy = []
+        for key in keys:
+            legacy.append(f"{alias}.filepath = ? OR {alias}.filepath LIKE ? ESCAPE '\\'")
+            params.extend([key, _escape_like_pattern(scope_root_prefix(key)) + "%"])
+        clause = f"{clause} OR ({alias}.scope_root IS NULL AND ({' OR '.join(legacy)}))"
+    return Result.Ok((f"({clause})", params))
@@ -27,15 +27,27 @@ import time
 import uuid
 import os
 import json
+import weakref
+from collections import OrderedDict
 from contextlib import contextmanager, asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
 from queue import Empty, Queue
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 import aiosqlite
 import sqlite3
 
-from ...config import DB_MAX_CONNECTIONS, DB_QUERY_TIMEOUT, DB_TIMEOUT
+from ...config import (
+    DB_MAX_CONNECTIONS,
+    DB_QUERY_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_TIMEOUT,
+    DB_WRITE_BATCH_MAX,
+    DB_WRITE_BATCH_WINDOW_MS,
+    DB_WRITE_QUEUE_ENABLED,
+)
+from ...metrics import observe_db_query
 from ...shared import ErrorCode, Result, get_logger
 
 logger = get_logger(__name__)
@@ -47,6 +59,10 @@ ASSET_LOCKS_MAX = int(os.getenv("MAJOOR_ASSET_LOCKS_MAX", "10000") or 10000)
 ASSET_LOCKS_TTL_S = float(os.getenv("MAJOOR_ASSET_LOCKS_TTL_SECONDS", "600") or 600.0)
 
 _TX_TOKEN: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("mjr_db_tx_token", default=None)
+# Set inside the writer task so statements it issues itself (self-heal paths) never re-enter the queue.
+_IN_WRITER: contextvars.ContextVar[bool] = contextvars.ContextVar("mjr_db_in_writer", default=False)
+_GROUP_COMMIT_HEADS = frozenset({"INSERT", "UPDATE", "DELETE", "REPLACE"})
+_WRITER_STOP = object()
 _COLUMN_NAME_PATTERN = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z_][a-zA-Z0-9_]*)?$")
 _KNOWN_COLUMNS = {
     # assets
@@ -85,6 +101,8 @@ _KNOWN_COLUMNS = {
     "last_seen",
     # metadata_cache
     "metadata_hash",
+    # blobs
+    "hash",
     # common aliases
     "a.id",
     "a.filepath",
@@ -219,6 +237,154 @@ def _build_in_query(base_query: str, safe_column: str, value_count: int) -> Tupl
     return True, query, tuple(["?"] * n)
 
 
+def _probe_json_each() -> bool:
+    try:
+        with sqlite3.connect(":memory:") as conn:
+            conn.execute("SELECT value FROM json_each(?)", ("[1]",)).fetchall()
+        return True
+    except Exception:
+        return False
+
+
+# JSON1 is built into every SQLite >= 3.38; older builds fall back to expanded placeholders.
+_JSON_EACH_SUPPORTED = _probe_json_each()
+
+
+@lru_cache(maxsize=256)
+def _build_json_in_query(base_query: str, safe_column: str) -> str:
+    """
+    Build the `{IN_CLAUSE}` query binding every key through one JSON array parameter.
+
+    The SQL text only depends on the template, so each template maps to a single
+    cached prepared statement whatever the number of keys (and the variable limit
+    no longer applies).
+    """
+    before, after = str(base_query).split("{IN_CLAUSE}")
+    return f"{before}{safe_column} IN (SELECT value FROM json_each(?)){after}"
+
+
+def _encode_in_values(values: List[Any]) -> Optional[str]:
+    """JSON array of `values`, or None when one of them has no exact JSON form (e.g. bytes)."""
+    if not _JSON_EACH_SUPPORTED:
+        return None
+    for value in values:
+        if value is not None and not isinstance(value, (str, int, float)):
+            return None
+    try:
+        return json.dumps(list(values), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _prepare_in_query(
+    base_query: str, column: str, values: List[Any], additional_params: Optional[tuple]
+) -> Result[Tuple[str, tuple, bool]]:
+    """Validate an IN-clause template and return (query, params, bound_as_json)."""
+    if not isinstance(values, (list, tuple)):
+        return Result.Err(ErrorCode.INVALID_INPUT, "values must be a list or tuple")
+
+    ok_col, safe_col = _validate_and_repair_column_name(column)
+    if not ok_col or not safe_col:
+        return Result.Err(ErrorCode.INVALID_INPUT, f"Invalid column name: {column}")
+
+    ok_tpl, why = _validate_in_base_query(base_query)
+    if not ok_tpl:
+        return Result.Err(ErrorCode.INVALID_INPUT, why or "Invalid base_query template")
+
+    extra = tuple(additional_params) if additional_params else ()
+    encoded = _encode_in_values(list(values))
+    if encoded is not None:
+        return Result.Ok((_build_json_in_query(str(base_query), safe_col), (encoded, *extra), True))
+
+    ok_q, query_or_err, _ = _build_in_query(str(base_query), safe_col, len(values))
+    if not ok_q:
+        return Result.Err(ErrorCode.INVALID_INPUT, str(query_or_err))
+    return Result.Ok((query_or_err, (*values, *extra), False))
+
+
+# `fetch` value selecting lean RowSet results (any truthy `fetch` is a read).
+_FETCH_ROWS = "rows"
+
+
+@lru_cache(maxsize=512)
+def _column_index(columns: Tuple[str, ...]) -> Dict[str, int]:
+    return {name: i for i, name in enumerate(columns)}
+
+
+class RowSet:
+    """
+    Lean SELECT result: plain row tuples plus one column -> position index.
+
+    The index is shared by every row (and by every result with the same columns), so
+    it must not be mutated. Returned by `Sqlite.aquery_rows` for hot read paths that
+    build their own payloads instead of going through per-row dicts.
+    """
+
+    __slots__ = ("columns", "index", "rows")
+
+    def __init__(self, columns: Tuple[str, ...], rows: List[tuple]):
+        self.columns = tuple(columns)
+        self.index = _column_index(self.columns)
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def value(self, row: int, column: str, default: Any = None) -> Any:
+        pos = self.index.get(column)
+        return default if pos is None else self.rows[row][pos]
+
+    def dicts(self) -> List[Dict[str, Any]]:
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+
+class _StatementCacheStats:
+    """
+    Hit/miss counters for the sqlite3 per-connection statement cache.
+
+    sqlite3 does not expose its cache counters, so each statement run through the
+    adapter is replayed against a same-sized LRU (keyed by SQL text, like sqlite3's)
+    for the connection that ran it. Only touched from the DB loop thread.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(0, int(capacity))
+        self.hits = 0
+        self.misses = 0
+        self.in_json = 0
+        self.in_expanded = 0
+        self._lru: "weakref.WeakKeyDictionary[Any, OrderedDict[str, None]]" = weakref.WeakKeyDictionary()
+
+    def note(self, conn: Any, sql: str) -> None:
+        lru = self._lru.get(conn)
+        if lru is None:
+            lru = self._lru[conn] = OrderedDict()
+        if sql in lru:
+            lru.move_to_end(sql)
+            self.hits += 1
+            return
+        self.misses += 1
+        if self.capacity:
+            lru[sql] = None
+            if len(lru) > self.capacity:
+                lru.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "in_lookups_json": self.in_json,
+            "in_lookups_expanded": self.in_expanded,
+        }
+
+
 def _try_repair_column_name(column: str) -> Optional[str]:
     if not column or not isinstance(column, str):
         return None
@@ -340,6 +506,19 @@ class _AsyncLoopThread:
         self._thread_ident = None
 
 
+class _WriteOp:
+    """A queued autocommit write; `future` resolves once its batch is committed."""
+
+    __slots__ = ("query", "params", "many", "future", "enqueued")
+
+    def __init__(self, query: str, params: Any, many: bool, future: "asyncio.Future[Result[Any]]"):
+        self.query = query
+        self.params = params
+        self.many = many
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
 class Sqlite:
     """
     Connection pool manager for SQLite (aiosqlite-backed).
@@ -377,6 +556,17 @@ class Sqlite:
         # Transaction connections live on the loop thread; keyed by token.
         self._tx_conns: Dict[str, aiosqlite.Connection] = {}
 
+        # Single-writer queue (loop-thread objects, created lazily).
+        self._write_queue_enabled = bool(DB_WRITE_QUEUE_ENABLED)
+        self._write_batch_max = max(1, int(DB_WRITE_BATCH_MAX))
+        self._write_batch_window_s = max(0.0, float(DB_WRITE_BATCH_WINDOW_MS) / 1000.0)
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._writer_conn: Optional[aiosqlite.Connection] = None
+        self._writer_stats: Dict[str, int] = {"batches": 0, "ops": 0, "max_batch": 0, "retried_ops": 0}
+        self._statement_cache_size = max(0, int(DB_STATEMENT_CACHE_SIZE))
+        self._statement_stats = _StatementCacheStats(self._statement_cache_size)
+
         self._loop_thread = _AsyncLoopThread()
         self._write_lock: Optional[asyncio.Lock] = None
         self._tx_write_lock_tokens: set[str] = set()
@@ -669,6 +859,21 @@ class Sqlite:
             "max_connections": int(self._max_conn_limit),
             "query_timeout_s": float(self._query_timeout),
             "busy_timeout_ms": int(SQLITE_BUSY_TIMEOUT_MS),
+            "write_queue": self.get_write_queue_stats(),
+            "statement_cache": self._statement_stats.snapshot(),
+        }
+
+    def get_write_queue_stats(self) -> Dict[str, Any]:
+        """Return single-writer queue counters (batches committed, ops, largest batch, backlog)."""
+        queue = self._write_queue
+        try:
+            pending = int(queue.qsize()) if queue is not None else 0
+        except Exception:
+            pending = 0
+        return {
+            "enabled": bool(self._write_queue_enabled),
+            "pending": pending,
+            **{key: int(value) for key, value in self._writer_stats.items()},
         }
 
     async def _apply_connection_pragmas(self, conn: aiosqlite.Connection):
@@ -681,7 +886,12 @@ class Sqlite:
 
     async def _create_connection(self) -> aiosqlite.Connection:
         # Use autocommit mode; we manage transactions explicitly (BEGIN/COMMIT) when needed.
-        conn = await aiosqlite.connect(str(self.db_path), timeout=self._timeout, isolation_level=None)
+        conn = await aiosqlite.connect(
+            str(self.db_path),
+            timeout=self._timeout,
+            isolation_level=None,
+            cached_statements=self._statement_cache_size,
+        )
         conn.row_factory = sqlite3.Row
         await self._apply_connection_pragmas(conn)
         return conn
@@ -860,7 +1070,7 @@ class Sqlite:
         self,
         query: str,
         params: Optional[tuple],
-        fetch: bool,
+        fetch: bool | str,
         *,
         tx_token: Optional[str] = None,
     ) -> Result[Any]:
@@ -873,6 +1083,9 @@ class Sqlite:
                 return Result.Err(ErrorCode.DB_ERROR, "Transaction connection missing")
             return await self._execute_on_conn_async(conn, query, params, fetch, commit=False, tx_token=token)
 
+        if not fetch and self._use_write_queue(query):
+            return await self._submit_write(query, params, many=False)
+
         conn = await self._acquire_connection_async()
         try:
             res = await self._execute_on_conn_async(conn, query, params, fetch, commit=True, tx_token=None)
@@ -880,6 +1093,178 @@ class Sqlite:
         finally:
             await self._release_connection_async(conn)
 
+    # ------------------------------------------------------------------
+    # Single-writer queue (group commit)
+    # ------------------------------------------------------------------
+
+    def _use_write_queue(self, query: str) -> bool:
+        if not self._write_queue_enabled or _IN_WRITER.get():
+            return False
+        q = str(query or "").lstrip()
+        if not q:
+            return False
+        return q.split(None, 1)[0].upper() in _GROUP_COMMIT_HEADS
+
+    async def _submit_write(self, query: str, params: Any, *, many: bool) -> Result[Any]:
+        if self._resetting:
+            raise RuntimeError("Database is resetting - connection rejected")
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue()
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.get_running_loop().create_task(self._writer_loop())
+        fut: "asyncio.Future[Result[Any]]" = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait(_WriteOp(query, params, many, fut))
+        # A timeout cancels the future; the writer skips ops whose future is already done.
+        return await self._with_query_timeout(fut)
+
+    async def _writer_loop(self) -> None:
+        _IN_WRITER.set(True)
+        queue = self._write_queue
+        if queue is None:
+            return
+        stopping = False
+        try:
+            while not stopping:
+                first = await queue.get()
+                if first is _WRITER_STOP:
+                    break
+                batch: List[_WriteOp] = [first]
+                while len(batch) < self._write_batch_max:
+                    try:
+                        item = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is _WRITER_STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                # Only linger when writers are actually concurrent; a lone write commits at once.
+                if len(batch) > 1 and not stopping and self._write_batch_window_s > 0:
+                    deadline = time.monotonic() + self._write_batch_window_s
+                    while len(batch) < self._write_batch_max:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                        except asyncio.TimeoutError:
+                            break
+                        if item is _WRITER_STOP:
+                            stopping = True
+                            break
+                        batch.append(item)
+                try:
+                    await self._run_write_batch(batch)
+                except Exception as exc:
+                    logger.error("DB writer batch failed: %s", exc)
+                    for op in batch:
+                        if not op.future.done():
+                            op.future.set_result(Result.Err(ErrorCode.DB_ERROR, str(exc)))
+        finally:
+            conn, self._writer_conn = self._writer_conn, None
+            if conn is not None:
+                try:
+                    await conn.close()
+                except Exception:
+                    pass
+
+    async def _run_write_batch(self, batch: List[_WriteOp]) -> None:
+        ops = [op for op in batch if not op.future.done()]
+        if not ops:
+            return
+        if self._writer_conn is None:
+            self._writer_conn = await self._create_connection()
+        conn = self._writer_conn
+
+        done: List[Tuple[_WriteOp, Result[Any]]] = []
+        retry: List[_WriteOp] = []
+        lock = self._write_lock
+        if lock is None:
+            lock = self._write_lock = asyncio.Lock()
+        async with lock:
+            try:
+                for attempt in range(self._lock_retry_attempts + 1):
+                    try:
+                        await conn.execute("BEGIN IMMEDIATE")
+                        break
+                    except sqlite3.OperationalError as exc:
+                        if self._is_locked_error(exc) and attempt < self._lock_retry_attempts:
+                            await self._sleep_backoff(attempt)
+                            continue
+                        raise
+            except Exception as exc:
+                logger.debug("DB writer could not begin batch, running ops individually: %s", exc)
+                retry = ops
+            else:
+                for op in ops:
+                    # A savepoint per op keeps one bad statement from failing the whole batch.
+                    await conn.execute("SAVEPOINT mjr_write")
+                    try:
+                        if op.many:
+                            res = await self._executemany_on_conn_locked_async(conn, op.query, op.params, commit=False)
+                        else:
+                            res = await self._execute_on_conn_locked_async(conn, op.query, op.params, False, commit=False)
+                        await conn.execute("RELEASE mjr_write")
+                        done.append((op, res))
+                    except Exception:
+                        await conn.execute("ROLLBACK TO mjr_write")
+                        await conn.execute("RELEASE mjr_write")
+                        retry.append(op)
+                try:
+                    for attempt in range(self._lock_retry_attempts + 1):
+                        try:
+                            await conn.commit()
+                            break
+                        except sqlite3.OperationalError as exc:
+                            if self._is_locked_error(exc) and attempt < self._lock_retry_attempts:
+                                await self._sleep_backoff(attempt)
+                                continue
+                            raise
+                except Exception as exc:
+                    logger.warning("DB writer batch commit failed, retrying ops individually: %s", exc)
+                    try:
+                        await conn.rollback()
+                    except Exception:
+                        pass
+                    retry = ops
+                    done = []
+
+        self._writer_stats["batches"] += 1
+        self._writer_stats["ops"] += len(ops)
+        self._writer_stats["max_batch"] = max(self._writer_stats["max_batch"], len(ops))
+        # Batched ops are timed from enqueue to commit (queue wait included, like the
+        # write-lock wait on the direct path); replayed ops are timed by the direct path.
+        committed = time.perf_counter()
+        for op, res in done:
+            observe_db_query(op.query, committed - op.enqueued, res.ok)
+            if not op.future.done():
+                op.future.set_result(res)
+
+        # Failed statements were rolled back to their savepoint; replay them on their own
+        # so the regular error handling (self-heal, malformed recovery, Result codes) applies.
+        self._writer_stats["retried_ops"] += len(retry)
+        for op in retry:
+            if op.future.done():
+                continue
+            if op.many:
+                res = await self._executemany_on_conn_async(conn, op.query, op.params, commit=True, tx_token=None)
+            else:
+                res = await self._execute_on_conn_async(conn, op.query, op.params, False, commit=True, tx_token=None)
+            if not op.future.done():
+                op.future.set_result(res)
+
+    async def _stop_writer_async(self) -> None:
+        task, queue = self._writer_task, self._write_queue
+        self._writer_task = None
+        if task is None or task.done() or queue is None:
+            return
+        queue.put_nowait(_WRITER_STOP)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=max(5.0, float(self._timeout)))
+        except Exception as exc:
+            logger.warning("DB writer did not stop cleanly: %s", exc)
+            task.cancel()
+
     @staticmethod
     def _is_write_sql(query: str) -> bool:
         q = str(query or "").lstrip()
@@ -896,7 +1281,7 @@ class Sqlite:
         conn: aiosqlite.Connection,
         query: str,
         params: Optional[tuple],
-        fetch: bool,
+        fetch: bool | str,
         *,
         commit: bool,
         tx_token: Optional[str] = None,
@@ -967,22 +1352,32 @@ class Sqlite:
             except Exception as exc:
                 logger.error("Unexpected database error: %s", exc)
                 return Result.Err(ErrorCode.DB_ERROR, str(exc))
-        return await self._with_query_timeout(_execute_inner())
+        started = time.perf_counter()
+        result = await self._with_query_timeout(_execute_inner())
+        observe_db_query(query, time.perf_counter() - started, result.ok)
+        return result
 
     async def _execute_on_conn_locked_async(
         self,
         conn: aiosqlite.Connection,
         query: str,
         params: Optional[tuple],
-        fetch: bool,
+        fetch: bool | str,
         *,
         commit: bool,
     ) -> Result[Any]:
+        self._statement_stats.note(conn, query)
         try:
             for attempt in range(self._lock_retry_attempts + 1):
                 try:
                     cursor = await conn.execute(query, params or ())
                     try:
+                        if fetch == _FETCH_ROWS:
+                            cursor.row_factory = None
+                            rows = await cursor.fetchall()
+                            columns = tuple(d[0] for d in cursor.description or ())
+                            # aiosqlite types fetchall() as Iterable[Row]; it returns a list of tuples.
+                            return Result.Ok(RowSet(columns, cast(List[tuple], rows)))
                         if fetch:
                             rows = await cursor.fetchall()
                             return Result.Ok(self._rows_to_dicts(rows))
@@ -1032,6 +1427,12 @@ class Sqlite:
         """Execute a SELECT query and return rows (async)."""
         return await self.aexecute(sql, params, fetch=True)
 
+    async def aquery_rows(self, sql: str, params: Optional[tuple] = None) -> Result[RowSet]:
+        """Execute a SELECT query and return a lean `RowSet` (tuples + shared column index)."""
+        token = _TX_TOKEN.get()
+        fut = self._loop_thread.submit(self._execute_async(sql, params, _FETCH_ROWS, tx_token=token))
+        return await asyncio.wrap_future(fut)
+
     def query_in(
         self,
         base_query: str,
@@ -1042,32 +1443,18 @@ class Sqlite:
         """
         Execute a query with an IN clause safely.
 
-        `base_query` must contain the `{IN_CLAUSE}` placeholder, which will be replaced
-        with `<column> IN (?, ?, ...)` using parameter binding for values.
+        `base_query` must contain the `{IN_CLAUSE}` placeholder, which is replaced with
+        `<column> IN (SELECT value FROM json_each(?))` and the values bound as one JSON
+        array (one prepared statement per template, no variable limit). Values without
+        an exact JSON form fall back to `<column> IN (?, ?, ...)`.
         """
         if not values:
             return Result.Ok([])
-
-        if not isinstance(values, (list, tuple)):
-            return Result.Err(ErrorCode.INVALID_INPUT, "values must be a list or tuple")
-
-        ok_col, safe_col = _validate_and_repair_column_name(column)
-        if not ok_col or not safe_col:
-            return Result.Err(ErrorCode.INVALID_INPUT, f"Invalid column name: {column}")
-
-        ok_tpl, why = _validate_in_base_query(base_query)
-        if not ok_tpl:
-            return Result.Err(ErrorCode.INVALID_INPUT, why or "Invalid base_query template")
-
-        ok_q, query_or_err, _ = _build_in_query(str(base_query), safe_col, len(values))
-        if not ok_q:
-            return Result.Err(ErrorCode.INVALID_INPUT, str(query_or_err))
-        query = query_or_err
-
-        params = tuple(values)
-        if additional_params:
-            params = params + tuple(additional_params)
-
+        prepared = _prepare_in_query(base_query, column, values, additional_params)
+        if not prepared.ok or prepared.data is None:
+            return Result.Err(prepared.code or ErrorCode.INVALID_INPUT, prepared.error or "Invalid IN query")
+        query, params, as_json = prepared.data
+        self._note_in_lookup(as_json)
         return self.query(query, params)
 
     async def aquery_in(
@@ -1076,29 +1463,27 @@ class Sqlite:
         column: str,
         values: List[Any],
         additional_params: Optional[tuple] = None,
-    ) -> Result[List[Dict[str, Any]]]:
-        """Async variant of `query_in()` for IN-clause queries."""
+        *,
+        lean: bool = False,
+    ) -> Result[Any]:
+        """Async variant of `query_in()` for IN-clause queries (`lean=True` returns a `RowSet`)."""
         if not values:
-            return Result.Ok([])
-        if not isinstance(values, (list, tuple)):
-            return Result.Err(ErrorCode.INVALID_INPUT, "values must be a list or tuple")
-        ok_col, safe_col = _validate_and_repair_column_name(column)
-        if not ok_col or not safe_col:
-            return Result.Err(ErrorCode.INVALID_INPUT, f"Invalid column name: {column}")
-        ok_tpl, why = _validate_in_base_query(base_query)
-        if not ok_tpl:
-            return Result.Err(ErrorCode.INVALID_INPUT, why or "Invalid base_query template")
-
-        ok_q, query_or_err, _ = _build_in_query(str(base_query), safe_col, len(values))
-        if not ok_q:
-            return Result.Err(ErrorCode.INVALID_INPUT, str(query_or_err))
-        query = query_or_err
-
-        params = tuple(values)
-        if additional_params:
-            params = params + tuple(additional_params)
+            return Result.Ok(RowSet((), []) if lean else [])
+        prepared = _prepare_in_query(base_query, column, values, additional_params)
+        if not prepared.ok or prepared.data is None:
+            return Result.Err(prepared.code or ErrorCode.INVALID_INPUT, prepared.error or "Invalid IN query")
+        query, params, as_json = prepared.data
+        self._note_in_lookup(as_json)
+        if lean:
+            return await self.aquery_rows(query, params)
         return await self.aquery(query, params)
 
+    def _note_in_lookup(self, as_json: bool) -> None:
+        if as_json:
+            self._statement_stats.in_json += 1
+        else:
+            self._statement_stats.in_expanded += 1
+
     async def _executemany_async(
         self,
         query: str,
@@ -1114,6 +1499,9 @@ class Sqlite:
                 return Result.Err(ErrorCode.DB_ERROR, "Transaction connection missing")
             return await self._executemany_on_conn_async(conn, query, params_list, commit=False, tx_token=token)
 
+        if self._use_write_queue(query):
+            return await self._submit_write(query, list(params_list or []), many=True)
+
         conn = await self._acquire_connection_async()
         try:
             return await self._executemany_on_conn_async(conn, query, params_list, commit=True, tx_token=None)
@@ -1157,11 +1545,15 @@ class Sqlite:
             except Exception as exc:
                 logger.error("Batch execute error: %s", exc)
                 return Result.Err(ErrorCode.DB_ERROR, str(exc))
-        return await self._with_query_timeout(_execute_inner())
+        started = time.perf_counter()
+        result = await self._with_query_timeout(_execute_inner())
+        observe_db_query(query, time.perf_counter() - started, result.ok)
+        return result
 
     async def _executemany_on_conn_locked_async(
         self, conn: aiosqlite.Connection, query: str, params_list: List[Tuple], *, commit: bool
     ) -> Result[int]:
+        self._statement_stats.note(conn, query)
         try:
             for attempt in range(self._lock_retry_attempts + 1):
                 try:
@@ -1474,6 +1866,9 @@ class Sqlite:
     # implementation avoids subtle bugs (e.g. missing `_tx_local`).
 
     async def _close_all_async(self):
+        # 0. Let the writer commit what is queued, then close its connection.
+        await self._stop_writer_async()
+
         # 1. Close transaction connections first.
         tokens = list(self._tx_conns.keys())
         for token in tokens:
@@ -1665,7 +2060,19 @@ class Sqlite:
 
     @asynccontextmanager
     async def atransaction(self, mode: str = "immediate"):
-        """Async context manager for a DB transaction."""
+        """
+        Async context manager for a DB transaction.
+
+        Nested use (same task context) joins the enclosing transaction; the outermost
+        block commits or rolls back.
+        """
+        outer = _TX_TOKEN.get()
+        if outer:
+            with self._tx_state_lock:
+                joined = outer in self._tx_conns
+            if joined:
+                yield Result.Ok(True)
+                return
         tx_state = Result.Ok(True)
         begin_res = await self._begin_tx_for_async(mode)
         if not begin_res.ok or not begin_res.data:
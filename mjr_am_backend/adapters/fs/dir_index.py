@@ -0,0 +1,248 @@
+"""
+Compact in-memory index of one directory listing.
+
+Files are stored as parallel columns (names, sizes, mtimes, kind codes, interned
+extensions) kept newest first, with a precomputed name-order permutation. Filters
+and sorting work on the columns; asset dicts are only built for the page returned.
+"""
+from __future__ import annotations
+
+import bisect
+import os
+import stat
+import sys
+from array import array
+from typing import Any, Iterable, Mapping, MutableSequence, Optional, Sequence
+
+from mjr_am_backend.shared import classify_file
+
+KINDS: tuple[str, ...] = ("image", "video", "audio", "model3d")
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+# ext -> (interned ext, kind code or None when the extension is not listable)
+_EXT_CACHE: dict[str, tuple[str, Optional[int]]] = {}
+
+# Above this many changed names a patch re-sorts instead of inserting row by row.
+_PATCH_MAX_CHANGES = 64
+
+# Row tuple accepted by `DirIndex.from_rows`: (name, size, mtime)
+Row = tuple[str, int, int]
+
+
+def _ext_info(name: str) -> tuple[str, Optional[int]]:
+    dot = name.rfind(".")
+    ext = name[dot:].lower() if dot > 0 else ""
+    info = _EXT_CACHE.get(ext)
+    if info is None:
+        info = (sys.intern(ext), _KIND_CODES.get(classify_file(name)))
+        if len(_EXT_CACHE) < 4096:
+            _EXT_CACHE[info[0]] = info
+    return info
+
+
+def _record(name: str, size: int, mtime: int) -> Optional[tuple[Any, ...]]:
+    """Sortable build record (-mtime, folded name, name, size, ext, kind); None if not listable."""
+    ext, kind = _ext_info(name)
+    if kind is None:
+        return None
+    folded = name.lower()
+    # Most generated filenames are already lower case: share the string.
+    return (-int(mtime), name if folded == name else folded, name, int(size), ext, kind)
+
+
+def _find(names: list[str], name: str) -> int:
+    try:
+        return names.index(name)
+    except ValueError:
+        return -1
+
+
+class DirIndex:
+    """Columnar listing of the supported files of one directory (newest first)."""
+
+    __slots__ = ("dirpath", "names", "folded", "exts", "kinds", "sizes", "mtimes", "by_name")
+
+    def __init__(self, dirpath: str, records: Sequence[tuple[Any, ...]] = ()):
+        """`records` must already be sorted (see `from_rows`)."""
+        self.dirpath = dirpath
+        self.names: list[str] = [r[2] for r in records]
+        self.folded: list[str] = [r[1] for r in records]
+        self.exts: list[str] = [r[4] for r in records]
+        self.kinds = array("B", [r[5] for r in records])
+        self.sizes = array("q", [r[3] for r in records])
+        self.mtimes = array("q", [-r[0] for r in records])
+        self.by_name = array("L", [i for _f, _n, i in sorted(zip(self.folded, self.names, range(len(records))))])
+
+    @classmethod
+    def from_rows(cls, dirpath: str, rows: Iterable[Row]) -> "DirIndex":
+        records = [rec for rec in (_record(*row) for row in rows) if rec is not None]
+        records.sort()
+        return cls(dirpath, records)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def ordered(self, sort_key: str) -> Sequence[int]:
+        """Positions in the requested order (mtime_desc is the storage order)."""
+        n = len(self.names)
+        if sort_key == "mtime_asc":
+            return range(n - 1, -1, -1)
+        if sort_key == "name_asc":
+            return self.by_name
+        if sort_key == "name_desc":
+            return self.by_name[::-1]
+        return range(n)
+
+    def select(
+        self,
+        sort_key: str,
+        *,
+        kind: str = "",
+        extensions: Optional[Sequence[str]] = None,
+        query_lower: str = "",
+        mtime_start: Optional[int] = None,
+        mtime_end: Optional[int] = None,
+    ) -> Sequence[int]:
+        """Positions matching the column filters, in `sort_key` order."""
+        order = self.ordered(sort_key)
+        if not (kind or extensions or query_lower or mtime_start is not None or mtime_end is not None):
+            return order
+        kind_code = _KIND_CODES.get(kind, -1) if kind else None
+        ext_set = {e if e.startswith(".") else f".{e}" for e in extensions} if extensions else None
+        kinds, exts, folded, mtimes = self.kinds, self.exts, self.folded, self.mtimes
+        out = []
+        for i in order:
+            if kind_code is not None and kinds[i] != kind_code:
+                continue
+            if ext_set is not None and exts[i] and exts[i] not in ext_set:
+                continue
+            if query_lower and query_lower not in folded[i]:
+                continue
+            if mtime_start is not None and mtimes[i] < mtime_start:
+                continue
+            if mtime_end is not None and mtimes[i] >= mtime_end:
+                continue
+            out.append(i)
+        return out
+
+    def filepath(self, i: int) -> str:
+        return os.path.join(self.dirpath, self.names[i])
+
+    def entry(self, i: int, subfolder: str, asset_type: str, root_id: Optional[str]) -> dict[str, Any]:
+        return {
+            "id": None,
+            "filename": self.names[i],
+            "subfolder": subfolder,
+            "filepath": self.filepath(i),
+            "kind": KINDS[self.kinds[i]],
+            "ext": self.exts[i],
+            "size": self.sizes[i],
+            "mtime": self.mtimes[i],
+            "width": None,
+            "height": None,
+            "duration": None,
+            "rating": 0,
+            "tags": [],
+            "has_workflow": None,
+            "has_generation_data": None,
+            "type": asset_type,
+            "root_id": root_id,
+        }
+
+    def patched(self, changed: Mapping[str, Optional[tuple[int, int]]]) -> "DirIndex":
+        """
+        Return a new index with `changed` applied ({name: (size, mtime)}, or None when removed).
+
+        Columns are copied, changed rows deleted and re-inserted at their bisected
+        positions; unchanged files keep their relative order in both permutations, so
+        nothing is re-sorted. The current index is left untouched.
+        """
+        added = sorted(
+            rec
+            for rec in (_record(name, st[0], st[1]) for name, st in changed.items() if st is not None)
+            if rec is not None
+        )
+        if len(changed) > _PATCH_MAX_CHANGES:
+            kept = (
+                (-self.mtimes[i], self.folded[i], name, self.sizes[i], self.exts[i], self.kinds[i])
+                for i, name in enumerate(self.names)
+                if name not in changed
+            )
+            return DirIndex(self.dirpath, sorted([*kept, *added]))
+        removed = sorted(i for i in (_find(self.names, name) for name in changed) if i >= 0)
+
+        out = DirIndex(self.dirpath)
+        out.names, out.folded, out.exts = list(self.names), list(self.folded), list(self.exts)
+        out.kinds, out.sizes, out.mtimes = array("B", self.kinds), array("q", self.sizes), array("q", self.mtimes)
+        columns: tuple[MutableSequence[Any], ...] = (out.mtimes, out.folded, out.names, out.sizes, out.exts, out.kinds)
+        for i in reversed(removed):
+            for column in columns:
+                del column[i]
+
+        def _order_key(p: int) -> tuple[int, str, str]:
+            return (-out.mtimes[p], out.folded[p], out.names[p])
+
+        inserted: list[int] = []
+        for rec in added:
+            # `added` is sorted, so each insert lands after the previous one.
+            pos = bisect.bisect_left(range(len(out.names)), rec[:3], lo=inserted[-1] + 1 if inserted else 0, key=_order_key)
+            out.mtimes.insert(pos, -rec[0])
+            for column, value in zip(columns[1:], rec[1:]):
+                column.insert(pos, value)
+            inserted.append(pos)
+
+        # Old position -> new position (-1 when removed), built from contiguous runs.
+        remap = array("l")
+        new = 0
+        pending = iter(inserted)
+        next_insert = next(pending, None)
+        old = 0
+        for stop in removed + [len(self.names)]:
+            while old < stop:
+                while next_insert == new:
+                    new += 1
+                    next_insert = next(pending, None)
+                run = stop - old if next_insert is None else min(stop - old, next_insert - new)
+                remap.extend(range(new, new + run))
+                old += run
+                new += run
+            if stop < len(self.names):
+                remap.append(-1)
+                old = stop + 1
+        by_name = list(filter((-1).__ne__, map(remap.__getitem__, self.by_name)))
+        for pos in inserted:
+            bisect.insort(by_name, pos, key=lambda p: (out.folded[p], out.names[p]))
+        out.by_name = array("L", by_name)
+        return out
+
+
+def scan_dir_index(dirpath: str) -> DirIndex:
+    """List the supported files of one directory (follows symlinks, skips unreadable entries)."""
+    rows: list[Row] = []
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            if _ext_info(entry.name)[1] is None:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            rows.append((entry.name, st.st_size, int(st.st_mtime)))
+    return DirIndex.from_rows(dirpath, rows)
+
+
+def stat_dir_names(dirpath: str, names: Iterable[str]) -> dict[str, Optional[tuple[int, int]]]:
+    """Re-stat changed names: {name: (size, mtime), or None when gone / not a listable file}."""
+    out: dict[str, Optional[tuple[int, int]]] = {}
+    for name in names:
+        info = None
+        if _ext_info(name)[1] is not None:
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+                if stat.S_ISREG(st.st_mode):
+                    info = (st.st_size, int(st.st_mtime))
+            except OSError:
+                info = None
+        out[name] = info
+    return out
@@ -1,23 +1,49 @@
 ﻿"""
-Best-effort filesystem event watcher for invalidating directory listing caches.
+Best-effort filesystem event watcher for directory listing caches.
+
+Every event is stamped with a global sequence number and journaled against the
+directory it touches. A cached listing remembers the sequence it was built at;
+`get_fs_list_cache_changes` then returns just the file names that changed in that
+directory since, so the cache can re-stat those names instead of relisting.
+Events elsewhere in the tree leave the listing alone.
 
 Uses watchdog when available; must never raise to callers (anti-crash rule).
 """
 
 from __future__ import annotations
 
+import os
 import threading
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Deque, Dict, List, Optional, Tuple
 
+from mjr_am_backend.config import FS_LIST_CACHE_JOURNAL_MAX
 from mjr_am_backend.shared import get_logger
 
 logger = get_logger(__name__)
 
 _LOCK = threading.Lock()
 _OBSERVER = None
-_TOKENS: Dict[str, int] = {}
 _WATCHED: Dict[str, object] = {}
+_JOURNAL_DIRS_MAX = 4096
+
+_SEQ = 0
+# Listings built before this sequence cannot be patched (watch (re)started, journal evicted).
+_FLOOR = 0
+
+
+class _DirJournal:
+    __slots__ = ("events", "last_seq", "dropped_seq", "reset_seq")
+
+    def __init__(self) -> None:
+        self.events: Deque[Tuple[int, str]] = deque()
+        self.last_seq = 0
+        self.dropped_seq = 0
+        self.reset_seq = 0
+
+
+_JOURNALS: "OrderedDict[str, _DirJournal]" = OrderedDict()
 
 
 def _normalize_watch_path(path: str) -> Optional[str]:
@@ -29,29 +55,142 @@ def _normalize_watch_path(path: str) -> Optional[str]:
         return None
 
 
-def _bump(path_key: str) -> None:
+def _next_seq_locked() -> int:
+    global _SEQ
+    _SEQ += 1
+    return _SEQ
+
+
+def _journal_locked(directory: str) -> _DirJournal:
+    global _FLOOR
+    journal = _JOURNALS.get(directory)
+    if journal is None:
+        journal = _DirJournal()
+        _JOURNALS[directory] = journal
+        while len(_JOURNALS) > _JOURNAL_DIRS_MAX:
+            _, evicted = _JOURNALS.popitem(last=False)
+            _FLOOR = max(_FLOOR, evicted.last_seq + 1)
+    else:
+        _JOURNALS.move_to_end(directory)
+    return journal
+
+
+def _record_file_locked(path: str) -> None:
+    directory, name = os.path.split(path)
+    if not directory or not name:
+        return
+    seq = _next_seq_locked()
+    journal = _journal_locked(directory)
+    journal.events.append((seq, name))
+    journal.last_seq = seq
+    while len(journal.events) > int(FS_LIST_CACHE_JOURNAL_MAX):
+        dropped, _ = journal.events.popleft()
+        journal.dropped_seq = dropped
+
+
+def _record_dir_reset_locked(path: str) -> None:
+    """A directory appeared, vanished or moved: listings of it (and below it) must be rebuilt."""
+    seq = _next_seq_locked()
+    prefix = path.rstrip(os.sep) + os.sep
+    for directory, journal in _JOURNALS.items():
+        if directory == path or directory.startswith(prefix):
+            journal.reset_seq = seq
+            journal.last_seq = seq
+    journal = _journal_locked(path)
+    journal.reset_seq = seq
+    journal.last_seq = seq
+
+
+def _record_event(event) -> None:
+    """Journal one watchdog event (called from the observer thread)."""
     try:
+        src = str(getattr(event, "src_path", "") or "")
+        dest = str(getattr(event, "dest_path", "") or "")
+        event_type = str(getattr(event, "event_type", "") or "")
         with _LOCK:
-            _TOKENS[path_key] = int(_TOKENS.get(path_key, 0)) + 1
+            if getattr(event, "is_directory", False):
+                # Parent "modified" events just echo child changes already journaled.
+                if event_type in ("created", "deleted", "moved"):
+                    _record_dir_reset_locked(src)
+                    if dest:
+                        _record_dir_reset_locked(dest)
+                return
+            if src:
+                _record_file_locked(src)
+            if dest:
+                _record_file_locked(dest)
     except Exception:
         return
 
 
+def get_fs_list_cache_seq() -> int:
+    """Current event sequence; snapshot it before listing a directory."""
+    with _LOCK:
+        return int(_SEQ)
+
+
 def get_fs_list_cache_token(path: str) -> int:
     """
-    Returns a monotonically increasing token for the watched root directory.
-    If the directory is not watched, returns 0.
+    Returns the sequence of the last event seen for files directly in `path`.
+    If nothing was journaled for the directory, returns 0.
     """
     key = _normalize_watch_path(path)
     if not key:
         return 0
     try:
         with _LOCK:
-            return int(_TOKENS.get(key, 0))
+            journal = _JOURNALS.get(key)
+            return int(journal.last_seq) if journal is not None else 0
     except Exception:
         return 0
 
 
+def get_fs_list_cache_changes(path: str, since: int) -> Optional[List[str]]:
+    """
+    Return names of files in `path` touched by events after sequence `since`.
+
+    Returns None when the listing cannot be patched (journal overflowed or was evicted,
+    the directory itself changed, or `path` was not watched at that point).
+    """
+    key = _normalize_watch_path(path)
+    if not key:
+        return None
+    try:
+        since = int(since)
+        with _LOCK:
+            if since < _FLOOR or not _is_watched_locked(key):
+                return None
+            journal = _JOURNALS.get(key)
+            if journal is None:
+                return []
+            if journal.reset_seq > since or journal.dropped_seq > since:
+                return None
+            return list(dict.fromkeys(name for seq, name in journal.events if seq > since))
+    except Exception:
+        return None
+
+
+def _is_watched_locked(key: str) -> bool:
+    if _OBSERVER is None:
+        return False
+    for root in _WATCHED:
+        if key == root or key.startswith(root.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+
+def is_fs_list_cache_watched(path: str) -> bool:
+    """True when events for `path` are being journaled."""
+    key = _normalize_watch_path(path)
+    if not key:
+        return False
+    try:
+        with _LOCK:
+            return _is_watched_locked(key)
+    except Exception:
+        return False
+
+
 def ensure_fs_list_cache_watching(path: str) -> None:
     """
     Ensure watchdog observer is running and watching `path` recursively.
@@ -70,7 +209,7 @@ def ensure_fs_list_cache_watching(path: str) -> None:
 
     try:
         with _LOCK:
-            global _OBSERVER
+            global _OBSERVER, _FLOOR
             if _OBSERVER is None:
                 obs = Observer()
                 try:
@@ -89,10 +228,7 @@ def ensure_fs_list_cache_watching(path: str) -> None:
 
             class _Handler(FileSystemEventHandler):
                 def on_any_event(self, event):  # type: ignore[override]
-                    try:
-                        _bump(key)
-                    except Exception:
-                        return
+                    _record_event(event)
 
             handler = _Handler()
             try:
@@ -102,7 +238,8 @@ def ensure_fs_list_cache_watching(path: str) -> None:
                 return
 
             _WATCHED[key] = watch
-            _TOKENS.setdefault(key, 0)
+            # Listings taken before the watch started may have missed events.
+            _FLOOR = _next_seq_locked()
     except Exception:
         return
 
@@ -114,11 +251,12 @@ def stop_global_fs_list_cache_watcher() -> None:
     """
     try:
         with _LOCK:
-            global _OBSERVER
+            global _OBSERVER, _FLOOR
             obs = _OBSERVER
             _OBSERVER = None
             _WATCHED.clear()
-            _TOKENS.clear()
+            _JOURNALS.clear()
+            _FLOOR = _next_seq_locked()
     except Exception:
         obs = None
 
@@ -133,5 +271,3 @@ def stop_global_fs_list_cache_watcher() -> None:
         obs.join(timeout=2.0)
     except Exception:
         pass
-
-
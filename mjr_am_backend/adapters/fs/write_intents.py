@@ -0,0 +1,115 @@
+"""
+Registry of the app's own file writes (rating/tags sync into file metadata).
+
+A writer announces files with `begin_writes` and, once done, `end_writes` records
+each file's post-write (mtime_ns, size). The index watcher defers files with a
+write in flight and skips files whose stat still matches their recorded write;
+the scanner recognises them the same way and only refreshes their scan_journal
+state hash and the asset's size/mtime instead of re-extracting metadata.
+
+A later change by anything else alters the stat, so it is indexed as usual.
+Process-local and best-effort: must never raise to callers (anti-crash rule).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mjr_am_backend.shared import get_logger
+
+logger = get_logger(__name__)
+
+# Recorded writes are forgotten after this long (the next scan then re-indexes the file).
+_EXPECTED_TTL_S = 6 * 3600.0
+_EXPECTED_MAX = 20_000
+
+_LOCK = threading.Lock()
+_IN_FLIGHT: Dict[str, int] = {}
+# path key -> (mtime_ns, size, recorded_at), oldest first
+_EXPECTED: "OrderedDict[str, Tuple[int, int, float]]" = OrderedDict()
+
+
+def _key(path: str) -> str:
+    try:
+        return os.path.normcase(os.path.normpath(str(path)))
+    except Exception:
+        return str(path or "")
+
+
+def begin_writes(paths: Iterable[str]) -> None:
+    """Mark `paths` as being written by the app."""
+    try:
+        with _LOCK:
+            for path in paths:
+                key = _key(path)
+                _IN_FLIGHT[key] = _IN_FLIGHT.get(key, 0) + 1
+                _EXPECTED.pop(key, None)
+    except Exception as exc:
+        logger.debug("begin_writes failed: %s", exc)
+
+
+def end_writes(paths: Iterable[str]) -> None:
+    """Record the post-write stat of `paths` (call once per `begin_writes`, even on failure)."""
+    try:
+        stats: List[Tuple[str, Optional[Tuple[int, int]]]] = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stats.append((_key(path), (int(st.st_mtime_ns), int(st.st_size))))
+            except OSError:
+                stats.append((_key(path), None))
+        now = time.monotonic()
+        with _LOCK:
+            for key, stat in stats:
+                count = _IN_FLIGHT.get(key, 0) - 1
+                if count > 0:
+                    _IN_FLIGHT[key] = count
+                else:
+                    _IN_FLIGHT.pop(key, None)
+                if stat is None:
+                    _EXPECTED.pop(key, None)
+                    continue
+                _EXPECTED[key] = (stat[0], stat[1], now)
+                _EXPECTED.move_to_end(key)
+            while len(_EXPECTED) > _EXPECTED_MAX:
+                _EXPECTED.popitem(last=False)
+    except Exception as exc:
+        logger.debug("end_writes failed: %s", exc)
+
+
+def is_write_in_flight(path: str) -> bool:
+    try:
+        with _LOCK:
+            return _key(path) in _IN_FLIGHT
+    except Exception:
+        return False
+
+
+def matches_self_write(path: str, mtime_ns: int, size: int, *, consume: bool = False) -> bool:
+    """
+    True if the file's (mtime_ns, size) is exactly what the app's last write left.
+
+    With `consume`, a match is forgotten; callers consume only after the scan journal
+    update has committed, from then on the journal itself recognises the file.
+    """
+    try:
+        key = _key(path)
+        with _LOCK:
+            expected = _EXPECTED.get(key)
+            if expected is None:
+                return False
+            if time.monotonic() - expected[2] > _EXPECTED_TTL_S:
+                _EXPECTED.pop(key, None)
+                return False
+            if (expected[0], expected[1]) != (int(mtime_ns), int(size)):
+                return False
+            if consume:
+                _EXPECTED.pop(key, None)
+            return True
+    except Exception:
+        return False
+
@@ -3,14 +3,19 @@ ExifTool adapter for reading and writing metadata.
 """
 import os
 import asyncio
+import atexit
 import subprocess
 import json
 import shutil
 import re
+import threading
+import time
+from queue import Empty, Queue
 from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 
-from ...config import EXIFTOOL_TIMEOUT
+from ...config import EXIFTOOL_TIMEOUT, EXIFTOOL_POOL_SIZE
+from ...metrics import timed_tool
 from ...shared import Result, ErrorCode, get_logger
 
 logger = get_logger(__name__)
@@ -159,6 +164,333 @@ def _build_match_map(valid_paths: List[str]) -> Tuple[Dict[str, List[str]], List
     return key_to_paths, cmd_paths
 
 
+def _is_argfile_safe(value: str) -> bool:
+    """
+    Return True if `value` can be passed as a single `-@` argfile line unchanged.
+
+    ExifTool strips leading whitespace and skips blank/comment lines in argfiles,
+    so such values must go through argv instead.
+    """
+    s = str(value or "")
+    if not s or "\x00" in s or "\n" in s or "\r" in s:
+        return False
+    if s != s.strip() or s.startswith("#"):
+        return False
+    return True
+
+
+def _build_write_args(metadata: Optional[dict], preserve_workflow: bool) -> Result[List[str]]:
+    """
+    Build the tag-assignment arguments of one write (everything but options and the path).
+
+    - Scalars: `-Tag=Value`
+    - Lists: clear then append (`-Tag=` then `-Tag+=Item`)
+    This matches ExifTool's array semantics (XMP arrays, IPTC keyword lists, etc.).
+    """
+    invalid_keys: List[str] = []
+    for key in (metadata or {}).keys():
+        if not isinstance(key, str):
+            invalid_keys.append(str(key))
+            continue
+        if not _is_safe_exiftool_tag(key.strip()):
+            invalid_keys.append(key.strip())
+    if invalid_keys:
+        return Result.Err(
+            ErrorCode.INVALID_INPUT,
+            "Invalid ExifTool tag format",
+            invalid_tags=invalid_keys,
+        )
+
+    # Preserve existing metadata if requested
+    args: List[str] = ["-tagsFromFile", "@"] if preserve_workflow else []
+    for key, value in (metadata or {}).items():
+        if value is None:
+            args.append(f"-{key}=")
+            continue
+        if isinstance(value, list):
+            args.append(f"-{key}=")
+            for item in value:
+                if item is None:
+                    continue
+                text = str(item).strip()
+                if text:
+                    args.append(f"-{key}+={text}")
+            continue
+        args.append(f"-{key}={value}")
+    return Result.Ok(args)
+
+
+def _take_until(buf: bytearray, marker: bytes) -> Optional[Tuple[bytes, bytes]]:
+    """Pop everything before `marker` plus the rest of the marker line from `buf`."""
+    idx = buf.find(marker)
+    if idx < 0:
+        return None
+    line_end = buf.find(b"\n", idx)
+    if line_end < 0:
+        return None
+    head = bytes(buf[:idx])
+    tail = bytes(buf[idx + len(marker):line_end]).strip()
+    del buf[: line_end + 1]
+    return head, tail
+
+
+def _split_batch_output(stdout: bytes, stderr: bytes, markers: List[bytes]) -> List[Optional[Tuple[bytes, int]]]:
+    """
+    Split the output of a multi-command (`-execute`) run per command.
+
+    Each command echoes its marker to stdout (`-echo3`) and its marker plus
+    `${status}` to stderr (`-echo4`) once processed. Returns (stderr, returncode)
+    per command, or None for commands that never completed.
+    """
+    out_buf, err_buf = bytearray(stdout or b""), bytearray(stderr or b"")
+    parts: List[Optional[Tuple[bytes, int]]] = []
+    for marker in markers:
+        out_part = _take_until(out_buf, marker)
+        err_part = _take_until(err_buf, marker)
+        if out_part is None or err_part is None:
+            parts.append(None)
+            continue
+        try:
+            returncode = int(err_part[1].decode("ascii", errors="strict"))
+        except Exception:
+            # ExifTool builds without `${status}` support echo it literally: infer it.
+            returncode = 1 if b"error" in err_part[0].lower() else 0
+        parts.append((err_part[0], returncode))
+    return parts
+
+
+class _WorkerDied(RuntimeError):
+    """Raised when a stay_open worker exits before answering a request."""
+
+
+class _StayOpenWorker:
+    """
+    One long-lived `exiftool -stay_open True -@ -` process.
+
+    Requests are written as argfile lines terminated by `-execute{N}`; ExifTool prints
+    `{readyN}` on stdout when done, and `-echo4` puts the same sentinel (plus the exit
+    status) on stderr so both streams can be split per request.
+    """
+
+    def __init__(self, bin_path: str):
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._out = bytearray()
+        self._err = bytearray()
+        self._eof = False
+        self.proc = subprocess.Popen(
+            [bin_path, "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=False,
+            close_fds=os.name != "nt",
+        )
+        for stream, buf in ((self.proc.stdout, self._out), (self.proc.stderr, self._err)):
+            t = threading.Thread(target=self._pump, args=(stream, buf), daemon=True, name="mjr-exiftool-pump")
+            t.start()
+
+    def _pump(self, stream, buf: bytearray) -> None:
+        try:
+            while True:
+                chunk = stream.read1(65536) if hasattr(stream, "read1") else stream.read(65536)
+                if not chunk:
+                    break
+                with self._cond:
+                    buf.extend(chunk)
+                    self._cond.notify_all()
+        except Exception:
+            pass
+        finally:
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+
+    def is_alive(self) -> bool:
+        return not self._eof and self.proc.poll() is None
+
+    def execute(self, args: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """
+        Run one ExifTool command on this worker.
+
+        Raises `subprocess.TimeoutExpired` on timeout and `_WorkerDied` if the process
+        exits mid-request; the caller must discard the worker in both cases.
+        """
+        self._seq += 1
+        seq = self._seq
+        marker = f"{{ready{seq}}}".encode("ascii")
+        lines = list(args) + ["-echo4", f"{{ready{seq}}}${{status}}", f"-execute{seq}"]
+        payload = ("\n".join(lines) + "\n").encode("utf-8", errors="replace")
+        try:
+            assert self.proc.stdin is not None
+            self.proc.stdin.write(payload)
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as exc:
+            raise _WorkerDied(str(exc)) from exc
+
+        deadline = time.monotonic() + max(0.1, float(timeout))
+        out_part: Optional[Tuple[bytes, bytes]] = None
+        err_part: Optional[Tuple[bytes, bytes]] = None
+        with self._cond:
+            while True:
+                if out_part is None:
+                    out_part = _take_until(self._out, marker)
+                if err_part is None:
+                    err_part = _take_until(self._err, marker)
+                if out_part is not None and err_part is not None:
+                    break
+                if self._eof:
+                    raise _WorkerDied("ExifTool worker exited")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(cmd="exiftool -stay_open", timeout=timeout)
+                self._cond.wait(remaining)
+
+        stdout = out_part[0]
+        stderr = err_part[0]
+        try:
+            returncode = int(err_part[1].decode("ascii", errors="strict"))
+        except Exception:
+            # ExifTool builds without `${status}` support echo it literally: infer it.
+            returncode = 0 if stdout.strip() or not stderr.strip() else 1
+        return subprocess.CompletedProcess(args=args, returncode=returncode, stdout=stdout, stderr=stderr)
+
+    def close(self, graceful: bool = True) -> None:
+        try:
+            if graceful and self.proc.poll() is None and self.proc.stdin is not None:
+                self.proc.stdin.write(b"-stay_open\nFalse\n")
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=2.0)
+        except Exception:
+            pass
+        try:
+            if self.proc.poll() is None:
+                self.proc.kill()
+                self.proc.wait(timeout=2.0)
+        except Exception:
+            pass
+        for stream in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            try:
+                if stream is not None:
+                    stream.close()
+            except Exception:
+                pass
+
+
+class ExifToolPool:
+    """
+    Bounded pool of persistent ExifTool workers.
+
+    Workers are started lazily, replaced when they crash, and killed/restarted when a
+    request exceeds its timeout. Thread-safe; callers block while all workers are busy.
+    """
+
+    def __init__(self, bin_path: str, size: int):
+        self.bin = bin_path
+        self.size = max(1, int(size))
+        self._slots: "Queue[List[Any]]" = Queue()
+        for _ in range(self.size):
+            self._slots.put([None, False])
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._stats: Dict[str, Any] = {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "spawned": 0,
+            "restarts": 0,
+            "busy": 0,
+            "total_ms": 0.0,
+        }
+        self._all: List[_StayOpenWorker] = []
+
+    def _bump(self, key: str, amount: Any = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] = self._stats.get(key, 0) + amount
+
+    def _spawn(self, replacing: bool) -> _StayOpenWorker:
+        worker = _StayOpenWorker(self.bin)
+        with self._stats_lock:
+            self._stats["spawned"] += 1
+            if replacing:
+                self._stats["restarts"] += 1
+            self._all = [w for w in self._all if w.is_alive()] + [worker]
+        return worker
+
+    def execute(self, args: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """
+        Execute one command on an idle worker.
+
+        Raises `subprocess.TimeoutExpired` on timeout, `_WorkerDied` if the worker died
+        twice in a row, and `OSError` if ExifTool cannot be started.
+        """
+        if self._closed:
+            raise _WorkerDied("ExifTool pool is closed")
+        wait_deadline = time.monotonic() + max(1.0, float(timeout))
+        try:
+            slot = self._slots.get(timeout=max(0.1, wait_deadline - time.monotonic()))
+        except Empty:
+            self._bump("timeouts")
+            raise subprocess.TimeoutExpired(cmd="exiftool -stay_open (pool busy)", timeout=timeout)
+
+        self._bump("busy")
+        started = time.perf_counter()
+        try:
+            for attempt in range(2):
+                worker = slot[0]
+                if worker is None or not worker.is_alive():
+                    if worker is not None:
+                        worker.close(graceful=False)
+                    slot[0] = None
+                    # slot[1] records that this slot already ran a worker (restart vs first start).
+                    worker = self._spawn(replacing=bool(slot[1]))
+                    slot[0] = worker
+                    slot[1] = True
+                try:
+                    result = worker.execute(args, timeout)
+                    self._bump("requests")
+                    return result
+                except subprocess.TimeoutExpired:
+                    # A hung worker cannot be resynchronized: kill it, the slot respawns lazily.
+                    self._bump("timeouts")
+                    worker.close(graceful=False)
+                    slot[0] = None
+                    raise
+                except _WorkerDied:
+                    self._bump("errors")
+                    worker.close(graceful=False)
+                    slot[0] = None
+                    if attempt == 0:
+                        continue
+                    raise
+            raise _WorkerDied("ExifTool worker unavailable")
+        finally:
+            self._bump("busy", -1)
+            self._bump("total_ms", (time.perf_counter() - started) * 1000.0)
+            self._slots.put(slot)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            alive = sum(1 for w in self._all if w.is_alive())
+        requests = int(stats.get("requests") or 0)
+        total_ms = float(stats.pop("total_ms", 0.0) or 0.0)
+        stats["avg_ms"] = round(total_ms / requests, 2) if requests else 0.0
+        stats["size"] = self.size
+        stats["alive"] = alive
+        stats["closed"] = self._closed
+        return stats
+
+    def close(self) -> None:
+        """Stop all workers (idempotent)."""
+        self._closed = True
+        with self._stats_lock:
+            workers = list(self._all)
+            self._all = []
+        for worker in workers:
+            worker.close(graceful=True)
+
+
 class ExifTool:
     """
     ExifTool wrapper for metadata operations.
@@ -166,17 +498,28 @@ class ExifTool:
     Never raises exceptions - always returns Result.
     """
 
-    def __init__(self, bin_name: str = "exiftool", timeout: Optional[float] = None):
+    def __init__(
+        self,
+        bin_name: str = "exiftool",
+        timeout: Optional[float] = None,
+        pool_size: Optional[int] = None,
+    ):
         """
         Initialize ExifTool adapter.
 
         Args:
             bin_name: ExifTool binary name or path
             timeout: Command timeout in seconds
+            pool_size: Persistent `-stay_open` workers for reads (0 disables the pool)
         """
         self.bin = bin_name
         self.timeout = float(timeout) if timeout is not None else float(EXIFTOOL_TIMEOUT)
         self._available = self._check_available()
+        size = EXIFTOOL_POOL_SIZE if pool_size is None else pool_size
+        self._pool: Optional[ExifToolPool] = None
+        if self._available and int(size or 0) > 0:
+            self._pool = ExifToolPool(self.bin, int(size))
+            atexit.register(self._pool.close)
 
     def _resolve_executable(self, bin_name: str) -> Optional[str]:
         """
@@ -253,6 +596,70 @@ class ExifTool:
         """Check if ExifTool is available."""
         return self._available
 
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Return persistent worker pool counters (for health/diagnostics)."""
+        pool = self._pool
+        if pool is None:
+            return {"enabled": False}
+        stats = pool.get_stats()
+        stats["enabled"] = True
+        return stats
+
+    def close(self) -> None:
+        """Stop persistent ExifTool workers (safe to call multiple times)."""
+        pool = self._pool
+        if pool is not None:
+            pool.close()
+
+    def _base_read_args(self, safe_tags: List[str]) -> List[str]:
+        # -j: JSON output
+        # -G1: Group names with family 1
+        # -ee: Extract embedded data (critical for ComfyUI workflows)
+        # -a: Allow duplicate tags
+        # -U: Extract unknown tags
+        # -s: Short tag names
+        args = ["-j", "-G1", "-ee", "-a", "-U", "-s"]
+        if safe_tags:
+            args.extend([f"-{tag}" for tag in safe_tags])
+        return args
+
+    def _run_pooled(self, args: List[str], paths: List[str], timeout: float) -> Optional[subprocess.CompletedProcess]:
+        """
+        Run a read through the persistent worker pool.
+
+        Returns None when the pool cannot serve the request (disabled, unsafe argfile
+        paths, ExifTool failed to start) so callers fall back to a one-shot process.
+        Raises `subprocess.TimeoutExpired` like `subprocess.run` would.
+        """
+        pool = self._pool
+        if pool is None or not paths:
+            return None
+        if not all(_is_argfile_safe(p) for p in paths):
+            return None
+        full_args = list(args)
+        if os.name == "nt":
+            full_args.extend(["-charset", "filename=utf8"])
+        full_args.extend(paths)
+        try:
+            process = pool.execute(full_args, timeout)
+        except subprocess.TimeoutExpired:
+            raise
+        except _WorkerDied as exc:
+            logger.warning("ExifTool worker failed (%s); using one-shot process", exc)
+            return None
+        except OSError as exc:
+            logger.warning("ExifTool pool disabled (failed to start worker): %s", exc)
+            self._pool = None
+            pool.close()
+            return None
+        if os.name == "nt" and process.returncode != 0:
+            stderr_msg, _ = _decode_bytes_best_effort(process.stderr)
+            if "file not found" in stderr_msg.lower():
+                # Keep the historical argv + stdin charset retry path for Windows filenames.
+                return None
+        return process
+
+    @timed_tool("exiftool", "read")
     def read(self, path: str, tags: Optional[List[str]] = None) -> Result[Dict[str, Any]]:
         """
         Read metadata from file using ExifTool.
@@ -302,16 +709,8 @@ class ExifTool:
             )
 
         try:
-            # Build command with comprehensive extraction flags
-            # -j: JSON output
-            # -G1: Group names with family 1
-            # -ee: Extract embedded data (critical for ComfyUI workflows)
-            # -a: Allow duplicate tags
-            # -U: Extract unknown tags
-            # -s: Short tag names
-            cmd = [self.bin, "-j", "-G1", "-ee", "-a", "-U", "-s"]
-            if safe_tags:
-                cmd.extend([f"-{tag}" for tag in safe_tags])
+            # Build command with comprehensive extraction flags (see _base_read_args).
+            cmd = [self.bin] + self._base_read_args(safe_tags)
 
             # Windows Unicode compatibility:
             # - Prefer argv (most robust with Win32 wide-char argv).
@@ -323,10 +722,11 @@ class ExifTool:
             else:
                 cmd.append(path)
 
-            # Run command
-            process = _run(cmd, stdin_input)
+            # Persistent worker first; one-shot process when the pool can't serve it.
+            pooled = self._run_pooled(self._base_read_args(safe_tags), [str(path)], self.timeout)
+            process = pooled if pooled is not None else _run(cmd, stdin_input)
 
-            if os.name == "nt" and process.returncode != 0:
+            if pooled is None and os.name == "nt" and process.returncode != 0:
                 stderr_msg, _ = _decode_bytes_best_effort(process.stderr)
                 stderr_msg = stderr_msg.strip()
                 # Retry only for the specific "file not found" failure mode; avoid
@@ -412,6 +812,7 @@ class ExifTool:
                 quality="degraded"
             )
 
+    @timed_tool("exiftool", "read_batch")
     def read_batch(self, paths: List[str], tags: Optional[List[str]] = None) -> Dict[str, Result[Dict[str, Any]]]:
         """
         Read metadata from multiple files using a single ExifTool invocation.
@@ -466,9 +867,7 @@ class ExifTool:
 
         try:
             # Build batch command
-            cmd = [self.bin, "-j", "-G1", "-ee", "-a", "-U", "-s"]
-            if safe_tags:
-                cmd.extend([f"-{tag}" for tag in safe_tags])
+            cmd = [self.bin] + self._base_read_args(safe_tags)
 
             stdin_input: Optional[bytes] = None
             if os.name == "nt":
@@ -482,19 +881,23 @@ class ExifTool:
 
             timeout_s = self.timeout * len(cmd_paths)
 
-            # Run command
-            process = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=False,
-                check=False,
-                timeout=timeout_s,  # Scale timeout with file count
-                input=stdin_input,
-                shell=False,
-            )
+            # Run command (persistent worker first, one-shot process as fallback)
+            pooled = self._run_pooled(self._base_read_args(safe_tags), cmd_paths, timeout_s)
+            if pooled is not None:
+                process = pooled
+            else:
+                process = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=False,
+                    check=False,
+                    timeout=timeout_s,  # Scale timeout with file count
+                    input=stdin_input,
+                    shell=False,
+                )
 
             # Windows retry path: use stdin argfile in UTF-8 when argv path decoding fails.
-            if os.name == "nt" and process.returncode != 0:
+            if pooled is None and os.name == "nt" and process.returncode != 0:
                 stderr0, _ = _decode_bytes_best_effort(process.stderr)
                 if "file not found" in (stderr0 or "").lower():
                     retry_cmd = [self.bin, "-j", "-G1", "-ee", "-a", "-U", "-s"]
@@ -616,6 +1019,7 @@ class ExifTool:
                     results[path] = err
             return results
 
+    @timed_tool("exiftool", "write")
     def write(self, path: str, metadata: dict, preserve_workflow: bool = True) -> Result[bool]:
         """
         Write metadata to file using ExifTool.
@@ -644,45 +1048,10 @@ class ExifTool:
             return Result.Err(ErrorCode.NOT_FOUND, f"File not found: {path}")
 
         try:
-            # Build command
-            cmd = [self.bin]
-
-            # Preserve existing metadata if requested
-            if preserve_workflow:
-                cmd.extend(["-tagsFromFile", "@"])
-
-            invalid_keys: List[str] = []
-            for key in (metadata or {}).keys():
-                if not isinstance(key, str):
-                    invalid_keys.append(str(key))
-                    continue
-                if not _is_safe_exiftool_tag(key.strip()):
-                    invalid_keys.append(key.strip())
-            if invalid_keys:
-                return Result.Err(
-                    ErrorCode.INVALID_INPUT,
-                    "Invalid ExifTool tag format",
-                    invalid_tags=invalid_keys,
-                )
-
-            # Add metadata tags
-            # - Scalars: `-Tag=Value`
-            # - Lists: clear then append (`-Tag=` then `-Tag+=Item`)
-            # This matches ExifTool's array semantics (XMP arrays, IPTC keyword lists, etc.).
-            for key, value in (metadata or {}).items():
-                if value is None:
-                    cmd.append(f"-{key}=")
-                    continue
-                if isinstance(value, list):
-                    cmd.append(f"-{key}=")
-                    for item in value:
-                        if item is None:
-                            continue
-                        text = str(item).strip()
-                        if text:
-                            cmd.append(f"-{key}+={text}")
-                    continue
-                cmd.append(f"-{key}={value}")
+            built = _build_write_args(metadata, preserve_workflow)
+            if not built.ok:
+                return Result.Err(built.code, built.error or "Invalid ExifTool tags", **(built.meta or {}))
+            cmd = [self.bin, *(built.data or [])]
 
             stdin_input = None
             if os.name == "nt":
@@ -734,6 +1103,110 @@ class ExifTool:
                 str(e)
             )
 
+    @timed_tool("exiftool", "write_batch")
+    def write_batch(
+        self, items: List[Tuple[str, dict]], preserve_workflow: bool = True
+    ) -> Dict[str, Result[bool]]:
+        """
+        Write metadata to several files with a single ExifTool process.
+
+        Commands are streamed as one `-@ -` argfile separated by `-execute`, so the
+        Perl start-up cost is paid once per batch. Paths or values that cannot be
+        expressed as argfile lines fall back to `write()`.
+
+        Args:
+            items: (path, metadata) pairs; a later pair for the same path wins
+            preserve_workflow: Copy original metadata fields before writing
+
+        Returns:
+            Dict mapping each path to its Result
+        """
+        results: Dict[str, Result[bool]] = {}
+        if not self._available:
+            err: Result[bool] = Result.Err(ErrorCode.TOOL_MISSING, "ExifTool not found in PATH")
+            return {str(path): err for path, _ in items or []}
+
+        commands: Dict[str, List[str]] = {}
+        for path, metadata in items or []:
+            path = str(path or "")
+            commands.pop(path, None)
+            if not path or "\x00" in path:
+                results[path] = Result.Err(ErrorCode.INVALID_INPUT, "Invalid file path")
+                continue
+            try:
+                p = Path(path)
+                if not p.exists() or not p.is_file():
+                    results[path] = Result.Err(ErrorCode.NOT_FOUND, f"File not found: {path}")
+                    continue
+            except (OSError, ValueError):
+                results[path] = Result.Err(ErrorCode.INVALID_INPUT, "Invalid file path")
+                continue
+            built = _build_write_args(metadata, preserve_workflow)
+            if not built.ok:
+                results[path] = Result.Err(built.code, built.error or "Invalid ExifTool tags", **(built.meta or {}))
+                continue
+            args = built.data or []
+            if not _is_argfile_safe(path) or not all(_is_argfile_safe(a) for a in args):
+                results[path] = self.write(path, metadata, preserve_workflow)
+                continue
+            results.pop(path, None)
+            commands[path] = args
+        if not commands:
+            return results
+
+        paths = list(commands)
+        markers: List[bytes] = []
+        lines: List[str] = []
+        for i, path in enumerate(paths):
+            if i:
+                lines.append("-execute")
+            marker = f"{{done{i}}}"
+            markers.append(marker.encode("ascii"))
+            lines.extend(commands[path])
+            if os.name == "nt":
+                lines.extend(["-charset", "filename=utf8"])
+            lines.extend(["-overwrite_original", "-echo3", marker, "-echo4", marker + "${status}", path])
+        payload = ("\n".join(lines) + "\n").encode("utf-8", errors="replace")
+        timeout = self.timeout * len(paths)
+
+        try:
+            process = subprocess.run(
+                [self.bin, "-@", "-"],
+                capture_output=True,
+                text=False,
+                check=False,
+                timeout=timeout,
+                input=payload,
+                shell=False,
+            )
+            stdout, stderr = process.stdout or b"", process.stderr or b""
+        except subprocess.TimeoutExpired as exc:
+            logger.error(f"ExifTool batch write timeout for {len(paths)} files")
+            stdout, stderr = exc.stdout or b"", exc.stderr or b""
+        except Exception as e:
+            logger.error(f"ExifTool batch write error: {e}")
+            err = Result.Err(ErrorCode.EXIFTOOL_ERROR, str(e))
+            results.update((path, err) for path in paths)
+            return results
+
+        for path, part in zip(paths, _split_batch_output(stdout, stderr, markers)):
+            if part is None:
+                results[path] = Result.Err(ErrorCode.EXIFTOOL_ERROR, "ExifTool batch write did not complete")
+                continue
+            err_bytes, returncode = part
+            if returncode != 0:
+                stderr_msg = _decode_bytes_best_effort(err_bytes)[0].strip()
+                logger.warning(f"ExifTool write error for {path}: {stderr_msg}")
+                results[path] = Result.Err(
+                    ErrorCode.EXIFTOOL_ERROR,
+                    stderr_msg or "ExifTool write failed",
+                    return_code=int(returncode),
+                )
+                continue
+            results[path] = Result.Ok(True)
+        logger.debug(f"Metadata written to {len(paths)} files in one ExifTool run")
+        return results
+
     async def aread(self, path: str, tags: Optional[List[str]] = None) -> Result[Dict[str, Any]]:
         """Async wrapper for read() executed off the event loop thread."""
         return await asyncio.to_thread(self.read, path, tags)
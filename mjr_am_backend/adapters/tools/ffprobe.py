@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import Optional, List, Dict
 
 from ...config import FFPROBE_TIMEOUT
+from ...metrics import timed_tool
 from ...shared import Result, ErrorCode, get_logger
 
 logger = get_logger(__name__)
@@ -86,6 +87,7 @@ class FFProbe:
         """Check if ffprobe is available."""
         return self._available
 
+    @timed_tool("ffprobe", "read")
     def read(self, path: str) -> Result[dict]:
         """
         Read video metadata using ffprobe.
@@ -184,6 +186,7 @@ class FFProbe:
                 quality="degraded"
             )
 
+    @timed_tool("ffprobe", "read_batch")
     def read_batch(self, paths: List[str]) -> Dict[str, Result[dict]]:
         """
         Read metadata from multiple video files.
@@ -186,9 +186,15 @@ COLLECTIONS_DIR = str(COLLECTIONS_DIR_PATH)
 os.makedirs(INDEX_DIR, exist_ok=True)
 os.makedirs(COLLECTIONS_DIR, exist_ok=True)
 
+# Grid thumbnails (generated on demand / after enrichment, evicted least-recently-used)
+THUMBS_DIR_PATH = INDEX_DIR_PATH / "thumbs"
+THUMBS_DIR = str(THUMBS_DIR_PATH)
+
 # External tool overrides (portable vs. system-wide)
 EXIFTOOL_BIN = _env_raw("MJR_AM_EXIFTOOL_PATH", "MAJOOR_EXIFTOOL_PATH", "MAJOOR_EXIFTOOL_BIN", default="exiftool")
 FFPROBE_BIN = _env_raw("MJR_AM_FFPROBE_PATH", "MAJOOR_FFPROBE_PATH", "MAJOOR_FFPROBE_BIN", default="ffprobe")
+# Optional: only used to grab video poster frames for thumbnails.
+FFMPEG_BIN = _env_raw("MJR_AM_FFMPEG_PATH", "MAJOOR_FFMPEG_PATH", "MAJOOR_FFMPEG_BIN", default="ffmpeg")
 
 TOOL_LOCATIONS = {
     "exiftool": EXIFTOOL_BIN,
@@ -210,16 +216,46 @@ MEDIA_PROBE_BACKEND = str(_env_raw("MJR_AM_MEDIA_PROBE_BACKEND", "MAJOOR_MEDIA_P
 # Tool timeouts
 EXIFTOOL_TIMEOUT = _env_int(15, "MJR_AM_EXIFTOOL_TIMEOUT", "MAJOOR_EXIFTOOL_TIMEOUT", min_value=1, max_value=120)
 FFPROBE_TIMEOUT = _env_int(10, "MJR_AM_FFPROBE_TIMEOUT", "MAJOOR_FFPROBE_TIMEOUT", min_value=1, max_value=120)
+# Persistent `exiftool -stay_open` workers used for reads (0 disables the pool).
+EXIFTOOL_POOL_SIZE = _env_int(2, "MJR_AM_EXIFTOOL_POOL_SIZE", "MAJOOR_EXIFTOOL_POOL_SIZE", min_value=0, max_value=16)
+# Rating/tags file sync: files written per ExifTool invocation, and parallel writer threads.
+RATING_TAGS_SYNC_BATCH_SIZE = _env_int(50, "MJR_AM_RATING_TAGS_SYNC_BATCH_SIZE", "MAJOOR_RATING_TAGS_SYNC_BATCH_SIZE", min_value=1, max_value=500)
+RATING_TAGS_SYNC_CONCURRENCY = _env_int(1, "MJR_AM_RATING_TAGS_SYNC_CONCURRENCY", "MAJOOR_RATING_TAGS_SYNC_CONCURRENCY", min_value=1, max_value=8)
 
 # Database tuning
 DB_TIMEOUT = _env_float(30.0, "MJR_AM_DB_TIMEOUT", "MAJOOR_DB_TIMEOUT", min_value=1.0, max_value=300.0)
 DB_MAX_CONNECTIONS = _env_int(8, "MJR_AM_DB_MAX_CONNECTIONS", "MAJOOR_DB_MAX_CONNECTIONS", min_value=1, max_value=64)
 DB_QUERY_TIMEOUT = _env_float(60.0, "MJR_AM_DB_QUERY_TIMEOUT", "MAJOOR_DB_QUERY_TIMEOUT", min_value=1.0, max_value=600.0)
+# Prepared statements cached per connection (sqlite3 `cached_statements`, LRU by SQL text).
+DB_STATEMENT_CACHE_SIZE = _env_int(256, "MJR_AM_DB_STATEMENT_CACHE_SIZE", "MAJOOR_DB_STATEMENT_CACHE_SIZE", min_value=0, max_value=4096)
+# Single-writer queue: autocommit INSERT/UPDATE/DELETE statements are group-committed by one
+# writer connection (batch bounded by statement count and a short coalescing window).
+DB_WRITE_QUEUE_ENABLED = _env_bool(True, "MJR_AM_DB_WRITE_QUEUE", "MAJOOR_DB_WRITE_QUEUE")
+DB_WRITE_BATCH_MAX = _env_int(256, "MJR_AM_DB_WRITE_BATCH_MAX", "MAJOOR_DB_WRITE_BATCH_MAX", min_value=1, max_value=10_000)
+DB_WRITE_BATCH_WINDOW_MS = _env_float(2.0, "MJR_AM_DB_WRITE_BATCH_WINDOW_MS", "MAJOOR_DB_WRITE_BATCH_WINDOW_MS", min_value=0.0, max_value=100.0)
 TO_THREAD_TIMEOUT_S = _env_float(30.0, "MJR_AM_TO_THREAD_TIMEOUT", "MAJOOR_TO_THREAD_TIMEOUT", min_value=1.0, max_value=300.0)
 MAX_METADATA_JSON_BYTES = _env_int(2 * 1024 * 1024, "MJR_AM_MAX_METADATA_JSON_BYTES", "MAJOOR_MAX_METADATA_JSON_BYTES", min_value=64 * 1024, max_value=32 * 1024 * 1024)
 METADATA_CACHE_MAX = _env_int(100_000, "MJR_AM_METADATA_CACHE_MAX", "MAJOOR_METADATA_CACHE_MAX", min_value=1000, max_value=5_000_000)
 METADATA_CACHE_TTL_SECONDS = _env_float(90.0 * 24.0 * 3600.0, "MJR_AM_METADATA_CACHE_TTL_SECONDS", "MAJOOR_METADATA_CACHE_TTL_SECONDS", min_value=60.0, max_value=3650.0 * 24.0 * 3600.0)
 METADATA_CACHE_CLEANUP_INTERVAL_SECONDS = _env_float(300.0, "MJR_AM_METADATA_CACHE_CLEANUP_INTERVAL_SECONDS", "MAJOOR_METADATA_CACHE_CLEANUP_INTERVAL_SECONDS", min_value=5.0, max_value=3600.0)
+# Workflow/prompt blob store: decompressed-JSON LRU budget (bytes) and zlib level.
+BLOB_CACHE_MAX_BYTES = _env_int(32 * 1024 * 1024, "MJR_AM_BLOB_CACHE_MAX_BYTES", "MAJOOR_BLOB_CACHE_MAX_BYTES", min_value=0, max_value=1024 * 1024 * 1024)
+BLOB_COMPRESSION_LEVEL = _env_int(6, "MJR_AM_BLOB_COMPRESSION_LEVEL", "MAJOOR_BLOB_COMPRESSION_LEVEL", min_value=1, max_value=9)
+# Near-duplicate index: pairs up to this phash distance are precomputed as hashes are indexed,
+# keeping at most DUP_PAIR_MAX_NEIGHBORS closest matches per newly indexed image.
+DUP_PAIR_MAX_DISTANCE = _env_int(10, "MJR_AM_DUP_PAIR_MAX_DISTANCE", "MAJOOR_DUP_PAIR_MAX_DISTANCE", min_value=0, max_value=15)
+DUP_PAIR_MAX_NEIGHBORS = _env_int(64, "MJR_AM_DUP_PAIR_MAX_NEIGHBORS", "MAJOOR_DUP_PAIR_MAX_NEIGHBORS", min_value=1, max_value=1000)
+# GenInfo parsing: LRU of parsed graph templates (entries) and optional worker processes
+# for cache misses (0 = parse in the default thread pool).
+GENINFO_MEMO_MAX = _env_int(512, "MJR_AM_GENINFO_MEMO_MAX", "MAJOOR_GENINFO_MEMO_MAX", min_value=0, max_value=100_000)
+GENINFO_PARSE_PROCESSES = _env_int(0, "MJR_AM_GENINFO_PARSE_PROCESSES", "MAJOOR_GENINFO_PARSE_PROCESSES", min_value=0, max_value=32)
+# Thumbnails: on-disk cache budget (bytes), concurrent renders, encoder and pregeneration.
+THUMB_CACHE_MAX_BYTES = _env_int(512 * 1024 * 1024, "MJR_AM_THUMB_CACHE_MAX_BYTES", "MAJOOR_THUMB_CACHE_MAX_BYTES", min_value=16 * 1024 * 1024, max_value=64 * 1024 * 1024 * 1024)
+THUMB_WORKERS = _env_int(2, "MJR_AM_THUMB_WORKERS", "MAJOOR_THUMB_WORKERS", min_value=1, max_value=16)
+THUMB_FORMAT = str(_env_raw("MJR_AM_THUMB_FORMAT", "MAJOOR_THUMB_FORMAT", default="webp") or "webp").strip().lower()
+THUMB_QUALITY = _env_int(80, "MJR_AM_THUMB_QUALITY", "MAJOOR_THUMB_QUALITY", min_value=1, max_value=100)
+THUMB_FFMPEG_TIMEOUT = _env_float(10.0, "MJR_AM_THUMB_FFMPEG_TIMEOUT", "MAJOOR_THUMB_FFMPEG_TIMEOUT", min_value=1.0, max_value=120.0)
+THUMB_PREGENERATE = _env_bool(True, "MJR_AM_THUMB_PREGENERATE", "MAJOOR_THUMB_PREGENERATE")
 METADATA_EXTRACT_CONCURRENCY = _env_int(1, "MJR_AM_METADATA_EXTRACT_CONCURRENCY", "MAJOOR_METADATA_EXTRACT_CONCURRENCY", min_value=1, max_value=16)
 
 # Index dedupe (avoid double-indexing bursts from multiple event sources)
@@ -275,10 +311,17 @@ BG_SCAN_ON_LIST = _env_bool(False, "MJR_AM_BG_SCAN_ON_LIST", "MAJOOR_BG_SCAN_ON_
 BG_SCAN_MIN_INTERVAL_SECONDS = _env_float(30.0, "MJR_AM_BG_SCAN_MIN_INTERVAL_SECONDS", "MAJOOR_BG_SCAN_MIN_INTERVAL_SECONDS", min_value=0.0, max_value=3600.0)
 SEARCH_MAX_LIMIT = _env_int(500, "MJR_AM_SEARCH_MAX_LIMIT", "MAJOOR_SEARCH_MAX_LIMIT", min_value=1, max_value=100000)
 SEARCH_MAX_OFFSET = _env_int(10_000, "MJR_AM_SEARCH_MAX_OFFSET", "MAJOOR_SEARCH_MAX_OFFSET", min_value=0, max_value=10_000_000)
+# scope=all merge sessions (Outputs DB + Inputs filesystem): resumable across pages via `cursor`.
+SEARCH_MERGE_SESSION_MAX = _env_int(64, "MJR_AM_SEARCH_MERGE_SESSION_MAX", "MAJOOR_SEARCH_MERGE_SESSION_MAX", min_value=1, max_value=10000)
+SEARCH_MERGE_SESSION_TTL_SECONDS = _env_float(300.0, "MJR_AM_SEARCH_MERGE_SESSION_TTL_SECONDS", "MAJOOR_SEARCH_MERGE_SESSION_TTL_SECONDS", min_value=1.0, max_value=86400.0)
 
 # Filesystem listing cache (used by filesystem fallback search/list)
 FS_LIST_CACHE_MAX = _env_int(32, "MJR_AM_FS_LIST_CACHE_MAX", "MAJOOR_FS_LIST_CACHE_MAX", min_value=1, max_value=10000)
 FS_LIST_CACHE_TTL_SECONDS = _env_float(1.5, "MJR_AM_FS_LIST_CACHE_TTL_SECONDS", "MAJOOR_FS_LIST_CACHE_TTL_SECONDS", min_value=0.1, max_value=3600.0)
+# Listings under a watched root are patched from the per-directory event journal, so they can
+# live much longer; the journal keeps at most FS_LIST_CACHE_JOURNAL_MAX events per directory.
+FS_LIST_CACHE_WATCHED_TTL_SECONDS = _env_float(600.0, "MJR_AM_FS_LIST_CACHE_WATCHED_TTL_SECONDS", "MAJOOR_FS_LIST_CACHE_WATCHED_TTL_SECONDS", min_value=0.1, max_value=86400.0)
+FS_LIST_CACHE_JOURNAL_MAX = _env_int(2048, "MJR_AM_FS_LIST_CACHE_JOURNAL_MAX", "MAJOOR_FS_LIST_CACHE_JOURNAL_MAX", min_value=16, max_value=1_000_000)
 # Scanner batching (bounded transactions)
 # Tweak only if you know your workload; larger batches reduce transaction overhead but increase lock time.
 SCAN_BATCH_SMALL_THRESHOLD = _env_int(100, "MJR_AM_SCAN_BATCH_SMALL_THRESHOLD", "MAJOOR_SCAN_BATCH_SMALL_THRESHOLD", min_value=1, max_value=1_000_000)
@@ -301,3 +344,6 @@ SCAN_BATCH_XL = _env_int(400, "MJR_AM_SCAN_BATCH_XL", "MAJOOR_SCAN_BATCH_XL", mi
 
 # Scanner limits
 MAX_TO_ENRICH_ITEMS = _env_int(10000, "MJR_AM_MAX_TO_ENRICH_ITEMS", "MAJOOR_MAX_TO_ENRICH_ITEMS", min_value=1, max_value=1_000_000)
+# Directory journal: an unchanged directory's journaled files are re-stat'ed (to catch in-place
+# overwrites, which leave the directory mtime alone) at most once per interval; 0 = every scan.
+SCAN_DIR_JOURNAL_VERIFY_INTERVAL_SECONDS = _env_float(3600.0, "MJR_AM_SCAN_DIR_JOURNAL_VERIFY_INTERVAL_SECONDS", "MAJOOR_SCAN_DIR_JOURNAL_VERIFY_INTERVAL_SECONDS", min_value=0.0, max_value=30.0 * 24.0 * 3600.0)
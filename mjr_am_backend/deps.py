@@ -14,10 +14,12 @@ from .adapters.tools import ExifTool, FFProbe
 from .features.metadata import MetadataService
 from .features.health import HealthService
 from .features.index import IndexService
+from .features.index.metadata_helpers import MetadataHelpers
 from .features.index.watcher import OutputWatcher
 from .features.index.watcher_scope import load_watcher_scope, build_watch_paths
 from .features.tags import RatingTagsSyncWorker
 from .features.duplicates import DuplicatesService
+from .features.thumbs import ThumbnailService
 from .settings import AppSettings
 from .config import (
     INDEX_DB,
@@ -28,10 +30,28 @@ from .config import (
     DB_TIMEOUT,
     DB_MAX_CONNECTIONS,
     WATCHER_ENABLED,
+    get_runtime_output_root,
 )
+from .custom_roots import list_custom_roots
 
 logger = get_logger(__name__)
 
+
+def _configured_scope_roots() -> list[str]:
+    """Output, input and custom root directories (best-effort)."""
+    roots = [str(get_runtime_output_root())]
+    try:
+        import folder_paths  # type: ignore
+
+        roots.append(str(folder_paths.get_input_directory()))
+    except Exception:
+        pass
+    custom = list_custom_roots()
+    if custom.ok:
+        roots.extend(str(r.get("path")) for r in custom.data or [] if r.get("path") and not r.get("invalid"))
+    return roots
+
+
 async def build_services(db_path: Optional[str] = None) -> Result[dict]:
     """
     Build all services (DI container).
@@ -91,13 +111,17 @@ async def build_services(db_path: Optional[str] = None) -> Result[dict]:
         ffprobe=ffprobe
     )
 
+    thumbnail_service = ThumbnailService()
+    duplicates_service = DuplicatesService(db)
+
     # Check for optional columns
     matches = await table_has_column(db, "asset_metadata", "tags_text")
     
     index_service = IndexService(
         db=db,
         metadata_service=metadata_service,
-        has_tags_text_column=matches
+        has_tags_text_column=matches,
+        thumbnail_service=thumbnail_service,
     )
 
     services = {
@@ -108,8 +132,48 @@ async def build_services(db_path: Optional[str] = None) -> Result[dict]:
         "health": health_service,
         "index": index_service,
         "settings": settings_service,
-        "duplicates": DuplicatesService(db),
+        "duplicates": duplicates_service,
+        "thumbnails": thumbnail_service,
     }
+    # One-off background fill of the materialized generation columns (no-op once done).
+    try:
+        if await MetadataHelpers.generation_backfill_pending(db):
+            services["generation_backfill"] = asyncio.create_task(MetadataHelpers.backfill_generation_columns(db))
+    except Exception as exc:
+        logger.debug("Generation column backfill not started: %s", exc)
+    # One-off move of inline workflow/prompt graphs into the blob store (no-op once done).
+    try:
+        if await MetadataHelpers.blob_migration_pending(db):
+            services["blob_migration"] = asyncio.create_task(MetadataHelpers.migrate_inline_blobs(db))
+    except Exception as exc:
+        logger.debug("Blob store migration not started: %s", exc)
+    # Counters table created on an already populated DB (no-op once reconciled).
+    try:
+        if await health_service.counters_reconcile_pending():
+            services["asset_stats_reconcile"] = asyncio.create_task(health_service.reconcile_counters())
+    except Exception as exc:
+        logger.debug("Asset counters reconcile not started: %s", exc)
+    # Calendar day rollup: first build, or rebuild after a timezone change (no-op otherwise).
+    try:
+        if await index_service.date_histogram_rebuild_pending():
+            services["day_stats_rebuild"] = asyncio.create_task(index_service.rebuild_date_histogram())
+    except Exception as exc:
+        logger.debug("Calendar rollup rebuild not started: %s", exc)
+    # Assets indexed before scope_root existed: register the configured roots and stamp them.
+    try:
+        if await index_service.scope_stamp_pending():
+            services["scope_root_backfill"] = asyncio.create_task(
+                index_service.stamp_scope_roots(_configured_scope_roots())
+            )
+    except Exception as exc:
+        logger.debug("Scope root backfill not started: %s", exc)
+    # Phashes stored before the near-duplicate band index existed (no-op once indexed).
+    try:
+        if await duplicates_service.phash_index_pending():
+            services["phash_index_backfill"] = asyncio.create_task(duplicates_service.build_phash_index())
+    except Exception as exc:
+        logger.debug("Phash index backfill not started: %s", exc)
+
     try:
         services["watcher_scope"] = await load_watcher_scope(db)
     except Exception:
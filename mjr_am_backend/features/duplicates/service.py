@@ -1,21 +1,40 @@
 """
 Background duplicate/similarity analysis.
+
+Perceptual hashes are indexed in `asset_phash_index` as four 16-bit bands
+(multi-index hashing): two 64-bit hashes within Hamming distance d always have
+one band within d // 4 bits of each other, so a lookup only probes the band
+values around the query hash instead of comparing against every image.
+Pairs up to DUP_PAIR_MAX_DISTANCE are recorded in `asset_phash_pairs` as each
+hash is indexed, which turns "all similar pairs" into a single indexed read.
 """
 from __future__ import annotations
 
 import asyncio
 import hashlib
 import json
+from functools import lru_cache
+from itertools import combinations
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from PIL import Image
 
+from ...adapters.db.scope_roots import scope_roots_where
 from ...adapters.db.sqlite import Sqlite
+from ...config import DUP_PAIR_MAX_DISTANCE, DUP_PAIR_MAX_NEIGHBORS
 from ...shared import Result, get_logger
 
 logger = get_logger(__name__)
 
+PHASH_BANDS = 4
+PHASH_BAND_BITS = 16
+# Probing stays bounded (<= 697 values per band) up to a 3-bit radius per band.
+PHASH_MAX_QUERY_DISTANCE = PHASH_BANDS * 4 - 1
+_PHASH_MASK = (1 << 64) - 1
+_BAND_MASK = (1 << PHASH_BAND_BITS) - 1
+_PROBE_CHUNK = 500
+
 
 def _safe_int(value: Any, default: int = 0) -> int:
     try:
@@ -59,11 +78,51 @@ def _hamming_hex(a: str, b: str) -> int:
         return 64
 
 
+def _phash_to_int(value: Any) -> Optional[int]:
+    try:
+        parsed = int(str(value or "").strip(), 16)
+    except Exception:
+        return None
+    if parsed < 0 or parsed > _PHASH_MASK:
+        return None
+    return parsed
+
+
+def _to_signed64(value: int) -> int:
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _phash_bands(value: int) -> Tuple[int, ...]:
+    return tuple((value >> (PHASH_BAND_BITS * i)) & _BAND_MASK for i in range(PHASH_BANDS))
+
+
+@lru_cache(maxsize=8)
+def _band_flip_masks(radius: int) -> Tuple[int, ...]:
+    """All band values at Hamming distance <= radius from 0 (XOR with a band to probe around it)."""
+    masks = [0]
+    for r in range(1, max(0, int(radius)) + 1):
+        for bits in combinations(range(PHASH_BAND_BITS), r):
+            m = 0
+            for b in bits:
+                m |= 1 << b
+            masks.append(m)
+    return tuple(masks)
+
+
+def _asset_ref(row: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    return {
+        "id": _safe_int(row.get(f"{prefix}id")),
+        "filepath": row.get(f"{prefix}filepath"),
+        "filename": row.get(f"{prefix}filename"),
+    }
+
+
 class DuplicatesService:
     def __init__(self, db: Sqlite):
         self.db = db
         self._lock = asyncio.Lock()
         self._task: Optional[asyncio.Task] = None
+        self._index_lock = asyncio.Lock()
         self._status: Dict[str, Any] = {
             "running": False,
             "processed": 0,
@@ -141,16 +200,204 @@ class DuplicatesService:
                     )
                     if upd.ok:
                         self._status["updated"] = _safe_int(self._status.get("updated")) + 1
+                        if phash:
+                            await self.index_phash(aid, phash)
                     else:
                         self._status["errors"] = _safe_int(self._status.get("errors")) + 1
                 except Exception as exc:
                     self._status["errors"] = _safe_int(self._status.get("errors")) + 1
                     self._status["last_error"] = str(exc)
+            # Hashes written outside this loop (restores, older versions) join the index too.
+            await self.build_phash_index()
         except Exception as exc:
             self._set_status(last_error=str(exc))
         finally:
             self._set_status(running=False)
 
+    async def _probe_phash(
+        self,
+        value: int,
+        max_distance: int,
+        exclude_id: int = 0,
+    ) -> Result[Dict[int, int]]:
+        """Return {asset_id: distance} for indexed hashes within `max_distance` of `value`."""
+        masks = _band_flip_masks(max_distance // PHASH_BANDS)
+        found: Dict[int, int] = {}
+        seen = {int(exclude_id)} if exclude_id else set()
+        for band_no, band in enumerate(_phash_bands(value)):
+            probes = sorted({band ^ m for m in masks})
+            for start in range(0, len(probes), _PROBE_CHUNK):
+                chunk = probes[start:start + _PROBE_CHUNK]
+                res = await self.db.aquery(
+                    f"SELECT asset_id, phash FROM asset_phash_index WHERE b{band_no} IN ({','.join('?' * len(chunk))})",
+                    tuple(chunk),
+                )
+                if not res.ok:
+                    return Result.Err("DB_ERROR", res.error or "Phash index lookup failed")
+                for row in res.data or []:
+                    aid = _safe_int((row or {}).get("asset_id"))
+                    if aid in seen:
+                        continue
+                    seen.add(aid)
+                    d = (value ^ (_safe_int((row or {}).get("phash")) & _PHASH_MASK)).bit_count()
+                    if d <= max_distance:
+                        found[aid] = d
+        return Result.Ok(found)
+
+    async def index_phash(self, asset_id: int, phash: Optional[str]) -> Result[int]:
+        """
+        Add one asset's phash to the band index and record its nearest similar pairs.
+
+        Returns the number of pairs recorded.
+        """
+        aid = _safe_int(asset_id)
+        value = _phash_to_int(phash)
+        if not aid or value is None:
+            return Result.Ok(0)
+        async with self._index_lock:
+            ins = await self.db.aexecute(
+                """
+                INSERT OR REPLACE INTO asset_phash_index (asset_id, phash, b0, b1, b2, b3)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (aid, _to_signed64(value), *_phash_bands(value)),
+            )
+            if not ins.ok:
+                return Result.Err("DB_ERROR", ins.error or "Failed to index phash")
+            probe = await self._probe_phash(value, int(DUP_PAIR_MAX_DISTANCE), exclude_id=aid)
+            if not probe.ok:
+                return Result.Err(probe.code or "DB_ERROR", probe.error or "Phash index lookup failed")
+            nearest = sorted((probe.data or {}).items(), key=lambda kv: (kv[1], kv[0]))[: int(DUP_PAIR_MAX_NEIGHBORS)]
+            if not nearest:
+                return Result.Ok(0)
+            pairs = await self.db.aexecutemany(
+                "INSERT OR REPLACE INTO asset_phash_pairs (left_id, right_id, distance) VALUES (?, ?, ?)",
+                [(min(aid, other), max(aid, other), d) for other, d in nearest],
+            )
+            if not pairs.ok:
+                return Result.Err("DB_ERROR", pairs.error or "Failed to record similar pairs")
+            return Result.Ok(len(nearest))
+
+    async def phash_index_pending(self) -> bool:
+        res = await self.db.aquery(
+            """
+            SELECT 1 AS pending FROM assets a
+            WHERE a.phash IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM asset_phash_index i WHERE i.asset_id = a.id)
+            LIMIT 1
+            """
+        )
+        return bool(res.ok and res.data)
+
+    async def build_phash_index(self, batch_size: int = 500) -> Result[int]:
+        """Index every stored phash that is not in the band index yet (resumable, oldest id first)."""
+        indexed = 0
+        last_id = 0
+        batch_size = max(1, int(batch_size or 500))
+        while True:
+            rows = await self.db.aquery(
+                """
+                SELECT a.id, a.phash FROM assets a
+                LEFT JOIN asset_phash_index i ON i.asset_id = a.id
+                WHERE a.phash IS NOT NULL AND i.asset_id IS NULL AND a.id > ?
+                ORDER BY a.id
+                LIMIT ?
+                """,
+                (last_id, batch_size),
+            )
+            if not rows.ok:
+                return Result.Err("DB_ERROR", rows.error or "Failed to list unindexed phashes")
+            batch = rows.data or []
+            if not batch:
+                break
+            for row in batch:
+                last_id = _safe_int((row or {}).get("id"))
+                res = await self.index_phash(last_id, (row or {}).get("phash"))
+                if res.ok and _phash_to_int((row or {}).get("phash")) is not None:
+                    indexed += 1
+            await asyncio.sleep(0)
+        if indexed:
+            logger.info("Indexed %d perceptual hashes for near-duplicate lookups", indexed)
+        return Result.Ok(indexed)
+
+    async def find_similar(self, asset_id: int, max_distance: int = 6, limit: int = 50) -> Result[Dict[str, Any]]:
+        """Neighbors of one image within `max_distance` (any indexed image, closest first)."""
+        aid = _safe_int(asset_id)
+        if aid <= 0:
+            return Result.Err("INVALID_INPUT", "Invalid asset_id")
+        max_distance = max(0, min(PHASH_MAX_QUERY_DISTANCE, _safe_int(max_distance, 6)))
+        limit = max(1, min(500, _safe_int(limit, 50)))
+
+        row = await self.db.aquery("SELECT phash FROM assets WHERE id = ?", (aid,))
+        if not row.ok:
+            return Result.Err("DB_ERROR", row.error or "Failed to load asset")
+        if not row.data:
+            return Result.Err("NOT_FOUND", f"Asset not found: {aid}")
+        value = _phash_to_int((row.data[0] or {}).get("phash"))
+        if value is None:
+            return Result.Ok({"asset_id": aid, "max_distance": max_distance, "hashed": False, "neighbors": []})
+
+        probe = await self._probe_phash(value, max_distance, exclude_id=aid)
+        if not probe.ok:
+            return Result.Err(probe.code or "DB_ERROR", probe.error or "Phash index lookup failed")
+        nearest = sorted((probe.data or {}).items(), key=lambda kv: (kv[1], kv[0]))[:limit]
+        info: Dict[int, Dict[str, Any]] = {}
+        if nearest:
+            rows = await self.db.aquery_in(
+                "SELECT id, filepath, filename FROM assets WHERE {IN_CLAUSE}",
+                "id",
+                [other for other, _ in nearest],
+            )
+            if not rows.ok:
+                return Result.Err("DB_ERROR", rows.error or "Failed to load neighbors")
+            info = {_safe_int((r or {}).get("id")): _asset_ref(r or {}) for r in rows.data or []}
+        neighbors = [{"distance": d, **info[other]} for other, d in nearest if other in info]
+        return Result.Ok({"asset_id": aid, "max_distance": max_distance, "hashed": True, "neighbors": neighbors})
+
+    async def list_similar_pairs(
+        self,
+        roots: Optional[List[str]] = None,
+        max_distance: int = 6,
+        limit: int = 100,
+    ) -> Result[Dict[str, Any]]:
+        """Similar image pairs from the precomputed pair table, closest first."""
+        max_distance = max(0, min(int(DUP_PAIR_MAX_DISTANCE), _safe_int(max_distance, 6)))
+        limit = max(1, min(5000, _safe_int(limit, 100)))
+        where = ["p.distance <= ?"]
+        params: List[Any] = [max_distance]
+        for alias in ("l", "r") if roots else ():
+            scoped = await scope_roots_where(self.db, roots or [], alias=alias)
+            if not scoped.ok or scoped.data is None:
+                return Result.Err(scoped.code or "DB_ERROR", scoped.error or "Failed to scope roots")
+            where.append(scoped.data[0])
+            params.extend(scoped.data[1])
+        params.append(limit)
+        rows = await self.db.aquery(
+            f"""
+            SELECT p.distance,
+                   l.id AS left_id, l.filepath AS left_filepath, l.filename AS left_filename,
+                   r.id AS right_id, r.filepath AS right_filepath, r.filename AS right_filename
+            FROM asset_phash_pairs p
+            JOIN assets l ON l.id = p.left_id
+            JOIN assets r ON r.id = p.right_id
+            WHERE {' AND '.join(where)}
+            ORDER BY p.distance, p.left_id, p.right_id
+            LIMIT ?
+            """,
+            tuple(params),
+        )
+        if not rows.ok:
+            return Result.Err("DB_ERROR", rows.error or "Similar pairs query failed")
+        pairs = [
+            {
+                "distance": _safe_int((r or {}).get("distance"), 64),
+                "left": _asset_ref(r or {}, "left_"),
+                "right": _asset_ref(r or {}, "right_"),
+            }
+            for r in rows.data or []
+        ]
+        return Result.Ok({"max_distance": max_distance, "pairs": pairs})
+
     async def get_alerts(
         self,
         roots: Optional[List[str]] = None,
@@ -166,11 +413,11 @@ class DuplicatesService:
         where = ""
         params: List[Any] = []
         if roots:
-            clauses = []
-            for r in roots:
-                clauses.append("a.filepath LIKE ?")
-                params.append(str(Path(str(r)).resolve(strict=False)) + "%")
-            where = f"WHERE ({' OR '.join(clauses)})"
+            scoped = await scope_roots_where(self.db, roots)
+            if not scoped.ok or scoped.data is None:
+                return Result.Err(scoped.code or "DB_ERROR", scoped.error or "Failed to scope roots")
+            where = f"WHERE {scoped.data[0]}"
+            params.extend(scoped.data[1])
 
         dup_q = f"""
             SELECT a.id, a.filepath, a.filename, a.content_hash, m.tags
@@ -224,6 +471,33 @@ class DuplicatesService:
         exact_groups.sort(key=lambda g: _safe_int(g.get("count")), reverse=True)
         exact_groups = exact_groups[:max_groups]
 
+        if phash_distance <= int(DUP_PAIR_MAX_DISTANCE):
+            indexed = await self.list_similar_pairs(roots=roots, max_distance=phash_distance, limit=max_pairs)
+            if not indexed.ok:
+                return Result.Err(indexed.code or "DB_ERROR", indexed.error or "Similarity query failed")
+            similar_pairs = (indexed.data or {}).get("pairs") or []
+        else:
+            scanned = await self._scan_similar_pairs(where, params, phash_distance, max_pairs)
+            if not scanned.ok:
+                return Result.Err(scanned.code or "DB_ERROR", scanned.error or "Similarity query failed")
+            similar_pairs = scanned.data or []
+
+        similar_pairs.sort(key=lambda p: _safe_int(p.get("distance"), 64))
+
+        return Result.Ok({
+            "exact_groups": exact_groups,
+            "similar_pairs": similar_pairs,
+            "status": dict(self._status),
+        })
+
+    async def _scan_similar_pairs(
+        self,
+        where: str,
+        params: List[Any],
+        phash_distance: int,
+        max_pairs: int,
+    ) -> Result[List[Dict[str, Any]]]:
+        """Pairwise scan of the latest images, for distances above the precomputed pair range."""
         sim_q = f"""
             SELECT a.id, a.filepath, a.filename, a.phash
             FROM assets a
@@ -267,14 +541,7 @@ class DuplicatesService:
                         break
             if len(similar_pairs) >= max_pairs:
                 break
-
-        similar_pairs.sort(key=lambda p: _safe_int(p.get("distance"), 64))
-
-        return Result.Ok({
-            "exact_groups": exact_groups,
-            "similar_pairs": similar_pairs,
-            "status": dict(self._status),
-        })
+        return Result.Ok(similar_pairs)
 
     async def merge_tags_for_group(self, keep_asset_id: int, merge_asset_ids: List[int]) -> Result[Dict[str, Any]]:
         keep_asset_id = int(keep_asset_id or 0)
@@ -0,0 +1,264 @@
+"""
+Memoized GenInfo parsing.
+
+Renders from one queued batch share a prompt graph that differs only in its seed
+inputs. Before parsing, those seed values are swapped for sentinels and the
+templated graph is fingerprinted; the parsed result of a template is kept in a
+small LRU, and each asset gets its own seeds substituted back into a copy.
+
+Cache misses run in the default thread pool, or in a process pool when
+GENINFO_PARSE_PROCESSES > 0 (opt-in: spawned workers re-import the host's main
+module, which is heavy under ComfyUI).
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from ...config import GENINFO_MEMO_MAX, GENINFO_PARSE_PROCESSES
+from ...shared import Result, get_logger
+from .parser import parse_geninfo_from_prompt
+
+logger = get_logger(__name__)
+
+# Prompt-graph inputs that change per render without changing what the parser extracts
+# (besides the value itself).
+VOLATILE_INPUT_KEYS = ("seed", "noise_seed")
+_SENTINEL_BASE = 0x5EED_0000_0000_0000
+
+_MEMO_LOCK = threading.Lock()
+_MEMO: "OrderedDict[str, Any]" = OrderedDict()
+_MEMO_STATS = {"hits": 0, "misses": 0, "bypassed": 0}
+# Marker for templates whose parse output embeds a sentinel in a way substitution cannot undo.
+_PARSE_DIRECT = object()
+_MISSING = object()
+
+_POOL_LOCK = threading.Lock()
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_DISABLED = False
+
+
+@dataclass
+class _GraphTemplate:
+    key: str
+    prompt: Any
+    workflow: Any
+    seeds: Dict[int, int] = field(default_factory=dict)  # sentinel -> real value
+
+
+def _is_seed_value(value: Any) -> bool:
+    # 0 is falsy and the parser treats it differently from a set seed; leave it in the graph.
+    return isinstance(value, int) and not isinstance(value, bool) and value != 0
+
+
+def _template_workflow(workflow: Any, seeds_by_node: Dict[str, Dict[int, int]]) -> Any:
+    if not isinstance(workflow, dict):
+        return workflow
+    out = dict(workflow)
+    extra = out.get("extra")
+    if isinstance(extra, dict) and "ds" in extra:
+        # Canvas pan/zoom: never read by the parser, but changes between submissions.
+        out["extra"] = {k: v for k, v in extra.items() if k != "ds"}
+    nodes = out.get("nodes")
+    if not seeds_by_node or not isinstance(nodes, list):
+        return out
+    templated_nodes = []
+    for node in nodes:
+        node_seeds = seeds_by_node.get(str(node.get("id"))) if isinstance(node, dict) else None
+        widgets = node.get("widgets_values") if node_seeds else None
+        if not node_seeds or not isinstance(widgets, list):
+            templated_nodes.append(node)
+            continue
+        by_value = {real: sentinel for sentinel, real in node_seeds.items()}
+        node = dict(node)
+        node["widgets_values"] = [
+            by_value.get(w, w) if _is_seed_value(w) else w for w in widgets
+        ]
+        templated_nodes.append(node)
+    out["nodes"] = templated_nodes
+    return out
+
+
+def template_graph(prompt_graph: Any, workflow: Any = None) -> Optional[_GraphTemplate]:
+    """
+    Replace per-render seed values with sentinels and fingerprint the result.
+
+    Returns None when the graph cannot be serialized (it is then parsed directly).
+    """
+    seeds: Dict[int, int] = {}
+    seeds_by_node: Dict[str, Dict[int, int]] = {}
+    prompt = prompt_graph
+    if isinstance(prompt_graph, dict):
+        prompt = {}
+        for node_id in sorted(prompt_graph, key=str):
+            node = prompt_graph[node_id]
+            inputs = node.get("inputs") if isinstance(node, dict) else None
+            if isinstance(inputs, dict) and any(_is_seed_value(inputs.get(k)) for k in VOLATILE_INPUT_KEYS):
+                inputs = dict(inputs)
+                for k in VOLATILE_INPUT_KEYS:
+                    if _is_seed_value(inputs.get(k)):
+                        sentinel = _SENTINEL_BASE + len(seeds)
+                        seeds[sentinel] = inputs[k]
+                        seeds_by_node.setdefault(str(node_id), {})[sentinel] = inputs[k]
+                        inputs[k] = sentinel
+                node = dict(node)
+                node["inputs"] = inputs
+            prompt[node_id] = node
+    templated_workflow = _template_workflow(workflow, seeds_by_node)
+    try:
+        canonical = json.dumps(
+            [prompt, templated_workflow],
+            ensure_ascii=False,
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+    except (TypeError, ValueError):
+        return None
+    key = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return _GraphTemplate(key=key, prompt=prompt, workflow=templated_workflow, seeds=seeds)
+
+
+def _substitute(value: Any, seeds: Dict[int, int]) -> Any:
+    if isinstance(value, dict):
+        return {k: _substitute(v, seeds) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, seeds) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool) and value in seeds:
+        return seeds[value]
+    return value
+
+
+def apply_seeds(data: Any, seeds: Dict[int, int]) -> Any:
+    """
+    Return a copy of a parsed template with the real seed values restored.
+
+    Returns _PARSE_DIRECT when a sentinel survives substitution (e.g. formatted into a string).
+    """
+    if not seeds:
+        return copy.deepcopy(data)
+    out = _substitute(data, seeds)
+    try:
+        text = json.dumps(out, default=str)
+    except (TypeError, ValueError):
+        return _PARSE_DIRECT
+    if any(str(sentinel) in text for sentinel in seeds):
+        return _PARSE_DIRECT
+    return out
+
+
+def _memo_get(key: str) -> Any:
+    with _MEMO_LOCK:
+        value = _MEMO.get(key, _MISSING)
+        if value is not _MISSING:
+            _MEMO.move_to_end(key)
+        return value
+
+
+def _memo_put(key: str, value: Any) -> None:
+    limit = int(GENINFO_MEMO_MAX or 0)
+    if limit <= 0:
+        return
+    with _MEMO_LOCK:
+        _MEMO[key] = value
+        _MEMO.move_to_end(key)
+        while len(_MEMO) > limit:
+            _MEMO.popitem(last=False)
+
+
+def clear_geninfo_memo() -> None:
+    with _MEMO_LOCK:
+        _MEMO.clear()
+        for k in _MEMO_STATS:
+            _MEMO_STATS[k] = 0
+
+
+def geninfo_memo_stats() -> Dict[str, Any]:
+    with _MEMO_LOCK:
+        return {
+            "entries": len(_MEMO),
+            "max_entries": int(GENINFO_MEMO_MAX or 0),
+            "processes": 0 if _POOL_DISABLED else int(GENINFO_PARSE_PROCESSES or 0),
+            **_MEMO_STATS,
+        }
+
+
+def _count(stat: str) -> None:
+    with _MEMO_LOCK:
+        _MEMO_STATS[stat] += 1
+
+
+def _parse_payload(prompt_graph: Any, workflow: Any) -> Optional[Dict[str, Any]]:
+    """Worker entry point: plain data in and out (picklable for the process pool)."""
+    res = parse_geninfo_from_prompt(prompt_graph, workflow=workflow)
+    return res.data if res.ok else None
+
+
+def _get_pool() -> Optional[Executor]:
+    global _POOL
+    workers = int(GENINFO_PARSE_PROCESSES or 0)
+    if workers <= 0 or _POOL_DISABLED:
+        return None
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def shutdown_geninfo_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_parse(prompt_graph: Any, workflow: Any) -> Optional[Dict[str, Any]]:
+    global _POOL_DISABLED
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return await loop.run_in_executor(pool, _parse_payload, prompt_graph, workflow)
+        except (BrokenProcessPool, OSError, RuntimeError) as exc:
+            logger.warning("GenInfo process pool unavailable, parsing in threads: %s", exc)
+            _POOL_DISABLED = True
+            shutdown_geninfo_pool()
+    return await loop.run_in_executor(None, _parse_payload, prompt_graph, workflow)
+
+
+async def parse_geninfo_memoized(prompt_graph: Any, workflow: Any = None) -> Result[Optional[Dict[str, Any]]]:
+    """
+    Parse GenInfo for one asset, reusing the parse of any earlier asset with the same
+    graph modulo seeds. Same contract as `parse_geninfo_from_prompt`.
+    """
+    template = await asyncio.to_thread(template_graph, prompt_graph, workflow)
+    if template is None:
+        _count("bypassed")
+        return Result.Ok(await _run_parse(prompt_graph, workflow))
+
+    cached = _memo_get(template.key)
+    if cached is _PARSE_DIRECT:
+        _count("bypassed")
+        return Result.Ok(await _run_parse(prompt_graph, workflow))
+    if cached is _MISSING:
+        _count("misses")
+        cached = await _run_parse(template.prompt, template.workflow)
+        _memo_put(template.key, cached)
+    else:
+        _count("hits")
+
+    data = apply_seeds(cached, template.seeds)
+    if data is _PARSE_DIRECT:
+        _memo_put(template.key, _PARSE_DIRECT)
+        _count("bypassed")
+        return Result.Ok(await _run_parse(prompt_graph, workflow))
+    return Result.Ok(data)
@@ -1,11 +1,12 @@
 """
 Health service - system status and tool availability.
 """
-import os
 from pathlib import Path
-from typing import Optional, Sequence, Tuple, List
+from typing import Any, Optional, Sequence, Tuple, List
 
 from ...shared import Result, get_logger
+from ...adapters.db.schema import asset_stats_reconcile_pending, reconcile_asset_stats
+from ...adapters.db.scope_roots import scope_root_keys, scope_roots_where
 from ...adapters.db.sqlite import Sqlite
 from ...adapters.tools import ExifTool, FFProbe
 from ...config import get_tool_paths
@@ -58,6 +59,7 @@ class HealthService:
                 "exiftool": {
                     "available": self.exiftool.is_available(),
                     "required": False,  # Optional but recommended
+                    "pool": self._get_exiftool_pool_stats(),
                 },
                 "ffprobe": {
                     "available": self.ffprobe.is_available(),
@@ -146,25 +148,13 @@ class HealthService:
         else:
             return "degraded"  # No external tools but DB works
 
-    def _roots_where(self, roots: Sequence[str]) -> Tuple[str, List[str]]:
-        def _escape_like_pattern(pattern: str) -> str:
-            return pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-
-        clauses = []
-        params: List[str] = []
-        for root in roots:
-            if not root:
-                continue
-            try:
-                base = str(Path(str(root)).resolve(strict=False))
-            except OSError:
-                continue
-            base_sep = base if base.endswith(os.sep) else base + os.sep
-            clauses.append("(a.filepath = ? OR a.filepath LIKE ? ESCAPE '\\')")
-            params.extend([base, _escape_like_pattern(base_sep) + "%"])
-        if not clauses:
+    async def _roots_where(self, roots: Sequence[str]) -> Tuple[str, List[Any]]:
+        result = await scope_roots_where(self.db, roots)
+        if not result.ok or result.data is None:
+            if result.code != "INVALID_INPUT":
+                logger.warning("Failed to scope health counters to roots: %s", result.error)
             return "1=1", []
-        return "(" + " OR ".join(clauses) + ")", params
+        return result.data
 
     def _get_db_file_size_bytes(self) -> int:
         """
@@ -187,61 +177,130 @@ class HealthService:
         except Exception:
             return 0
 
-    async def get_counters(self, roots: Optional[Sequence[str]] = None) -> Result[dict]:
+    async def reconcile_counters(self) -> Result[int]:
+        """Rebuild the trigger-maintained asset_stats counters from the assets table."""
+        return await reconcile_asset_stats(self.db)
+
+    async def counters_reconcile_pending(self) -> bool:
+        return await asset_stats_reconcile_pending(self.db)
+
+    async def _counts_from_stats(self, roots: Optional[Sequence[str]]) -> Optional[dict]:
         """
-        Get database counters.
+        Sum asset_stats rows for the assets under `roots` (all when None); None if not usable.
 
-        Returns:
-            Result with counters dict containing asset counts
+        Rows are keyed by scope_root, so a root sums exactly the scope keys `_counts_by_scan`
+        seeks. Unstamped assets count under '' and only the scan finds them by filepath.
         """
-        try:
-            where_sql, where_params = self._roots_where(roots) if roots else ("1=1", [])
-            params = tuple(where_params)
+        where_sql = "1=1"
+        params: List[str] = []
+        if roots:
+            resolved = await scope_root_keys(self.db, roots)
+            if not resolved.ok or resolved.data is None:
+                return None
+            scope_keys, unstamped = resolved.data
+            if unstamped or not scope_keys:
+                return None
+            where_sql = f"scope_root IN ({', '.join('?' for _ in scope_keys)})"
+            params = list(scope_keys)
+        result = await self.db.aquery(
+            f"""
+            SELECT kind, SUM(total) AS total, SUM(rated) AS rated,
+                   SUM(with_workflow) AS with_workflow, SUM(with_generation_data) AS with_generation_data
+            FROM asset_stats
+            WHERE {where_sql}
+            GROUP BY kind
+            """,
+            tuple(params),
+        )
+        if not result.ok:
+            return None
+        rows = [row for row in result.data or [] if int(row.get("total") or 0) > 0]
+        return {
+            "total": sum(int(row["total"]) for row in rows),
+            "by_kind": {row["kind"]: int(row["total"]) for row in rows},
+            "rated": sum(int(row.get("rated") or 0) for row in rows),
+            "with_workflow": sum(int(row.get("with_workflow") or 0) for row in rows),
+            "with_generation_data": sum(int(row.get("with_generation_data") or 0) for row in rows),
+        }
 
-            total_result = await self.db.aexecute(
-                f"SELECT COUNT(*) as count FROM assets a WHERE {where_sql}",
-                params,
-                fetch=True,
-            )
+    async def _counts_by_scan(self, roots: Optional[Sequence[str]]) -> dict:
+        where_sql, where_params = await self._roots_where(roots) if roots else ("1=1", [])
+        params = tuple(where_params)
+
+        total_result = await self.db.aexecute(
+            f"SELECT COUNT(*) as count FROM assets a WHERE {where_sql}",
+            params,
+            fetch=True,
+        )
+
+        kind_result = await self.db.aexecute(
+            f"SELECT a.kind, COUNT(*) as count FROM assets a WHERE {where_sql} GROUP BY a.kind",
+            params,
+            fetch=True,
+        )
+
+        rated_result = await self.db.aexecute(
+            f"""
+            SELECT COUNT(*) as count
+            FROM asset_metadata m
+            JOIN assets a ON a.id = m.asset_id
+            WHERE m.rating > 0 AND {where_sql}
+            """,
+            params,
+            fetch=True,
+        )
+
+        workflow_result = await self.db.aexecute(
+            f"""
+            SELECT COUNT(*) as count
+            FROM asset_metadata m
+            JOIN assets a ON a.id = m.asset_id
+            WHERE m.has_workflow = 1 AND {where_sql}
+            """,
+            params,
+            fetch=True,
+        )
+
+        generation_result = await self.db.aexecute(
+            f"""
+            SELECT COUNT(*) as count
+            FROM asset_metadata m
+            JOIN assets a ON a.id = m.asset_id
+            WHERE m.has_generation_data = 1 AND {where_sql}
+            """,
+            params,
+            fetch=True,
+        )
+
+        by_kind = {}
+        if kind_result.ok and kind_result.data and len(kind_result.data) > 0:
+            by_kind = {row["kind"]: row["count"] for row in kind_result.data}
 
-            kind_result = await self.db.aexecute(
-                f"SELECT a.kind, COUNT(*) as count FROM assets a WHERE {where_sql} GROUP BY a.kind",
-                params,
-                fetch=True,
-            )
+        return {
+            "total": total_result.data[0]["count"] if total_result.ok and total_result.data else 0,
+            "by_kind": by_kind,
+            "rated": rated_result.data[0]["count"] if rated_result.ok and rated_result.data else 0,
+            "with_workflow": workflow_result.data[0]["count"] if workflow_result.ok and workflow_result.data else 0,
+            "with_generation_data": generation_result.data[0]["count"] if generation_result.ok and generation_result.data else 0,
+        }
 
-            rated_result = await self.db.aexecute(
-                f"""
-                SELECT COUNT(*) as count
-                FROM asset_metadata m
-                JOIN assets a ON a.id = m.asset_id
-                WHERE m.rating > 0 AND {where_sql}
-                """,
-                params,
-                fetch=True,
-            )
+    async def get_counters(self, roots: Optional[Sequence[str]] = None) -> Result[dict]:
+        """
+        Get database counters.
 
-            workflow_result = await self.db.aexecute(
-                f"""
-                SELECT COUNT(*) as count
-                FROM asset_metadata m
-                JOIN assets a ON a.id = m.asset_id
-                WHERE m.has_workflow = 1 AND {where_sql}
-                """,
-                params,
-                fetch=True,
-            )
+        Args:
+            roots: Restrict counts to assets under these directories. Served from the
+                asset_stats table once it has been reconciled (scans assets otherwise).
 
-            generation_result = await self.db.aexecute(
-                f"""
-                SELECT COUNT(*) as count
-                FROM asset_metadata m
-                JOIN assets a ON a.id = m.asset_id
-                WHERE m.has_generation_data = 1 AND {where_sql}
-                """,
-                params,
-                fetch=True,
-            )
+        Returns:
+            Result with counters dict containing asset counts
+        """
+        try:
+            counts = None
+            if not await asset_stats_reconcile_pending(self.db):
+                counts = await self._counts_from_stats(roots)
+            if counts is None:
+                counts = await self._counts_by_scan(roots)
 
             last_scan_result = await self.db.aexecute(
                 "SELECT value FROM metadata WHERE key = 'last_scan_end'",
@@ -255,24 +314,19 @@ class HealthService:
             )
             last_index_end = last_index_result.data[0]["value"] if last_index_result.ok and last_index_result.data else None
 
-            # Get counts by kind
-            by_kind = {}
-            if kind_result.ok and kind_result.data and len(kind_result.data) > 0:
-                by_kind = {row["kind"]: row["count"] for row in kind_result.data}
-
-            workflow_count = workflow_result.data[0]["count"] if workflow_result.ok and workflow_result.data else 0
-            generation_count = generation_result.data[0]["count"] if generation_result.ok and generation_result.data else 0
+            by_kind = counts["by_kind"]
+            workflow_count = counts["with_workflow"]
 
             counters = {
-                "total_assets": total_result.data[0]["count"] if total_result.ok and total_result.data else 0,
+                "total_assets": counts["total"],
                 "images": by_kind.get("image", 0),
                 "videos": by_kind.get("video", 0),
                 "audio": by_kind.get("audio", 0),
                 "by_kind": by_kind,  # Keep for backward compatibility
-                "rated": rated_result.data[0]["count"] if rated_result.ok and rated_result.data else 0,
+                "rated": counts["rated"],
                 "with_workflow": workflow_count,
                 "with_workflows": workflow_count,
-                "with_generation_data": generation_count,
+                "with_generation_data": counts["with_generation_data"],
                 "last_scan_end": last_scan_end,
                 "last_index_end": last_index_end,
                 "tool_availability": self._get_tool_capabilities(),
@@ -289,6 +343,18 @@ class HealthService:
                 logger.error(f"Failed to get counters: {e}")
             return Result.Err("DB_ERROR", str(e))
 
+    def _get_exiftool_pool_stats(self) -> dict:
+        """Persistent ExifTool worker pool counters (best-effort)."""
+        try:
+            getter = getattr(self.exiftool, "get_pool_stats", None)
+            if callable(getter):
+                stats = getter()
+                if isinstance(stats, dict):
+                    return stats
+        except Exception as exc:
+            logger.debug("ExifTool pool stats unavailable: %s", exc)
+        return {"enabled": False}
+
     def _get_tool_capabilities(self) -> dict:
         """Report availability of required tooling (ExifTool/FFprobe)."""
         return {
@@ -0,0 +1,231 @@
+"""
+Content-addressed store for large metadata payloads (ComfyUI workflow / prompt graph).
+
+`asset_metadata.metadata_raw` and `metadata_cache.metadata_raw` keep a small
+reference (`{"$blob": "<sha256>"}`) in place of each graph; the graph itself is
+stored once in the `blobs` table, zlib-compressed, keyed by the hash of its
+canonical JSON. Reads go through a small in-process LRU of decompressed JSON text.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypeGuard
+
+from ...adapters.db.sqlite import Sqlite
+from ...config import BLOB_CACHE_MAX_BYTES, BLOB_COMPRESSION_LEVEL
+from ...shared import Result, get_logger
+
+logger = get_logger(__name__)
+
+BLOB_REF_KEY = "$blob"
+BLOB_FIELDS = ("workflow", "prompt")
+BLOB_CODEC = "zlib"
+# Graphs smaller than this stay inline; the reference would not save anything.
+BLOB_MIN_BYTES = 512
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_CACHE_BYTES = 0
+
+
+def is_blob_ref(value: Any) -> TypeGuard[Dict[str, str]]:
+    return isinstance(value, dict) and len(value) == 1 and isinstance(value.get(BLOB_REF_KEY), str)
+
+
+def has_blob_refs(meta: Any) -> bool:
+    return isinstance(meta, dict) and any(is_blob_ref(meta.get(field)) for field in BLOB_FIELDS)
+
+
+def blob_refs(meta: Any) -> Dict[str, str]:
+    """Return {field: hash} for the blob references held by a metadata payload."""
+    if not isinstance(meta, dict):
+        return {}
+    return {field: meta[field][BLOB_REF_KEY] for field in BLOB_FIELDS if is_blob_ref(meta.get(field))}
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def externalize_blobs(meta: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Tuple[bytes, int]], Dict[str, str]]:
+    """
+    Replace large graphs in a metadata payload with blob references.
+
+    Returns:
+        (stripped copy of `meta`, {hash: (compressed bytes, raw size)}, {field: hash})
+    """
+    stripped = dict(meta)
+    blobs: Dict[str, Tuple[bytes, int]] = {}
+    refs: Dict[str, str] = {}
+    for field in BLOB_FIELDS:
+        value = meta.get(field)
+        if is_blob_ref(value):
+            refs[field] = value[BLOB_REF_KEY]
+            continue
+        if not isinstance(value, (dict, list)) or not value:
+            continue
+        try:
+            text = _canonical_json(value)
+        except (TypeError, ValueError):
+            continue
+        raw = text.encode("utf-8")
+        if len(raw) < BLOB_MIN_BYTES:
+            continue
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest not in blobs:
+            blobs[digest] = (zlib.compress(raw, int(BLOB_COMPRESSION_LEVEL)), len(raw))
+        stripped[field] = {BLOB_REF_KEY: digest}
+        refs[field] = digest
+    return stripped, blobs, refs
+
+
+async def store_blobs(db: Sqlite, blobs: Dict[str, Tuple[bytes, int]]) -> Result[Any]:
+    """Insert blobs that are not stored yet (content-addressed, so existing rows are kept)."""
+    if not blobs:
+        return Result.Ok(0)
+    return await db.aexecutemany(
+        "INSERT OR IGNORE INTO blobs (hash, codec, raw_size, data) VALUES (?, ?, ?, ?)",
+        [(digest, BLOB_CODEC, int(size), data) for digest, (data, size) in blobs.items()],
+    )
+
+
+def _cache_get(digest: str) -> Optional[str]:
+    with _CACHE_LOCK:
+        text = _CACHE.get(digest)
+        if text is not None:
+            _CACHE.move_to_end(digest)
+        return text
+
+
+def _cache_put(digest: str, text: str) -> None:
+    global _CACHE_BYTES
+    budget = int(BLOB_CACHE_MAX_BYTES or 0)
+    size = len(text)
+    if budget <= 0 or size > budget // 4:
+        return
+    with _CACHE_LOCK:
+        previous = _CACHE.pop(digest, None)
+        if previous is not None:
+            _CACHE_BYTES -= len(previous)
+        _CACHE[digest] = text
+        _CACHE_BYTES += size
+        while _CACHE_BYTES > budget and _CACHE:
+            _, evicted = _CACHE.popitem(last=False)
+            _CACHE_BYTES -= len(evicted)
+
+
+def clear_blob_cache() -> None:
+    global _CACHE_BYTES
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        _CACHE_BYTES = 0
+
+
+def blob_cache_stats() -> Dict[str, int]:
+    with _CACHE_LOCK:
+        return {"entries": len(_CACHE), "bytes": int(_CACHE_BYTES), "max_bytes": int(BLOB_CACHE_MAX_BYTES or 0)}
+
+
+def _decode_blob(row: Dict[str, Any]) -> Optional[str]:
+    data = row.get("data")
+    if data is None:
+        return None
+    try:
+        raw = bytes(data)
+        if str(row.get("codec") or BLOB_CODEC) == BLOB_CODEC:
+            raw = zlib.decompress(raw)
+        return raw.decode("utf-8")
+    except (zlib.error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        logger.debug("Failed to decode blob %s: %s", row.get("hash"), exc)
+        return None
+
+
+async def load_blob_texts(db: Sqlite, digests: Iterable[str]) -> Dict[str, str]:
+    """Return {hash: decompressed JSON text} for the requested hashes (LRU first, then one IN query)."""
+    found: Dict[str, str] = {}
+    missing: List[str] = []
+    for digest in dict.fromkeys(d for d in digests if isinstance(d, str) and d):
+        text = _cache_get(digest)
+        if text is None:
+            missing.append(digest)
+        else:
+            found[digest] = text
+    if not missing:
+        return found
+    res = await db.aquery_in("SELECT hash, codec, data FROM blobs WHERE {IN_CLAUSE}", "hash", missing)
+    if not res.ok:
+        logger.debug("Blob lookup failed: %s", res.error)
+        return found
+    for row in res.data or []:
+        text = _decode_blob(row)
+        if text is None:
+            continue
+        digest = str(row.get("hash") or "")
+        found[digest] = text
+        _cache_put(digest, text)
+    return found
+
+
+async def load_blob_text(db: Sqlite, digest: Optional[str]) -> Optional[str]:
+    if not digest:
+        return None
+    return (await load_blob_texts(db, [digest])).get(digest)
+
+
+async def resolve_blobs_many(db: Sqlite, metas: Iterable[Any]) -> None:
+    """Replace blob references with their parsed graphs, in place (missing blobs become None)."""
+    targets = [m for m in metas if has_blob_refs(m)]
+    if not targets:
+        return
+    texts = await load_blob_texts(db, (h for m in targets for h in blob_refs(m).values()))
+    for meta in targets:
+        for field, digest in blob_refs(meta).items():
+            text = texts.get(digest)
+            try:
+                meta[field] = json.loads(text) if text is not None else None
+            except ValueError:
+                meta[field] = None
+
+
+async def resolve_blobs(db: Sqlite, meta: Any) -> Any:
+    await resolve_blobs_many(db, [meta])
+    return meta
+
+
+async def prune_orphan_blobs(db: Sqlite) -> Result[int]:
+    """
+    Delete blobs no longer referenced by asset_metadata or metadata_cache.
+
+    One DELETE inside an IMMEDIATE transaction: writers store blobs and the rows that
+    reference them in a single transaction, so a blob is never seen unreferenced mid-write.
+    """
+    deleted: Result[Any] = Result.Ok(0)
+    async with db.atransaction(mode="immediate") as tx:
+        if tx.ok:
+            deleted = await db.aexecute(
+                f"""
+                DELETE FROM blobs
+                WHERE hash NOT IN (SELECT workflow_hash FROM asset_metadata WHERE workflow_hash IS NOT NULL)
+                  AND hash NOT IN (SELECT prompt_hash FROM asset_metadata WHERE prompt_hash IS NOT NULL)
+                  AND hash NOT IN (
+                      SELECT json_extract(metadata_raw, '$.workflow."{BLOB_REF_KEY}"') FROM metadata_cache
+                      WHERE json_extract(metadata_raw, '$.workflow."{BLOB_REF_KEY}"') IS NOT NULL
+                      UNION
+                      SELECT json_extract(metadata_raw, '$.prompt."{BLOB_REF_KEY}"') FROM metadata_cache
+                      WHERE json_extract(metadata_raw, '$.prompt."{BLOB_REF_KEY}"') IS NOT NULL
+                  )
+                """
+            )
+            if deleted.ok:
+                # aexecute reports the connection's last insert rowid ahead of rowcount.
+                deleted = await db.aquery("SELECT changes() AS n")
+    if not tx.ok:
+        return Result.Err("DB_ERROR", tx.error or "Failed to prune blobs")
+    if not deleted.ok:
+        return Result.Err("DB_ERROR", deleted.error or "Failed to prune blobs")
+    rows = deleted.data or []
+    return Result.Ok(int(rows[0].get("n") or 0) if rows else 0)
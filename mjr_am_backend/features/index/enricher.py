@@ -6,10 +6,12 @@ from __future__ import annotations
 import os
 import asyncio
 import time
+from contextlib import AsyncExitStack
 from typing import List, Dict, Any, Optional
 
 from ...shared import get_logger, Result
 from ...adapters.db.sqlite import Sqlite
+from ...metrics import ENRICH_QUEUE_DEPTH
 from ..metadata import MetadataService
 
 
@@ -52,6 +54,7 @@ class MetadataEnricher:
         compute_state_hash_fn,
         prepare_metadata_fields_fn,
         metadata_error_payload_fn,
+        thumbnail_service: Any = None,
     ):
         """
         Initialize metadata enricher.
@@ -62,12 +65,14 @@ class MetadataEnricher:
             compute_state_hash_fn: Function to compute state hash
             prepare_metadata_fields_fn: Function to prepare metadata fields
             metadata_error_payload_fn: Function to create error payload
+            thumbnail_service: Optional ThumbnailService; enriched files get thumbnails queued
         """
         self.db = db
         self.metadata = metadata_service
         self._compute_state_hash = compute_state_hash_fn
         self._prepare_metadata_fields = prepare_metadata_fields_fn
         self._metadata_error_payload = metadata_error_payload_fn
+        self._thumbnails = thumbnail_service
         self._enrich_lock = asyncio.Lock()
         self._enrich_queue: List[tuple[int, str]] = []
         self._enrich_task: Optional[asyncio.Task[None]] = None
@@ -117,6 +122,7 @@ class MetadataEnricher:
                 existing.add(fp)
             # Keep highest priority first (negative = higher priority).
             self._enrich_queue.sort(key=lambda item: item[0])
+            ENRICH_QUEUE_DEPTH.set(len(self._enrich_queue))
             if self._enrich_running and self._enrich_task and not self._enrich_task.done():
                 return
             self._emit_status(True, queued=len(self._enrich_queue))
@@ -141,6 +147,7 @@ class MetadataEnricher:
                 prio = 0
             self._enrich_queue.append((prio, fp))
             self._enrich_queue.sort(key=lambda item: item[0])
+            ENRICH_QUEUE_DEPTH.set(len(self._enrich_queue))
             if self._enrich_running and self._enrich_task and not self._enrich_task.done():
                 self._emit_status(True, queued=len(self._enrich_queue))
                 return
@@ -160,6 +167,7 @@ class MetadataEnricher:
             if clear_queue:
                 self._enrich_queue.clear()
                 self._retry_counts.clear()
+                ENRICH_QUEUE_DEPTH.set(0)
         if task and not task.done():
             task.cancel()
             try:
@@ -184,6 +192,7 @@ class MetadataEnricher:
                     size = max(1, int(self._CHUNK_SIZE or 64))
                     chunk_items = self._enrich_queue[:size]
                     del self._enrich_queue[:size]
+                    ENRICH_QUEUE_DEPTH.set(len(self._enrich_queue))
                     chunk = [fp for _, fp in chunk_items if fp]
                 await self._enrich_metadata_chunk(chunk)
         except Exception as exc:
@@ -198,10 +207,46 @@ class MetadataEnricher:
                 queue_left = len(self._enrich_queue)
             self._emit_status(False, queue_left=queue_left)
 
+    @staticmethod
+    def _stat_files(filepaths: List[str]) -> Dict[str, tuple[int, int]]:
+        """Return {filepath: (mtime_ns, size)}; runs in a worker thread, unreadable files are omitted."""
+        out: Dict[str, tuple[int, int]] = {}
+        for fp in filepaths:
+            try:
+                stat = os.stat(fp)
+            except Exception:
+                continue
+            mtime_ns = getattr(stat, "st_mtime_ns", int(stat.st_mtime * 1_000_000_000))
+            out[fp] = (int(mtime_ns), int(stat.st_size))
+        return out
+
+    @staticmethod
+    def _update_item(asset_id: int, filepath: str, metadata_result: Result[Dict[str, Any]]) -> Dict[str, Any]:
+        width = None
+        height = None
+        duration = None
+        if metadata_result.ok and metadata_result.data:
+            meta = metadata_result.data
+            width = meta.get("width")
+            height = meta.get("height")
+            duration = meta.get("duration")
+        return {
+            "asset_id": asset_id,
+            "width": width,
+            "height": height,
+            "duration": duration,
+            "metadata_result": metadata_result,
+            "filepath": filepath,
+        }
+
     async def _enrich_metadata_chunk(self, filepaths: List[str]) -> None:
         """
         Process a chunk of files for metadata enrichment.
 
+        Files are stat'ed in one worker-thread call and the metadata cache is read with
+        one IN query; new cache rows are written with the asset_metadata rows in one
+        transaction.
+
         Args:
             filepaths: List of file paths to process
         """
@@ -228,52 +273,34 @@ class MetadataEnricher:
             if fp and aid:
                 id_by_fp[str(fp)] = aid
 
-        updates: List[Dict[str, Any]] = []
-        retry_paths: List[str] = []
+        targets = [fp for fp in cleaned if fp in id_by_fp]
+        if not targets:
+            return
 
         # Import helper locally to use shared logic (including FTS population)
         from .metadata_helpers import MetadataHelpers
 
+        stat_map = await asyncio.to_thread(self._stat_files, targets)
+        state_hashes = {
+            fp: self._compute_state_hash(fp, mtime_ns, size)
+            for fp, (mtime_ns, size) in stat_map.items()
+        }
+        # Try cache first to avoid tool work.
+        cached = await MetadataHelpers.retrieve_cached_metadata_many(self.db, state_hashes)
+
+        updates: List[Dict[str, Any]] = []
         to_extract: List[tuple[str, int, str]] = []
-        for fp in cleaned:
-            asset_id = id_by_fp.get(fp)
-            if not asset_id:
+        for fp in targets:
+            state_hash = state_hashes.get(fp)
+            if not state_hash:
                 continue
-            try:
-                stat = os.stat(fp)
-            except Exception:
+            metadata_result = cached.get(fp)
+            if metadata_result is None:
+                to_extract.append((fp, id_by_fp[fp], state_hash))
                 continue
-            mtime_ns = getattr(stat, "st_mtime_ns", int(stat.st_mtime * 1_000_000_000))
-            state_hash = self._compute_state_hash(fp, int(mtime_ns), int(stat.st_size))
-
-            # Try cache first to avoid tool work.
-            metadata_result = await MetadataHelpers.retrieve_cached_metadata(self.db, fp, state_hash)
-            if not (metadata_result and metadata_result.ok):
-                to_extract.append((fp, int(asset_id), state_hash))
-                continue
-            if not metadata_result.ok:
-                metadata_result = self._metadata_error_payload(metadata_result, fp)
-
-            width = None
-            height = None
-            duration = None
-            if metadata_result.ok and metadata_result.data:
-                meta = metadata_result.data
-                width = meta.get("width")
-                height = meta.get("height")
-                duration = meta.get("duration")
-
-            updates.append(
-                {
-                    "asset_id": asset_id,
-                    "width": width,
-                    "height": height,
-                    "duration": duration,
-                    "metadata_result": metadata_result,
-                    "filepath": fp,
-                }
-            )
+            updates.append(self._update_item(id_by_fp[fp], fp, metadata_result))
 
+        cache_entries: List[tuple[str, str, Result[Dict[str, Any]]]] = []
         if to_extract:
             batch_results = await self.metadata.get_metadata_batch([fp for fp, _, _ in to_extract], scan_id=None)
             for fp, asset_id, state_hash in to_extract:
@@ -283,44 +310,138 @@ class MetadataEnricher:
                 elif not metadata_result.ok:
                     metadata_result = self._metadata_error_payload(metadata_result, fp)
                 else:
-                    try:
-                        await MetadataHelpers.store_metadata_cache(self.db, fp, state_hash, metadata_result)
-                    except Exception:
-                        pass
-
-                width = None
-                height = None
-                duration = None
-                if metadata_result.ok and metadata_result.data:
-                    meta = metadata_result.data
-                    width = meta.get("width")
-                    height = meta.get("height")
-                    duration = meta.get("duration")
-
-                updates.append(
-                    {
-                        "asset_id": asset_id,
-                        "width": width,
-                        "height": height,
-                        "duration": duration,
-                        "metadata_result": metadata_result,
-                        "filepath": fp,
-                    }
-                )
+                    cache_entries.append((fp, state_hash, metadata_result))
+                updates.append(self._update_item(asset_id, fp, metadata_result))
 
         if not updates:
             return
 
+        retry_paths = await self._write_updates(updates, cache_entries)
+        self._queue_thumbnails([item["filepath"] for item in updates], retry_paths)
+
+        if retry_paths:
+            to_requeue: List[str] = []
+            for fp in retry_paths:
+                try:
+                    c = int(self._retry_counts.get(fp, 0)) + 1
+                except Exception:
+                    c = 1
+                self._retry_counts[fp] = c
+                if c <= _MAX_ENRICH_RETRIES:
+                    to_requeue.append(fp)
+                else:
+                    logger.warning("Metadata enrichment dropped after max retries (%s): %s", _MAX_ENRICH_RETRIES, fp)
+                    self._retry_counts.pop(fp, None)
+            if to_requeue:
+                await asyncio.sleep(0.2)
+                await self.start_enrichment(to_requeue)
+
+    def _queue_thumbnails(self, filepaths: List[str], skip: List[str]) -> None:
+        if self._thumbnails is None:
+            return
+        skipped = set(skip or [])
+        try:
+            self._thumbnails.pregenerate(fp for fp in filepaths if fp and fp not in skipped)
+        except Exception as exc:
+            logger.debug("Thumbnail pregeneration not queued: %s", exc)
+
+    async def _write_update(self, item: Dict[str, Any]) -> None:
+        from .metadata_helpers import MetadataHelpers
+
+        asset_id = int(item["asset_id"])
+        await self.db.aexecute(
+            """
+            UPDATE assets
+            SET width = COALESCE(?, width),
+                height = COALESCE(?, height),
+                duration = COALESCE(?, duration),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (item.get("width"), item.get("height"), item.get("duration"), asset_id),
+        )
+        # Use shared helper to write metadata (ensures tags_text/FTS is populated with prompt/geninfo)
+        await MetadataHelpers.write_asset_metadata_row(
+            self.db,
+            asset_id,
+            item["metadata_result"],
+            filepath=item.get("filepath"),
+        )
+
+    async def _write_updates(
+        self,
+        updates: List[Dict[str, Any]],
+        cache_entries: List[tuple[str, str, Result[Dict[str, Any]]]],
+    ) -> List[str]:
+        """
+        Write a chunk's asset/metadata updates and new cache rows in one transaction.
+
+        Falls back to one transaction per asset when the chunk transaction fails with a
+        non-transient error, so a single bad row does not hold back the rest.
+
+        Returns:
+            File paths to retry later
+        """
+        from .metadata_helpers import MetadataHelpers
+
+        updates = [
+            item for item in updates
+            if item.get("asset_id") and isinstance(item.get("metadata_result"), Result)
+        ]
+        if not updates:
+            return []
+        filepaths = [str(item.get("filepath") or "") for item in updates]
+        asset_ids = sorted({int(item["asset_id"]) for item in updates})
+        try:
+            async with AsyncExitStack() as asset_locks:
+                # Sorted acquisition: other writers hold at most one asset lock at a time.
+                for asset_id in asset_ids:
+                    await asset_locks.enter_async_context(self.db.lock_for_asset(asset_id))
+                # Use deferred tx to reduce lock contention with concurrent search/sort reads.
+                async with self.db.atransaction(mode="deferred") as tx:
+                    if not tx.ok:
+                        logger.warning(
+                            "Metadata enrichment skipped (transaction begin failed) for %s assets: %s",
+                            len(updates),
+                            tx.error,
+                        )
+                        return [fp for fp in filepaths if fp]
+                    if cache_entries:
+                        cache_res = await MetadataHelpers.store_metadata_cache_many(self.db, cache_entries)
+                        if not cache_res.ok:
+                            logger.debug("Metadata cache write failed during enrichment: %s", cache_res.error)
+                    for item in updates:
+                        await self._write_update(item)
+            if not tx.ok:
+                logger.warning("Metadata enrichment commit failed for %s assets: %s", len(updates), tx.error)
+                return [fp for fp in filepaths if fp]
+        except Exception as exc:
+            if _is_transient_db_error(exc):
+                logger.info("Metadata enrichment deferred for %s assets due to DB contention/reset: %s", len(updates), exc)
+                return [fp for fp in filepaths if fp]
+            logger.warning("Metadata enrichment batch failed (%s); retrying assets individually.", exc)
+            return await self._write_updates_individually(updates, cache_entries)
+
+        for fp in filepaths:
+            self._retry_counts.pop(fp, None)
+        await self._notify_updated(asset_ids)
+        return []
+
+    async def _write_updates_individually(
+        self,
+        updates: List[Dict[str, Any]],
+        cache_entries: List[tuple[str, str, Result[Dict[str, Any]]]],
+    ) -> List[str]:
+        from .metadata_helpers import MetadataHelpers
+
+        cache_by_fp = {entry[0]: entry for entry in cache_entries}
+        retry_paths: List[str] = []
+        written: List[int] = []
         for item in updates:
-            asset_id = item.get("asset_id")
-            if not asset_id:
-                continue
-            meta_res = item.get("metadata_result")
-            if not isinstance(meta_res, Result):
-                continue
+            asset_id = int(item["asset_id"])
+            fp = str(item.get("filepath") or "")
             try:
                 async with self.db.lock_for_asset(asset_id):
-                    # Use deferred tx to reduce lock contention with concurrent search/sort reads.
                     async with self.db.atransaction(mode="deferred") as tx:
                         if not tx.ok:
                             logger.warning(
@@ -328,81 +449,53 @@ class MetadataEnricher:
                                 asset_id,
                                 tx.error,
                             )
-                            fp = str(item.get("filepath") or "")
                             if fp:
                                 retry_paths.append(fp)
                             continue
-                        await self.db.aexecute(
-                            """
-                            UPDATE assets
-                            SET width = COALESCE(?, width),
-                                height = COALESCE(?, height),
-                                duration = COALESCE(?, duration),
-                                updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                            """,
-                            (item.get("width"), item.get("height"), item.get("duration"), asset_id),
-                        )
-                        # Use shared helper to write metadata (ensures tags_text/FTS is populated with prompt/geninfo)
-                        await MetadataHelpers.write_asset_metadata_row(
-                            self.db,
-                            asset_id,
-                            meta_res,
-                            filepath=item.get("filepath"),
-                        )
+                        if fp in cache_by_fp:
+                            await MetadataHelpers.store_metadata_cache_many(self.db, [cache_by_fp[fp]])
+                        await self._write_update(item)
                     if not tx.ok:
                         logger.warning("Metadata enrichment commit failed for asset_id=%s: %s", asset_id, tx.error)
-                        fp = str(item.get("filepath") or "")
                         if fp:
                             retry_paths.append(fp)
                     else:
-                        fp = str(item.get("filepath") or "")
                         if fp:
                             self._retry_counts.pop(fp, None)
-                        # Notify frontend so workflow dot updates promptly.
-                        try:
-                            res = await self.db.aquery(
-                                """
-                                SELECT a.id, m.has_workflow AS has_workflow,
-                                       m.has_generation_data AS has_generation_data
-                                FROM assets a
-                                LEFT JOIN asset_metadata m ON a.id = m.asset_id
-                                WHERE a.id = ?
-                                LIMIT 1
-                                """,
-                                (int(asset_id),),
-                            )
-                            if res.ok and res.data:
-                                payload = dict(res.data[0])
-                                from ...routes.registry import PromptServer
-                                PromptServer.instance.send_sync("mjr-asset-updated", payload)
-                        except Exception:
-                            pass
+                        written.append(asset_id)
             except Exception as exc:
-                fp = str(item.get("filepath") or "")
                 if _is_transient_db_error(exc):
                     logger.info("Metadata enrichment deferred for asset_id=%s due to DB contention/reset: %s", asset_id, exc)
                     if fp:
                         retry_paths.append(fp)
                 else:
                     logger.warning("Metadata enrichment update failed for asset_id=%s: %s", asset_id, exc)
+        await self._notify_updated(written)
+        return retry_paths
 
-        if retry_paths:
-            to_requeue: List[str] = []
-            for fp in retry_paths:
-                try:
-                    c = int(self._retry_counts.get(fp, 0)) + 1
-                except Exception:
-                    c = 1
-                self._retry_counts[fp] = c
-                if c <= _MAX_ENRICH_RETRIES:
-                    to_requeue.append(fp)
-                else:
-                    logger.warning("Metadata enrichment dropped after max retries (%s): %s", _MAX_ENRICH_RETRIES, fp)
-                    self._retry_counts.pop(fp, None)
-            if to_requeue:
-                await asyncio.sleep(0.2)
-                await self.start_enrichment(to_requeue)
+    async def _notify_updated(self, asset_ids: List[int]) -> None:
+        """Notify the frontend so workflow dots update promptly."""
+        if not asset_ids:
+            return
+        try:
+            res = await self.db.aquery_in(
+                """
+                SELECT a.id, m.has_workflow AS has_workflow,
+                       m.has_generation_data AS has_generation_data
+                FROM assets a
+                LEFT JOIN asset_metadata m ON a.id = m.asset_id
+                WHERE {IN_CLAUSE}
+                """,
+                "a.id",
+                list(asset_ids),
+            )
+            if not res.ok or not res.data:
+                return
+            from ...routes.registry import PromptServer
+            for row in res.data:
+                PromptServer.instance.send_sync("mjr-asset-updated", dict(row))
+        except Exception:
+            pass
 
     def get_queue_length(self) -> int:
         """Return pending enrichment queue length."""
@@ -6,7 +6,7 @@ import asyncio
 import json
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Tuple, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Tuple, Optional
 
 from ...config import (
     MAX_METADATA_JSON_BYTES,
@@ -16,6 +16,14 @@ from ...config import (
 )
 from ...shared import Result, get_logger
 from ...adapters.db.sqlite import Sqlite
+from .blob_store import (
+    BLOB_REF_KEY,
+    externalize_blobs,
+    has_blob_refs,
+    resolve_blobs,
+    resolve_blobs_many,
+    store_blobs,
+)
 from ..metadata.parsing_utils import (
     looks_like_comfyui_workflow,
     looks_like_comfyui_prompt_graph,
@@ -23,9 +31,29 @@ from ..metadata.parsing_utils import (
 )
 
 MAX_TAG_LENGTH = 100
+MAX_GENERATION_TEXT_LENGTH = 255
+GENERATION_COLUMNS = ("workflow_type", "model_name", "sampler", "seed", "steps", "cfg", "generation_time_ms")
+GENERATION_BACKFILL_KEY = "generation_columns_backfill"
+GENERATION_BACKFILL_BATCH = 500
+# asset_metadata columns holding the blobs.hash of the externalized graphs
+BLOB_HASH_COLUMNS = {"workflow": "workflow_hash", "prompt": "prompt_hash"}
+BLOB_MIGRATION_KEY = "blob_store_migration"
+BLOB_MIGRATION_BATCH = 200
+_SQLITE_INT_MIN = -(2 ** 63)
+_SQLITE_INT_MAX = 2 ** 63 - 1
 logger = get_logger(__name__)
 _METADATA_CACHE_CLEANUP_LOCK = asyncio.Lock()
 _METADATA_CACHE_LAST_CLEANUP = 0.0
+_METADATA_CACHE_UPSERT = """
+    INSERT INTO metadata_cache
+    (filepath, state_hash, metadata_hash, metadata_raw)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(filepath) DO UPDATE SET
+        state_hash = excluded.state_hash,
+        metadata_hash = excluded.metadata_hash,
+        metadata_raw = excluded.metadata_raw,
+        last_updated = CURRENT_TIMESTAMP
+"""
 
 
 class MetadataHelpers:
@@ -139,6 +167,328 @@ class MetadataHelpers:
 
         return has_workflow, has_generation_data, metadata_quality, metadata_raw_json
 
+    @staticmethod
+    def externalize_metadata_raw(
+        metadata_result: Result[Dict[str, Any]],
+        metadata_raw_json: str,
+    ) -> Tuple[str, Dict[str, Tuple[bytes, int]], Dict[str, str]]:
+        """
+        Move the workflow/prompt graphs of a payload into blobs.
+
+        Args:
+            metadata_result: Result from metadata extraction
+            metadata_raw_json: Full JSON from prepare_metadata_fields (returned as-is when nothing moves)
+
+        Returns:
+            Tuple of (metadata_raw_json with blob references, blobs to store, {field: blob hash})
+        """
+        if not (metadata_result and metadata_result.ok and isinstance(metadata_result.data, dict) and metadata_result.data):
+            return metadata_raw_json, {}, {}
+        stripped, blobs, blob_hashes = externalize_blobs(metadata_result.data)
+        if not blob_hashes:
+            return metadata_raw_json, {}, {}
+        return json.dumps(stripped), blobs, blob_hashes
+
+    @staticmethod
+    def extract_generation_columns(meta: Any) -> Dict[str, Any]:
+        """
+        Extract the materialized generation columns from a metadata payload.
+
+        Reads the top-level keys first (workflow_type, model, generation_time_ms), then
+        the parsed GenInfo (`{"steps": {"value": 20}, "sampler": {"name": ...}}`).
+
+        Args:
+            meta: Metadata payload (as stored in asset_metadata.metadata_raw)
+
+        Returns:
+            Dict keyed by GENERATION_COLUMNS (missing values are None)
+        """
+        out: Dict[str, Any] = dict.fromkeys(GENERATION_COLUMNS)
+        if not isinstance(meta, dict):
+            return out
+        raw_geninfo = meta.get("geninfo")
+        geninfo: Dict[str, Any] = raw_geninfo if isinstance(raw_geninfo, dict) else {}
+
+        def _field(obj: Any, *keys: str) -> Any:
+            if isinstance(obj, dict):
+                for key in keys:
+                    value = obj.get(key)
+                    if value is not None:
+                        return value
+                return None
+            return obj
+
+        def _text(value: Any) -> Optional[str]:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            if not isinstance(value, str):
+                return None
+            value = value.strip()
+            return value[:MAX_GENERATION_TEXT_LENGTH] if value else None
+
+        def _int(value: Any) -> Optional[int]:
+            if isinstance(value, bool) or value is None:
+                return None
+            try:
+                number = int(float(value)) if isinstance(value, (str, float)) else int(value)
+            except (TypeError, ValueError, OverflowError):
+                return None
+            return number if _SQLITE_INT_MIN <= number <= _SQLITE_INT_MAX else None
+
+        def _float(value: Any) -> Optional[float]:
+            if isinstance(value, bool) or value is None:
+                return None
+            try:
+                number = float(value)
+            except (TypeError, ValueError, OverflowError):
+                return None
+            return number if number == number and abs(number) != float("inf") else None
+
+        engine = geninfo.get("engine") if isinstance(geninfo.get("engine"), dict) else meta.get("engine")
+        workflow_type = _text(meta.get("workflow_type")) or _text(_field(engine, "type") if isinstance(engine, dict) else None)
+        out["workflow_type"] = workflow_type.upper() if workflow_type else None
+
+        raw_models = geninfo.get("models")
+        models: Dict[str, Any] = raw_models if isinstance(raw_models, dict) else {}
+        model_name = _text(_field(models.get("checkpoint"), "name")) or _text(_field(geninfo.get("checkpoint"), "name"))
+        if not model_name:
+            for value in models.values():
+                model_name = _text(_field(value, "name"))
+                if model_name:
+                    break
+        out["model_name"] = model_name or _text(meta.get("model"))
+
+        out["sampler"] = _text(_field(geninfo.get("sampler"), "name", "value")) or _text(
+            _field(geninfo.get("sampler_name"), "value", "name")
+        )
+        out["seed"] = _int(_field(geninfo.get("seed"), "value"))
+        out["steps"] = _int(_field(geninfo.get("steps"), "value"))
+        out["cfg"] = _float(_field(geninfo.get("cfg"), "value"))
+        generation_time = _int(meta.get("generation_time_ms"))
+        out["generation_time_ms"] = generation_time if generation_time is not None and generation_time >= 0 else None
+        return out
+
+    @staticmethod
+    def _generation_backfill_params(rows: list) -> list:
+        params = []
+        for row in rows:
+            try:
+                meta = json.loads(row.get("metadata_raw") or "{}")
+            except (TypeError, ValueError):
+                continue
+            cols = MetadataHelpers.extract_generation_columns(meta)
+            if any(value is not None for value in cols.values()):
+                params.append(tuple(cols[col] for col in GENERATION_COLUMNS) + (row.get("asset_id"),))
+        return params
+
+    @staticmethod
+    async def generation_backfill_pending(db: Sqlite) -> bool:
+        """
+        Return True when existing rows still need `backfill_generation_columns`.
+
+        Empty databases are marked as done immediately.
+        """
+        done = await db.aquery("SELECT value FROM metadata WHERE key = ? LIMIT 1", (GENERATION_BACKFILL_KEY,))
+        if done.ok and done.data and str(done.data[0].get("value") or "") == "done":
+            return False
+        any_row = await db.aquery("SELECT 1 FROM asset_metadata LIMIT 1")
+        if any_row.ok and not any_row.data:
+            await MetadataHelpers.set_metadata_value(db, GENERATION_BACKFILL_KEY, "done")
+            return False
+        return True
+
+    @staticmethod
+    async def backfill_generation_columns(db: Sqlite, batch_size: int = GENERATION_BACKFILL_BATCH) -> Result[int]:
+        """
+        Populate the generation columns for rows written before they existed.
+
+        Walks asset_metadata by asset_id in batches and records completion in the
+        metadata table, so it only runs once per database.
+
+        Args:
+            db: Database adapter instance
+            batch_size: Rows parsed per batch
+
+        Returns:
+            Result with the number of rows updated
+        """
+        done = await db.aquery("SELECT value FROM metadata WHERE key = ? LIMIT 1", (GENERATION_BACKFILL_KEY,))
+        if done.ok and done.data and str(done.data[0].get("value") or "") == "done":
+            return Result.Ok(0)
+
+        batch_size = max(1, int(batch_size or GENERATION_BACKFILL_BATCH))
+        last_id = 0
+        updated = 0
+        assignments = ", ".join(f"{col} = ?" for col in GENERATION_COLUMNS)
+        while True:
+            rows_res = await db.aquery(
+                """
+                SELECT asset_id, metadata_raw
+                FROM asset_metadata
+                WHERE asset_id > ?
+                ORDER BY asset_id
+                LIMIT ?
+                """,
+                (last_id, batch_size),
+            )
+            if not rows_res.ok:
+                return Result.Err("DB_ERROR", rows_res.error or "Failed to read asset_metadata for backfill")
+            rows = rows_res.data or []
+            if not rows:
+                break
+            last_id = int(rows[-1].get("asset_id") or last_id)
+
+            # JSON parsing is CPU-bound; keep it off the event loop.
+            params = await asyncio.to_thread(MetadataHelpers._generation_backfill_params, rows)
+            if params:
+                write = await db.aexecutemany(f"UPDATE asset_metadata SET {assignments} WHERE asset_id = ?", params)
+                if not write.ok:
+                    return Result.Err("DB_ERROR", write.error or "Failed to backfill generation columns")
+                updated += len(params)
+
+        marker = await MetadataHelpers.set_metadata_value(db, GENERATION_BACKFILL_KEY, "done")
+        if not marker.ok:
+            logger.debug("Failed to record generation backfill completion: %s", marker.error)
+        if updated:
+            logger.info("Backfilled generation columns for %s assets", updated)
+        return Result.Ok(updated)
+
+    @staticmethod
+    def _blob_migration_params(rows: list, key: str) -> Tuple[Dict[str, Tuple[bytes, int]], list]:
+        blobs: Dict[str, Tuple[bytes, int]] = {}
+        params = []
+        for row in rows:
+            raw = row.get("metadata_raw")
+            try:
+                meta = json.loads(raw or "{}")
+            except (TypeError, ValueError):
+                continue
+            if not isinstance(meta, dict):
+                continue
+            stripped, row_blobs, blob_hashes = externalize_blobs(meta)
+            if not row_blobs:
+                continue
+            blobs.update(row_blobs)
+            if key == "asset_id":
+                stripped_raw = json.dumps(stripped)
+                hashes = tuple(blob_hashes.get(field) for field in BLOB_HASH_COLUMNS)
+                params.append((stripped_raw, *hashes, row.get(key), raw))
+            else:
+                stripped_raw = json.dumps(stripped, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+                metadata_hash = MetadataHelpers.compute_metadata_hash(stripped_raw)
+                params.append((stripped_raw, metadata_hash, row.get(key), raw))
+        return blobs, params
+
+    @staticmethod
+    async def blob_migration_pending(db: Sqlite) -> bool:
+        """
+        Return True when rows written before the blob store still hold inline graphs.
+
+        Empty databases are marked as done immediately.
+        """
+        done = await db.aquery("SELECT value FROM metadata WHERE key = ? LIMIT 1", (BLOB_MIGRATION_KEY,))
+        if done.ok and done.data and str(done.data[0].get("value") or "") == "done":
+            return False
+        any_row = await db.aquery(
+            "SELECT 1 FROM asset_metadata UNION ALL SELECT 1 FROM metadata_cache LIMIT 1"
+        )
+        if any_row.ok and not any_row.data:
+            await MetadataHelpers.set_metadata_value(db, BLOB_MIGRATION_KEY, "done")
+            return False
+        return True
+
+    @staticmethod
+    async def migrate_inline_blobs(db: Sqlite, batch_size: int = BLOB_MIGRATION_BATCH) -> Result[int]:
+        """
+        Move inline workflow/prompt graphs of existing rows into the blobs table.
+
+        Walks asset_metadata (by asset_id) and metadata_cache (by rowid) in batches.
+        Rows rewritten concurrently are left alone (the update is guarded by the
+        original metadata_raw); completion is recorded in the metadata table.
+
+        Args:
+            db: Database adapter instance
+            batch_size: Rows parsed per batch
+
+        Returns:
+            Result with the number of rows rewritten
+        """
+        done = await db.aquery("SELECT value FROM metadata WHERE key = ? LIMIT 1", (BLOB_MIGRATION_KEY,))
+        if done.ok and done.data and str(done.data[0].get("value") or "") == "done":
+            return Result.Ok(0)
+
+        batch_size = max(1, int(batch_size or BLOB_MIGRATION_BATCH))
+        hash_assignments = ", ".join(f"{col} = ?" for col in BLOB_HASH_COLUMNS.values())
+        passes = (
+            (
+                "asset_id",
+                """
+                SELECT asset_id, metadata_raw FROM asset_metadata
+                WHERE asset_id > ? AND workflow_hash IS NULL AND prompt_hash IS NULL
+                ORDER BY asset_id LIMIT ?
+                """,
+                f"UPDATE asset_metadata SET metadata_raw = ?, {hash_assignments} WHERE asset_id = ? AND metadata_raw = ?",
+            ),
+            (
+                "rowid",
+                "SELECT rowid, metadata_raw FROM metadata_cache WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                "UPDATE metadata_cache SET metadata_raw = ?, metadata_hash = ? WHERE rowid = ? AND metadata_raw = ?",
+            ),
+        )
+        updated = 0
+        for key, select_sql, update_sql in passes:
+            last_id = 0
+            while True:
+                rows_res = await db.aquery(select_sql, (last_id, batch_size))
+                if not rows_res.ok:
+                    return Result.Err("DB_ERROR", rows_res.error or "Failed to read metadata for blob migration")
+                rows = rows_res.data or []
+                if not rows:
+                    break
+                last_id = int(rows[-1].get(key) or last_id)
+
+                # JSON parsing and compression are CPU-bound; keep them off the event loop.
+                blobs, params = await asyncio.to_thread(MetadataHelpers._blob_migration_params, rows, key)
+                if not params:
+                    continue
+                write = await MetadataHelpers._write_with_blobs(
+                    db, blobs, lambda: db.aexecutemany(update_sql, params)
+                )
+                if not write.ok:
+                    return Result.Err("DB_ERROR", write.error or "Failed to rewrite metadata rows")
+                updated += len(params)
+
+        marker = await MetadataHelpers.set_metadata_value(db, BLOB_MIGRATION_KEY, "done")
+        if not marker.ok:
+            logger.debug("Failed to record blob migration completion: %s", marker.error)
+        if updated:
+            logger.info("Moved workflow/prompt graphs of %s metadata rows into the blob store", updated)
+        return Result.Ok(updated)
+
+    @staticmethod
+    async def _write_with_blobs(
+        db: Sqlite,
+        blobs: Dict[str, Tuple[bytes, int]],
+        write: Callable[[], Awaitable[Result[Any]]],
+    ) -> Result[Any]:
+        """
+        Store blobs and run the write that references them in one transaction.
+
+        Blobs go in first so a committed row never references a missing graph, and
+        `prune_orphan_blobs` never sees them before their referencing row.
+        """
+        if not blobs:
+            return await write()
+        res: Result[Any] = Result.Ok(0)
+        async with db.atransaction(mode="immediate") as tx:
+            if tx.ok:
+                res = await store_blobs(db, blobs)
+                if res.ok:
+                    res = await write()
+        if not tx.ok:
+            return Result.Err(tx.code or "DB_ERROR", tx.error or "Failed to store blobs")
+        return res
+
     @staticmethod
     def _bool_to_db(value: Optional[bool]) -> Optional[int]:
         if value is True:
@@ -194,7 +544,11 @@ class MetadataHelpers:
         Returns:
             Result from database operation
         """
+        if metadata_result and metadata_result.ok and has_blob_refs(metadata_result.data):
+            # Payloads re-read from asset_metadata (merge-and-rewrite paths) carry blob references.
+            await resolve_blobs(db, metadata_result.data)
         has_workflow, has_generation_data, metadata_quality, metadata_raw_json = MetadataHelpers.prepare_metadata_fields(metadata_result)
+        metadata_raw_json, blobs, blob_hashes = MetadataHelpers.externalize_metadata_raw(metadata_result, metadata_raw_json)
         db_has_workflow = MetadataHelpers._bool_to_db(has_workflow)
         db_has_generation = MetadataHelpers._bool_to_db(has_generation_data)
 
@@ -221,6 +575,7 @@ class MetadataHelpers:
                     )
                 except Exception:
                     metadata_raw_json = "{}"
+                blobs, blob_hashes = {}, {}
         if truncated:
             try:
                 metadata_result.meta["truncated"] = True
@@ -246,6 +601,10 @@ class MetadataHelpers:
         extracted_rating = 0
         extracted_tags_json = "[]"
         extracted_tags_text = ""
+        extracted_metadata_text = ""
+        generation_cols = MetadataHelpers.extract_generation_columns(
+            metadata_result.data if metadata_result and metadata_result.ok and not truncated else None
+        )
         if metadata_result and metadata_result.ok and metadata_result.data:
             meta = metadata_result.data
             try:
@@ -273,10 +632,12 @@ class MetadataHelpers:
                 extracted_tags_json = "[]"
                 extracted_tags_text = ""
 
-        # Enrich tags_text with GenInfo (Models, LoRAs, Prompts) for FTS
+        # Enrich tags_text with GenInfo (Models, LoRAs) for the tags FTS index; prompt text
+        # goes to metadata_text (prompt FTS index) so the tags index stays small.
         if metadata_result and metadata_result.ok and metadata_result.data:
             meta = metadata_result.data
             extras = []
+            prompt_texts = []
             geninfo = meta.get("geninfo")
             if isinstance(geninfo, dict):
                 # Models
@@ -300,7 +661,7 @@ class MetadataHelpers:
                 if isinstance(pos_obj, dict):
                     p_val = pos_obj.get("value")
                     if isinstance(p_val, str) and p_val.strip():
-                        extras.append(p_val.strip())
+                        prompt_texts.append(p_val.strip())
 
                 # Workflow Type (T2I, I2V, etc.)
                 engine = geninfo.get("engine")
@@ -331,20 +692,7 @@ class MetadataHelpers:
                 else:
                     extracted_tags_text = " ".join(extras)
 
-            # Concat all metadata fields for metadata_text
-            meta_fields = [extracted_tags_text] + extras
-            # Add prompts, parameters, model, workflow, etc. from metadata_raw
-            if meta.get("prompt"):
-                meta_fields.append(str(meta.get("prompt")))
-            if meta.get("parameters"):
-                meta_fields.append(str(meta.get("parameters")))
-            if meta.get("model"):
-                meta_fields.append(str(meta.get("model")))
-            if meta.get("workflow_type"):
-                meta_fields.append(str(meta.get("workflow_type")))
-            if meta.get("metadata_raw"):
-                meta_fields.append(str(meta.get("metadata_raw")))
-            " ".join([str(f) for f in meta_fields if f])
+            extracted_metadata_text = " ".join(prompt_texts)
 
         # Import existing OS/file metadata when DB has defaults, without overriding user edits.
         # - rating: only set if current rating is 0
@@ -356,12 +704,22 @@ class MetadataHelpers:
         quality_rank_excluded = "CASE excluded.metadata_quality WHEN 'full' THEN 3 WHEN 'partial' THEN 2 WHEN 'degraded' THEN 1 ELSE 0 END"
         quality_rank_current = "CASE COALESCE(asset_metadata.metadata_quality, 'none') WHEN 'full' THEN 3 WHEN 'partial' THEN 2 WHEN 'degraded' THEN 1 ELSE 0 END"
         should_upgrade = f"({quality_rank_excluded} >= {quality_rank_current})"
+        guarded_columns = ("metadata_text", *GENERATION_COLUMNS, *BLOB_HASH_COLUMNS.values())
+        guarded_updates = "".join(
+            f""",
+                {col} = CASE
+                    WHEN {should_upgrade} THEN excluded.{col}
+                    ELSE asset_metadata.{col}
+                END"""
+            for col in guarded_columns
+        )
 
-        return await db.aexecute(
-            """
+        upsert_sql = """
             INSERT INTO asset_metadata
-            (asset_id, rating, tags, tags_text, has_workflow, has_generation_data, metadata_quality, metadata_raw)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            (asset_id, rating, tags, tags_text, has_workflow, has_generation_data, metadata_quality, metadata_raw,
+             metadata_text, workflow_type, model_name, sampler, seed, steps, cfg, generation_time_ms,
+             workflow_hash, prompt_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(asset_id) DO UPDATE SET
                 rating = CASE
                     WHEN COALESCE(asset_metadata.rating, 0) = 0 THEN excluded.rating
@@ -390,19 +748,22 @@ class MetadataHelpers:
                 metadata_raw = CASE
                     WHEN {should_upgrade} THEN excluded.metadata_raw
                     ELSE asset_metadata.metadata_raw
-                END
-            """.format(should_upgrade=should_upgrade),
-            (
-                asset_id,
-                extracted_rating,
-                extracted_tags_json,
-                extracted_tags_text,
-                db_has_workflow,
-                db_has_generation,
-                metadata_quality,
-                metadata_raw_json,
-            ),
+                END{guarded_updates}
+            """.format(should_upgrade=should_upgrade, guarded_updates=guarded_updates)
+        params = (
+            asset_id,
+            extracted_rating,
+            extracted_tags_json,
+            extracted_tags_text,
+            db_has_workflow,
+            db_has_generation,
+            metadata_quality,
+            metadata_raw_json,
+            extracted_metadata_text,
+            *(generation_cols[col] for col in GENERATION_COLUMNS),
+            *(blob_hashes.get(field) for field in BLOB_HASH_COLUMNS),
         )
+        return await MetadataHelpers._write_with_blobs(db, blobs, lambda: db.aexecute(upsert_sql, params))
 
     @staticmethod
     async def refresh_metadata_if_needed(
@@ -443,6 +804,7 @@ class MetadataHelpers:
 
             current = result.data[0] if result.data else None
             new_has_workflow, new_has_generation_data, _, new_metadata_raw = MetadataHelpers.prepare_metadata_fields(metadata_result)
+            new_metadata_raw, _, _ = MetadataHelpers.externalize_metadata_raw(metadata_result, new_metadata_raw)
             new_has_workflow_db = MetadataHelpers._bool_to_db(new_has_workflow)
             new_has_generation_db = MetadataHelpers._bool_to_db(new_has_generation_data)
 
@@ -491,9 +853,75 @@ class MetadataHelpers:
 
         try:
             payload = json.loads(raw)
-            return Result.Ok(payload, source="cache")
         except json.JSONDecodeError:
             return None
+        await resolve_blobs(db, payload)
+        return Result.Ok(payload, source="cache")
+
+    @staticmethod
+    async def retrieve_cached_metadata_many(
+        db: Sqlite,
+        state_hashes: Dict[str, str],
+    ) -> Dict[str, Result[Dict[str, Any]]]:
+        """
+        Bulk variant of `retrieve_cached_metadata` (one IN query for the whole batch).
+
+        Args:
+            db: Database adapter instance
+            state_hashes: Mapping of file path to its current state hash
+
+        Returns:
+            Mapping of file path to cached metadata result (cache misses are omitted)
+        """
+        wanted = {fp: sh for fp, sh in (state_hashes or {}).items() if fp and sh}
+        if not wanted:
+            return {}
+        result = await db.aquery_in(
+            "SELECT filepath, state_hash, metadata_raw FROM metadata_cache WHERE {IN_CLAUSE}",
+            "filepath",
+            list(wanted),
+        )
+        if not result.ok:
+            return {}
+        payloads: Dict[str, Dict[str, Any]] = {}
+        for row in result.data or []:
+            fp = str(row.get("filepath") or "")
+            raw = row.get("metadata_raw")
+            if not fp or not raw or row.get("state_hash") != wanted.get(fp):
+                continue
+            try:
+                payload = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(payload, dict):
+                payloads[fp] = payload
+        await resolve_blobs_many(db, payloads.values())
+        return {fp: Result.Ok(payload, source="cache") for fp, payload in payloads.items()}
+
+    @staticmethod
+    async def inline_cached_blobs(db: Sqlite, raw_by_key: Dict[Any, Any]) -> None:
+        """
+        Rewrite prefetched metadata_cache JSON strings so blob references carry the graphs again.
+
+        Args:
+            db: Database adapter instance
+            raw_by_key: Mapping of any key to metadata_cache.metadata_raw text (updated in place)
+        """
+        parsed: Dict[Any, Dict[str, Any]] = {}
+        for key, raw in raw_by_key.items():
+            if not isinstance(raw, str) or BLOB_REF_KEY not in raw:
+                continue
+            try:
+                payload = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if has_blob_refs(payload):
+                parsed[key] = payload
+        if not parsed:
+            return
+        await resolve_blobs_many(db, parsed.values())
+        for key, payload in parsed.items():
+            raw_by_key[key] = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
 
     @staticmethod
     async def _maybe_cleanup_metadata_cache(db: Sqlite) -> None:
@@ -574,11 +1002,67 @@ class MetadataHelpers:
         Returns:
             Result from database operation
         """
+        prepared = MetadataHelpers._metadata_cache_row(filepath, state_hash, metadata_result)
+        if not prepared.ok or prepared.data is None:
+            return prepared
+        row, blobs = prepared.data
+        write_res = await MetadataHelpers._write_with_blobs(db, blobs, lambda: db.aexecute(_METADATA_CACHE_UPSERT, row))
+        try:
+            await MetadataHelpers._maybe_cleanup_metadata_cache(db)
+        except Exception:
+            pass
+        return write_res
+
+    @staticmethod
+    async def store_metadata_cache_many(
+        db: Sqlite,
+        entries: List[Tuple[str, str, Result[Dict[str, Any]]]],
+    ) -> Result[int]:
+        """
+        Bulk variant of `store_metadata_cache`: one blob insert and one executemany upsert.
+
+        Args:
+            db: Database adapter instance
+            entries: (filepath, state_hash, metadata_result) tuples
+
+        Returns:
+            Result with the number of cache rows written (skipped payloads are not counted)
+        """
+        rows: List[Tuple[Any, ...]] = []
+        blobs: Dict[str, Tuple[bytes, int]] = {}
+        for filepath, state_hash, metadata_result in entries or []:
+            prepared = MetadataHelpers._metadata_cache_row(filepath, state_hash, metadata_result)
+            if not prepared.ok or prepared.data is None:
+                continue
+            row, row_blobs = prepared.data
+            rows.append(row)
+            blobs.update(row_blobs)
+        if not rows:
+            return Result.Ok(0)
+        write_res = await MetadataHelpers._write_with_blobs(
+            db, blobs, lambda: db.aexecutemany(_METADATA_CACHE_UPSERT, rows)
+        )
+        if not write_res.ok:
+            return Result.Err(write_res.code or "DB_ERROR", write_res.error or "Failed to store metadata cache")
+        try:
+            await MetadataHelpers._maybe_cleanup_metadata_cache(db)
+        except Exception:
+            pass
+        return Result.Ok(len(rows))
+
+    @staticmethod
+    def _metadata_cache_row(
+        filepath: str,
+        state_hash: str,
+        metadata_result: Result[Dict[str, Any]],
+    ) -> Result[Tuple[Tuple[Any, ...], Dict[str, Tuple[bytes, int]]]]:
+        """Build the metadata_cache upsert parameters (and blobs to store) for one payload."""
         if not metadata_result.ok or not metadata_result.data:
             return Result.Err("CACHE_SKIPPED", "No metadata to cache")
 
+        stripped, blobs, _ = externalize_blobs(metadata_result.data)
         metadata_raw = json.dumps(
-            metadata_result.data,
+            stripped,
             ensure_ascii=False,
             separators=(",", ":"),
             sort_keys=True
@@ -609,25 +1093,7 @@ class MetadataHelpers:
                     max_bytes=int(max_bytes),
                 )
         metadata_hash = MetadataHelpers.compute_metadata_hash(metadata_raw)
-
-        write_res = await db.aexecute(
-            """
-            INSERT INTO metadata_cache
-            (filepath, state_hash, metadata_hash, metadata_raw)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(filepath) DO UPDATE SET
-                state_hash = excluded.state_hash,
-                metadata_hash = excluded.metadata_hash,
-                metadata_raw = excluded.metadata_raw,
-                last_updated = CURRENT_TIMESTAMP
-            """,
-            (filepath, state_hash, metadata_hash, metadata_raw)
-        )
-        try:
-            await MetadataHelpers._maybe_cleanup_metadata_cache(db)
-        except Exception:
-            pass
-        return write_res
+        return Result.Ok(((filepath, state_hash, metadata_hash, metadata_raw), blobs))
 
     @staticmethod
     def compute_metadata_hash(raw_json: str) -> str:
@@ -2,6 +2,7 @@
 Index scanner - handles directory scanning and file indexing operations.
 """
 import hashlib
+import json
 import logging
 import os
 import time
@@ -11,12 +12,15 @@ import sqlite3
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from queue import Empty, Queue
-from typing import List, Dict, Any, Iterable, Optional, cast
+from typing import List, Dict, Any, Iterable, NamedTuple, Optional, Sequence, Union, cast
 from datetime import datetime
 from uuid import uuid4
 
 from ...shared import get_logger, Result, classify_file, FileKind, ErrorCode, log_structured, EXTENSIONS
 from ...adapters.db.sqlite import Sqlite
+from ...adapters.db.scope_roots import scope_root_sql
+from ...adapters.fs.write_intents import matches_self_write
+from ...metrics import observe_scan_phase
 from ...config import (
     SCAN_BATCH_SMALL_THRESHOLD,
     SCAN_BATCH_MED_THRESHOLD,
@@ -28,6 +32,7 @@ from ...config import (
     SCAN_BATCH_INITIAL,
     SCAN_BATCH_MIN,
     MAX_TO_ENRICH_ITEMS,
+    SCAN_DIR_JOURNAL_VERIFY_INTERVAL_SECONDS,
     IS_WINDOWS,
 )
 from ..metadata import MetadataService
@@ -44,6 +49,9 @@ MAX_TRANSACTION_BATCH_SIZE = 500
 MAX_SCAN_JOURNAL_LOOKUP = 5000
 STAT_RETRY_COUNT = 3
 STAT_RETRY_BASE_DELAY_S = 0.15
+# Directories modified this close to the scan start are not journaled: a change landing
+# in the same mtime tick as the listing (coarse NAS/FAT timestamps) would go unnoticed.
+DIR_JOURNAL_RACY_WINDOW_NS = 2_000_000_000
 
 # Extensions explicitly excluded from indexing
 _EXCLUDED_EXTENSIONS: set = {".psd", ".json", ".txt", ".csv", ".db", ".sqlite", ".log"}
@@ -67,6 +75,128 @@ def _is_fatal_db_error(exc: Exception) -> bool:
     return True
 
 
+class _ScannedFile(NamedTuple):
+    """
+    One file yielded by the directory walk.
+
+    `mtime_ns` / `size` come from the scandir entry's stat (None when that stat failed;
+    `_index_batch` retries those off-loop).
+    """
+
+    path: Path
+    mtime_ns: Optional[int]
+    size: Optional[int]
+    kind: str
+
+
+def _scanned_file(entry: "os.DirEntry[str]") -> Optional[_ScannedFile]:
+    """Build a walk record for a supported file entry (None for directories/unsupported files)."""
+    # Keep historical behavior: index symlinks to files, but do not recurse
+    # into symlinked directories.
+    if not entry.is_file(follow_symlinks=True):
+        return None
+    name = entry.name
+    try:
+        ext = os.path.splitext(name)[1].lower()
+    except Exception:
+        ext = ""
+    kind = _EXT_TO_KIND.get(ext, "unknown") if ext and _EXT_TO_KIND else classify_file(entry.path)
+    if kind == "unknown":
+        return None
+    try:
+        st = entry.stat()
+        return _ScannedFile(Path(entry.path), int(st.st_mtime_ns), int(st.st_size), kind)
+    except OSError:
+        return _ScannedFile(Path(entry.path), None, None, kind)
+
+
+class _DirJournalState:
+    """
+    Directory journal bookkeeping for one scan.
+
+    Filled by the walk thread (`_iter_files`) and persisted by `scan_directory` once
+    the walk and all batches are done.
+    """
+
+    __slots__ = ("known", "observed", "missing", "verified", "pruned_dirs", "pruned_files", "cutoff_ns", "verify_before_s")
+
+    def __init__(self, known: Dict[str, Dict[str, Any]], cutoff_ns: int, verify_before_s: float = float("inf")):
+        self.known = known
+        self.observed: Dict[str, tuple[int, int, list[str], list[list[Any]]]] = {}
+        self.missing: list[str] = []
+        self.verified: list[str] = []
+        self.pruned_dirs = 0
+        self.pruned_files = 0
+        self.cutoff_ns = int(cutoff_ns)
+        self.verify_before_s = verify_before_s
+
+    def stat_dir(self, directory: Path) -> Optional[int]:
+        try:
+            return int(os.stat(directory).st_mtime_ns)
+        except OSError:
+            key = str(directory)
+            if key in self.known:
+                self.missing.append(key)
+            return None
+
+    def unchanged_subdirs(self, directory: Path, mtime_ns: int) -> Optional[list[str]]:
+        """
+        Return journaled subdirectory names when the directory is unchanged, else None.
+
+        Overwriting a file in place does not touch its directory's mtime, so entries last
+        verified before `verify_before_s` also have their journaled files stat'ed; the
+        first (mtime_ns, size) mismatch relists the directory.
+        """
+        key = str(directory)
+        entry = self.known.get(key)
+        if not entry or int(entry.get("mtime_ns") or -1) != mtime_ns:
+            return None
+        files = entry.get("files") or []
+        if int(entry.get("verified_at") or 0) < self.verify_before_s:
+            if not self._files_unchanged(directory, files):
+                return None
+            self.verified.append(key)
+        self.pruned_dirs += 1
+        self.pruned_files += len(files)
+        return list(entry.get("subdirs") or [])
+
+    @staticmethod
+    def _files_unchanged(directory: Path, files: list[Any]) -> bool:
+        for item in files:
+            # Journals written before per-file stats were recorded hold bare names.
+            if not isinstance(item, list) or len(item) != 3:
+                return False
+            name, file_mtime_ns, file_size = item
+            try:
+                st = os.stat(directory / str(name))
+            except OSError:
+                return False
+            if int(st.st_mtime_ns) != file_mtime_ns or int(st.st_size) != file_size:
+                return False
+        return True
+
+    def record(
+        self,
+        directory: Path,
+        mtime_ns: int,
+        child_count: int,
+        subdirs: list[str],
+        files: list[list[Any]],
+    ) -> None:
+        key = str(directory)
+        previous = self.known.get(key)
+        if previous:
+            # Subdirectories gone from the fresh listing are never visited again; drop
+            # their rows (and their descendants') along with the parent's refresh.
+            for name in set(previous.get("subdirs") or []) - set(subdirs):
+                gone = str(directory / str(name))
+                prefix = gone + os.sep
+                self.missing.extend(k for k in self.known if k == gone or k.startswith(prefix))
+        if mtime_ns >= self.cutoff_ns:
+            return
+        self.observed[key] = (mtime_ns, child_count, subdirs, files)
+
+
 class IndexScanner:
     """
     Handles directory scanning and file indexing operations.
@@ -99,9 +229,9 @@ class IndexScanner:
         self._batch_fallback_lock = threading.Lock()
 
     @staticmethod
-    def _drain_walk_queue(q: "Queue[Optional[Path]]", max_items: int) -> list[Optional[Path]]:
+    def _drain_walk_queue(q: "Queue[Optional[_ScannedFile]]", max_items: int) -> list[Optional[_ScannedFile]]:
         """Read one-or-more items from walk queue with bounded non-blocking drain."""
-        items: list[Optional[Path]] = []
+        items: list[Optional[_ScannedFile]] = []
         try:
             first = q.get()
         except Exception:
@@ -120,10 +250,17 @@ class IndexScanner:
                 break
         return items
 
-    def _walk_and_enqueue(self, dir_path: Path, recursive: bool, stop_event: threading.Event, q: "Queue[Optional[Path]]") -> None:
-        """Producer running on executor: walks filesystem and pushes paths into queue."""
+    def _walk_and_enqueue(
+        self,
+        dir_path: Path,
+        recursive: bool,
+        stop_event: threading.Event,
+        q: "Queue[Optional[_ScannedFile]]",
+        dir_state: Optional[_DirJournalState] = None,
+    ) -> None:
+        """Producer running on executor: walks filesystem and pushes file records into queue."""
         try:
-            for fp in self._iter_files(dir_path, recursive):
+            for fp in self._iter_files(dir_path, recursive, dir_state=dir_state):
                 if stop_event.is_set():
                     break
                 try:
@@ -148,6 +285,7 @@ class IndexScanner:
         root_id: Optional[str] = None,
         fast: bool = False,
         background_metadata: bool = False,
+        verify: bool = False,
     ) -> Result[Dict[str, Any]]:
         """
         Scan a directory for asset files.
@@ -160,6 +298,7 @@ class IndexScanner:
             root_id: Root identifier for the scan
             fast: Skip metadata extraction during scan
             background_metadata: Enable background metadata enrichment
+            verify: List every directory even if the directory journal says it is unchanged
 
         Returns:
             Result with scan statistics
@@ -195,9 +334,26 @@ class IndexScanner:
                 "errors": 0,
                 "batch_fallbacks": 0,
                 "skipped_state_changed": 0,
+                "pruned_dirs": 0,
                 "start_time": datetime.now().isoformat()
             }
 
+            # Directory journal: incremental recursive scans skip listing directories whose
+            # mtime and journaled file stats have not changed since they were last fully
+            # indexed. Full and verify scans list everything and refresh the journal.
+            dir_root_key = str(dir_path.resolve()) if recursive else ""
+            dir_state: Optional[_DirJournalState] = None
+            prune = incremental and not verify
+            if recursive:
+                known_dirs = await self._load_dir_journal(dir_root_key) if prune else {}
+                dir_state = _DirJournalState(
+                    known_dirs,
+                    time.time_ns() - DIR_JOURNAL_RACY_WINDOW_NS,
+                    time.time() - SCAN_DIR_JOURNAL_VERIFY_INTERVAL_SECONDS,
+                )
+            dirty_dirs: set[str] = set()
+            walk_completed = False
+
             def _stream_batch_target(scanned_count: int) -> int:
                 try:
                     n = int(scanned_count or 0)
@@ -218,7 +374,7 @@ class IndexScanner:
                 # Walk the filesystem in a dedicated thread and consume results in batches.
                 loop = asyncio.get_running_loop()
                 stop_event = threading.Event()
-                q: "Queue[Optional[Path]]" = Queue(maxsize=max(1000, int(SCAN_BATCH_XL) * 4))
+                q: "Queue[Optional[_ScannedFile]]" = Queue(maxsize=max(1000, int(SCAN_BATCH_XL) * 4))
 
                 walk_future = loop.run_in_executor(
                     _FS_WALK_EXECUTOR,
@@ -227,9 +383,10 @@ class IndexScanner:
                     recursive,
                     stop_event,
                     q,
+                    dir_state,
                 )
 
-                batch: List[Path] = []
+                batch: List[_ScannedFile] = []
                 done = False
                 try:
                     while not done:
@@ -240,12 +397,12 @@ class IndexScanner:
                             await asyncio.sleep(0)
                             continue
 
-                        for file_path in pulled:
-                            if file_path is None:
+                        for scanned in pulled:
+                            if scanned is None:
                                 done = True
                                 break
 
-                            batch.append(file_path)
+                            batch.append(scanned)
                             stats["scanned"] += 1
 
                             if len(batch) >= _stream_batch_target(stats["scanned"]):
@@ -258,6 +415,7 @@ class IndexScanner:
                                     fast=fast,
                                     stats=stats,
                                     to_enrich=to_enrich,
+                                    dirty_dirs=dirty_dirs,
                                 )
                                 batch = []
                                 await asyncio.sleep(0)
@@ -272,9 +430,11 @@ class IndexScanner:
                             fast=fast,
                             stats=stats,
                             to_enrich=to_enrich,
+                            dirty_dirs=dirty_dirs,
                         )
                         batch = []
                         await asyncio.sleep(0)
+                    walk_completed = True
                 except asyncio.CancelledError:
                     stop_event.set()
                     raise
@@ -284,6 +444,13 @@ class IndexScanner:
                         await asyncio.wait_for(walk_future, timeout=2.0)
                     except Exception:
                         pass
+
+                if dir_state is not None:
+                    stats["pruned_dirs"] = dir_state.pruned_dirs
+                    stats["scanned"] += dir_state.pruned_files
+                    stats["skipped"] += dir_state.pruned_files
+                    if walk_completed:
+                        await self._save_dir_journal(dir_root_key, dir_state, dirty_dirs, replace=not prune)
             finally:
                 stats["end_time"] = datetime.now().isoformat()
                 duration = time.perf_counter() - scan_start
@@ -327,7 +494,7 @@ class IndexScanner:
     async def _scan_stream_batch(
         self,
         *,
-        batch: List[Path],
+        batch: List[_ScannedFile],
         base_dir: str,
         incremental: bool,
         source: str,
@@ -335,11 +502,13 @@ class IndexScanner:
         fast: bool,
         stats: Dict[str, Any],
         to_enrich: List[str],
+        dirty_dirs: Optional[set[str]] = None,
     ) -> None:
         if not batch:
             return
 
-        filepaths = [str(p) for p in batch]
+        failures_before = int(stats.get("errors") or 0) + int(stats.get("skipped_state_changed") or 0)
+        filepaths = [str(item.path) for item in batch]
         journal_map = (await self._get_journal_entries(filepaths)) if incremental and filepaths else {}
         existing_map: Dict[str, Dict[str, Any]] = {}
 
@@ -368,6 +537,13 @@ class IndexScanner:
             to_enrich=to_enrich,
         )
 
+        if dirty_dirs is not None:
+            failures_after = int(stats.get("errors") or 0) + int(stats.get("skipped_state_changed") or 0)
+            if failures_after > failures_before:
+                # Keep directories with unindexed files out of the journal so the next
+                # incremental scan lists them again.
+                dirty_dirs.update(str(item.path.parent) for item in batch)
+
     async def index_paths(
         self,
         paths: List[Path],
@@ -504,7 +680,7 @@ class IndexScanner:
 
     async def _index_batch(
         self,
-        batch: List[Path],
+        batch: Sequence[Union[Path, _ScannedFile]],
         base_dir: str,
         incremental: bool,
         source: str,
@@ -521,16 +697,22 @@ class IndexScanner:
 
         This drastically reduces SQLite transaction overhead on large scans (10k+ files)
         while keeping the "do not crash UI" and Result patterns intact.
+
+        Walk records carry their scandir stat; plain paths (and records whose stat failed)
+        are stat'ed together in one worker-thread call.
         """
 
         batch_start = time.perf_counter()
+        records = await self._stat_batch(batch, stats)
+        phase_start = time.perf_counter()
+        observe_scan_phase("stat", phase_start - batch_start)
 
         # Phase 1: Stat files and determine which need metadata extraction
         prepared: List[Dict[str, Any]] = []
-        needs_metadata: List[tuple[Path, str, int, int, int, str, Optional[int]]] = []  # (path, filepath, mtime_ns, mtime, size, state_hash, existing_id)
+        needs_metadata: List[tuple[Path, str, int, int, int, str, Optional[int], str]] = []  # (path, filepath, mtime_ns, mtime, size, state_hash, existing_id, kind)
 
         # Prefetch metadata cache and asset_metadata entries for the entire batch to avoid N+1 queries
-        filepaths = [str(p) for p in batch]
+        filepaths = [str(r.path) for r in records]
         cache_map = {}
         has_meta_set = set()
 
@@ -547,6 +729,7 @@ class IndexScanner:
                     state_hash = row.get("state_hash")
                     if fp and state_hash:
                         cache_map[(fp, state_hash)] = row.get("metadata_raw")
+                await MetadataHelpers.inline_cached_blobs(self.db, cache_map)
 
             # Prefetch asset_metadata entries
             asset_ids = []
@@ -575,7 +758,12 @@ class IndexScanner:
                             except Exception:
                                 pass
 
-        for file_path in batch:
+        now = time.perf_counter()
+        observe_scan_phase("prefetch", now - phase_start)
+        phase_start = now
+
+        for record in records:
+            file_path = record.path
             fp = str(file_path)
             existing_state: Optional[Dict[str, Any]]
             if incremental and fp in journal_map:
@@ -584,18 +772,10 @@ class IndexScanner:
             else:
                 existing_state = existing_map.get(fp)
 
-            # Stat the file
-            stat_result = await self._stat_with_retry(file_path)
-            if not stat_result[0]:
-                stats["errors"] += 1
-                logger.warning("Failed to stat %s: %s", str(file_path), stat_result[1])
-                continue
-
-            stat = stat_result[1]
-            mtime_ns = stat.st_mtime_ns
-            mtime = int(stat.st_mtime)
-            size = int(stat.st_size)
-            filepath = str(file_path)
+            mtime_ns = int(record.mtime_ns or 0)
+            mtime = mtime_ns // 1_000_000_000
+            size = int(record.size or 0)
+            filepath = fp
             state_hash = self._compute_state_hash(filepath, mtime_ns, size)
 
             # Check journal skip
@@ -606,6 +786,18 @@ class IndexScanner:
             if incremental and journal_state_hash and str(journal_state_hash) == state_hash:
                 prepared.append({"action": "skipped_journal"})
                 continue
+            # The app's own rating/tags write: keep the metadata, refresh the journal and stat only.
+            # The intent is consumed once that write commits.
+            if incremental and journal_state_hash and matches_self_write(filepath, mtime_ns, size):
+                prepared.append({
+                    "action": "self_write",
+                    "filepath": filepath,
+                    "state_hash": state_hash,
+                    "mtime": mtime,
+                    "mtime_ns": mtime_ns,
+                    "size": size,
+                })
+                continue
 
             existing_id = 0
             existing_mtime = 0
@@ -630,6 +822,7 @@ class IndexScanner:
                         "metadata_result": cached_result,
                         "filepath": filepath,
                         "file_path": file_path,
+                        "mtime_ns": int(mtime_ns),
                         "state_hash": state_hash,
                         "mtime": mtime,
                         "size": size,
@@ -645,7 +838,7 @@ class IndexScanner:
 
             # This file needs processing
             if not fast:
-                needs_metadata.append((file_path, filepath, int(mtime_ns), mtime, size, state_hash, existing_id if existing_id else None))
+                needs_metadata.append((file_path, filepath, int(mtime_ns), mtime, size, state_hash, existing_id if existing_id else None, record.kind))
             else:
                 # Fast mode - no metadata
                 rel_path = self._safe_relative_path(file_path, base_dir)
@@ -663,7 +856,7 @@ class IndexScanner:
                     "cache_store": False,
                     "filename": file_path.name if not existing_id else None,
                     "subfolder": str(rel_path.parent) if not existing_id and rel_path.parent != Path(".") else ("" if not existing_id else None),
-                    "kind": classify_file(file_path.name) if not existing_id else None,
+                    "kind": (record.kind or classify_file(file_path.name)) if not existing_id else None,
                 })
 
         # Phase 2: Batch metadata extraction
@@ -671,7 +864,7 @@ class IndexScanner:
             paths_to_extract = [item[0] for item in needs_metadata]
             batch_metadata = await self.metadata.get_metadata_batch([str(p) for p in paths_to_extract], scan_id=self._current_scan_id)
 
-            for file_path, filepath, mtime_ns, mtime, size, state_hash, existing_id_opt in needs_metadata:
+            for file_path, filepath, mtime_ns, mtime, size, state_hash, existing_id_opt, walked_kind in needs_metadata:
                 metadata_result: Result[Dict[str, Any]] | None = batch_metadata.get(str(file_path))
                 if not metadata_result:
                     metadata_result = MetadataHelpers.metadata_error_payload(Result.Err("METADATA_MISSING", "No metadata returned"), filepath)
@@ -698,7 +891,7 @@ class IndexScanner:
                     rel_path = self._safe_relative_path(file_path, base_dir)
                     filename = file_path.name
                     subfolder = str(rel_path.parent) if rel_path.parent != Path(".") else ""
-                    kind = classify_file(filename)
+                    kind = walked_kind or classify_file(filename)
 
                     prepared.append({
                         "action": "added",
@@ -716,11 +909,20 @@ class IndexScanner:
                         "cache_store": cache_store,
                     })
 
+        now = time.perf_counter()
+        observe_scan_phase("metadata", now - phase_start)
+        phase_start = now
+
         if not prepared:
             return
 
+        # Re-check every file about to be written in one worker-thread call, so a file
+        # rewritten during metadata extraction is left for the next scan.
+        drifted = await asyncio.to_thread(self._drifted_filepaths, prepared)
+
         # Apply DB writes for the whole batch in one transaction.
         # If the batch fails, fall back to processing items individually
+        self_writes: list[Dict[str, Any]] = []
         try:
             async with self.db.atransaction(mode="immediate") as tx:
                 if not tx.ok:
@@ -731,11 +933,14 @@ class IndexScanner:
                     if action in ("skipped", "skipped_journal"):
                         stats["skipped"] += 1
                         continue
+                    if action == "self_write":
+                        if (await self._record_self_write(entry, base_dir)).ok:
+                            self_writes.append(entry)
+                        stats["skipped"] += 1
+                        continue
                     file_path_value = entry.get("file_path")
                     if isinstance(file_path_value, Path):
-                        expected_mtime_ns = int(entry.get("mtime_ns") or 0)
-                        expected_size = int(entry.get("size") or 0)
-                        if self._file_state_drifted(file_path_value, expected_mtime_ns, expected_size):
+                        if str(file_path_value) in drifted:
                             stats["skipped"] += 1
                             stats["skipped_state_changed"] = int(stats.get("skipped_state_changed") or 0) + 1
                             continue
@@ -896,6 +1101,8 @@ class IndexScanner:
                     stats["skipped"] += 1
             if not tx.ok:
                 raise RuntimeError(tx.error or "Commit failed")
+            for entry in self_writes:
+                self._consume_self_write(entry)
         except Exception as batch_error:
             if _is_fatal_db_error(batch_error):
                 logger.error(
@@ -925,17 +1132,28 @@ class IndexScanner:
                 try:
                     file_path_obj = entry.get("file_path")
                     if isinstance(file_path_obj, Path):
-                        expected_mtime_ns = int(entry.get("mtime_ns") or 0)
-                        expected_size = int(entry.get("size") or 0)
-                        if self._file_state_drifted(file_path_obj, expected_mtime_ns, expected_size):
+                        if str(file_path_obj) in drifted:
                             stats["skipped"] += 1
                             stats["skipped_state_changed"] = int(stats.get("skipped_state_changed") or 0) + 1
                             stats["errors"] = max(0, stats["errors"] - 1)
                             continue
+                    if action == "self_write":
+                        recorded: Result[Any] = Result.Err("DB_ERROR", "Failed to begin transaction")
+                        async with self.db.atransaction(mode="immediate") as tx:
+                            if tx.ok:
+                                recorded = await self._record_self_write(entry, base_dir)
+                        if not tx.ok or not recorded.ok:
+                            failed_entries.append(filepath_value)
+                            continue
+                        self._consume_self_write(entry)
+                        stats["skipped"] += 1
+                        stats["errors"] = max(0, stats["errors"] - 1)  # Correct the error count
+                        continue
                     async with self.db.atransaction(mode="immediate") as tx:
                         if not tx.ok:
                             failed_entries.append(filepath_value)
                             continue
+
                         if action == "refresh":
                             asset_id = entry.get("asset_id")
                             metadata_result = entry.get("metadata_result")
@@ -1096,6 +1314,7 @@ class IndexScanner:
                 sample = failed_entries[:5]
                 logger.warning("Batch fallback completed with %s failures (sample: %s)", len(failed_entries), sample)
 
+        observe_scan_phase("write", time.perf_counter() - phase_start)
         duration = time.perf_counter() - batch_start
         if duration > 0.2:
             logger.debug(
@@ -1242,60 +1461,67 @@ class IndexScanner:
 
 
 
-    def _iter_files(self, directory: Path, recursive: bool):
+    def _iter_files(self, directory: Path, recursive: bool, dir_state: Optional[_DirJournalState] = None):
         """
         Generator to iterate over all asset files from directory (streaming).
 
         Args:
             directory: Directory to scan
             recursive: Scan subdirectories
+            dir_state: Directory journal for this scan; unchanged directories are not
+                listed (their journaled subdirectories are still visited)
 
         Yields:
-            File paths one by one
+            `_ScannedFile` records one by one (stat taken from the scandir entry)
         """
-        def _is_supported(p: Path) -> bool:
-            try:
-                ext = p.suffix.lower()
-            except Exception:
-                ext = ""
-            if ext and _EXT_TO_KIND:
-                return _EXT_TO_KIND.get(ext, "unknown") != "unknown"
-            return classify_file(str(p)) != "unknown"
-
         if recursive:
             # Iterative scandir is generally faster than os.walk on large trees/NAS shares.
             stack: list[Path] = [directory]
             while stack:
                 current = stack.pop()
+                mtime_ns: Optional[int] = None
+                if dir_state is not None:
+                    mtime_ns = dir_state.stat_dir(current)
+                    if mtime_ns is None:
+                        continue
+                    journaled_subdirs = dir_state.unchanged_subdirs(current, mtime_ns)
+                    if journaled_subdirs is not None:
+                        stack.extend(current / name for name in journaled_subdirs)
+                        continue
+                subdir_names: list[str] = []
+                file_stats: list[list[Any]] = []
+                child_count = 0
                 try:
                     with os.scandir(current) as it:
                         for entry in it:
+                            child_count += 1
                             try:
                                 if entry.is_dir(follow_symlinks=False):
                                     stack.append(Path(entry.path))
+                                    subdir_names.append(entry.name)
                                     continue
-                                # Keep historical behavior: index symlinks to files, but do not recurse
-                                # into symlinked directories.
-                                if not entry.is_file(follow_symlinks=True):
-                                    continue
-                                name = entry.name
-                                try:
-                                    ext = os.path.splitext(name)[1].lower()
-                                except Exception:
-                                    ext = ""
-                                if ext and _EXT_TO_KIND and _EXT_TO_KIND.get(ext, "unknown") == "unknown":
-                                    continue
-                                file_path = Path(entry.path)
-                                if _is_supported(file_path):
-                                    yield file_path
+                                scanned = _scanned_file(entry)
+                                if scanned is not None:
+                                    if scanned.mtime_ns is not None:
+                                        file_stats.append([entry.name, scanned.mtime_ns, scanned.size])
+                                    else:
+                                        file_stats.append([entry.name, -1, -1])
+                                    yield scanned
                             except (OSError, PermissionError):
                                 continue
                 except (OSError, PermissionError):
                     continue
+                if dir_state is not None and mtime_ns is not None:
+                    dir_state.record(current, mtime_ns, child_count, subdir_names, file_stats)
         else:
-            for item in directory.iterdir():
-                if item.is_file() and _is_supported(item):
-                    yield item
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        scanned = _scanned_file(entry)
+                    except (OSError, PermissionError):
+                        continue
+                    if scanned is not None:
+                        yield scanned
 
     @staticmethod
     def _file_state_drifted(file_path: Path, expected_mtime_ns: int, expected_size: int) -> bool:
@@ -1306,6 +1532,20 @@ class IndexScanner:
         except Exception:
             return True
 
+    @classmethod
+    def _drifted_filepaths(cls, prepared: List[Dict[str, Any]]) -> set[str]:
+        """Filepaths of prepared writes whose file changed since it was stat'ed (runs in a worker thread)."""
+        drifted: set[str] = set()
+        for entry in prepared:
+            if entry.get("action") in ("skipped", "skipped_journal"):
+                continue
+            file_path = entry.get("file_path")
+            if not isinstance(file_path, Path):
+                continue
+            if cls._file_state_drifted(file_path, int(entry.get("mtime_ns") or 0), int(entry.get("size") or 0)):
+                drifted.add(str(file_path))
+        return drifted
+
     def get_runtime_status(self) -> Dict[str, Any]:
         try:
             with self._batch_fallback_lock:
@@ -1416,6 +1656,165 @@ class IndexScanner:
             (filepath, dir_path, state_hash, mtime, size)
         )
 
+    async def _record_self_write(self, entry: Dict[str, Any], base_dir: str) -> Result[Any]:
+        """Journal the app's own write and bring the asset's size/mtime along (metadata is kept)."""
+        filepath = str(entry.get("filepath") or "")
+        mtime = int(entry.get("mtime") or 0)
+        size = int(entry.get("size") or 0)
+        journal = await self._write_scan_journal_entry(filepath, base_dir, str(entry.get("state_hash") or ""), mtime, size)
+        if not journal.ok:
+            return journal
+        return await self.db.aexecute(
+            "UPDATE assets SET size = ?, mtime = ?, updated_at = CURRENT_TIMESTAMP WHERE filepath = ?",
+            (size, mtime, filepath),
+        )
+
+    @staticmethod
+    def _consume_self_write(entry: Dict[str, Any]) -> None:
+        """Forget a recorded write once its journal/asset update has committed."""
+        matches_self_write(
+            str(entry.get("filepath") or ""),
+            int(entry.get("mtime_ns") or 0),
+            int(entry.get("size") or 0),
+            consume=True,
+        )
+
+    async def _load_dir_journal(self, root_path: str) -> Dict[str, Dict[str, Any]]:
+        """Load the directory journal for a scan root. Returns {dir_path: entry}."""
+        res = await self.db.aquery(
+            """
+            SELECT dir_path, mtime_ns, subdirs, files,
+                   CAST(strftime('%s', last_seen) AS INTEGER) AS verified_at
+            FROM scan_dir_journal WHERE root_path = ?
+            """,
+            (root_path,),
+        )
+        if not res.ok:
+            return {}
+        out: Dict[str, Dict[str, Any]] = {}
+        for row in res.data or []:
+            if not isinstance(row, dict) or not row.get("dir_path"):
+                continue
+            try:
+                subdirs = json.loads(row.get("subdirs") or "[]")
+                files = json.loads(row.get("files") or "[]")
+            except (TypeError, ValueError):
+                continue
+            if not isinstance(subdirs, list) or not isinstance(files, list):
+                continue
+            out[str(row["dir_path"])] = {
+                "mtime_ns": row.get("mtime_ns"),
+                "subdirs": subdirs,
+                "files": files,
+                "verified_at": row.get("verified_at"),
+            }
+        return out
+
+    async def _save_dir_journal(
+        self,
+        root_path: str,
+        dir_state: _DirJournalState,
+        dirty_dirs: set[str],
+        replace: bool = False,
+    ) -> None:
+        """
+        Persist listed directories (minus those with failed files) and drop vanished ones.
+
+        With `replace`, the walk listed the whole tree and its rows supersede the journal.
+        Directories whose files were re-stat'ed without relisting get `last_seen` bumped.
+        """
+        rows = [
+            (root_path, dir_key, mtime_ns, child_count, json.dumps(subdirs), json.dumps(files))
+            for dir_key, (mtime_ns, child_count, subdirs, files) in dir_state.observed.items()
+            if dir_key not in dirty_dirs
+        ]
+        stale = [(root_path, dir_key) for dir_key in {*dir_state.missing, *dirty_dirs} if dir_key in dir_state.known]
+        verified = [(root_path, dir_key) for dir_key in dir_state.verified if dir_key not in dirty_dirs]
+        if not rows and not stale and not verified and not replace:
+            return
+        try:
+            async with self.db.atransaction(mode="immediate") as tx:
+                if not tx.ok:
+                    return
+                if replace:
+                    await self.db.aexecute("DELETE FROM scan_dir_journal WHERE root_path = ?", (root_path,))
+                if stale:
+                    await self.db.aexecutemany(
+                        "DELETE FROM scan_dir_journal WHERE root_path = ? AND dir_path = ?",
+                        stale,
+                    )
+                if verified:
+                    await self.db.aexecutemany(
+                        """
+                        UPDATE scan_dir_journal SET last_seen = CURRENT_TIMESTAMP
+                        WHERE root_path = ? AND dir_path = ?
+                        """,
+                        verified,
+                    )
+                if rows:
+                    await self.db.aexecutemany(
+                        """
+                        INSERT OR REPLACE INTO scan_dir_journal
+                        (root_path, dir_path, mtime_ns, child_count, subdirs, files, last_seen)
+                        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                        """,
+                        rows,
+                    )
+        except Exception as exc:
+            logger.debug("Failed to persist directory scan journal for %s: %s", root_path, exc)
+
+    @staticmethod
+    def _stat_paths_with_retry(paths: List[Path]) -> Dict[str, Any]:
+        """Stat paths in the calling (worker) thread; returns {path: stat_result | OSError}."""
+        results: Dict[str, Any] = {}
+        pending = list(paths)
+        for attempt in range(STAT_RETRY_COUNT):
+            if attempt:
+                time.sleep(STAT_RETRY_BASE_DELAY_S * attempt)
+            failed: List[Path] = []
+            for path in pending:
+                try:
+                    results[str(path)] = path.stat()
+                except OSError as exc:
+                    results[str(path)] = exc
+                    failed.append(path)
+            pending = failed
+            if not pending:
+                break
+        return results
+
+    async def _stat_batch(
+        self,
+        batch: Sequence[Union[Path, _ScannedFile]],
+        stats: Dict[str, Any],
+    ) -> List[_ScannedFile]:
+        """
+        Return walk records with stat fields for a batch, dropping files that cannot be stat'ed.
+
+        Records from the walk already carry their stat; the rest are stat'ed (with retries)
+        in a single worker-thread call.
+        """
+        records = [
+            item if isinstance(item, _ScannedFile) else _ScannedFile(Path(item), None, None, "")
+            for item in batch
+        ]
+        missing = [r.path for r in records if r.mtime_ns is None or r.size is None]
+        if not missing:
+            return records
+        stat_map = await asyncio.to_thread(self._stat_paths_with_retry, missing)
+        out: List[_ScannedFile] = []
+        for record in records:
+            if record.mtime_ns is not None and record.size is not None:
+                out.append(record)
+                continue
+            st = stat_map.get(str(record.path))
+            if st is None or isinstance(st, OSError):
+                stats["errors"] += 1
+                logger.warning("Failed to stat %s after retries: %s", str(record.path), st)
+                continue
+            out.append(record._replace(mtime_ns=int(st.st_mtime_ns), size=int(st.st_size)))
+        return out
+
     async def _stat_with_retry(self, file_path: Path):
         for attempt in range(STAT_RETRY_COUNT):
             try:
@@ -1482,6 +1881,15 @@ class IndexScanner:
 
         if incremental and journal_state_hash and str(journal_state_hash) == state_hash:
             return Result.Ok({"action": "skipped_journal"})
+        if incremental and journal_state_hash and matches_self_write(filepath, mtime_ns, size):
+            self_write = {"filepath": filepath, "state_hash": state_hash, "mtime": mtime, "mtime_ns": mtime_ns, "size": size}
+            recorded: Result[Any] = Result.Err("DB_ERROR", "Failed to begin transaction")
+            async with self.db.atransaction(mode="immediate") as tx:
+                if tx.ok:
+                    recorded = await self._record_self_write(self_write, base_dir)
+            if tx.ok and recorded.ok:
+                self._consume_self_write(self_write)
+            return Result.Ok({"action": "skipped_journal"})
 
         # Check if file already exists (allow caller to prefetch to avoid N+1 queries)
         existing_asset = None
@@ -1697,15 +2105,16 @@ class IndexScanner:
 
         # Insert into assets table (NO workflow fields here)
         insert_result = await self.db.aexecute(
-            """
+            f"""
             INSERT INTO assets
-            (filename, subfolder, filepath, source, root_id, kind, ext, width, height, duration, size, mtime)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (filename, subfolder, filepath, scope_root, source, root_id, kind, ext, width, height, duration, size, mtime)
+            VALUES (?, ?, ?, {scope_root_sql("?")}, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 filename,
                 subfolder,
                 filepath,
+                filepath,
                 str(source or "output"),
                 str(root_id) if root_id else None,
                 kind,
@@ -1,14 +1,19 @@
 """
 Index searcher - handles asset search and retrieval operations.
 """
+import base64
+import binascii
+import datetime
 import json
-import os
 import re
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 
 from ...shared import get_logger, Result
-from ...adapters.db.sqlite import Sqlite
+from ...adapters.db.schema import asset_day_stats_rebuild_pending
+from ...adapters.db.scope_roots import scope_root_keys, scope_roots_where
+from ...adapters.db.sqlite import RowSet, Sqlite
+from .blob_store import is_blob_ref, resolve_blobs_many
 from ...config import (
     SEARCH_MAX_QUERY_LENGTH,
     SEARCH_MAX_TOKENS,
@@ -49,17 +54,94 @@ def _normalize_sort_key(sort: Optional[str]) -> str:
     return "mtime_desc"
 
 
-def _build_sort_sql(sort: Optional[str], *, table_alias: str = "a", rank_alias: Optional[str] = None) -> str:
-    key = _normalize_sort_key(sort)
+# Sort spec entries: (SQL expression, direction, row field, parameter placeholder).
+SortSpec = List[Tuple[str, str, str, str]]
+
+RELEVANCE_SORT_KEY = "relevance"
+CURSOR_VERSION = 1
+
+
+def _sort_spec(sort: Optional[str], *, table_alias: str = "a", rank_alias: Optional[str] = None) -> SortSpec:
+    a = table_alias
+    key = sort if sort == RELEVANCE_SORT_KEY else _normalize_sort_key(sort)
+    if key == RELEVANCE_SORT_KEY:
+        return [(rank_alias or "rank", "ASC", "rank", "?"), (f"{a}.id", "ASC", "id", "?")]
     if key == "name_asc":
-        return f"ORDER BY LOWER({table_alias}.filename) ASC, {table_alias}.id DESC"
+        return [(f"LOWER({a}.filename)", "ASC", "filename", "LOWER(?)"), (f"{a}.id", "DESC", "id", "?")]
     if key == "name_desc":
-        return f"ORDER BY LOWER({table_alias}.filename) DESC, {table_alias}.id DESC"
+        return [(f"LOWER({a}.filename)", "DESC", "filename", "LOWER(?)"), (f"{a}.id", "DESC", "id", "?")]
     if key == "mtime_asc":
-        return f"ORDER BY {table_alias}.mtime ASC, {table_alias}.id ASC"
+        return [(f"{a}.mtime", "ASC", "mtime", "?"), (f"{a}.id", "ASC", "id", "?")]
     if rank_alias:
-        return f"ORDER BY {table_alias}.mtime DESC, {rank_alias} ASC, {table_alias}.id DESC"
-    return f"ORDER BY {table_alias}.mtime DESC, {table_alias}.id DESC"
+        return [(f"{a}.mtime", "DESC", "mtime", "?"), (rank_alias, "ASC", "rank", "?"), (f"{a}.id", "DESC", "id", "?")]
+    return [(f"{a}.mtime", "DESC", "mtime", "?"), (f"{a}.id", "DESC", "id", "?")]
+
+
+def _build_sort_sql(sort: Optional[str], *, table_alias: str = "a", rank_alias: Optional[str] = None) -> str:
+    spec = _sort_spec(sort, table_alias=table_alias, rank_alias=rank_alias)
+    return "ORDER BY " + ", ".join(f"{expr} {direction}" for expr, direction, _field, _ph in spec)
+
+
+def _build_keyset_clause(spec: SortSpec, values: List[Any]) -> Tuple[str, List[Any]]:
+    """
+    Build the "rows after the cursor" predicate for a sort spec.
+
+    Uniform directions use a row-value comparison (`(a.mtime, a.id) < (?, ?)`), which
+    SQLite can satisfy with a range scan on the matching composite index; mixed
+    directions fall back to the expanded lexicographic form.
+    """
+    directions = {direction for _expr, direction, _field, _ph in spec}
+    if len(directions) == 1 and all(ph == "?" for *_rest, ph in spec):
+        op = ">" if "ASC" in directions else "<"
+        cols = ", ".join(expr for expr, *_rest in spec)
+        marks = ", ".join("?" for _ in spec)
+        return f"AND ({cols}) {op} ({marks})", list(values)
+
+    ors: List[str] = []
+    params: List[Any] = []
+    for i, (expr, direction, _field, ph) in enumerate(spec):
+        ands: List[str] = []
+        for j in range(i):
+            ands.append(f"{spec[j][0]} = {spec[j][3]}")
+            params.append(values[j])
+        ands.append(f"{expr} {'>' if direction == 'ASC' else '<'} {ph}")
+        params.append(values[i])
+        ors.append("(" + " AND ".join(ands) + ")")
+    return "AND (" + " OR ".join(ors) + ")", params
+
+
+def encode_cursor(sort_key: str, spec: SortSpec, row: Dict[str, Any]) -> Optional[str]:
+    """Encode the sort tuple of the last row of a page into an opaque cursor."""
+    values: List[Any] = []
+    for _expr, _direction, field, _ph in spec:
+        value = row.get(field)
+        if value is None or not isinstance(value, (int, float, str)):
+            return None
+        values.append(value)
+    payload = json.dumps({"v": CURSOR_VERSION, "s": sort_key, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], sort_key: str, spec: SortSpec) -> Result[Optional[List[Any]]]:
+    """Decode a cursor produced by `encode_cursor` for the same sort order."""
+    if not cursor:
+        return Result.Ok(None)
+    try:
+        text = str(cursor).strip()
+        raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        return Result.Err("INVALID_INPUT", "Invalid cursor")
+    if not isinstance(payload, dict) or payload.get("v") != CURSOR_VERSION:
+        return Result.Err("INVALID_INPUT", "Invalid cursor")
+    if payload.get("s") != sort_key:
+        return Result.Err("INVALID_INPUT", "Cursor does not match the requested sort order")
+    values = payload.get("k")
+    if not isinstance(values, list) or len(values) != len(spec):
+        return Result.Err("INVALID_INPUT", "Invalid cursor")
+    if any(isinstance(v, bool) or not isinstance(v, (int, float, str)) for v in values):
+        return Result.Err("INVALID_INPUT", "Invalid cursor")
+    return Result.Ok(values)
 
 
 def _build_filter_clauses(filters: Optional[Dict[str, Any]], alias: str = "a") -> Tuple[List[str], List[Any]]:
@@ -118,15 +200,17 @@ def _build_filter_clauses(filters: Optional[Dict[str, Any]], alias: str = "a") -
         variants = alias_map.get(raw, [raw] if raw else [])
         if variants:
             placeholders = ", ".join("?" for _ in variants)
-            clauses.append(
-                "AND UPPER(COALESCE("
-                "json_extract(m.metadata_raw, '$.workflow_type'), "
-                "json_extract(m.metadata_raw, '$.geninfo.engine.type'), "
-                "json_extract(m.metadata_raw, '$.engine.type'), "
-                "''"
-                f")) IN ({placeholders})"
-            )
+            # Materialized (upper-cased) at write time; see MetadataHelpers.extract_generation_columns.
+            clauses.append(f"AND m.workflow_type IN ({placeholders})")
             params.extend(variants)
+    model_name = filters.get("model_name")
+    if isinstance(model_name, str) and model_name.strip():
+        clauses.append("AND m.model_name = ?")
+        params.append(model_name.strip())
+    sampler = filters.get("sampler")
+    if isinstance(sampler, str) and sampler.strip():
+        clauses.append("AND m.sampler = ?")
+        params.append(sampler.strip())
     if "has_workflow" in filters:
         # Backward-compatible: older/stale rows may have has_workflow=0 even though metadata_raw
         # contains a workflow/prompt. Prefer not to hide such assets when filtering.
@@ -167,6 +251,36 @@ def _build_filter_clauses(filters: Optional[Dict[str, Any]], alias: str = "a") -
     return clauses, params
 
 
+def _decode_tags(raw: Any, memo: Dict[str, Any]) -> Any:
+    """Decode a tags JSON column; identical strings on a page are parsed once (lists are copied)."""
+    if not raw or raw == "[]":
+        return []
+    if not isinstance(raw, str):
+        return raw
+    parsed = memo.get(raw)
+    if parsed is None:
+        try:
+            parsed = json.loads(raw)
+        except (ValueError, TypeError):
+            parsed = []
+        memo[raw] = parsed
+    return list(parsed) if isinstance(parsed, list) else parsed
+
+
+def _asset_dicts(rows: RowSet) -> List[Dict[str, Any]]:
+    """Build each asset dict once from lean rows, decoding the tags column in the same pass."""
+    columns = rows.columns
+    tags_at = rows.index.get("tags")
+    memo: Dict[str, Any] = {}
+    assets = []
+    for row in rows.rows:
+        asset = dict(zip(columns, row))
+        asset["tags"] = _decode_tags(row[tags_at], memo) if tags_at is not None else []
+        asset.setdefault("tags_text", "")
+        assets.append(asset)
+    return assets
+
+
 class IndexSearcher:
     """
     Handles asset search and retrieval operations.
@@ -231,9 +345,13 @@ class IndexSearcher:
         offset: int = 0,
         filters: Optional[Dict[str, Any]] = None,
         include_total: bool = False,
+        cursor: Optional[str] = None,
     ) -> Result[Dict[str, Any]]:
         """
         Search assets using FTS5 or browse mode when query is '*'.
+
+        Pass the previous page's `next_cursor` as `cursor` for keyset pagination
+        (offset is then ignored and not capped).
         """
         limit = max(0, min(SEARCH_MAX_LIMIT, int(limit)))
         offset = max(0, min(SEARCH_MAX_OFFSET, int(offset)))
@@ -250,6 +368,15 @@ class IndexSearcher:
         metadata_tags_text_clause = self._build_tags_text_clause()
         is_browse_all = query.strip() == "*"
 
+        sort_key = "mtime_desc" if is_browse_all else RELEVANCE_SORT_KEY
+        spec = _sort_spec(sort_key, table_alias="a", rank_alias=None if is_browse_all else "best.rank")
+        cursor_res = decode_cursor(cursor, sort_key, spec)
+        if not cursor_res.ok:
+            return Result.Err(cursor_res.code or "INVALID_INPUT", cursor_res.error or "Invalid cursor")
+        cursor_values = cursor_res.data
+        if cursor_values is not None:
+            offset = 0
+
         if is_browse_all:
             sql_parts = [
                 f"""
@@ -261,7 +388,7 @@ class IndexSearcher:
                     COALESCE(m.tags, '[]') as tags,
 {metadata_tags_text_clause}                    m.has_workflow as has_workflow,
                     m.has_generation_data as has_generation_data,
-                    NULL as generation_time_ms,
+                    m.generation_time_ms as generation_time_ms,
                     NULL as file_creation_time,
                     NULL as file_birth_time
                 FROM assets a
@@ -275,14 +402,19 @@ class IndexSearcher:
             sql_parts.extend(filter_clauses)
             params.extend(filter_params)
 
-            sql_parts.append("ORDER BY a.mtime DESC")
+            if cursor_values is not None:
+                keyset_clause, keyset_params = _build_keyset_clause(spec, cursor_values)
+                sql_parts.append(keyset_clause)
+                params.extend(keyset_params)
+
+            sql_parts.append(_build_sort_sql(sort_key, table_alias="a"))
             sql_parts.append("LIMIT ? OFFSET ?")
             params.extend([limit, offset])
 
-            result = await self.db.aquery(" ".join(sql_parts), tuple(params))
+            result = await self.db.aquery_rows(" ".join(sql_parts), tuple(params))
             if not result.ok:
                 return Result.Err("SEARCH_FAILED", result.error or "Search query failed")
-            rows = result.data or []
+            rows = result.data or RowSet((), [])
 
             total = None
             if include_total:
@@ -308,6 +440,12 @@ class IndexSearcher:
                     SELECT rowid AS asset_id, (bm25(asset_metadata_fts) + 8.0) AS rank
                     FROM asset_metadata_fts
                     WHERE asset_metadata_fts MATCH ?
+
+                    UNION ALL
+
+                    SELECT rowid AS asset_id, (bm25(asset_prompt_fts) + 8.0) AS rank
+                    FROM asset_prompt_fts
+                    WHERE asset_prompt_fts MATCH ?
                 ),
                 best AS (
                     SELECT asset_id, MIN(rank) AS rank
@@ -323,7 +461,7 @@ class IndexSearcher:
                     COALESCE(m.tags, '[]') as tags,
 {metadata_tags_text_clause}                    m.has_workflow as has_workflow,
                     m.has_generation_data as has_generation_data,
-                    NULL as generation_time_ms,
+                    m.generation_time_ms as generation_time_ms,
                     NULL as file_creation_time,
                     NULL as file_birth_time,
                     best.rank as rank
@@ -333,24 +471,29 @@ class IndexSearcher:
                 WHERE 1=1
                 """
             ]
-            params = [fts_query, fts_query]
+            params = [fts_query, fts_query, fts_query]
 
             filter_clauses, filter_params = _build_filter_clauses(filters)
             sql_parts.extend(filter_clauses)
             params.extend(filter_params)
 
-            sql_parts.append("ORDER BY rank")
+            if cursor_values is not None:
+                keyset_clause, keyset_params = _build_keyset_clause(spec, cursor_values)
+                sql_parts.append(keyset_clause)
+                params.extend(keyset_params)
+
+            sql_parts.append(_build_sort_sql(sort_key, table_alias="a", rank_alias="best.rank"))
             sql_parts.append("LIMIT ? OFFSET ?")
             params.extend([limit, offset])
 
-            result = await self.db.aquery(" ".join(sql_parts), tuple(params))
+            result = await self.db.aquery_rows(" ".join(sql_parts), tuple(params))
             if not result.ok:
                 return Result.Err("SEARCH_FAILED", result.error or "Search query failed")
-            rows = result.data or []
+            rows = result.data or RowSet((), [])
 
             total = None
-            if include_total and rows and "_total" in rows[0]:
-                total = rows[0]["_total"]
+            if include_total and rows:
+                total = rows.value(0, "_total")
             if include_total and total is None:
                 count_sql = """
                     WITH matches AS (
@@ -363,6 +506,12 @@ class IndexSearcher:
                         SELECT rowid AS asset_id
                         FROM asset_metadata_fts
                         WHERE asset_metadata_fts MATCH ?
+
+                        UNION
+
+                        SELECT rowid AS asset_id
+                        FROM asset_prompt_fts
+                        WHERE asset_prompt_fts MATCH ?
                     )
                     SELECT COUNT(*) as total
                     FROM (SELECT DISTINCT asset_id FROM matches) t
@@ -370,32 +519,24 @@ class IndexSearcher:
                     LEFT JOIN asset_metadata m ON a.id = m.asset_id
                     WHERE 1=1
                 """
-                count_params2 = [fts_query, fts_query]
+                count_params2 = [fts_query, fts_query, fts_query]
                 if filter_clauses:
                     count_sql += " " + " ".join(filter_clauses)
                     count_params2.extend(filter_params)
                 count_result = await self.db.aquery(count_sql, tuple(count_params2))
                 total = count_result.data[0]["total"] if count_result.ok and count_result.data else 0
 
-        assets = []
-        for row in rows:
-            asset = dict(row)
-            if asset.get("tags"):
-                try:
-                    asset["tags"] = json.loads(asset["tags"])
-                except (ValueError, json.JSONDecodeError, TypeError):
-                    asset["tags"] = []
-            else:
-                asset["tags"] = []
-            asset.setdefault("tags_text", "")
+        assets = _asset_dicts(rows)
+        for asset in assets:
             asset["highlight"] = asset.get("highlight") or None
-            assets.append(asset)
 
         logger.debug("Found %s results (total=%s)", len(assets), total if include_total else "skipped")
         payload: Dict[str, Any] = {"assets": assets, "limit": limit, "offset": offset, "query": query}
         payload["total"] = int(total or 0) if include_total else None
+        payload["next_cursor"] = encode_cursor(sort_key, spec, assets[-1]) if limit and len(assets) >= limit else None
 
         return Result.Ok(payload)
+
     async def search_scoped(
         self,
         query: str,
@@ -405,11 +546,13 @@ class IndexSearcher:
         filters: Optional[Dict[str, Any]] = None,
         include_total: bool = False,
         sort: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> Result[Dict[str, Any]]:
         """
         Search assets but restrict results to files whose absolute filepath is under one of the provided roots.
 
         This is used for UI scopes like Outputs / Inputs / All without breaking the existing DB structure.
+        Pass the previous page's `next_cursor` as `cursor` for keyset pagination.
         """
         cleaned_roots: List[str] = []
         for r in roots or []:
@@ -423,7 +566,7 @@ class IndexSearcher:
         if not cleaned_roots:
             return Result.Err("INVALID_INPUT", "Missing or invalid roots")
 
-        # Reuse the existing search logic but inject a filepath prefix constraint.
+        # Reuse the existing search logic but inject a scope root constraint.
         limit = max(0, min(SEARCH_MAX_LIMIT, int(limit)))
         offset = max(0, min(SEARCH_MAX_OFFSET, int(offset)))
 
@@ -438,23 +581,20 @@ class IndexSearcher:
         logger.debug(f"Searching (scoped) for: {query} (limit={limit}, offset={offset}, roots={len(cleaned_roots)})")
         metadata_tags_text_clause = self._build_tags_text_clause()
 
-        def _escape_like_pattern(pattern: str) -> str:
-            """Escape LIKE special characters (% and _) for safe prefix matching."""
-            return pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-
-        def _roots_where() -> Tuple[str, List[Any]]:
-            parts = []
-            params: List[Any] = []
-            for root in cleaned_roots:
-                prefix = root.rstrip(os.sep) + os.sep
-                escaped_prefix = _escape_like_pattern(prefix)
-                parts.append("(a.filepath = ? OR a.filepath LIKE ? ESCAPE '\\')")
-                params.extend([root, f"{escaped_prefix}%"])
-            return "(" + " OR ".join(parts) + ")", params
-
+        sort_key = _normalize_sort_key(sort)
         is_browse_all = query.strip() == "*"
-
-        roots_clause, roots_params = _roots_where()
+        spec = _sort_spec(sort_key, table_alias="a", rank_alias=None if is_browse_all else "best.rank")
+        cursor_res = decode_cursor(cursor, sort_key, spec)
+        if not cursor_res.ok:
+            return Result.Err(cursor_res.code or "INVALID_INPUT", cursor_res.error or "Invalid cursor")
+        cursor_values = cursor_res.data
+        if cursor_values is not None:
+            offset = 0
+
+        roots_where = await scope_roots_where(self.db, cleaned_roots)
+        if not roots_where.ok or roots_where.data is None:
+            return Result.Err(roots_where.code or "DB_ERROR", roots_where.error or "Failed to scope roots")
+        roots_clause, roots_params = roots_where.data
 
         if is_browse_all:
             sql_parts = [
@@ -466,7 +606,7 @@ class IndexSearcher:
                     COALESCE(m.tags, '[]') as tags,
 {metadata_tags_text_clause}                    m.has_workflow as has_workflow,
                     m.has_generation_data as has_generation_data,
-                    NULL as generation_time_ms,
+                    m.generation_time_ms as generation_time_ms,
                     NULL as file_creation_time,
                     NULL as file_birth_time
                 FROM assets a
@@ -481,16 +621,21 @@ class IndexSearcher:
             sql_parts.extend(filter_clauses)
             params.extend(filter_params)
 
-            sql_parts.append(_build_sort_sql(sort, table_alias="a"))
+            if cursor_values is not None:
+                keyset_clause, keyset_params = _build_keyset_clause(spec, cursor_values)
+                sql_parts.append(keyset_clause)
+                params.extend(keyset_params)
+
+            sql_parts.append(_build_sort_sql(sort_key, table_alias="a"))
             sql_parts.append("LIMIT ? OFFSET ?")
             params.extend([limit, offset])
 
             sql = " ".join(sql_parts)
-            result = await self.db.aquery(sql, tuple(params))
+            result = await self.db.aquery_rows(sql, tuple(params))
             if not result.ok:
                 return Result.Err("SEARCH_FAILED", result.error or "Scoped search query failed")
 
-            rows = result.data or []
+            rows = result.data or RowSet((), [])
 
             total = None
             if include_total:
@@ -523,6 +668,12 @@ class IndexSearcher:
                     SELECT rowid AS asset_id, (bm25(asset_metadata_fts) + 8.0) AS rank
                     FROM asset_metadata_fts
                     WHERE asset_metadata_fts MATCH ?
+
+                    UNION ALL
+
+                    SELECT rowid AS asset_id, (bm25(asset_prompt_fts) + 8.0) AS rank
+                    FROM asset_prompt_fts
+                    WHERE asset_prompt_fts MATCH ?
                 ),
                 best AS (
                     SELECT asset_id, MIN(rank) AS rank
@@ -536,7 +687,7 @@ class IndexSearcher:
                     COALESCE(m.tags, '[]') as tags,
 {metadata_tags_text_clause}                    m.has_workflow as has_workflow,
                     m.has_generation_data as has_generation_data,
-                    NULL as generation_time_ms,
+                    m.generation_time_ms as generation_time_ms,
                     NULL as file_creation_time,
                     NULL as file_birth_time,                    best.rank as rank
                 FROM best
@@ -546,23 +697,28 @@ class IndexSearcher:
                 """
             ]
 
-            params = [fts_query, fts_query]
+            params = [fts_query, fts_query, fts_query]
             params.extend(roots_params)
 
             filter_clauses, filter_params = _build_filter_clauses(filters)
             sql_parts.extend(filter_clauses)
             params.extend(filter_params)
 
-            sql_parts.append(_build_sort_sql(sort, table_alias="a", rank_alias="best.rank"))
+            if cursor_values is not None:
+                keyset_clause, keyset_params = _build_keyset_clause(spec, cursor_values)
+                sql_parts.append(keyset_clause)
+                params.extend(keyset_params)
+
+            sql_parts.append(_build_sort_sql(sort_key, table_alias="a", rank_alias="best.rank"))
             sql_parts.append("LIMIT ? OFFSET ?")
             params.extend([limit, offset])
 
             sql = " ".join(sql_parts)
-            result = await self.db.aquery(sql, tuple(params))
+            result = await self.db.aquery_rows(sql, tuple(params))
             if not result.ok:
                 return Result.Err("SEARCH_FAILED", result.error or "Scoped search query failed")
 
-            rows = result.data or []
+            rows = result.data or RowSet((), [])
 
             total = None
             if include_total:
@@ -577,6 +733,12 @@ class IndexSearcher:
                         SELECT rowid AS asset_id
                         FROM asset_metadata_fts
                         WHERE asset_metadata_fts MATCH ?
+
+                        UNION
+
+                        SELECT rowid AS asset_id
+                        FROM asset_prompt_fts
+                        WHERE asset_prompt_fts MATCH ?
                     )
                     SELECT COUNT(*) as total
                     FROM (SELECT DISTINCT asset_id FROM matches) t
@@ -584,7 +746,7 @@ class IndexSearcher:
                     LEFT JOIN asset_metadata m ON a.id = m.asset_id
                     WHERE {roots_clause}
                 """
-                count_params2: List[Any] = [fts_query, fts_query]
+                count_params2: List[Any] = [fts_query, fts_query, fts_query]
                 count_params2.extend(roots_params)
 
                 if filter_clauses:
@@ -594,46 +756,29 @@ class IndexSearcher:
                 count_result = await self.db.aquery(count_sql, tuple(count_params2))
                 total = count_result.data[0]["total"] if count_result.ok and count_result.data else 0
 
-        assets = []
-        for row in rows:
-            asset = dict(row)
-            if asset.get("tags"):
-                try:
-                    asset["tags"] = json.loads(asset["tags"])
-                except Exception:
-                    asset["tags"] = []
-            else:
-                asset["tags"] = []
-            asset.setdefault("tags_text", "")
-            assets.append(asset)
+        assets = _asset_dicts(rows)
 
         payload: Dict[str, Any] = {"assets": assets, "limit": limit, "offset": offset, "query": query}
         payload["total"] = int(total or 0) if include_total else None
-        payload["sort"] = _normalize_sort_key(sort)
+        payload["sort"] = sort_key
+        payload["next_cursor"] = encode_cursor(sort_key, spec, assets[-1]) if limit and len(assets) >= limit else None
         return Result.Ok(payload)
 
     async def has_assets_under_root(self, root: str) -> Result[bool]:
         """
         Return True if the DB contains at least one asset whose filepath is exactly `root`
-        or is nested under it (prefix match).
+        or is nested under it (scope_root seek, see adapters.db.scope_roots).
         """
         try:
             resolved = str(Path(root).resolve())
         except Exception as exc:
             return Result.Err("INVALID_INPUT", f"Invalid root: {exc}")
 
-        def _escape_like_pattern(pattern: str) -> str:
-            return pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-
-        prefix = resolved.rstrip(os.sep) + os.sep
-        escaped_prefix = _escape_like_pattern(prefix)
-        sql = """
-            SELECT 1
-            FROM assets a
-            WHERE (a.filepath = ? OR a.filepath LIKE ? ESCAPE '\\')
-            LIMIT 1
-        """
-        result = await self.db.aquery(sql, (resolved, f"{escaped_prefix}%"))
+        roots_where = await scope_roots_where(self.db, [resolved])
+        if not roots_where.ok or roots_where.data is None:
+            return Result.Err("DB_ERROR", roots_where.error or "Root lookup query failed")
+        roots_clause, roots_params = roots_where.data
+        result = await self.db.aquery(f"SELECT 1 FROM assets a WHERE {roots_clause} LIMIT 1", tuple(roots_params))
         if not result.ok:
             return Result.Err("DB_ERROR", result.error or "Root lookup query failed")
         return Result.Ok(bool(result.data))
@@ -651,6 +796,10 @@ class IndexSearcher:
         Notes:
         - Uses localtime conversion to match the UI's date filters (which use local time).
         - Intended for calendar "days with assets" indicators (no query/FTS).
+        - When the bounds are local midnights, only a kind filter is set and every asset
+          is scope-stamped, the counts come from the asset_day_stats rollup (keyed by
+          scope_root, so it selects exactly the assets the scan would) instead of
+          scanning assets.
         """
         cleaned_roots: List[str] = []
         for r in roots or []:
@@ -673,20 +822,22 @@ class IndexSearcher:
         if start_i <= 0 or end_i <= 0 or end_i <= start_i:
             return Result.Err("INVALID_INPUT", "Invalid month range")
 
-        def _escape_like_pattern(pattern: str) -> str:
-            return pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rolled = await self._date_histogram_from_rollup(cleaned_roots, start_i, end_i, filters)
+        if rolled is not None:
+            return Result.Ok(rolled)
+        return await self._date_histogram_by_scan(cleaned_roots, start_i, end_i, filters)
 
-        def _roots_where() -> Tuple[str, List[Any]]:
-            parts = []
-            params: List[Any] = []
-            for root in cleaned_roots:
-                prefix = root.rstrip(os.sep) + os.sep
-                escaped_prefix = _escape_like_pattern(prefix)
-                parts.append("(a.filepath = ? OR a.filepath LIKE ? ESCAPE '\\')")
-                params.extend([root, f"{escaped_prefix}%"])
-            return "(" + " OR ".join(parts) + ")", params
-
-        roots_clause, roots_params = _roots_where()
+    async def _date_histogram_by_scan(
+        self,
+        roots: List[str],
+        start_i: int,
+        end_i: int,
+        filters: Optional[Dict[str, Any]],
+    ) -> Result[Dict[str, int]]:
+        roots_where = await scope_roots_where(self.db, roots)
+        if not roots_where.ok or roots_where.data is None:
+            return Result.Err(roots_where.code or "DB_ERROR", roots_where.error or "Failed to scope roots")
+        roots_clause, roots_params = roots_where.data
 
         # Do not allow callers to inject their own mtime window beyond the month we requested.
         safe_filters = dict(filters or {})
@@ -732,6 +883,51 @@ class IndexSearcher:
 
         return Result.Ok(days)
 
+    async def _date_histogram_from_rollup(
+        self,
+        roots: List[str],
+        month_start: int,
+        month_end: int,
+        filters: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, int]]:
+        """Histogram from asset_day_stats, or None when the rollup cannot answer exactly."""
+        kind = None
+        for key, value in (filters or {}).items():
+            if key == "kind" and isinstance(value, str):
+                kind = value or None
+            elif key not in ("mtime_start", "mtime_end"):
+                return None
+        try:
+            start_dt = datetime.datetime.fromtimestamp(int(month_start))
+            end_dt = datetime.datetime.fromtimestamp(int(month_end))
+        except (OverflowError, OSError, ValueError):
+            return None
+        if start_dt.time() != datetime.time() or end_dt.time() != datetime.time() or end_dt <= start_dt:
+            return None
+        if await asset_day_stats_rebuild_pending(self.db):
+            return None
+        # Unstamped assets are counted under '' and only the scan's filepath fallback finds them.
+        resolved = await scope_root_keys(self.db, roots)
+        if not resolved.ok or resolved.data is None:
+            return None
+        scope_keys, unstamped = resolved.data
+        if unstamped or not scope_keys:
+            return None
+
+        sql = (
+            "SELECT day, SUM(total) AS count FROM asset_day_stats"
+            f" WHERE scope_root IN ({', '.join('?' for _ in scope_keys)}) AND day >= ? AND day < ?"
+        )
+        params: List[Any] = [*scope_keys, start_dt.strftime("%Y-%m-%d"), end_dt.strftime("%Y-%m-%d")]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        sql += " GROUP BY day HAVING SUM(total) > 0 ORDER BY day ASC"
+        result = await self.db.aquery(sql, tuple(params))
+        if not result.ok:
+            return None
+        return {str(row["day"]): int(row["count"]) for row in result.data or [] if row.get("day")}
+
     async def get_asset(self, asset_id: int) -> Result[Optional[Dict[str, Any]]]:
         """
         Get a single asset by ID.
@@ -752,7 +948,7 @@ class IndexSearcher:
                 m.workflow_hash,
                 m.has_workflow AS has_workflow,
                 m.has_generation_data AS has_generation_data,
-                json_extract(m.metadata_raw, '$.generation_time_ms') as generation_time_ms,
+                m.generation_time_ms AS generation_time_ms,
                 COALESCE(m.metadata_raw, '{}') AS metadata_raw
             FROM assets a
             LEFT JOIN asset_metadata m ON m.asset_id = a.id
@@ -768,6 +964,7 @@ class IndexSearcher:
             return Result.Ok(None)
 
         asset = self._hydrate_asset_payload(dict(result.data[0]))
+        await self._resolve_asset_blobs([asset])
         return Result.Ok(asset)
 
     async def get_assets(self, asset_ids: List[int]) -> Result[List[Dict[str, Any]]]:
@@ -833,6 +1030,8 @@ class IndexSearcher:
                 continue
             by_id[aid] = asset
 
+        await self._resolve_asset_blobs(list(by_id.values()))
+
         # Preserve requested ordering.
         out: List[Dict[str, Any]] = []
         for aid in cleaned:
@@ -869,6 +1068,17 @@ class IndexSearcher:
 
         return asset
 
+    async def _resolve_asset_blobs(self, assets: List[Dict[str, Any]]) -> None:
+        """Swap workflow/prompt blob references for the stored graphs (one blob query per call)."""
+        await resolve_blobs_many(self.db, (asset.get("metadata_raw") for asset in assets))
+        for asset in assets:
+            metadata_obj = asset.get("metadata_raw")
+            if not isinstance(metadata_obj, dict):
+                continue
+            for field in ("prompt", "workflow"):
+                if is_blob_ref(asset.get(field)):
+                    asset[field] = metadata_obj.get(field)
+
     async def lookup_assets_by_filepaths(self, filepaths: List[str]) -> Result[Dict[str, Dict[str, Any]]]:
         """
         Lookup DB-enriched asset fields for a set of absolute filepaths.
@@ -900,28 +1110,58 @@ class IndexSearcher:
             """,
             "a.filepath",
             cleaned,
+            lean=True,
         )
         if not result.ok:
             return Result.Err("DB_ERROR", result.error or "Filepath lookup failed")
+        return Result.Ok(self._lookup_rows_by_filepath(result.data or RowSet((), [])))
+
+    async def lookup_assets_in_dir(self, dirpath: str) -> Result[Dict[str, Dict[str, Any]]]:
+        """
+        Same fields as `lookup_assets_by_filepaths`, for every indexed file directly in `dirpath`.
 
+        One seek on the generated `dir_path` column instead of chunked filepath IN lists.
+        """
+        if not dirpath:
+            return Result.Ok({})
+        result = await self.db.aquery_rows(
+            """
+            SELECT
+                a.filepath,
+                a.id,
+                a.source,
+                a.root_id,
+                COALESCE(m.rating, 0) as rating,
+                COALESCE(m.tags, '[]') as tags,
+                m.has_workflow as has_workflow,
+                m.has_generation_data as has_generation_data
+            FROM assets a
+            LEFT JOIN asset_metadata m ON a.id = m.asset_id
+            WHERE a.dir_path = ?
+            """,
+            (str(dirpath),),
+        )
+        if not result.ok:
+            return Result.Err("DB_ERROR", result.error or "Directory lookup failed")
+        return Result.Ok(self._lookup_rows_by_filepath(result.data or RowSet((), [])))
+
+    @staticmethod
+    def _lookup_rows_by_filepath(rows: RowSet) -> Dict[str, Dict[str, Any]]:
+        if not rows.rows:
+            return {}
+        columns = rows.columns
+        fp_at = rows.index["filepath"]
+        tags_at = rows.index["tags"]
+        memo: Dict[str, Any] = {}
         out: Dict[str, Dict[str, Any]] = {}
-        for row in result.data or []:
-            if not isinstance(row, dict):
-                continue
-            fp = row.get("filepath")
+        for row in rows.rows:
+            fp = row[fp_at]
             if not fp:
                 continue
-            item = dict(row)
-            tags_raw = item.get("tags")
-            if tags_raw:
-                try:
-                    item["tags"] = json.loads(tags_raw) if isinstance(tags_raw, str) else tags_raw
-                except Exception:
-                    item["tags"] = []
-            else:
-                item["tags"] = []
+            item = dict(zip(columns, row))
+            item["tags"] = _decode_tags(row[tags_at], memo)
             out[str(fp)] = item
-        return Result.Ok(out)
+        return out
 
     def _sanitize_fts_query(self, query: str) -> str:
         """
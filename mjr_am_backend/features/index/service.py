@@ -14,7 +14,10 @@ from typing import Optional, List, Dict, Any
 
 from ...shared import get_logger, Result
 from mjr_am_shared.scan_throttle import mark_directory_indexed
+from ...adapters.db.schema import asset_day_stats_rebuild_pending, rebuild_asset_day_stats
+from ...adapters.db.scope_roots import register_scope_roots, scope_root_sql, stamp_unscoped_assets
 from ...adapters.db.sqlite import Sqlite
+from ..geninfo.memo import shutdown_geninfo_pool
 from ..metadata import MetadataService
 from .scanner import IndexScanner
 from .searcher import IndexSearcher
@@ -40,9 +43,16 @@ class IndexService:
     for each area of functionality.
     """
 
-    def __init__(self, db: Sqlite, metadata_service: MetadataService, has_tags_text_column: bool = False):
+    def __init__(
+        self,
+        db: Sqlite,
+        metadata_service: MetadataService,
+        has_tags_text_column: bool = False,
+        thumbnail_service: Any = None,
+    ):
         self.db = db
         self.metadata = metadata_service
+        self.thumbnails = thumbnail_service
         self._scan_lock = asyncio.Lock()
         self._has_tags_text_column = has_tags_text_column
         logger.debug("asset_metadata.tags_text column available: %s", self._has_tags_text_column)
@@ -57,6 +67,7 @@ class IndexService:
             self._scanner._compute_state_hash,
             MetadataHelpers.prepare_metadata_fields,
             MetadataHelpers.metadata_error_payload,
+            thumbnail_service=thumbnail_service,
         )
 
     # ==================== Scanning Operations ====================
@@ -70,6 +81,7 @@ class IndexService:
         root_id: Optional[str] = None,
         fast: bool = False,
         background_metadata: bool = False,
+        verify: bool = False,
     ) -> Result[Dict[str, Any]]:
         """
         Scan a directory for asset files.
@@ -82,6 +94,7 @@ class IndexService:
             root_id: Root identifier for the scan
             fast: Skip metadata extraction during scan
             background_metadata: Enable background metadata enrichment
+            verify: List every directory even when the directory journal says it is unchanged
 
         Returns:
             Result with scan statistics
@@ -94,6 +107,7 @@ class IndexService:
             root_id,
             fast,
             background_metadata,
+            verify=verify,
         )
 
         if result.ok:
@@ -201,13 +215,13 @@ class IndexService:
 
                 if mtime is None:
                     upd = await self.db.aexecute(
-                        "UPDATE assets SET filepath = ?, filename = ?, subfolder = ?, updated_at = CURRENT_TIMESTAMP WHERE filepath = ?",
-                        (new_fp, filename, subfolder, old_fp),
+                        f"UPDATE assets SET filepath = ?, filename = ?, subfolder = ?, scope_root = {scope_root_sql('?')}, updated_at = CURRENT_TIMESTAMP WHERE filepath = ?",
+                        (new_fp, filename, subfolder, new_fp, old_fp),
                     )
                 else:
                     upd = await self.db.aexecute(
-                        "UPDATE assets SET filepath = ?, filename = ?, subfolder = ?, mtime = ?, updated_at = CURRENT_TIMESTAMP WHERE filepath = ?",
-                        (new_fp, filename, subfolder, mtime, old_fp),
+                        f"UPDATE assets SET filepath = ?, filename = ?, subfolder = ?, mtime = ?, scope_root = {scope_root_sql('?')}, updated_at = CURRENT_TIMESTAMP WHERE filepath = ?",
+                        (new_fp, filename, subfolder, mtime, new_fp, old_fp),
                     )
                 if not upd.ok:
                     return Result.Err("DB_ERROR", upd.error or "Failed to update asset filepath")
@@ -240,6 +254,7 @@ class IndexService:
         offset: int = 0,
         filters: Optional[Dict[str, Any]] = None,
         include_total: bool = True,
+        cursor: Optional[str] = None,
     ) -> Result[Dict[str, Any]]:
         """
         Search assets using FTS5 full-text search, or browse all if query is '*'.
@@ -247,13 +262,14 @@ class IndexService:
         Args:
             query: Search query (FTS5 syntax supported, or '*' to browse all)
             limit: Max results to return
-            offset: Pagination offset
+            offset: Pagination offset (ignored when `cursor` is given)
             filters: Optional filters (kind, rating, tags, etc.)
+            cursor: Opaque keyset cursor from a previous page's `next_cursor`
 
         Returns:
             Result with search results and metadata
         """
-        return await self.searcher.search(query, limit, offset, filters, include_total=include_total)
+        return await self.searcher.search(query, limit, offset, filters, include_total=include_total, cursor=cursor)
 
     async def search_scoped(
         self,
@@ -264,6 +280,7 @@ class IndexService:
         filters: Optional[Dict[str, Any]] = None,
         include_total: bool = True,
         sort: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> Result[Dict[str, Any]]:
         """
         Search assets but restrict results to files whose absolute filepath is under one of the provided roots.
@@ -278,6 +295,7 @@ class IndexService:
             filters,
             include_total=include_total,
             sort=sort,
+            cursor=cursor,
         )
 
     async def has_assets_under_root(self, root: str) -> Result[bool]:
@@ -300,6 +318,26 @@ class IndexService:
         """
         return await self.searcher.date_histogram_scoped(roots, month_start, month_end, filters)
 
+    async def date_histogram_rebuild_pending(self) -> bool:
+        """True when the per-day rollup is missing or was built for another timezone."""
+        return await asset_day_stats_rebuild_pending(self.db)
+
+    async def rebuild_date_histogram(self) -> Result[int]:
+        """Rebuild the per-day rollup for the current timezone."""
+        return await rebuild_asset_day_stats(self.db)
+
+    async def scope_stamp_pending(self) -> bool:
+        """True when some assets have no scope_root yet (e.g. indexed before schema v16)."""
+        result = await self.db.aquery("SELECT 1 FROM assets WHERE scope_root IS NULL LIMIT 1")
+        return bool(result.ok and result.data)
+
+    async def stamp_scope_roots(self, roots: List[str]) -> Result[int]:
+        """Register `roots` as scope roots, then stamp the assets that still have no scope_root."""
+        registered = await register_scope_roots(self.db, roots)
+        if not registered.ok:
+            return registered
+        return await stamp_unscoped_assets(self.db)
+
     async def get_asset(self, asset_id: int) -> Result[Optional[Dict[str, Any]]]:
         """Fetch a single asset row by id."""
         # Async path: return the DB row; deep "self-heal" is handled by scan/enrich flows.
@@ -323,6 +361,10 @@ class IndexService:
         """
         return await self.searcher.lookup_assets_by_filepaths(filepaths)
 
+    async def lookup_assets_in_dir(self, dirpath: str) -> Result[Dict[str, Dict[str, Any]]]:
+        """Lookup DB-enriched asset fields for every indexed file directly in `dirpath`."""
+        return await self.searcher.lookup_assets_in_dir(dirpath)
+
     # ==================== Update Operations ====================
 
     async def update_asset_rating(self, asset_id: int, rating: int) -> Result[Dict[str, Any]]:
@@ -373,11 +415,23 @@ class IndexService:
     async def stop_enrichment(self, clear_queue: bool = True) -> None:
         """
         Stop metadata enrichment worker (used during DB maintenance/restore).
+
+        Also drops queued thumbnail pregeneration and shuts down the optional GenInfo
+        parse process pool; the next parse starts a fresh one.
         """
         try:
             await self._enricher.stop_enrichment(clear_queue=clear_queue)
         except Exception:
             pass
+        if self.thumbnails is not None:
+            try:
+                await self.thumbnails.stop()
+            except Exception:
+                pass
+        try:
+            shutdown_geninfo_pool()
+        except Exception:
+            pass
 
     def get_runtime_status(self) -> Dict[str, Any]:
         """Return lightweight runtime counters for diagnostics/dashboard."""
@@ -22,6 +22,7 @@ from watchdog.events import (
     DirCreatedEvent,
 )
 
+from ...adapters.fs.write_intents import is_write_in_flight, matches_self_write
 from ...shared import get_logger, EXTENSIONS
 from ...config import (
     WATCHER_DEBOUNCE_MS,
@@ -102,6 +103,7 @@ class DebouncedWatchHandler(FileSystemEventHandler):
     - Ignores non-media files and internal directories
     - Deduplicates rapid events for the same file
     - Batches files before triggering indexing
+    - Skips changes left by the app's own rating/tags writes (see write_intents)
     - Only reacts to file creation (not modification noise)
     """
 
@@ -371,6 +373,7 @@ class DebouncedWatchHandler(FileSystemEventHandler):
             # or recently indexed via the frontend executed-event path.
             # TOCTOU: re-validate extension at flush time in case file was renamed.
             files = []
+            deferred = []
             for f in candidates:
                 if _is_recent_generated(f):
                     continue
@@ -380,10 +383,18 @@ class DebouncedWatchHandler(FileSystemEventHandler):
                         continue
                 except Exception:
                     continue
+                # The app is writing rating/tags into this file: look again once it is done.
+                if is_write_in_flight(f):
+                    deferred.append(f)
+                    continue
                 try:
-                    size = os.path.getsize(f)
+                    st = os.stat(f)
                 except OSError:
                     continue
+                size = st.st_size
+                # Unchanged since the app's own rating/tags write: nothing to re-index.
+                if matches_self_write(f, st.st_mtime_ns, size):
+                    continue
                 if size < MIN_FILE_SIZE:
                     continue
                 max_size = MAX_FILE_SIZE
@@ -392,6 +403,13 @@ class DebouncedWatchHandler(FileSystemEventHandler):
                     continue
                 files.append(f)
 
+            if deferred:
+                with self._lock:
+                    now = time.time()
+                    for f in deferred:
+                        self._pending.setdefault(f, now)
+                    self._schedule_flush()
+
             if not files:
                 return
 
@@ -0,0 +1,308 @@
+"""
+Native (pure-Python) metadata readers for PNG and WebP containers.
+
+These readers memory-map the file and walk the container chunks directly, so the
+image fast path (ComfyUI PNG/WebP outputs) does not need an ExifTool subprocess.
+The returned dicts use the same `-G1 -s` key shape as ExifTool so the existing
+extractors work unchanged.
+"""
+
+from __future__ import annotations
+
+import html
+import mmap
+import os
+import re
+import struct
+from typing import Any, Dict, List, Optional
+
+from .parsing_utils import MAX_METADATA_JSON_SIZE, _safe_zlib_decompress
+
+NATIVE_IMAGE_EXTENSIONS = frozenset({".png", ".webp"})
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_TEXT_CHUNKS = (b"tEXt", b"iTXt", b"zTXt")
+_XMP_KEYWORD = "XML:com.adobe.xmp"
+
+# PNG text keywords / EXIF text tags that carry generation data.
+_GENERATION_KEYS = frozenset({"PNG:Parameters", "PNG:Prompt", "PNG:Workflow"})
+_WEBP_GENERATION_KEYS = ("IFD0:Make", "IFD0:Model", "IFD0:ImageDescription", "ExifIFD:UserComment")
+
+# TIFF tags read from EXIF blocks: tag id -> (group, name).
+_IFD0_TAGS = {
+    0x010E: "ImageDescription",
+    0x010F: "Make",
+    0x0110: "Model",
+    0x0131: "Software",
+    0x013B: "Artist",
+    0x9C9E: "XPKeywords",
+}
+_EXIF_IFD_TAGS = {
+    0x9003: "DateTimeOriginal",
+    0x9004: "CreateDate",
+    0x9286: "UserComment",
+}
+_EXIF_IFD_POINTER = 0x8769
+
+_XMP_RATING_RE = re.compile(r"xmp:Rating\s*(?:=\s*[\"']|>)\s*(-?\d+)")
+_XMP_RATING_PERCENT_RE = re.compile(r"MicrosoftPhoto:Rating\s*(?:=\s*[\"']|>)\s*(\d+)")
+_XMP_SUBJECT_RE = re.compile(r"<dc:subject>\s*<rdf:Bag>(.*?)</rdf:Bag>", re.S)
+_XMP_LI_RE = re.compile(r"<rdf:li>(.*?)</rdf:li>", re.S)
+
+
+def read_image_chunks_exif_like(path: str) -> Dict[str, Any]:
+    """
+    Read PNG/WebP metadata chunks into an ExifTool-like dict.
+
+    Returns an empty dict for unsupported/corrupt files or on any I/O failure.
+    """
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext not in NATIVE_IMAGE_EXTENSIONS:
+        return {}
+    try:
+        with open(path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file.
+                return {}
+            try:
+                if mm[:8] == _PNG_SIGNATURE:
+                    return _read_png(mm)
+                if mm[:4] == b"RIFF" and mm[8:12] == b"WEBP":
+                    return _read_webp(mm)
+                return {}
+            finally:
+                mm.close()
+    except Exception:
+        return {}
+
+
+def has_generation_data(data: Optional[Dict[str, Any]]) -> bool:
+    """
+    Return True when a native read found generation metadata (ComfyUI prompt/workflow
+    or A1111 parameters), i.e. ExifTool would not add anything the extractors need.
+    """
+    if not data:
+        return False
+    if any(data.get(key) for key in _GENERATION_KEYS):
+        return True
+    for key in _WEBP_GENERATION_KEYS:
+        value = data.get(key)
+        if isinstance(value, str) and ("{" in value or "Steps:" in value):
+            return True
+    return False
+
+
+def _read_png(mm: mmap.mmap) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    size = len(mm)
+    pos = 8
+    while pos + 8 <= size:
+        length, ctype = struct.unpack(">I4s", mm[pos:pos + 8])
+        data_start = pos + 8
+        data_end = data_start + length
+        if data_end > size:
+            break
+        if ctype == b"IHDR" and length >= 8:
+            width, height = struct.unpack(">II", mm[data_start:data_start + 8])
+            out["PNG:ImageWidth"] = int(width)
+            out["PNG:ImageHeight"] = int(height)
+            out["Composite:ImageSize"] = f"{width}x{height}"
+        elif ctype in _PNG_TEXT_CHUNKS:
+            if length <= MAX_METADATA_JSON_SIZE * 2:
+                parsed = _parse_png_text_chunk(ctype, mm[data_start:data_end])
+                if parsed is not None:
+                    _store_png_text(out, parsed[0], parsed[1])
+        elif ctype == b"eXIf":
+            out.update(_parse_exif_block(mm[data_start:data_end]))
+        elif ctype == b"IEND":
+            break
+        # Other chunks (IDAT included) are skipped by length without touching their
+        # data: ExifTool appends XMP (our rating/tags writes) after the image data.
+        pos = data_end + 4  # skip CRC
+    return out
+
+
+def _parse_png_text_chunk(ctype: bytes, data: bytes) -> Optional[tuple[str, str]]:
+    sep = data.find(b"\x00")
+    if sep <= 0:
+        return None
+    keyword = data[:sep].decode("latin-1", errors="replace")
+    rest = data[sep + 1:]
+
+    if ctype == b"tEXt":
+        return keyword, rest.decode("latin-1", errors="replace")
+
+    if ctype == b"zTXt":
+        if not rest:
+            return None
+        raw = _safe_zlib_decompress(rest[1:], max_size=MAX_METADATA_JSON_SIZE)
+        if raw is None:
+            return None
+        return keyword, raw.decode("latin-1", errors="replace")
+
+    # iTXt: compression flag, method, language\0, translated keyword\0, text
+    if len(rest) < 2:
+        return None
+    compressed = rest[0] == 1
+    rest = rest[2:]
+    lang_end = rest.find(b"\x00")
+    if lang_end < 0:
+        return None
+    trans_end = rest.find(b"\x00", lang_end + 1)
+    if trans_end < 0:
+        return None
+    text = rest[trans_end + 1:]
+    if compressed:
+        raw = _safe_zlib_decompress(text, max_size=MAX_METADATA_JSON_SIZE)
+        if raw is None:
+            return None
+        text = raw
+    return keyword, text.decode("utf-8", errors="replace")
+
+
+def _png_tag_name(keyword: str) -> str:
+    # Mirror ExifTool: drop characters that are invalid in tag names, capitalize.
+    cleaned = re.sub(r"[^A-Za-z0-9_-]", "", keyword.title() if " " in keyword else keyword)
+    if not cleaned:
+        return "Unknown"
+    return cleaned[0].upper() + cleaned[1:]
+
+
+def _store_png_text(out: Dict[str, Any], keyword: str, text: str) -> None:
+    if keyword == _XMP_KEYWORD:
+        out.update(_parse_xmp(text))
+        return
+    key = f"PNG:{_png_tag_name(keyword)}"
+    if key not in out:
+        out[key] = text
+
+
+def _read_webp(mm: mmap.mmap) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    riff_size = struct.unpack("<I", mm[4:8])[0]
+    end = min(len(mm), 8 + riff_size)
+    pos = 12
+    while pos + 8 <= end:
+        fourcc = mm[pos:pos + 4]
+        length = struct.unpack("<I", mm[pos + 4:pos + 8])[0]
+        data_start = pos + 8
+        data_end = data_start + length
+        if data_end > end:
+            break
+        if fourcc == b"VP8X" and length >= 10:
+            chunk = mm[data_start:data_start + 10]
+            width = 1 + int.from_bytes(chunk[4:7], "little")
+            height = 1 + int.from_bytes(chunk[7:10], "little")
+            _store_webp_size(out, width, height)
+        elif fourcc == b"VP8 " and length >= 10 and "RIFF:ImageWidth" not in out:
+            chunk = mm[data_start:data_start + 10]
+            if chunk[3:6] == b"\x9d\x01\x2a":
+                width, height = struct.unpack("<HH", chunk[6:10])
+                _store_webp_size(out, width & 0x3FFF, height & 0x3FFF)
+        elif fourcc == b"VP8L" and length >= 5 and "RIFF:ImageWidth" not in out:
+            chunk = mm[data_start:data_start + 5]
+            if chunk[0] == 0x2F:
+                bits = int.from_bytes(chunk[1:5], "little")
+                _store_webp_size(out, (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+        elif fourcc == b"EXIF":
+            out.update(_parse_exif_block(mm[data_start:data_end]))
+        elif fourcc == b"XMP ":
+            out.update(_parse_xmp(mm[data_start:data_end].decode("utf-8", errors="replace")))
+        pos = data_end + (length & 1)  # chunks are padded to even sizes
+    return out
+
+
+def _store_webp_size(out: Dict[str, Any], width: int, height: int) -> None:
+    out["RIFF:ImageWidth"] = int(width)
+    out["RIFF:ImageHeight"] = int(height)
+    out["Composite:ImageSize"] = f"{width}x{height}"
+
+
+def _parse_exif_block(data: bytes) -> Dict[str, Any]:
+    """Parse the few IFD0/ExifIFD text tags the extractors look at."""
+    if data[:6] == b"Exif\x00\x00":
+        data = data[6:]
+    if data[:2] == b"II":
+        endian = "<"
+    elif data[:2] == b"MM":
+        endian = ">"
+    else:
+        return {}
+    out: Dict[str, Any] = {}
+    try:
+        ifd0 = struct.unpack(endian + "I", data[4:8])[0]
+        exif_ifd = _parse_ifd(data, ifd0, endian, _IFD0_TAGS, "IFD0", out)
+        if exif_ifd:
+            _parse_ifd(data, exif_ifd, endian, _EXIF_IFD_TAGS, "ExifIFD", out)
+    except (struct.error, IndexError):
+        pass
+    return out
+
+
+def _parse_ifd(
+    data: bytes,
+    offset: int,
+    endian: str,
+    wanted: Dict[int, str],
+    group: str,
+    out: Dict[str, Any],
+) -> Optional[int]:
+    if offset <= 0 or offset + 2 > len(data):
+        return None
+    count = struct.unpack(endian + "H", data[offset:offset + 2])[0]
+    exif_pointer: Optional[int] = None
+    for i in range(count):
+        entry = offset + 2 + i * 12
+        if entry + 12 > len(data):
+            break
+        tag, typ, n, value = struct.unpack(endian + "HHI4s", data[entry:entry + 12])
+        if tag == _EXIF_IFD_POINTER:
+            exif_pointer = struct.unpack(endian + "I", value)[0]
+            continue
+        name = wanted.get(tag)
+        if name is None or typ not in (1, 2, 7):
+            continue
+        if n <= 4:
+            raw = value[:n]
+        else:
+            start = struct.unpack(endian + "I", value)[0]
+            raw = data[start:start + n]
+        text = _decode_exif_text(name, raw)
+        if text:
+            out[f"{group}:{name}"] = text
+    return exif_pointer
+
+
+def _decode_exif_text(name: str, raw: bytes) -> str:
+    if name == "XPKeywords":
+        return raw.decode("utf-16-le", errors="replace").rstrip("\x00")
+    if name == "UserComment":
+        prefix, body = raw[:8], raw[8:]
+        if prefix.startswith(b"UNICODE"):
+            # ExifTool honours the TIFF byte order; UTF-16 without BOM is the common case.
+            enc = "utf-16-be" if body[:1] == b"\x00" else "utf-16-le"
+            return body.decode(enc, errors="replace").rstrip("\x00").strip()
+        if prefix.startswith(b"ASCII") or prefix == b"\x00" * 8:
+            return body.decode("utf-8", errors="replace").rstrip("\x00").strip()
+        return raw.decode("utf-8", errors="replace").rstrip("\x00").strip()
+    return raw.decode("utf-8", errors="replace").rstrip("\x00").strip()
+
+
+def _parse_xmp(text: str) -> Dict[str, Any]:
+    """Extract rating/keywords from an XMP packet (as written by ExifTool/Explorer)."""
+    out: Dict[str, Any] = {}
+    m = _XMP_RATING_RE.search(text)
+    if m:
+        out["XMP-xmp:Rating"] = int(m.group(1))
+    m = _XMP_RATING_PERCENT_RE.search(text)
+    if m:
+        out["XMP-microsoft:RatingPercent"] = int(m.group(1))
+    m = _XMP_SUBJECT_RE.search(text)
+    if m:
+        subjects: List[str] = [html.unescape(s).strip() for s in _XMP_LI_RE.findall(m.group(1))]
+        subjects = [s for s in subjects if s]
+        if subjects:
+            out["XMP-dc:Subject"] = subjects[0] if len(subjects) == 1 else subjects
+    return out
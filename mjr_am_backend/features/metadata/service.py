@@ -5,7 +5,6 @@ import asyncio
 import logging
 import os
 import time
-import functools
 from typing import Dict, Any, Optional
 
 from ...shared import Result, ErrorCode, get_logger, classify_file, log_structured
@@ -20,13 +19,24 @@ from .extractors import (
     extract_rating_tags_from_exif,
 )
 from .fallback_readers import read_image_exif_like, read_media_probe_like
+from .native_readers import has_generation_data, read_image_chunks_exif_like
 from ..audio import extract_audio_metadata
-from ..geninfo.parser import parse_geninfo_from_prompt
+from ..geninfo.memo import parse_geninfo_memoized
 from .parsing_utils import parse_auto1111_params
 
 logger = get_logger(__name__)
 
 
+def _read_native_batch(paths: list[str]) -> Dict[str, Dict[str, Any]]:
+    """Run the native PNG/WebP chunk reader over a batch (one worker-thread hop)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        data = read_image_chunks_exif_like(path)
+        if data:
+            out[path] = data
+    return out
+
+
 def _clean_model_name(value: Any) -> Optional[str]:
     if value is None:
         return None
@@ -207,18 +217,14 @@ class MetadataService:
         self._extract_sem = asyncio.Semaphore(max_concurrency)
 
     async def _enrich_with_geninfo_async(self, combined: Dict[str, Any]) -> None:
-        """Helper to parse geninfo from prompt/workflow in combined metadata (Worker Thread)."""
+        """Helper to parse geninfo from prompt/workflow in combined metadata (off the event loop, memoized)."""
         prompt_graph = combined.get("prompt")
         workflow = combined.get("workflow")
-        loop = asyncio.get_running_loop()
         geninfo_res = None
 
         try:
-            # Offload heavy parsing to thread pool to prevent blocking the event loop
-            geninfo_res = await loop.run_in_executor(
-                None,
-                functools.partial(parse_geninfo_from_prompt, prompt_graph, workflow=workflow)
-            )
+            # Graphs that differ only by seed reuse one parse; misses run in a worker pool.
+            geninfo_res = await parse_geninfo_memoized(prompt_graph, workflow=workflow)
         except Exception as exc:
             logger.debug(f"GenInfo parse skipped: {exc}")
 
@@ -310,7 +316,12 @@ class MetadataService:
             allow_ffprobe = "ffprobe" in backends
 
             if kind == "image":
-                return await self._extract_image_metadata(file_path, scan_id=scan_id, allow_exif=allow_exif)
+                return await self._extract_image_metadata(
+                    file_path,
+                    scan_id=scan_id,
+                    allow_exif=allow_exif,
+                    allow_native="native" in backends,
+                )
             elif kind == "video":
                 return await self._extract_video_metadata(
                     file_path,
@@ -354,6 +365,20 @@ class MetadataService:
 
         ext = os.path.splitext(file_path)[1].lower()
 
+        if kind == "image" and ext in (".png", ".webp"):
+            native_data = await asyncio.to_thread(read_image_chunks_exif_like, file_path)
+            if has_generation_data(native_data):
+                extract = extract_png_metadata if ext == ".png" else extract_webp_metadata
+                res = extract(file_path, native_data)
+                if res.ok and ((res.data or {}).get("workflow") or (res.data or {}).get("prompt")):
+                    data = res.data or {}
+                    payload = {
+                        "workflow": data.get("workflow"),
+                        "prompt": data.get("prompt"),
+                        "quality": data.get("quality", res.meta.get("quality", "none")),
+                    }
+                    return Result.Ok(payload, quality=payload.get("quality", "none"))
+
         exif_start = time.perf_counter()
         exif_result = await asyncio.to_thread(self.exiftool.read, file_path)
         exif_duration = time.perf_counter() - exif_start
@@ -402,18 +427,24 @@ class MetadataService:
         self,
         file_path: str,
         scan_id: Optional[str] = None,
-        allow_exif: bool = True
+        allow_exif: bool = True,
+        allow_native: bool = False,
     ) -> Result[Dict[str, Any]]:
         """Extract metadata from image file."""
         ext = os.path.splitext(file_path)[1].lower()
 
         exif_data = None
+        exif_duration = None
         image_fallback_enabled, _ = await self._resolve_fallback_prefs()
+        if allow_native:
+            exif_data = await asyncio.to_thread(read_image_chunks_exif_like, file_path) or None
+            if has_generation_data(exif_data):
+                allow_exif = False
         if allow_exif:
             exif_start = time.perf_counter()
             exif_result = await asyncio.to_thread(self.exiftool.read, file_path)
             exif_duration = time.perf_counter() - exif_start
-            exif_data = exif_result.data if exif_result.ok else None
+            exif_data = (exif_result.data if exif_result.ok else None) or exif_data
             if not exif_result.ok:
                 self._log_metadata_issue(
                     logging.WARNING,
@@ -723,8 +754,20 @@ class MetadataService:
         seen_exif: set[str] = set()
         seen_ffprobe: set[str] = set()
 
+        # Native PNG/WebP chunk reads (no subprocess); ExifTool only for files without
+        # generation metadata.
+        native_targets = [
+            path for path in images
+            if "native" in pick_probe_backend(path, settings_override=probe_mode)
+        ]
+        native_results: Dict[str, Dict[str, Any]] = (
+            await asyncio.to_thread(_read_native_batch, native_targets) if native_targets else {}
+        )
+
         for path in [*images, *videos, *audios]:
             backends = pick_probe_backend(path, settings_override=probe_mode)
+            if has_generation_data(native_results.get(path)):
+                continue
             if "exiftool" in backends and path not in seen_exif:
                 seen_exif.add(path)
                 exif_targets.append(path)
@@ -741,7 +784,9 @@ class MetadataService:
 
         def _exif_for(path: str) -> Optional[Dict[str, Any]]:
             ex_res = exif_results.get(path)
-            return ex_res.data if ex_res and ex_res.ok else None
+            if ex_res and ex_res.ok and ex_res.data:
+                return ex_res.data
+            return native_results.get(path) or None
 
         def _ffprobe_for(path: str) -> Optional[Dict[str, Any]]:
             ff_res = ffprobe_results.get(path)
@@ -14,9 +14,11 @@ import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from ...adapters.fs.write_intents import begin_writes, end_writes
 from ...adapters.tools.exiftool import ExifTool
+from ...config import RATING_TAGS_SYNC_BATCH_SIZE, RATING_TAGS_SYNC_CONCURRENCY
 from ...shared import Result, ErrorCode, get_logger
 
 logger = get_logger(__name__)
@@ -59,6 +61,39 @@ def _normalize_tags(tags: List[str]) -> List[str]:
     return out
 
 
+def _exif_rating_tags_payload(rating: int, tags: List[str]) -> Dict[str, Any]:
+    stars = max(0, min(5, int(rating or 0)))
+    tags_norm = _normalize_tags(tags)
+    joined = "; ".join(tags_norm)
+
+    # Multi-namespace writes to maximize Windows Explorer compatibility.
+    # Arrays are written as repeated values by the ExifTool adapter.
+    payload: Dict[str, Any] = {
+        "XMP:Rating": stars,
+        "xmp:rating": stars,
+        "rating": stars,
+        "ratingpercent": _windows_rating_percent(stars),
+        # Windows Property System (best-effort; writable depends on container/handler)
+        "Microsoft:SharedUserRating": _windows_rating_percent(stars),
+        "Microsoft:Category": joined,
+        "XMP:Subject": tags_norm,
+        "IPTC:Keywords": tags_norm,
+        "XPKeywords": joined,
+        "Keywords": joined,
+        "Subject": joined,
+    }
+
+    # Clear tags when explicitly empty.
+    if tags_norm == []:
+        payload["XMP:Subject"] = []
+        payload["IPTC:Keywords"] = []
+        payload["Microsoft:Category"] = ""
+        payload["XPKeywords"] = ""
+        payload["Keywords"] = ""
+        payload["Subject"] = ""
+    return payload
+
+
 def write_exif_rating_tags(exiftool: ExifTool, file_path: str, rating: int, tags: List[str]) -> Result[bool]:
     """
     Try writing rating/tags into the file metadata via ExifTool.
@@ -78,10 +113,6 @@ def write_exif_rating_tags(exiftool: ExifTool, file_path: str, rating: int, tags
     if not p.exists() or not p.is_file():
         return Result.Err(ErrorCode.NOT_FOUND, f"File not found: {file_path}")
 
-    stars = max(0, min(5, int(rating or 0)))
-    tags_norm = _normalize_tags(tags)
-    joined = "; ".join(tags_norm)
-
     try:
         original_mtime = None
         try:
@@ -89,32 +120,7 @@ def write_exif_rating_tags(exiftool: ExifTool, file_path: str, rating: int, tags
         except OSError:
             original_mtime = None
 
-        # Multi-namespace writes to maximize Windows Explorer compatibility.
-        # Arrays are written as repeated values by the ExifTool adapter.
-        payload: Dict[str, Any] = {
-            "XMP:Rating": stars,
-            "xmp:rating": stars,
-            "rating": stars,
-            "ratingpercent": _windows_rating_percent(stars),
-            # Windows Property System (best-effort; writable depends on container/handler)
-            "Microsoft:SharedUserRating": _windows_rating_percent(stars),
-            "Microsoft:Category": joined,
-            "XMP:Subject": tags_norm,
-            "IPTC:Keywords": tags_norm,
-            "XPKeywords": joined,
-            "Keywords": joined,
-            "Subject": joined,
-        }
-
-        # Clear tags when explicitly empty.
-        if tags_norm == []:
-            payload["XMP:Subject"] = []
-            payload["IPTC:Keywords"] = []
-            payload["Microsoft:Category"] = ""
-            payload["XPKeywords"] = ""
-            payload["Keywords"] = ""
-            payload["Subject"] = ""
-
+        payload = _exif_rating_tags_payload(rating, tags)
         res = exiftool.write(str(p), payload, preserve_workflow=True)
         if not res.ok:
             return Result.Err(res.code or ErrorCode.EXIFTOOL_ERROR, res.error or "ExifTool write failed")
@@ -130,6 +136,55 @@ def write_exif_rating_tags(exiftool: ExifTool, file_path: str, rating: int, tags
         return Result.Err(ErrorCode.EXIFTOOL_ERROR, f"ExifTool write failed: {exc}")
 
 
+def write_exif_rating_tags_batch(
+    exiftool: ExifTool, items: List[Tuple[str, int, List[str]]]
+) -> Dict[str, Result[bool]]:
+    """
+    Write rating/tags for several files through one ExifTool invocation.
+
+    `items` are (file_path, rating, tags). Returns a Result per file path; file
+    mtimes are restored like `write_exif_rating_tags` does.
+    """
+    try:
+        if not exiftool or not exiftool.is_available():
+            err: Result[bool] = Result.Err(ErrorCode.TOOL_MISSING, "ExifTool not available")
+            return {str(path): err for path, _, _ in items}
+    except (AttributeError, TypeError, ValueError) as exc:
+        logger.debug("ExifTool availability check failed: %s", exc)
+        err = Result.Err(ErrorCode.TOOL_MISSING, "ExifTool not available")
+        return {str(path): err for path, _, _ in items}
+
+    results: Dict[str, Result[bool]] = {}
+    mtimes: Dict[str, float] = {}
+    writes: List[Tuple[str, Dict[str, Any]]] = []
+    for file_path, rating, tags in items:
+        path = str(file_path)
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except (OSError, ValueError):
+            pass
+        writes.append((path, _exif_rating_tags_payload(rating, tags)))
+
+    try:
+        written = exiftool.write_batch(writes, preserve_workflow=True)
+    except Exception as exc:
+        err = Result.Err(ErrorCode.EXIFTOOL_ERROR, f"ExifTool write failed: {exc}")
+        return {path: err for path, _ in writes}
+
+    for path, _ in writes:
+        res = written.get(path) or Result.Err(ErrorCode.EXIFTOOL_ERROR, "ExifTool write failed")
+        if not res.ok:
+            results[path] = Result.Err(res.code or ErrorCode.EXIFTOOL_ERROR, res.error or "ExifTool write failed")
+            continue
+        if path in mtimes:
+            try:
+                os.utime(path, (mtimes[path], mtimes[path]))
+            except OSError as exc:
+                logger.debug("Failed to restore mtime after ExifTool write: %s", exc)
+        results[path] = Result.Ok(True)
+    return results
+
+
 @dataclass(frozen=True)
 class RatingTagsSyncTask:
     """Coalesced update request for a single file."""
@@ -278,23 +333,37 @@ def write_windows_rating_tags(file_path: str, rating: int, tags: List[str]) -> R
 class RatingTagsSyncWorker:
     """
     A background worker that coalesces rating/tag writes per file path.
+
+    Pending files are drained in groups of up to `batch_size` and written through
+    one ExifTool invocation per group, by `concurrency` threads. A file is never
+    written by two threads at once, so the last queued update always wins.
+    Progress is reported through the `mjr-rating-tags-sync` PromptServer event.
     """
 
-    def __init__(self, exiftool: ExifTool):
+    def __init__(self, exiftool: ExifTool, concurrency: Optional[int] = None, batch_size: Optional[int] = None):
         self._exiftool = exiftool
+        self._batch_size = max(1, int(batch_size or RATING_TAGS_SYNC_BATCH_SIZE))
         self._lock = threading.Lock()
         self._event = threading.Event()
         self._pending: Dict[str, RatingTagsSyncTask] = {}
+        self._inflight: set[str] = set()
+        self._progress = {"done": 0, "failed": 0}
         self._stop = False
-        self._thread = threading.Thread(target=self._run, name="mjr-rating-tags-sync", daemon=True)
-        self._thread.start()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"mjr-rating-tags-sync-{i}", daemon=True)
+            for i in range(max(1, int(concurrency or RATING_TAGS_SYNC_CONCURRENCY)))
+        ]
+        for thread in self._threads:
+            thread.start()
 
     def stop(self, timeout: float = 2.0) -> None:
-        """Stop the background worker thread (best-effort)."""
+        """Stop the background worker threads (best-effort)."""
         try:
             self._stop = True
             self._event.set()
-            self._thread.join(timeout=timeout)
+            deadline = time.monotonic() + max(0.0, float(timeout))
+            for thread in self._threads:
+                thread.join(timeout=max(0.0, deadline - time.monotonic()))
         except Exception as exc:
             logger.debug("RatingTagsSyncWorker stop failed: %s", exc)
 
@@ -314,16 +383,44 @@ class RatingTagsSyncWorker:
             self._pending[task.file_path] = task
             self._event.set()
 
-    def _drain_one(self) -> Optional[RatingTagsSyncTask]:
+    def _drain_batch(self) -> List[RatingTagsSyncTask]:
+        """Take up to `batch_size` pending tasks (oldest first) whose file is not being written."""
         with self._lock:
-            if not self._pending:
+            batch: List[RatingTagsSyncTask] = []
+            for path in self._pending:
+                if path in self._inflight:
+                    continue
+                batch.append(self._pending[path])
+                if len(batch) >= self._batch_size:
+                    break
+            for task in batch:
+                del self._pending[task.file_path]
+                self._inflight.add(task.file_path)
+            if not batch:
                 self._event.clear()
-                return None
-            # pop an arbitrary item (dict is insertion-ordered; popitem() pops last)
-            _, task = self._pending.popitem()
-            if not self._pending:
-                self._event.clear()
-            return task
+            return batch
+
+    def _finish_batch(self, batch: List[RatingTagsSyncTask], failed: int) -> None:
+        with self._lock:
+            for task in batch:
+                self._inflight.discard(task.file_path)
+            self._progress["done"] += len(batch) - failed
+            self._progress["failed"] += failed
+            remaining = len(self._pending) + len(self._inflight)
+            payload = {"active": remaining > 0, **self._progress, "pending": remaining}
+            if remaining == 0:
+                self._progress = {"done": 0, "failed": 0}
+            # Paths skipped while another thread was writing them can be drained now.
+            if self._pending:
+                self._event.set()
+        self._emit_progress(payload)
+
+    def _emit_progress(self, payload: Dict[str, Any]) -> None:
+        try:
+            from ...routes.registry import PromptServer
+            PromptServer.instance.send_sync("mjr-rating-tags-sync", payload)
+        except Exception:
+            pass
 
     def _run(self) -> None:
         while not self._stop:
@@ -331,41 +428,59 @@ class RatingTagsSyncWorker:
             if self._stop:
                 break
 
-            task = self._drain_one()
-            if not task:
+            batch = self._drain_batch()
+            if not batch:
                 continue
 
+            failed = 0
             try:
-                self._process(task)
+                failed = self._process_batch(batch)
             except Exception as exc:
                 # Never let background errors crash ComfyUI.
-                logger.debug("RatingTagsSyncWorker task failed: %s", exc)
-
-    def _process(self, task: RatingTagsSyncTask) -> None:
-        mode = task.mode
-        if mode == "off":
-            return
-
-        tags_norm = _normalize_tags(task.tags)
-        rating = max(0, min(5, int(task.rating or 0)))
+                failed = len(batch)
+                logger.debug("RatingTagsSyncWorker batch failed: %s", exc)
+            finally:
+                self._finish_batch(batch, failed)
+
+    def _process_batch(self, batch: List[RatingTagsSyncTask]) -> int:
+        """Write one group of tasks; returns how many files could not be synced."""
+        tasks = [t for t in batch if t.mode != "off"]
+        items = [
+            (t.file_path, max(0, min(5, int(t.rating or 0))), _normalize_tags(t.tags))
+            for t in tasks
+        ]
+
+        # Announce the writes so the index watcher/scanner do not re-index them.
+        paths = [item[0] for item in items]
+        begin_writes(paths)
+        try:
+            return self._write_items(tasks, items)
+        finally:
+            end_writes(paths)
 
+    def _write_items(self, tasks: List[RatingTagsSyncTask], items: List[Tuple[str, int, List[str]]]) -> int:
         # Prefer ExifTool (cross-platform), then Windows Shell fallback (Windows-only).
-        if mode in ("on", "exiftool"):
+        exif_items = [item for item, t in zip(items, tasks) if t.mode in ("on", "exiftool")]
+        written: Dict[str, Result[bool]] = {}
+        if exif_items:
             try:
-                ex = write_exif_rating_tags(self._exiftool, task.file_path, rating, tags_norm)
-                if ex.ok:
-                    time.sleep(0.01)
-                    return
-                logger.debug("ExifTool rating/tags write skipped: %s", ex.error)
+                written = write_exif_rating_tags_batch(self._exiftool, exif_items)
             except Exception as exc:
                 logger.debug("ExifTool rating/tags write failed: %s", exc)
 
-        try:
-            win = write_windows_rating_tags(task.file_path, rating, tags_norm)
-            if not win.ok:
+        failed = 0
+        for file_path, rating, tags_norm in items:
+            ex = written.get(file_path)
+            if ex is not None and ex.ok:
+                continue
+            if ex is not None:
+                logger.debug("ExifTool rating/tags write skipped: %s", ex.error)
+            try:
+                win = write_windows_rating_tags(file_path, rating, tags_norm)
+                if win.ok:
+                    continue
                 logger.debug("Windows rating/tags write skipped: %s", win.error)
-        except Exception as exc:
-            logger.debug("Windows rating/tags write failed: %s", exc)
-
-        # Small delay to prevent hammering exiftool when a batch update happens.
-        time.sleep(0.01)
+            except Exception as exc:
+                logger.debug("Windows rating/tags write failed: %s", exc)
+            failed += 1
+        return failed
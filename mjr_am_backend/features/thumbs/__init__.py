@@ -0,0 +1,6 @@
+"""
+Thumbnails feature - cached grid previews.
+"""
+from .service import DEFAULT_THUMB_SIZE, THUMB_SIZES, ThumbnailService
+
+__all__ = ["ThumbnailService", "THUMB_SIZES", "DEFAULT_THUMB_SIZE"]
@@ -0,0 +1,453 @@
+"""
+Grid thumbnails with an on-disk LRU cache.
+
+Thumbnails are rendered at a few fixed edge sizes (THUMB_SIZES) and stored under
+`_mjr_index/thumbs`. Each file is addressed by a hash of (source path, mtime,
+size, edge, format): an edited source gets a new key and the stale thumbnail just
+ages out. The key doubles as a strong ETag. The directory is kept under
+THUMB_CACHE_MAX_BYTES by least-recently-used eviction; recency survives restarts
+through the thumbnail files' mtimes.
+
+Images are decoded with Pillow's draft mode (JPEG DCT scaling) and reduce-based
+downscaling; videos use an ffmpeg poster frame when ffmpeg is available.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from ...config import (
+    FFMPEG_BIN,
+    THUMB_CACHE_MAX_BYTES,
+    THUMB_FFMPEG_TIMEOUT,
+    THUMB_FORMAT,
+    THUMB_PREGENERATE,
+    THUMB_QUALITY,
+    THUMB_WORKERS,
+    THUMBS_DIR,
+)
+from ...shared import ErrorCode, Result, classify_file, get_logger
+
+logger = get_logger(__name__)
+
+THUMB_SIZES = (128, 256, 512)
+DEFAULT_THUMB_SIZE = 256
+# Bump to invalidate every cached thumbnail after a rendering change.
+_KEY_VERSION = "1"
+_FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+_TOUCH_INTERVAL_S = 3600.0
+_PREGENERATE_QUEUE_MAX = 4096
+# Poster frame offsets (seconds): skip fade-ins, but still work for clips under a second.
+_POSTER_OFFSETS = ("1", "0")
+
+
+def snap_thumb_size(value: Any) -> int:
+    """Round a requested edge length up to the nearest supported thumbnail size."""
+    try:
+        px = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_THUMB_SIZE
+    for size in THUMB_SIZES:
+        if px <= size:
+            return size
+    return THUMB_SIZES[-1]
+
+
+def thumb_key(filepath: str, mtime_ns: int, size: int, px: int, fmt: str) -> str:
+    raw = "\0".join((_KEY_VERSION, str(filepath), str(int(mtime_ns)), str(int(size)), str(int(px)), fmt))
+    return hashlib.sha256(raw.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _resolve_ffmpeg(bin_name: Optional[str]) -> Optional[str]:
+    """Resolve the ffmpeg executable, rejecting anything that is not an ffmpeg binary."""
+    raw = str(bin_name or "").strip()
+    if not raw or any(ch in raw for ch in ("\x00", "\n", "\r", "&", "|", ";", ">", "<")):
+        return None
+    resolved = shutil.which(raw)
+    if not resolved:
+        try:
+            candidate = Path(raw)
+            if candidate.is_file():
+                resolved = str(candidate.resolve(strict=True))
+        except (OSError, RuntimeError, ValueError):
+            return None
+    if not resolved or not Path(resolved).name.lower().startswith("ffmpeg"):
+        return None
+    return resolved
+
+
+def _grab_video_frame(ffmpeg: str, filepath: str, px: int, timeout: float) -> Optional[Image.Image]:
+    scale = f"scale=w={px}:h={px}:force_original_aspect_ratio=decrease"
+    for offset in _POSTER_OFFSETS:
+        cmd = [
+            ffmpeg, "-v", "error", "-nostdin",
+            "-ss", offset, "-i", filepath,
+            "-frames:v", "1", "-vf", scale,
+            "-f", "image2pipe", "-vcodec", "png", "-",
+        ]
+        try:
+            process = subprocess.run(
+                cmd,
+                capture_output=True,
+                check=False,
+                timeout=timeout,
+                shell=False,
+                close_fds=os.name != "nt",
+            )
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            logger.debug("ffmpeg poster frame failed for %s: %s", filepath, exc)
+            return None
+        if process.returncode == 0 and process.stdout:
+            im = Image.open(io.BytesIO(process.stdout))
+            im.load()
+            return im
+    return None
+
+
+def _open_image(filepath: str, px: int) -> Image.Image:
+    im = Image.open(filepath)
+    # JPEG decodes straight to the nearest 1/2..1/8 scale at or above the target.
+    im.draft("RGB", (px, px))
+    return ImageOps.exif_transpose(im) or im
+
+
+def _prepare_for_encode(im: Image.Image, pil_format: str) -> Image.Image:
+    has_alpha = im.mode in ("RGBA", "LA", "PA") or (im.mode == "P" and "transparency" in im.info)
+    if pil_format == "WEBP" and has_alpha:
+        return im if im.mode == "RGBA" else im.convert("RGBA")
+    if has_alpha:
+        rgba = im.convert("RGBA")
+        flat = Image.new("RGB", rgba.size, (0, 0, 0))
+        flat.paste(rgba, mask=rgba.getchannel("A"))
+        return flat
+    return im if im.mode == "RGB" else im.convert("RGB")
+
+
+def _render_thumbnail(
+    filepath: str, kind: str, px: int, dest: Path, fmt: str, ffmpeg: Optional[str]
+) -> Optional[int]:
+    """Render one thumbnail to `dest` (atomic replace). Returns bytes written, None if undecodable."""
+    pil_format, _, _ = _FORMATS[fmt]
+    if kind == "video":
+        if not ffmpeg:
+            return None
+        im = _grab_video_frame(ffmpeg, filepath, px, float(THUMB_FFMPEG_TIMEOUT))
+        if im is None:
+            return None
+    else:
+        im = _open_image(filepath, px)
+    try:
+        # reducing_gap: shrink by an integer factor with reduce() before the final resample.
+        im.thumbnail((px, px), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        out = _prepare_for_encode(im, pil_format)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            options: Dict[str, Any] = {"quality": int(THUMB_QUALITY)}
+            if pil_format == "WEBP":
+                options["method"] = 4
+            else:
+                options["optimize"] = True
+            out.save(tmp, format=pil_format, **options)
+            os.replace(tmp, dest)
+        finally:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+        return int(dest.stat().st_size)
+    finally:
+        im.close()
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _unlink_all(paths: Iterable[Path]) -> None:
+    for path in paths:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+class ThumbnailService:
+    """
+    Renders and caches grid thumbnails.
+
+    Renders run in worker threads, at most THUMB_WORKERS at a time; concurrent
+    requests for the same thumbnail share one render. Pregeneration runs one
+    render at a time so interactive requests keep the remaining workers.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        workers: Optional[int] = None,
+        fmt: Optional[str] = None,
+        ffmpeg_bin: Optional[str] = None,
+    ):
+        self.cache_dir = Path(cache_dir or THUMBS_DIR)
+        self.max_bytes = int(THUMB_CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+        self._workers = max(1, int(THUMB_WORKERS if workers is None else workers))
+        fmt = str(fmt or THUMB_FORMAT or "webp").strip().lower()
+        if fmt == "jpg":
+            fmt = "jpeg"
+        if fmt not in _FORMATS or (fmt == "webp" and not features.check("webp")):
+            fmt = "jpeg"
+        self.fmt = fmt
+        self._ffmpeg = _resolve_ffmpeg(FFMPEG_BIN if ffmpeg_bin is None else ffmpeg_bin)
+
+        self._lock = threading.Lock()
+        # key -> (file, bytes, last touch); oldest first.
+        self._entries: "OrderedDict[str, Tuple[Path, int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._pregen_task: Optional[asyncio.Task] = None
+        self._stats = {"hits": 0, "misses": 0, "generated": 0, "failed": 0, "evicted": 0}
+
+    def supports(self, filepath: str) -> bool:
+        kind = classify_file(str(filepath or ""))
+        return kind == "image" or (kind == "video" and self._ffmpeg is not None)
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{_FORMATS[self.fmt][1]}"
+
+    def _thumb_info(self, key: str, path: Path, px: int) -> Dict[str, Any]:
+        return {"path": str(path), "etag": f'"{key}"', "mime": _FORMATS[self.fmt][2], "size": px}
+
+    # ==================== Cache index ====================
+
+    def _scan_cache_dir(self) -> List[Tuple[str, Path, int, float]]:
+        found: List[Tuple[str, Path, int, float]] = []
+        stale: List[Path] = []
+        try:
+            shards = list(os.scandir(self.cache_dir))
+        except OSError:
+            return found
+        for shard in shards:
+            if not shard.is_dir(follow_symlinks=False):
+                continue
+            try:
+                entries = list(os.scandir(shard.path))
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name
+                if name.endswith(".tmp"):
+                    stale.append(Path(entry.path))
+                    continue
+                key, ext = os.path.splitext(name)
+                if len(key) != 64 or ext not in {spec[1] for spec in _FORMATS.values()}:
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                found.append((key, Path(entry.path), int(st.st_size), float(st.st_mtime)))
+        _unlink_all(stale)
+        found.sort(key=lambda item: item[3])
+        return found
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self._loaded:
+                return
+            found = await asyncio.to_thread(self._scan_cache_dir)
+            with self._lock:
+                for key, path, nbytes, mtime in found:
+                    if key not in self._entries:
+                        self._entries[key] = (path, nbytes, mtime)
+                        self._total_bytes += nbytes
+                self._loaded = True
+            await self._evict()
+
+    def _lookup(self, key: str) -> Optional[Path]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            path, nbytes, touched = entry
+            self._entries.move_to_end(key)
+            if now - touched < _TOUCH_INTERVAL_S:
+                return path
+            self._entries[key] = (path, nbytes, now)
+        asyncio.get_running_loop().run_in_executor(None, _touch, path)
+        return path
+
+    def _record(self, key: str, path: Path, nbytes: int) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._entries[key] = (path, int(nbytes), time.time())
+            self._total_bytes += int(nbytes)
+
+    async def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop least-recently-used thumbnails until under budget, never `keep` (about to be served)."""
+        victims: List[Path] = []
+        with self._lock:
+            while self._entries and self._total_bytes > self.max_bytes:
+                key = next(iter(self._entries))
+                if key == keep:
+                    if len(self._entries) == 1:
+                        break
+                    self._entries.move_to_end(key)
+                    continue
+                path, nbytes, _ = self._entries.pop(key)
+                self._total_bytes -= nbytes
+                victims.append(path)
+            self._stats["evicted"] += len(victims)
+        if victims:
+            await asyncio.to_thread(_unlink_all, victims)
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    # ==================== Rendering ====================
+
+    async def get_thumbnail(self, filepath: str, size: Any = DEFAULT_THUMB_SIZE) -> Result[Dict[str, Any]]:
+        """
+        Return the cached thumbnail for a file, rendering it on a miss.
+
+        Returns:
+            Result with {"path", "etag", "mime", "size"}
+        """
+        fp = str(filepath or "")
+        kind = classify_file(fp)
+        if kind not in ("image", "video"):
+            return Result.Err(ErrorCode.UNSUPPORTED, f"No thumbnails for {kind} files")
+        if kind == "video" and self._ffmpeg is None:
+            return Result.Err(ErrorCode.TOOL_MISSING, "ffmpeg not found - video thumbnails unavailable")
+        px = snap_thumb_size(size)
+        try:
+            st = await asyncio.to_thread(os.stat, fp)
+        except OSError:
+            return Result.Err(ErrorCode.NOT_FOUND, "File not found")
+        await self._ensure_loaded()
+
+        mtime_ns = getattr(st, "st_mtime_ns", int(st.st_mtime * 1_000_000_000))
+        key = thumb_key(fp, mtime_ns, st.st_size, px, self.fmt)
+        cached = self._lookup(key)
+        if cached is not None:
+            self._count("hits")
+            return Result.Ok(self._thumb_info(key, cached, px))
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._count("misses")
+            task = asyncio.create_task(self._generate(key, fp, kind, px))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._forget_inflight, key))
+        return await asyncio.shield(task)
+
+    def _forget_inflight(self, key: str, _task: "asyncio.Task[Any]") -> None:
+        self._inflight.pop(key, None)
+
+    async def _generate(self, key: str, filepath: str, kind: str, px: int) -> Result[Dict[str, Any]]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._workers)
+        dest = self._path_for(key)
+        async with self._semaphore:
+            try:
+                nbytes = await asyncio.to_thread(_render_thumbnail, filepath, kind, px, dest, self.fmt, self._ffmpeg)
+            except Exception as exc:
+                nbytes = None
+                logger.debug("Thumbnail render failed for %s: %s", filepath, exc)
+        if nbytes is None:
+            self._count("failed")
+            return Result.Err("THUMB_FAILED", "Could not render a thumbnail for this file")
+        self._count("generated")
+        self._record(key, dest, nbytes)
+        await self._evict(keep=key)
+        return Result.Ok(self._thumb_info(key, dest, px))
+
+    # ==================== Pregeneration ====================
+
+    def pregenerate(self, filepaths: Iterable[str]) -> int:
+        """
+        Queue default-size thumbnails for background rendering.
+
+        Returns:
+            Number of newly queued files
+        """
+        if not THUMB_PREGENERATE:
+            return 0
+        queued = 0
+        for fp in filepaths or []:
+            fp = str(fp or "")
+            if not fp or fp in self._pending or not self.supports(fp):
+                continue
+            if len(self._pending) >= _PREGENERATE_QUEUE_MAX:
+                break
+            self._pending[fp] = None
+            queued += 1
+        if self._pending and (self._pregen_task is None or self._pregen_task.done()):
+            try:
+                self._pregen_task = asyncio.get_running_loop().create_task(self._pregenerate_worker())
+            except RuntimeError:
+                return 0
+        return queued
+
+    async def _pregenerate_worker(self) -> None:
+        while self._pending:
+            fp, _ = self._pending.popitem(last=False)
+            try:
+                await self.get_thumbnail(fp, DEFAULT_THUMB_SIZE)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.debug("Thumbnail pregeneration skipped for %s: %s", fp, exc)
+
+    async def stop(self) -> None:
+        """Drop queued pregeneration work and wait for the worker to exit."""
+        self._pending.clear()
+        task, self._pregen_task = self._pregen_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": int(self._total_bytes),
+                "max_bytes": int(self.max_bytes),
+                "format": self.fmt,
+                "video": self._ffmpeg is not None,
+                "pending": len(self._pending),
+                **self._stats,
+            }
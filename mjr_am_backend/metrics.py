@@ -0,0 +1,299 @@
+"""
+Process-local metrics registry (counters, gauges, fixed-bucket histograms).
+
+Updates take one short per-metric lock (a dict lookup plus an add), so they are
+cheap enough for per-query instrumentation. `render_metrics()` produces the
+Prometheus text exposition format (0.0.4) served at `/mjr/am/metrics`.
+
+Label values must come from bounded sets (route templates, statement templates,
+tool names); each metric keeps at most `MAX_SERIES` label sets and folds the rest
+into a single "other" series.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Sequence, Tuple, TypeVar
+
+MAX_SERIES = 500
+OTHER = "other"
+
+# Seconds; spans sub-millisecond SQLite point queries up to slow ExifTool batches.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+Labels = Tuple[str, ...]
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Labels = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Labels, Any] = {}
+
+    def _key(self, labels: Sequence[Any]) -> Labels:
+        key = tuple(str(v) for v in labels)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        if key not in self._series and len(self._series) >= MAX_SERIES:
+            return (OTHER,) * len(key)
+        return key
+
+    def _label_text(self, key: Labels, extra: str = "") -> str:
+        parts = [f'{n}="{_escape_label(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._series.items())
+        return [f"{self.name}{self._label_text(key)} {_format_value(value)}" for key, value in sorted(items)]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, labels: Sequence[Any] = ()) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, labels: Sequence[Any] = ()) -> float:
+        with self._lock:
+            return float(self._series.get(tuple(str(v) for v in labels), 0.0))
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, labels: Sequence[Any] = ()) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, labels: Sequence[Any] = ()) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Sequence[Any] = ()) -> None:
+        self.inc(-amount, labels)
+
+    def value(self, labels: Sequence[Any] = ()) -> float:
+        with self._lock:
+            return float(self._series.get(tuple(str(v) for v in labels), 0.0))
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed upper-bound buckets (plus sum and count)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, labels: Sequence[Any] = ()) -> None:
+        # Index len(buckets) is the implicit +Inf bucket.
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts..., sum]
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[idx] += 1
+            series[-1] += value
+
+    def count(self, labels: Sequence[Any] = ()) -> int:
+        with self._lock:
+            series = self._series.get(tuple(str(v) for v in labels))
+            return int(sum(series[:-1])) if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines: List[str] = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics, rendered in registration order."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Drop all recorded series (tests)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "mjr_am_http_requests_total", "Majoor HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_DURATION = REGISTRY.histogram(
+    "mjr_am_http_request_duration_seconds", "Majoor HTTP request latency by route template.", ("method", "route")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("mjr_am_http_requests_in_flight", "Majoor HTTP requests being handled.")
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "mjr_am_db_query_duration_seconds",
+    "SQLite statement latency (including write-lock wait) by statement template.",
+    ("statement",),
+)
+DB_QUERY_ERRORS = REGISTRY.counter(
+    "mjr_am_db_query_errors_total", "SQLite statements that returned an error, by statement template.", ("statement",)
+)
+TOOL_DURATION = REGISTRY.histogram(
+    "mjr_am_tool_duration_seconds", "External tool (ExifTool/FFprobe) call latency.", ("tool", "operation")
+)
+SCAN_PHASE_DURATION = REGISTRY.histogram(
+    "mjr_am_scan_batch_phase_duration_seconds", "Time spent per scanner batch phase.", ("phase",)
+)
+ENRICH_QUEUE_DEPTH = REGISTRY.gauge("mjr_am_enrich_queue_depth", "Files waiting for background metadata enrichment.")
+HTTP_IN_FLIGHT.set(0)
+ENRICH_QUEUE_DEPTH.set(0)
+
+_STATEMENT_MAX_LEN = 160
+_WS_RE = re.compile(r"\s+")
+# `?, ?, ?` placeholder runs (expanded IN lists) collapse to one token.
+_PLACEHOLDER_RUN_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+@lru_cache(maxsize=2048)
+def statement_template(sql: str) -> str:
+    """Bounded, parameter-free label for a SQL statement."""
+    text = _PLACEHOLDER_RUN_RE.sub("?...", _WS_RE.sub(" ", str(sql or "")).strip())
+    if len(text) > _STATEMENT_MAX_LEN:
+        text = text[: _STATEMENT_MAX_LEN - 3] + "..."
+    return text
+
+
+def observe_db_query(sql: str, seconds: float, ok: bool = True) -> None:
+    try:
+        template = statement_template(sql)
+        DB_QUERY_DURATION.observe(seconds, (template,))
+        if not ok:
+            DB_QUERY_ERRORS.inc(1.0, (template,))
+    except Exception:
+        pass
+
+
+def timed_tool(tool: str, operation: str) -> Callable[[_F], _F]:
+    """Decorator recording a tool call's wall time in `TOOL_DURATION`."""
+
+    def decorator(fn: _F) -> _F:
+        labels = (tool, operation)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                TOOL_DURATION.observe(time.perf_counter() - start, labels)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def observe_scan_phase(phase: str, seconds: float) -> None:
+    try:
+        SCAN_PHASE_DURATION.observe(seconds, (phase,))
+    except Exception:
+        pass
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -16,6 +16,7 @@ from uuid import uuid4
 
 from aiohttp import web
 
+from .metrics import HTTP_DURATION, HTTP_IN_FLIGHT, HTTP_REQUESTS
 from .shared import get_logger, request_id_var
 from .utils import env_float
 
@@ -183,6 +184,36 @@ def _should_log(request: web.Request, *, status: Optional[int], duration_ms: flo
     return duration_ms >= slow_ms
 
 
+def _is_metered(request: web.Request) -> bool:
+    # Like logging, metrics only cover Majoor endpoints.
+    try:
+        return (request.path or "").startswith("/mjr/")
+    except Exception:
+        return False
+
+
+def _route_label(request: web.Request) -> str:
+    """Route template (e.g. `/mjr/am/asset/{id}`) so the label set stays bounded."""
+    try:
+        resource = request.match_info.route.resource
+        if resource is not None:
+            return str(resource.canonical)
+    except Exception:
+        pass
+    return "unmatched"
+
+
+def _record_request_metrics(request: web.Request, status: Optional[int], duration_ms: float) -> None:
+    try:
+        HTTP_IN_FLIGHT.dec()
+        route = _route_label(request)
+        # No status means the handler was cancelled (client went away).
+        HTTP_REQUESTS.inc(1.0, (request.method, route, status if status is not None else "cancelled"))
+        HTTP_DURATION.observe(duration_ms / MS_PER_S, (request.method, route))
+    except Exception as exc:
+        logger.debug("Request metrics update failed: %s", exc)
+
+
 @web.middleware
 async def request_context_middleware(request: web.Request, handler):
     """Add request-id correlation and lightweight request logging context."""
@@ -201,6 +232,9 @@ async def request_context_middleware(request: web.Request, handler):
     status: Optional[int] = None
     error: Optional[str] = None
     error_type: Optional[str] = None
+    metered = _is_metered(request)
+    if metered:
+        HTTP_IN_FLIGHT.inc()
     try:
         response = await handler(request)
         try:
@@ -235,6 +269,8 @@ async def request_context_middleware(request: web.Request, handler):
     finally:
         duration_ms = (time.perf_counter() - start) * 1000.0
         request["mjr_duration_ms"] = duration_ms
+        if metered:
+            _record_request_metrics(request, status, duration_ms)
         try:
             if token is not None and request_id_var is not None:
                 request_id_var.reset(token)
@@ -14,6 +14,10 @@ logger = get_logger(__name__)
 # Video extensions
 VIDEO_EXTS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v', '.flv', '.wmv', '.mpg', '.mpeg'}
 
+# Images whose generation metadata can be read without a subprocess
+# (see features/metadata/native_readers.py).
+NATIVE_IMAGE_EXTS = {'.png', '.webp'}
+
 
 def pick_probe_backend(
     filepath: str | Path,
@@ -29,7 +33,9 @@ def pick_probe_backend(
         settings_override: Override the global MEDIA_PROBE_BACKEND setting
 
     Returns:
-        List of backends to use, in order: ["exiftool"], ["ffprobe"], or ["exiftool", "ffprobe"]
+        List of backends to use, in order: ["exiftool"], ["ffprobe"], or ["exiftool", "ffprobe"].
+        In auto mode PNG/WebP images get ["native", ...]: the pure-Python chunk reader runs
+        first and the following tool is only used when it finds no generation metadata.
     """
     mode = settings_override or MEDIA_PROBE_BACKEND
 
@@ -80,14 +86,16 @@ def pick_probe_backend(
                 tools.append("ffprobe")
             return tools if tools else []
         else:
+            # ComfyUI PNG/WebP: native chunk reader first, ExifTool only as fallback
+            tools = ["native"] if ext in NATIVE_IMAGE_EXTS else []
             # For images: ExifTool is sufficient
             if has_exiftool():
-                return ["exiftool"]
+                return tools + ["exiftool"]
             # Fallback to ffprobe if available (won't get generation tags though)
             if has_ffprobe():
                 logger.debug("Using ffprobe for image (ExifTool not available)")
-                return ["ffprobe"]
-            return []
+                return tools + ["ffprobe"]
+            return tools
 
     return []
 
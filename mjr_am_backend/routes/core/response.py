@@ -1,10 +1,15 @@
 ﻿"""
 Response utilities for route handlers.
 """
+import json
+from functools import partial
 from typing import Optional
 from aiohttp import web
 from mjr_am_backend.shared import Result
 
+# Asset pages are large lists of small dicts: drop the default ", " / ": " padding.
+_compact_dumps = partial(json.dumps, separators=(",", ":"))
+
 
 def safe_error_message(exc: Exception, generic_message: str) -> str:
     """
@@ -47,7 +52,7 @@ def _json_response(result: Result, status: Optional[int] = None):
         "error": result.error,
         "code": result.code,
         "meta": result.meta,
-    }, status=status)
+    }, status=status, dumps=_compact_dumps)
 
     # Optional standard headers derived from Result meta.
     try:
@@ -36,6 +36,18 @@ async def _dispose_services():
             logger.warning(error_msg, exc_info=True)
             disposal_errors.append(error_msg)
 
+    # Stop persistent ExifTool workers
+    exiftool = _services.get("exiftool")
+    if exiftool:
+        try:
+            closer = getattr(exiftool, "close", None)
+            if callable(closer):
+                closer()
+        except Exception as exc:
+            error_msg = f"Error stopping ExifTool workers: {exc}"
+            logger.warning(error_msg, exc_info=True)
+            disposal_errors.append(error_msg)
+
     # Clear services reference
     _services = None
 
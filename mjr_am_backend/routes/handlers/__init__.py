@@ -15,6 +15,7 @@ from .db_maintenance import register_db_maintenance_routes
 from .releases import register_releases_routes
 from .version import register_version_routes
 from .duplicates import register_duplicates_routes
+from .thumbs import register_thumb_routes
 
 __all__ = [
     "register_health_routes",
@@ -32,4 +33,5 @@ __all__ = [
     "register_version_routes",
     "register_download_routes",
     "register_duplicates_routes",
+    "register_thumb_routes",
 ]
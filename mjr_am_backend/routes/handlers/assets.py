@@ -658,6 +658,7 @@ def register_asset_routes(routes: web.RouteTableDef) -> None:
         routes_info = [
             {"method": "GET", "path": "/mjr/am/health", "description": "Get health status"},
             {"method": "GET", "path": "/mjr/am/health/counters", "description": "Get database counters"},
+            {"method": "POST", "path": "/mjr/am/health/counters/reconcile", "description": "Rebuild materialized asset counters"},
             {"method": "GET", "path": "/mjr/am/health/db", "description": "Get DB lock/corruption/recovery diagnostics"},
             {"method": "GET", "path": "/mjr/am/config", "description": "Get configuration"},
             {"method": "GET", "path": "/mjr/am/roots", "description": "Get core and custom roots"},
@@ -752,7 +753,7 @@ def register_asset_routes(routes: web.RouteTableDef) -> None:
         backup_row = None
         if asset_id is not None:
             row_res = await svc["db"].aquery(
-                "SELECT filename, subfolder, filepath, source, root_id, kind, ext, size, mtime, width, height, duration, created_at, updated_at, indexed_at, content_hash, phash, hash_state FROM assets WHERE id = ?",
+                "SELECT filename, subfolder, filepath, source, root_id, kind, ext, size, mtime, width, height, duration, created_at, updated_at, indexed_at, content_hash, phash, hash_state, scope_root FROM assets WHERE id = ?",
                 (asset_id,),
             )
             if row_res.ok and row_res.data:
@@ -790,8 +791,8 @@ def register_asset_routes(routes: web.RouteTableDef) -> None:
                     await svc["db"].aexecute(
                         """
                         INSERT OR REPLACE INTO assets
-                        (id, filename, subfolder, filepath, source, root_id, kind, ext, size, mtime, width, height, duration, created_at, updated_at, indexed_at, content_hash, phash, hash_state)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        (id, filename, subfolder, filepath, source, root_id, kind, ext, size, mtime, width, height, duration, created_at, updated_at, indexed_at, content_hash, phash, hash_state, scope_root)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                         """,
                         (
                             int(asset_id),
@@ -813,6 +814,7 @@ def register_asset_routes(routes: web.RouteTableDef) -> None:
                             backup_row.get("content_hash"),
                             backup_row.get("phash"),
                             backup_row.get("hash_state"),
+                            backup_row.get("scope_root"),
                         ),
                     )
                 except Exception as restore_exc:
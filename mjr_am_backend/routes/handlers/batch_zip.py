@@ -2,6 +2,11 @@
 Batch ZIP builder for drag-out (AssetsManager -> OS).
 
 Used by the frontend to support multi-selection drag-out via "DownloadURL".
+
+POST registers the resolved file list under a token; GET streams the archive
+straight into the response (ZIP64, data descriptors), so the download starts
+immediately and no temporary archive is written. Already-compressed media is
+stored as-is; only other files are deflated.
 """
 
 from __future__ import annotations
@@ -12,13 +17,13 @@ import threading
 import time
 import zipfile
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from aiohttp import web
 
 from mjr_am_backend.config import OUTPUT_ROOT_PATH
 from mjr_am_backend.custom_roots import resolve_custom_root
-from mjr_am_backend.shared import Result, get_logger, sanitize_error_message
+from mjr_am_backend.shared import EXTENSIONS, Result, get_logger, sanitize_error_message
 from mjr_am_backend.routes.core.paths import _is_within_root, _safe_rel_path
 from mjr_am_backend.routes.core.response import _json_response
 from mjr_am_backend.routes.core.request_json import _read_json
@@ -31,31 +36,17 @@ except Exception:
 
 logger = get_logger(__name__)
 
+# Archives used to be built here before being served; only leftovers from older versions remain.
 _BATCH_DIR = OUTPUT_ROOT_PATH / "_mjr_batch_zips"
 _BATCH_LOCK = threading.Lock()
 _BATCH_CACHE: Dict[str, Dict[str, Any]] = {}
-_TOKEN_LOCKS: Dict[str, threading.Lock] = {}
-_TOKEN_LOCKS_LOCK = threading.Lock()
-
-
-def _get_token_lock(token: str) -> threading.Lock:
-    with _TOKEN_LOCKS_LOCK:
-        lock = _TOKEN_LOCKS.get(token)
-        if lock is None:
-            lock = threading.Lock()
-            _TOKEN_LOCKS[token] = lock
-        return lock
-
-
-def _release_token_lock(token: str) -> None:
-    with _TOKEN_LOCKS_LOCK:
-        if token in _TOKEN_LOCKS:
-            _TOKEN_LOCKS.pop(token, None)
+_LEGACY_SWEPT = False
 
 _DEFAULT_BATCH_TTL_SECONDS = 300  # 5 minutes
 _DEFAULT_BATCH_MAX = 50
 _DEFAULT_MAX_ITEMS = 1000
 _DEFAULT_BUILD_TIMEOUT_S = 120.0
+_DEFAULT_STREAM_BUFFER_BYTES = 64 * 1024
 _DEFAULT_ZIP_COPY_CHUNK_BYTES = 1024 * 1024  # 1MB
 
 _TOKEN_MAX_LEN = 200
@@ -72,6 +63,12 @@ _MAX_ITEMS = int(os.environ.get("MAJOOR_MAX_BATCH_SIZE", str(_DEFAULT_MAX_ITEMS)
 _BUILD_TIMEOUT_S = float(os.environ.get("MAJOOR_BATCH_ZIP_BUILD_TIMEOUT_S", str(_DEFAULT_BUILD_TIMEOUT_S)))
 _ZIP_COPY_CHUNK_BYTES = int(os.environ.get("MAJOOR_BATCH_ZIP_CHUNK_BYTES", str(_DEFAULT_ZIP_COPY_CHUNK_BYTES)))
 
+# Formats that are already compressed: deflating them costs CPU for ~0% gain.
+_STORED_EXTENSIONS = frozenset(
+    set(EXTENSIONS.get("image", ())) | set(EXTENSIONS.get("video", ()))
+    | {".mp3", ".ogg", ".m4a", ".aac", ".flac", ".glb", ".zip", ".7z", ".gz"}
+)
+
 
 def _sanitize_token(token: Any) -> str:
     raw = str(token or "").strip()
@@ -94,39 +91,34 @@ def _sanitize_token(token: Any) -> str:
 
 def _cleanup_batch_zips() -> None:
     now = time.time()
-    stale: List[str] = []
     with _BATCH_LOCK:
         for token, entry in list(_BATCH_CACHE.items()):
             created_at = float(entry.get("created_at") or 0)
             if created_at and now - created_at > _BATCH_TTL_SECONDS:
-                stale.append(token)
-        for token in stale:
-            entry = _BATCH_CACHE.pop(token, {})
-            path = entry.get("path") if isinstance(entry, dict) else None
-            _release_token_lock(token)
-            if isinstance(path, Path):
-                try:
-                    if path.exists():
-                        path.unlink()
-                        logger.debug("Cleaned up stale batch zip: %s", path.name)
-                except Exception as exc:
-                    logger.warning("Failed to cleanup batch zip %s: %s", path.name if path else token, exc)
+                _BATCH_CACHE.pop(token, None)
 
         # Cap cache size in case of unexpected usage.
         if len(_BATCH_CACHE) > _BATCH_MAX:
             items = sorted(_BATCH_CACHE.items(), key=lambda kv: float(kv[1].get("created_at") or 0))
-            to_drop = items[: max(0, len(items) - _BATCH_MAX)]
-            for token, entry in to_drop:
+            for token, _ in items[: max(0, len(items) - _BATCH_MAX)]:
                 _BATCH_CACHE.pop(token, None)
-                _release_token_lock(token)
-                path = entry.get("path") if isinstance(entry, dict) else None
-                if isinstance(path, Path):
-                    try:
-                        if path.exists():
-                            path.unlink()
-                            logger.debug("Cleaned up batch zip (cache cap): %s", path.name)
-                    except Exception as exc:
-                        logger.warning("Failed to cleanup batch zip %s: %s", path.name if path else token, exc)
+
+
+def _sweep_legacy_batch_zips() -> None:
+    """Remove temporary archives left behind by versions that built ZIPs on disk."""
+    global _LEGACY_SWEPT
+    if _LEGACY_SWEPT:
+        return
+    _LEGACY_SWEPT = True
+    try:
+        leftovers = list(_BATCH_DIR.glob(".mjr_batch_*.zip"))
+    except OSError:
+        return
+    for path in leftovers:
+        try:
+            path.unlink()
+        except OSError as exc:
+            logger.debug("Failed to remove legacy batch zip %s: %s", path.name, exc)
 
 
 def _resolve_item_path(item: Dict[str, Any]) -> Optional[Path]:
@@ -177,6 +169,96 @@ def _resolve_item_path(item: Dict[str, Any]) -> Optional[Path]:
     return candidate
 
 
+class _ResponseSink:
+    """
+    Write-only file object that forwards zipfile output to an aiohttp response.
+
+    Used from a worker thread: each flush waits for the event loop to hand the bytes
+    to the transport, so a slow client throttles file reads. No `tell`/`seek`, which
+    makes zipfile write streaming-friendly data descriptors.
+    """
+
+    def __init__(self, response: web.StreamResponse, loop: asyncio.AbstractEventLoop):
+        self._response = response
+        self._loop = loop
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        if size >= _DEFAULT_STREAM_BUFFER_BYTES:
+            self.flush()
+            self._send(bytes(data))
+        else:
+            self._buffer += data
+            if len(self._buffer) >= _DEFAULT_STREAM_BUFFER_BYTES:
+                self.flush()
+        return size
+
+    def flush(self) -> None:
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._send(data)
+
+    def close(self) -> None:
+        # zipfile never closes a file object it was handed; this completes the
+        # writable-file protocol its signature expects.
+        self.flush()
+
+    def _send(self, data: bytes) -> None:
+        asyncio.run_coroutine_threadsafe(self._response.write(data), self._loop).result()
+
+
+def _zip_date_time(mtime: float) -> Tuple[int, int, int, int, int, int]:
+    try:
+        dt = time.localtime(float(mtime))
+    except Exception:
+        dt = time.localtime(time.time())
+    # The ZIP format cannot represent dates before 1980.
+    if dt[0] < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    return (int(dt[0]), int(dt[1]), int(dt[2]), int(dt[3]), int(dt[4]), int(dt[5]))
+
+
+def _zip_add_file(zf: zipfile.ZipFile, path: Path, arcname: str) -> bool:
+    """
+    Stream one file into the archive.
+
+    The file is opened once and read up to the size seen by fstat, so a rename or
+    append racing with the download cannot change what the entry header promised.
+    """
+    arc = str(arcname or "").replace("\x00", "")[:_ZIP_NAME_MAX_LEN] or path.name[:_ZIP_NAME_MAX_LEN]
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return False
+    with f:
+        st = os.fstat(f.fileno())
+        zi = zipfile.ZipInfo(filename=arc, date_time=_zip_date_time(st.st_mtime))
+        zi.compress_type = zipfile.ZIP_STORED if path.suffix.lower() in _STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+        zi.file_size = int(st.st_size)
+        remaining = int(st.st_size)
+        # file_size lets zipfile pick ZIP64 for entries over 4 GiB.
+        with zf.open(zi, "w") as out:
+            while remaining > 0:
+                chunk = f.read(min(_ZIP_COPY_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                out.write(chunk)
+                remaining -= len(chunk)
+    return True
+
+
+def _write_zip(sink: _ResponseSink, entries: List[Tuple[Path, str]]) -> int:
+    count = 0
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for path, arcname in entries:
+            if _zip_add_file(zf, path, arcname):
+                count += 1
+    sink.flush()
+    return count
+
+
 def register_batch_zip_routes(routes: web.RouteTableDef) -> None:
     """Register batch-zip creation and download routes."""
     @routes.post("/mjr/am/batch-zip")
@@ -215,158 +297,80 @@ def register_batch_zip_routes(routes: web.RouteTableDef) -> None:
         if len(items) > _MAX_ITEMS:
             return _json_response(Result.Err("INVALID_INPUT", f"Batch size exceeds limit ({_MAX_ITEMS})"))
 
-        try:
-            _BATCH_DIR.mkdir(parents=True, exist_ok=True)
-        except Exception as exc:
-            return _json_response(
-                Result.Err("IO_ERROR", sanitize_error_message(exc, "Cannot create batch directory"))
-            )
-
         _cleanup_batch_zips()
 
-        token_lock = _get_token_lock(token)
-        zip_path = (_BATCH_DIR / f".mjr_batch_{token}.zip").resolve()
-        try:
-            zip_path.relative_to(_BATCH_DIR.resolve(strict=True))
-        except Exception:
-            return _json_response(Result.Err("INVALID_INPUT", "Invalid zip path"))
-
         event = asyncio.Event()
         filename = f"Majoor_Batch_{len(items)}.zip"
         with _BATCH_LOCK:
             _BATCH_CACHE[token] = {
-                "path": zip_path,
+                "entries": [],
                 "event": event,
                 "ready": False,
                 "created_at": time.time(),
                 "filename": filename,
             }
 
-        def _build_zip() -> int:
-            with token_lock:
-                try:
-                    if zip_path.exists():
-                        zip_path.unlink()
-                except Exception:
-                    pass
-
-                count = 0
-                used_names = set()
-                with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                    for raw in items:
-                        if not isinstance(raw, dict):
-                            continue
-                        target = _resolve_item_path(raw)
-                        if not target:
-                            continue
-
-                        # Flatten: never include subfolders in the ZIP. This matches drag-out UX
-                        # expectations (a simple bundle of files).
-                        arc_name_rel = _safe_rel_path(str(raw.get("filename") or ""))
-                        if not arc_name_rel or len(arc_name_rel.parts) != 1:
-                            arc_name_rel = Path(target.name)
-
-                        arc_base = arc_name_rel.name or target.name
-                        arc_base = arc_base.replace("\x00", "").replace("\r", "").replace("\n", "")
-                        arc_base = arc_base.replace("/", "_").replace("\\", "_")
-                        if not arc_base:
-                            arc_base = target.name
-
-                        # Avoid collisions when multiple folders contain the same filename.
-                        stem = Path(arc_base).stem
-                        suffix = Path(arc_base).suffix
-                        if not stem and suffix:
-                            stem = arc_base[: -len(suffix)] or arc_base
-                        candidate = arc_base[:_ZIP_NAME_MAX_LEN]
-                        if candidate in used_names:
-                            n = 2
-                            while True:
-                                attempt = f"{stem} ({n}){suffix}" if suffix else f"{stem} ({n})"
-                                attempt = attempt[:_ZIP_NAME_MAX_LEN]
-                                if attempt not in used_names:
-                                    candidate = attempt
-                                    break
-                                n += 1
-                        used_names.add(candidate)
-
-                        arc = candidate
-                        try:
-                            ok = _zip_add_file_open_handle(zf, target, arc)
-                            if ok:
-                                count += 1
-                        except Exception:
-                            continue
-                return count
-
-        def _zip_add_file_open_handle(zf: zipfile.ZipFile, path: Path, arcname: str) -> bool:
-            """
-            Avoid TOCTOU by opening the file once and streaming bytes into the zip entry.
-
-            Using `ZipFile.write(path)` re-opens the file by name, which can race with
-            rename/replace between checks and reads.
-            """
-            try:
-                arc = str(arcname or "").replace("\x00", "")[:_ZIP_NAME_MAX_LEN]
-                if not arc:
-                    arc = path.name[:_ZIP_NAME_MAX_LEN]
-            except Exception:
-                arc = path.name[:_ZIP_NAME_MAX_LEN]
-
-            try:
-                with open(path, "rb") as f:
-                    try:
-                        st = os.fstat(f.fileno())
-                    except Exception:
-                        st = path.stat()
-
-                    try:
-                        dt = time.localtime(float(getattr(st, "st_mtime", time.time())))
-                        date_time = (
-                            int(dt[0]), int(dt[1]), int(dt[2]),
-                            int(dt[3]), int(dt[4]), int(dt[5]),
-                        )
-                    except Exception:
-                        dt_now = time.localtime(time.time())
-                        date_time = (
-                            int(dt_now[0]), int(dt_now[1]), int(dt_now[2]),
-                            int(dt_now[3]), int(dt_now[4]), int(dt_now[5]),
-                        )
-
-                    zi = zipfile.ZipInfo(filename=arc, date_time=date_time)
-                    zi.compress_type = zipfile.ZIP_DEFLATED
-                    try:
-                        zi.file_size = int(getattr(st, "st_size", 0) or 0)
-                    except Exception:
-                        pass
-
-                    with zf.open(zi, "w") as out:
-                        while True:
-                            chunk = f.read(_ZIP_COPY_CHUNK_BYTES)
-                            if not chunk:
-                                break
-                            out.write(chunk)
-                return True
-            except Exception:
-                return False
+        def _collect_entries() -> List[Tuple[Path, str]]:
+            entries: List[Tuple[Path, str]] = []
+            used_names = set()
+            for raw in items:
+                if not isinstance(raw, dict):
+                    continue
+                target = _resolve_item_path(raw)
+                if not target:
+                    continue
+
+                # Flatten: never include subfolders in the ZIP. This matches drag-out UX
+                # expectations (a simple bundle of files).
+                arc_name_rel = _safe_rel_path(str(raw.get("filename") or ""))
+                if not arc_name_rel or len(arc_name_rel.parts) != 1:
+                    arc_name_rel = Path(target.name)
+
+                arc_base = arc_name_rel.name or target.name
+                arc_base = arc_base.replace("\x00", "").replace("\r", "").replace("\n", "")
+                arc_base = arc_base.replace("/", "_").replace("\\", "_")
+                if not arc_base:
+                    arc_base = target.name
+
+                # Avoid collisions when multiple folders contain the same filename.
+                stem = Path(arc_base).stem
+                suffix = Path(arc_base).suffix
+                if not stem and suffix:
+                    stem = arc_base[: -len(suffix)] or arc_base
+                candidate = arc_base[:_ZIP_NAME_MAX_LEN]
+                if candidate in used_names:
+                    n = 2
+                    while True:
+                        attempt = f"{stem} ({n}){suffix}" if suffix else f"{stem} ({n})"
+                        attempt = attempt[:_ZIP_NAME_MAX_LEN]
+                        if attempt not in used_names:
+                            candidate = attempt
+                            break
+                        n += 1
+                used_names.add(candidate)
+                entries.append((target, candidate))
+            return entries
 
         ok = False
         error = None
-        count = 0
+        entries: List[Tuple[Path, str]] = []
         try:
             try:
-                count = await asyncio.wait_for(asyncio.to_thread(_build_zip), timeout=_BUILD_TIMEOUT_S)
+                entries = await asyncio.wait_for(asyncio.to_thread(_collect_entries), timeout=_BUILD_TIMEOUT_S)
             except asyncio.TimeoutError:
-                count = 0
+                entries = []
                 error = "Batch zip build timed out"
-            ok = count > 0
+            ok = bool(entries)
             if not ok:
-                error = "No valid files to archive"
+                error = error or "No valid files to archive"
         except Exception as exc:
             error = sanitize_error_message(exc, "Batch zip creation failed")
+        count = len(entries)
 
         with _BATCH_LOCK:
             entry = _BATCH_CACHE.get(token)
             if entry:
+                entry["entries"] = entries
                 entry["ready"] = ok
                 entry["error"] = error
                 entry["count"] = count
@@ -375,13 +379,6 @@ def register_batch_zip_routes(routes: web.RouteTableDef) -> None:
                 except Exception:
                     pass
 
-        if not ok:
-            try:
-                if zip_path.exists():
-                    zip_path.unlink()
-            except Exception:
-                pass
-
         if ok:
             return _json_response(Result.Ok({"token": token, "count": count, "filename": filename}))
         return _json_response(Result.Err("NO_VALID_FILES", error or "No valid files to archive", token=token, count=count, filename=filename))
@@ -415,16 +412,32 @@ def register_batch_zip_routes(routes: web.RouteTableDef) -> None:
             err = str((entry or {}).get("error") or "Not ready")
             return _json_response(Result.Err("NOT_READY", err), status=404)
 
-        path = entry.get("path")
-        if not isinstance(path, Path) or not path.exists():
-            return _json_response(Result.Err("NOT_FOUND", "File missing"), status=404)
+        entries = entry.get("entries") or []
+        if not entries:
+            return _json_response(Result.Err("NOT_FOUND", "No files to archive"), status=404)
+
+        await asyncio.to_thread(_sweep_legacy_batch_zips)
 
         name = entry.get("filename") or f"{token}.zip"
         safe_name = str(name).replace('"', "").replace("\r", "").replace("\n", "")[:_ZIP_NAME_MAX_LEN]
-        headers = {"Content-Disposition": f'attachment; filename="{safe_name}"'}
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "application/zip",
+                "Content-Disposition": f'attachment; filename="{safe_name}"',
+                "Cache-Control": "private, no-store",
+            }
+        )
+        # Size is only known once every entry is written.
+        response.enable_chunked_encoding()
+        await response.prepare(request)
         try:
-            return web.FileResponse(path, headers=headers)
+            await asyncio.to_thread(_write_zip, _ResponseSink(response, asyncio.get_running_loop()), list(entries))
+        except ConnectionError:
+            logger.debug("Batch zip download aborted by client: %s", token)
+            return response
         except Exception as exc:
-            logger.debug("FileResponse failed: %s", exc)
-            return _json_response(Result.Err("IO_ERROR", "Failed to serve zip"), status=500)
-
+            # Headers are already sent: the truncated archive is the only possible signal.
+            logger.warning("Batch zip streaming failed for %s: %s", token, exc)
+            return response
+        await response.write_eof()
+        return response
@@ -17,6 +17,7 @@ from aiohttp import web
 
 from mjr_am_backend.config import INDEX_DB_PATH, get_runtime_output_root
 from mjr_am_backend.shared import Result, get_logger
+from mjr_am_backend.features.index.blob_store import prune_orphan_blobs
 from ..core import _json_response, _csrf_error, _require_services, safe_error_message
 
 logger = get_logger(__name__)
@@ -234,6 +235,11 @@ def register_db_maintenance_routes(routes: web.RouteTableDef) -> None:
                 steps.append("ANALYZE")
             except Exception as exc:
                 logger.debug("DB analyze step failed: %s", exc)
+            pruned = await prune_orphan_blobs(db)
+            if pruned.ok:
+                steps.append(f"prune blobs ({int(pruned.data or 0)})")
+            else:
+                logger.debug("DB blob prune step failed: %s", pruned.error)
         except Exception as exc:
             return _json_response(Result.Err("DB_ERROR", safe_error_message(exc, "Database optimize failed")))
 
@@ -109,6 +109,56 @@ def register_duplicates_routes(routes: web.RouteTableDef) -> None:
         )
         return _json_response(result)
 
+    @routes.get("/mjr/am/duplicates/similar")
+    async def duplicates_similar_pairs(request):
+        svc, error_result = await _require_services()
+        if error_result:
+            return _json_response(error_result)
+        dup = svc.get("duplicates")
+        if not dup:
+            return _json_response(Result.Err("SERVICE_UNAVAILABLE", "Duplicate service unavailable"))
+
+        scope = (request.query.get("scope") or "output").strip().lower()
+        custom_root_id = request.query.get("custom_root_id") or request.query.get("root_id") or ""
+        roots_res = _roots_for_scope(scope, str(custom_root_id))
+        if not roots_res.ok:
+            return _json_response(roots_res)
+
+        try:
+            max_distance = int(request.query.get("max_distance", "6"))
+        except Exception:
+            max_distance = 6
+        try:
+            limit = int(request.query.get("limit", "100"))
+        except Exception:
+            limit = 100
+        result = await dup.list_similar_pairs(roots=roots_res.data, max_distance=max_distance, limit=limit)
+        return _json_response(result)
+
+    @routes.get("/mjr/am/duplicates/neighbors")
+    async def duplicates_neighbors(request):
+        svc, error_result = await _require_services()
+        if error_result:
+            return _json_response(error_result)
+        dup = svc.get("duplicates")
+        if not dup:
+            return _json_response(Result.Err("SERVICE_UNAVAILABLE", "Duplicate service unavailable"))
+
+        try:
+            asset_id = int(request.query.get("asset_id", ""))
+        except Exception:
+            return _json_response(Result.Err("INVALID_INPUT", "Invalid asset_id"))
+        try:
+            max_distance = int(request.query.get("max_distance", "6"))
+        except Exception:
+            max_distance = 6
+        try:
+            limit = int(request.query.get("limit", "50"))
+        except Exception:
+            limit = 50
+        result = await dup.find_similar(asset_id, max_distance=max_distance, limit=limit)
+        return _json_response(result)
+
     @routes.post("/mjr/am/duplicates/merge-tags")
     async def duplicates_merge_tags(request):
         csrf = _csrf_error(request)
@@ -10,12 +10,14 @@ import os
 import time
 from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Mapping, Optional
+from typing import Any, Mapping, Optional, Sequence
 
 from mjr_am_backend.shared import Result, classify_file, get_logger, sanitize_error_message
 from mjr_am_backend.config import (
     FS_LIST_CACHE_MAX,
     FS_LIST_CACHE_TTL_SECONDS,
+    FS_LIST_CACHE_WATCHED_TTL_SECONDS,
+    SEARCH_MAX_FILEPATH_LOOKUP,
     BG_SCAN_FAILURE_HISTORY_MAX,
     SCAN_PENDING_MAX,
     MANUAL_BG_SCAN_GRACE_SECONDS,
@@ -24,8 +26,11 @@ from mjr_am_backend.config import (
 )
 from mjr_am_backend.adapters.fs.list_cache_watcher import (
     ensure_fs_list_cache_watching,
-    get_fs_list_cache_token,
+    get_fs_list_cache_changes,
+    get_fs_list_cache_seq,
+    is_fs_list_cache_watched,
 )
+from mjr_am_backend.adapters.fs.dir_index import DirIndex, scan_dir_index, stat_dir_names
 from mjr_am_shared.scan_throttle import normalize_scan_directory, should_skip_background_scan
 from .db_maintenance import is_db_maintenance_active
 from ..core import _safe_rel_path, _is_within_root, _require_services
@@ -359,52 +364,39 @@ def _build_task_key(task: dict[str, Any]) -> str:
     return f"{source}|{root_id}|{directory}"
 
 
-def _collect_filesystem_entries(
-    target_dir_resolved: Path,
-    base: Path,
-    asset_type: str,
-    root_id: Optional[str],
-) -> list[dict[str, Any]]:
-    entries: list[dict[str, Any]] = []
-    for entry in target_dir_resolved.iterdir():
-        if not entry.is_file():
-            continue
-        filename = entry.name
-        kind = classify_file(filename)
-        if kind == "unknown":
-            continue
-        try:
-            stat = entry.stat()
-        except OSError:
-            continue
-
-        try:
-            rel_to_root = entry.parent.relative_to(base)
-            sub = "" if str(rel_to_root) == "." else str(rel_to_root).replace("\\", "/")
-        except ValueError:
-            sub = ""
-        entries.append(
-            {
-                "id": None,
-                "filename": filename,
-                "subfolder": sub,
-                "filepath": str(entry),
-                "kind": kind,
-                "ext": entry.suffix.lower(),
-                "size": stat.st_size,
-                "mtime": int(stat.st_mtime),
-                "width": None,
-                "height": None,
-                "duration": None,
-                "rating": 0,
-                "tags": [],
-                "has_workflow": None,
-                "has_generation_data": None,
-                "type": asset_type,
-                "root_id": root_id,
-            }
-        )
-    return entries
+def _apply_db_row(asset: dict[str, Any], db_row: Mapping[str, Any]) -> None:
+    asset["id"] = db_row.get("id")
+    asset["rating"] = int(db_row.get("rating") or 0)
+    asset["tags"] = db_row.get("tags") or []
+    asset["has_workflow"] = db_row.get("has_workflow")
+    asset["has_generation_data"] = db_row.get("has_generation_data")
+    # Prefer stored root_id if present (custom)
+    if db_row.get("root_id"):
+        asset["root_id"] = db_row.get("root_id")
+
+
+async def _lookup_db_rows(index_service: Optional[Any], filepaths: list[str]) -> dict[str, dict[str, Any]]:
+    """DB-enriched fields (rating/tags/workflow flags) by filepath; empty when unavailable."""
+    lookup = getattr(index_service, "lookup_assets_by_filepaths", None)
+    if not callable(lookup) or not filepaths:
+        return {}
+    mapping: dict[str, dict[str, Any]] = {}
+    chunk = max(1, int(SEARCH_MAX_FILEPATH_LOOKUP))
+    for i in range(0, len(filepaths), chunk):
+        enrich_result = await lookup(filepaths[i:i + chunk])
+        if enrich_result and getattr(enrich_result, "ok", False) and isinstance(enrich_result.data, dict):
+            mapping.update(enrich_result.data)
+    return mapping
+
+
+async def _lookup_dir_rows(index_service: Optional[Any], index: DirIndex, positions: Sequence[int]) -> dict[str, dict[str, Any]]:
+    """DB-enriched fields for the listed candidates: one `dir_path` seek, else filepath lookups."""
+    lookup = getattr(index_service, "lookup_assets_in_dir", None)
+    if callable(lookup):
+        result = await lookup(index.dirpath)
+        if result and getattr(result, "ok", False) and isinstance(result.data, dict):
+            return result.data
+    return await _lookup_db_rows(index_service, [index.filepath(i) for i in positions])
 
 
 def _collect_filesystem_entries_window(
@@ -497,59 +489,81 @@ async def _fs_cache_get_or_build(
     asset_type: str,
     root_id: Optional[str],
 ) -> Result[dict[str, Any]]:
-    # Made async to allow async locking if needed, though mostly sync logic
+    """
+    Return the cached listing of one directory, building or patching it as needed.
+
+    The listing is a columnar DirIndex. Under a watched root it is patched from the
+    directory's event journal (only changed names are re-stat'ed) and may be reused for
+    FS_LIST_CACHE_WATCHED_TTL_SECONDS; otherwise it is rebuilt whenever the
+    directory mtime changes or FS_LIST_CACHE_TTL_SECONDS elapses.
+    """
     try:
         dir_mtime_ns = target_dir_resolved.stat().st_mtime_ns
     except OSError as exc:
         return Result.Err("DIR_NOT_FOUND", sanitize_error_message(exc, "Directory not found"))
     try:
         ensure_fs_list_cache_watching(str(base))
+        watched = is_fs_list_cache_watched(str(target_dir_resolved))
     except Exception:
-        pass
-    try:
-        watch_token = int(get_fs_list_cache_token(str(base)))
-    except Exception:
-        watch_token = 0
+        watched = False
 
     cache_key = f"{str(base)}|{str(target_dir_resolved)}|{asset_type}|{str(root_id or '')}"
-    
+
     async with _FS_LIST_CACHE_LOCK:
         cached = _FS_LIST_CACHE.get(cache_key)
-        if (
-            cached
-            and cached.get("dir_mtime_ns") == dir_mtime_ns
-            and int(cached.get("watch_token") or 0) == watch_token
-            and isinstance(cached.get("entries"), list)
-        ):
-            try:
-                now = time.monotonic()
-                cached_at = float(cached.get("cached_at_mono") or cached.get("cached_at") or 0.0)
-                if cached_at and (now - cached_at) <= float(FS_LIST_CACHE_TTL_SECONDS):
-                    _FS_LIST_CACHE.move_to_end(cache_key)
-                    return Result.Ok({"entries": cached["entries"], "dir_mtime_ns": dir_mtime_ns})
-            except Exception:
-                pass
+        if cached and isinstance(cached.get("index"), DirIndex):
             _FS_LIST_CACHE.move_to_end(cache_key)
+            cached = dict(cached)
+        else:
+            cached = None
 
+    if cached is not None:
+        try:
+            patchable = watched and cached.get("watch_seq") is not None
+            ttl = FS_LIST_CACHE_WATCHED_TTL_SECONDS if patchable else FS_LIST_CACHE_TTL_SECONDS
+            cached_at = float(cached.get("cached_at_mono") or cached.get("cached_at") or 0.0)
+            fresh = bool(cached_at) and (time.monotonic() - cached_at) <= float(ttl)
+            if fresh and not patchable and cached.get("dir_mtime_ns") == dir_mtime_ns:
+                return Result.Ok({"index": cached["index"], "dir_mtime_ns": dir_mtime_ns})
+            if fresh and patchable:
+                since = int(cached["watch_seq"])
+                seq = get_fs_list_cache_seq()
+                names = get_fs_list_cache_changes(str(target_dir_resolved), since)
+                if names == [] and cached.get("dir_mtime_ns") == dir_mtime_ns:
+                    return Result.Ok({"index": cached["index"], "dir_mtime_ns": dir_mtime_ns})
+                # No journaled change but a new mtime means events are still in flight: rebuild.
+                if names:
+                    changed = await asyncio.to_thread(stat_dir_names, str(target_dir_resolved), names)
+                    # Copy-on-write: requests may still be paging the previous index.
+                    index = await asyncio.to_thread(cached["index"].patched, changed)
+                    async with _FS_LIST_CACHE_LOCK:
+                        current = _FS_LIST_CACHE.get(cache_key)
+                        # Keep the newer listing if another request already patched or rebuilt it.
+                        if current is None or int(current.get("watch_seq") or 0) <= since:
+                            _FS_LIST_CACHE[cache_key] = {
+                                **cached,
+                                "index": index,
+                                "dir_mtime_ns": dir_mtime_ns,
+                                "watch_seq": seq,
+                            }
+                    return Result.Ok({"index": index, "dir_mtime_ns": dir_mtime_ns})
+        except Exception as exc:
+            logger.debug("FS list cache patch failed, rebuilding: %s", exc)
+
+    # Events that land while the directory is listed are re-applied on the next patch.
+    watch_seq = get_fs_list_cache_seq() if watched else None
     try:
-        entries = await asyncio.to_thread(
-            _collect_filesystem_entries,
-            target_dir_resolved,
-            base,
-            asset_type,
-            root_id,
-        )
+        index = await asyncio.to_thread(scan_dir_index, str(target_dir_resolved))
     except OSError as exc:
         return Result.Err(
             "LIST_FAILED", sanitize_error_message(exc, "Failed to list directory")
         )
 
     async with _FS_LIST_CACHE_LOCK:
-        # `watch_token` may be implemented later (fs watch integration); keep None for now.
         _FS_LIST_CACHE[cache_key] = {
             "dir_mtime_ns": dir_mtime_ns,
-            "watch_token": watch_token,
-            "entries": entries,
+            "watch_seq": watch_seq,
+            "index": index,
             "cached_at_mono": time.monotonic(),
             "cached_at": time.time(),
         }
@@ -557,7 +571,7 @@ async def _fs_cache_get_or_build(
         while len(_FS_LIST_CACHE) > int(FS_LIST_CACHE_MAX):
             _FS_LIST_CACHE.popitem(last=False)
 
-    return Result.Ok({"entries": entries, "dir_mtime_ns": dir_mtime_ns})
+    return Result.Ok({"index": index, "dir_mtime_ns": dir_mtime_ns})
 
 
 async def _list_filesystem_assets(
@@ -631,28 +645,13 @@ async def _list_filesystem_assets(
             )
             # Keep DB hydration behavior consistent with non-fast path.
             try:
-                lookup = getattr(index_service, "lookup_assets_by_filepaths", None)
-                if callable(lookup) and entries_window:
-                    filepaths = [str(a.get("filepath") or "") for a in entries_window if isinstance(a, dict)]
-                    filepaths = [p for p in filepaths if p]
-                    if filepaths:
-                        enrich_result = await lookup(filepaths)
-                        if enrich_result and getattr(enrich_result, "ok", False) and isinstance(enrich_result.data, dict):
-                            mapping = enrich_result.data
-                            for asset in entries_window:
-                                if not isinstance(asset, dict):
-                                    continue
-                                fp = str(asset.get("filepath") or "")
-                                db_row = mapping.get(fp)
-                                if not isinstance(db_row, dict):
-                                    continue
-                                asset["id"] = db_row.get("id")
-                                asset["rating"] = int(db_row.get("rating") or 0)
-                                asset["tags"] = db_row.get("tags") or []
-                                asset["has_workflow"] = db_row.get("has_workflow")
-                                asset["has_generation_data"] = db_row.get("has_generation_data")
-                                if db_row.get("root_id"):
-                                    asset["root_id"] = db_row.get("root_id")
+                mapping: dict[str, dict[str, Any]] = await _lookup_db_rows(
+                    index_service, [str(a.get("filepath") or "") for a in entries_window]
+                )
+                for asset in entries_window:
+                    db_row = mapping.get(str(asset.get("filepath") or ""))
+                    if isinstance(db_row, dict):
+                        _apply_db_row(asset, db_row)
             except Exception as exc:
                 logger.debug("Filesystem DB enrichment skipped (sort=none path): %s", exc)
             return Result.Ok(
@@ -668,98 +667,59 @@ async def _list_filesystem_assets(
         except OSError as exc:
             return Result.Err("LIST_FAILED", sanitize_error_message(exc, "Failed to list directory"))
 
-    # Changed to await the async cache builder
     cache_result = await _fs_cache_get_or_build(base, target_dir_resolved, asset_type, root_id)
     if not cache_result.ok:
         return cache_result
-    all_entries = cache_result.data.get("entries") if isinstance(cache_result.data, dict) else None
-    if not isinstance(all_entries, list):
+    index = cache_result.data.get("index") if isinstance(cache_result.data, dict) else None
+    if not isinstance(index, DirIndex):
         return Result.Err("LIST_FAILED", "Failed to list directory")
 
-    entries = []
-    for item in all_entries:
-        if not isinstance(item, dict):
-            continue
-        filename = str(item.get("filename") or "")
-        kind = str(item.get("kind") or "")
-        if not filename or kind == "unknown":
-            continue
-        if filter_kind and kind != filter_kind:
-            continue
-        if not browse_all and q_lower not in filename.lower():
-            continue
-        entries.append(item)
-
-    if sort_key == "name_asc":
-        entries.sort(key=lambda x: str(x.get("filename") or "").lower())
-    elif sort_key == "name_desc":
-        entries.sort(key=lambda x: str(x.get("filename") or "").lower(), reverse=True)
-    elif sort_key == "mtime_asc":
-        entries.sort(key=lambda x: _safe_mtime_int(x.get("mtime")))
-    else:
-        entries.sort(key=lambda x: _safe_mtime_int(x.get("mtime")), reverse=True)
-
-    # Enrich with DB fields (workflow/generation/tags/rating) when available.
     try:
-        lookup = getattr(index_service, "lookup_assets_by_filepaths", None)
-        if callable(lookup) and entries:
-            filepaths = [str(a.get("filepath") or "") for a in entries if isinstance(a, dict)]
-            filepaths = [p for p in filepaths if p]
-            if filepaths:
-                enrich_result = await lookup(filepaths)
-                if enrich_result and getattr(enrich_result, "ok", False) and isinstance(enrich_result.data, dict):
-                    mapping = enrich_result.data
-                    for asset in entries:
-                        if not isinstance(asset, dict):
-                            continue
-                        fp = str(asset.get("filepath") or "")
-                        db_row = mapping.get(fp)
-                        if not isinstance(db_row, dict):
-                            continue
-                        asset["id"] = db_row.get("id")
-                        asset["rating"] = int(db_row.get("rating") or 0)
-                        asset["tags"] = db_row.get("tags") or []
-                        asset["has_workflow"] = db_row.get("has_workflow")
-                        asset["has_generation_data"] = db_row.get("has_generation_data")
-                        # Prefer stored root_id if present (custom)
-                        if db_row.get("root_id"):
-                            asset["root_id"] = db_row.get("root_id")
-    except Exception as exc:
-        logger.debug("Filesystem DB enrichment skipped: %s", exc)
-
-    # Apply filters after enrichment.
-    total = 0
-    paged: list[dict[str, Any]] = []
+        rel_to_root = target_dir_resolved.relative_to(base)
+        sub = "" if str(rel_to_root) == "." else str(rel_to_root).replace("\\", "/")
+    except ValueError:
+        sub = ""
+
+    positions = index.select(
+        sort_key,
+        kind=filter_kind,
+        extensions=filter_extensions,
+        query_lower="" if browse_all else q_lower,
+        mtime_start=filter_mtime_start,
+        mtime_end=filter_mtime_end,
+    )
     start = max(0, int(offset or 0))
     limit_int = int(limit or 0)
     end = start + limit_int if limit_int > 0 else None
 
-    for item in entries:
-        entry_ext = _normalize_extension(item.get("ext"))
-        if filter_extensions and entry_ext and entry_ext not in filter_extensions:
-            continue
-        if filter_kind and item.get("kind") != filter_kind:
-            continue
-        if filter_min_rating > 0 and int(item.get("rating", 0)) < filter_min_rating:
-            continue
-        if filter_workflow_only and not _is_truthy_boolish(item.get("has_workflow")):
-            continue
+    # Rating/workflow filters need DB fields for every candidate; otherwise only the page is hydrated.
+    mapping = {}
+    if filter_min_rating > 0 or filter_workflow_only:
         try:
-            entry_mtime = int(item.get("mtime") or 0)
-        except Exception:
-            entry_mtime = 0
-        if filter_mtime_start is not None and entry_mtime < filter_mtime_start:
-            continue
-        if filter_mtime_end is not None and entry_mtime >= filter_mtime_end:
-            continue
-        if not browse_all and q_lower not in str(item.get("filename", "")).lower():
-            continue
-
-        # This entry passed all filters; count it for total.
-        if total >= start:
-            if end is None or len(paged) < (end - start):
-                paged.append(item)
-        total += 1
+            mapping = await _lookup_dir_rows(index_service, index, positions)
+        except Exception as exc:
+            logger.debug("Filesystem DB enrichment skipped: %s", exc)
+
+        def _passes(i: int) -> bool:
+            db_row = mapping.get(index.filepath(i)) or {}
+            if filter_min_rating > 0 and int(db_row.get("rating") or 0) < filter_min_rating:
+                return False
+            if filter_workflow_only and not _is_truthy_boolish(db_row.get("has_workflow")):
+                return False
+            return True
+
+        positions = [i for i in positions if _passes(i)]
+
+    total = len(positions)
+    paged = [index.entry(i, sub, asset_type, root_id) for i in positions[start:end]]
+    if paged and not mapping:
+        try:
+            mapping = await _lookup_db_rows(index_service, [a["filepath"] for a in paged])
+        except Exception as exc:
+            logger.debug("Filesystem DB enrichment skipped: %s", exc)
+    for asset in paged:
+        db_row = mapping.get(asset["filepath"])
+        if isinstance(db_row, dict):
+            _apply_db_row(asset, db_row)
 
     return Result.Ok({"assets": paged, "total": total, "limit": limit, "offset": offset, "query": q, "sort": sort_key})
-
@@ -18,6 +18,7 @@ except Exception:
 from mjr_am_backend.config import OUTPUT_ROOT, get_tool_paths, MEDIA_PROBE_BACKEND
 from mjr_am_backend.config import TO_THREAD_TIMEOUT_S
 from mjr_am_backend.custom_roots import resolve_custom_root
+from mjr_am_backend.metrics import render_metrics
 from mjr_am_backend.shared import Result, ErrorCode, sanitize_error_message
 from mjr_am_backend.tool_detect import get_tool_status
 from mjr_am_backend.utils import parse_bool
@@ -96,7 +97,10 @@ def register_health_routes(routes: web.RouteTableDef) -> None:
             return _json_response(Result.Err(ErrorCode.INVALID_INPUT, f"Unknown scope: {scope}"))
 
         try:
-            result = await asyncio.wait_for(svc['health'].get_counters(roots=roots), timeout=TO_THREAD_TIMEOUT_S)
+            result = await asyncio.wait_for(
+                svc['health'].get_counters(roots=roots),
+                timeout=TO_THREAD_TIMEOUT_S,
+            )
         except asyncio.TimeoutError:
             result = Result.Err(ErrorCode.TIMEOUT, "Health counters timed out")
         except Exception as exc:
@@ -122,6 +126,23 @@ def register_health_routes(routes: web.RouteTableDef) -> None:
                     result.data["watcher"] = {"enabled": False, "directories": [], "scope": None, "custom_root_id": None}
         return _json_response(result)
 
+    @routes.post("/mjr/am/health/counters/reconcile")
+    async def health_counters_reconcile(request):
+        """Rebuild the materialized asset counters from the assets table."""
+        csrf = _csrf_error(request)
+        if csrf:
+            return _json_response(Result.Err(ErrorCode.CSRF, csrf))
+        svc, error_result = await _require_services()
+        if error_result:
+            return _json_response(error_result)
+        try:
+            result = await svc['health'].reconcile_counters()
+        except Exception as exc:
+            result = Result.Err(ErrorCode.DB_ERROR, sanitize_error_message(exc, "Counter reconcile failed"))
+        if result.ok:
+            result = Result.Ok({"rows": result.data})
+        return _json_response(result)
+
     @routes.get("/mjr/am/health/db")
     async def health_db(request):
         """
@@ -184,6 +205,14 @@ def register_health_routes(routes: web.RouteTableDef) -> None:
             )
         )
 
+    @routes.get("/mjr/am/metrics")
+    async def metrics(request):
+        """Request/DB/tool latency and queue metrics in Prometheus text format."""
+        return web.Response(
+            text=render_metrics(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
     @routes.get("/mjr/am/status")
     async def runtime_status(request):
         """
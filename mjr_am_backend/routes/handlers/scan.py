@@ -32,6 +32,7 @@ from mjr_am_backend.custom_roots import resolve_custom_root
 from mjr_am_backend.shared import Result, get_logger, sanitize_error_message
 from mjr_am_backend.utils import env_float, parse_bool
 from mjr_am_backend.features.index.metadata_helpers import MetadataHelpers
+from mjr_am_backend.features.index.blob_store import prune_orphan_blobs
 from mjr_am_backend.features.watcher_settings import get_watcher_settings, update_watcher_settings
 from mjr_am_backend.features.index.watcher_scope import (
     build_watch_paths,
@@ -397,6 +398,7 @@ def register_scan_routes(routes: web.RouteTableDef) -> None:
             directory: Path to scan (optional, defaults to ComfyUI output directory)
             recursive: Scan subdirectories (default: true)
             incremental: Only update changed files (default: true)
+            verify: List every directory, ignoring the directory journal (default: false)
         """
         svc, error_result = await _require_services()
         if error_result:
@@ -565,6 +567,7 @@ def register_scan_routes(routes: web.RouteTableDef) -> None:
 
         recursive = body.get("recursive", True)
         incremental = body.get("incremental", True)
+        verify = bool(body.get("verify") or body.get("mode") == "verify")
         fast = bool(body.get("fast") or body.get("mode") == "fast" or body.get("manifest_only") is True)
         background_metadata = bool(body.get("background_metadata") or body.get("enrich_metadata") or body.get("enqueue_metadata"))
 
@@ -579,6 +582,7 @@ def register_scan_routes(routes: web.RouteTableDef) -> None:
                         scan_root_id,
                         fast,
                         background_metadata,
+                        verify=verify,
                     ),
                     timeout=TO_THREAD_TIMEOUT_S,
                 )
@@ -925,10 +929,11 @@ def register_scan_routes(routes: web.RouteTableDef) -> None:
                             except Exception:
                                 try:
                                     await db_adapter.aexecutemany("""
-                                        INSERT INTO asset_metadata (asset_id, metadata_raw)
-                                        VALUES (?, ?)
+                                        INSERT INTO asset_metadata (asset_id, metadata_raw, generation_time_ms)
+                                        VALUES (?1, ?2, json_extract(?2, '$.generation_time_ms'))
                                         ON CONFLICT(asset_id) DO UPDATE SET
-                                            metadata_raw = excluded.metadata_raw
+                                            metadata_raw = excluded.metadata_raw,
+                                            generation_time_ms = excluded.generation_time_ms
                                     """, upsert_params)
                                 except Exception:
                                     logger.debug("Fallback SQL bulk upsert failed")
@@ -1204,6 +1209,27 @@ def register_scan_routes(routes: web.RouteTableDef) -> None:
                 total_deleted += int(res.data or 0)
             return Result.Ok(total_deleted)
 
+        async def _clear_dir_journal(prefixes: list[str] | None) -> Result[int]:
+            if not await db.ahas_table("scan_dir_journal"):
+                return Result.Ok(0)
+            if prefixes is None:
+                return await db.aexecute("DELETE FROM scan_dir_journal")
+            total_deleted = 0
+            for prefix in prefixes:
+                try:
+                    normalized = str(Path(prefix).resolve(strict=False))
+                except Exception:
+                    return Result.Err("INVALID_INPUT", f"Invalid path for cache clearing: {prefix}")
+                like = normalized.rstrip(os.path.sep) + os.path.sep + "%"
+                res = await db.aexecute(
+                    "DELETE FROM scan_dir_journal WHERE dir_path = ? OR dir_path LIKE ? OR root_path = ? OR root_path LIKE ?",
+                    (normalized, like, normalized, like),
+                )
+                if not res.ok:
+                    return res
+                total_deleted += int(res.data or 0)
+            return Result.Ok(total_deleted)
+
         async def _clear_assets(prefixes: list[str] | None) -> Result[int]:
             # Deleting from assets cascades to asset_metadata/scan_journal/metadata_cache.
             return await _clear_table("assets", prefixes)
@@ -1249,6 +1275,11 @@ def register_scan_routes(routes: web.RouteTableDef) -> None:
                     if not res.ok:
                         return Result.Err(res.code, res.error or "Failed to clear scan_journal")
                     cleared["scan_journal"] = int(res.data or 0)
+                if clear_scan_journal or clear_assets_table:
+                    # Journaled directories would otherwise be skipped by the next incremental scan.
+                    res = await _clear_dir_journal(cache_prefixes)
+                    if not res.ok:
+                        return Result.Err(res.code, res.error or "Failed to clear scan_dir_journal")
                 if clear_metadata_cache:
                     res = await _clear_table("metadata_cache", cache_prefixes)
                     if not res.ok:
@@ -1325,7 +1356,13 @@ def register_scan_routes(routes: web.RouteTableDef) -> None:
 
         # FULL RESET CLEANUP: VACUUM and Physical Files
         if scope == "all" and (clear_scan_journal or clear_metadata_cache):
-            # 1. Vacuum DB to reclaim space and rebuild file
+            # 1. Drop workflow/prompt blobs no longer referenced, then vacuum DB to reclaim space
+            try:
+                pruned = await prune_orphan_blobs(db)
+                if not pruned.ok:
+                    logger.debug("Blob prune during index reset failed: %s", pruned.error)
+            except Exception as exc:
+                logger.debug("Blob prune during index reset failed: %s", exc)
             try:
                 await asyncio.to_thread(db.execute, "VACUUM")
                 logger.info("Database VACUUM completed during index reset")
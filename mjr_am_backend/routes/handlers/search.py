@@ -6,7 +6,11 @@ import asyncio
 import re
 import os
 import json
+import secrets
+import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Optional
 from aiohttp import web
 
 try:
@@ -19,10 +23,16 @@ except Exception:
 
     folder_paths = _FolderPathsStub()  # type: ignore
 
-from mjr_am_backend.config import OUTPUT_ROOT, TO_THREAD_TIMEOUT_S
+from mjr_am_backend.config import (
+    OUTPUT_ROOT,
+    SEARCH_MERGE_SESSION_MAX,
+    SEARCH_MERGE_SESSION_TTL_SECONDS,
+    TO_THREAD_TIMEOUT_S,
+)
 from mjr_am_backend.custom_roots import resolve_custom_root
 from mjr_am_backend.shared import Result, get_logger
 from mjr_am_backend.features.index.metadata_helpers import MetadataHelpers
+from mjr_am_backend.features.index.blob_store import load_blob_text
 from ..core import _json_response, _require_services, _read_json, safe_error_message
 from ..core.security import _check_rate_limit
 from .filesystem import _list_filesystem_assets, _kickoff_background_scan
@@ -46,8 +56,96 @@ SEARCH_MAX_BATCH_IDS = 200
 AUTOCOMPLETE_RATE_LIMIT_MAX_REQUESTS = 40
 AUTOCOMPLETE_RATE_LIMIT_WINDOW_SECONDS = 60
 
+MERGE_CURSOR_PREFIX = "m."
+
 logger = get_logger(__name__)
 
+_MERGE_SESSIONS_LOCK = asyncio.Lock()
+_MERGE_SESSIONS: OrderedDict[str, "_MergeSession"] = OrderedDict()
+
+
+class _MergeSession:
+    """
+    Resumable state of the scope=all browse merge (Outputs from DB, Inputs from filesystem).
+
+    Outputs are paged with the DB keyset cursor, Inputs by offset; unconsumed
+    buffered items are kept so the next page continues the merge where it stopped.
+    """
+
+    __slots__ = (
+        "signature",
+        "produced",
+        "out_buf",
+        "out_cursor",
+        "out_done",
+        "out_total",
+        "in_buf",
+        "in_offset",
+        "in_total",
+        "touched",
+    )
+
+    def __init__(self, signature: str):
+        self.signature = signature
+        self.produced = 0
+        self.out_buf: list[dict] = []
+        self.out_cursor: Optional[str] = None
+        self.out_done = False
+        self.out_total: Optional[int] = None
+        self.in_buf: list[dict] = []
+        self.in_offset = 0
+        self.in_total: Optional[int] = None
+        self.touched = time.monotonic()
+
+    @property
+    def in_done(self) -> bool:
+        return self.in_total is not None and self.in_offset >= self.in_total
+
+    @property
+    def exhausted(self) -> bool:
+        return self.out_done and self.in_done and not self.out_buf and not self.in_buf
+
+
+def _merge_signature(query: str, sort_key: str, filters: dict | None, output_root: str, input_root: str) -> str:
+    try:
+        filters_key = json.dumps(filters or {}, sort_keys=True, default=str)
+    except Exception:
+        filters_key = repr(filters)
+    return "|".join((query, sort_key, filters_key, str(output_root), str(input_root)))
+
+
+def _parse_merge_cursor(cursor: Optional[str]) -> Optional[tuple[str, int]]:
+    """Parse a `m.<session>.<position>` merge cursor; None when it is not one."""
+    text = str(cursor or "")
+    if not text.startswith(MERGE_CURSOR_PREFIX):
+        return None
+    session_id, sep, position = text[len(MERGE_CURSOR_PREFIX):].rpartition(".")
+    if not sep or not session_id or not position.isdigit():
+        return None
+    return session_id, int(position)
+
+
+async def _take_merge_session(session_id: str, signature: str, position: int) -> Optional[_MergeSession]:
+    """Pop a live session matching the request; concurrent replays of one cursor fall back to a rebuild."""
+    now = time.monotonic()
+    ttl = float(SEARCH_MERGE_SESSION_TTL_SECONDS)
+    async with _MERGE_SESSIONS_LOCK:
+        for key in [k for k, v in _MERGE_SESSIONS.items() if now - v.touched > ttl]:
+            _MERGE_SESSIONS.pop(key, None)
+        session = _MERGE_SESSIONS.pop(session_id, None)
+    if session is None or session.signature != signature or session.produced != position:
+        return None
+    return session
+
+
+async def _store_merge_session(session_id: str, session: _MergeSession) -> None:
+    session.touched = time.monotonic()
+    async with _MERGE_SESSIONS_LOCK:
+        _MERGE_SESSIONS[session_id] = session
+        _MERGE_SESSIONS.move_to_end(session_id)
+        while len(_MERGE_SESSIONS) > int(SEARCH_MERGE_SESSION_MAX):
+            _MERGE_SESSIONS.popitem(last=False)
+
 
 def _asset_dedupe_key(asset: dict) -> str:
     fp = str((asset or {}).get("filepath") or "").strip()
@@ -381,6 +479,7 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
           q: search query (default: '*')
           limit: number of items (default: 50)
           offset: pagination offset (default: 0)
+          cursor: opaque cursor from a previous page's `next_cursor` (replaces offset; not for scope=custom)
           subfolder: for input/custom browsing (default: '')
           custom_root_id: required when scope=custom
         """
@@ -407,7 +506,10 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
 
         limit = max(0, min(MAX_LIST_LIMIT, limit))
         offset = max(0, offset)
-        if offset > MAX_OFFSET:
+        cursor = (request.query.get("cursor") or "").strip() or None
+        if cursor:
+            offset = 0
+        elif offset > MAX_OFFSET:
             return _json_response(Result.Err("INVALID_INPUT", f"Offset must be less than {MAX_OFFSET}"))
         sort_key = _normalize_sort_key(request.query.get("sort"))
 
@@ -455,6 +557,10 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
             wf_type = str(request.query["workflow_type"] or "").strip().upper()
             if wf_type:
                 filters["workflow_type"] = wf_type
+        for param, key in (("model", "model_name"), ("sampler", "sampler")):
+            value = str(request.query.get(param) or "").strip()
+            if value:
+                filters[key] = value
         if "has_workflow" in request.query:
             filters["has_workflow"] = request.query["has_workflow"].lower() in ("true", "1", "yes")
 
@@ -504,6 +610,7 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
                     filters=scoped_filters,
                     include_total=include_total,
                     sort=sort_key,
+                    cursor=cursor,
                 )
 
                 if db_result.ok:
@@ -626,11 +733,20 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
             except Exception:
                 input_indexed = False
 
-            if not input_indexed and query == "*" and offset == 0 and not filters:
+            merge_cursor = _parse_merge_cursor(cursor)
+            if merge_cursor is not None:
+                offset = merge_cursor[1]
+            elif cursor and not input_indexed:
+                return _json_response(Result.Err("INVALID_INPUT", "Invalid cursor"))
+
+            if not input_indexed and query == "*" and offset == 0 and not cursor and not filters:
                 # Opportunistically index the input root so `scope=all` can become DB-only on later requests.
                 await _kickoff_background_scan(str(Path(input_root)), source="input", recursive=False, incremental=True)
 
             if input_indexed:
+                if merge_cursor is not None:
+                    # Merge session from before Inputs were indexed: continue by position.
+                    cursor = None
                 scoped = await svc["index"].search_scoped(
                     query,
                     roots=[output_root, input_root],
@@ -639,6 +755,7 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
                     filters=filters or None,
                     include_total=include_total,
                     sort=sort_key,
+                    cursor=cursor,
                 )
                 if not scoped.ok:
                     return _json_response(scoped)
@@ -677,6 +794,7 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
                         "query": query,
                         "scope": scope,
                         "sort": sort_key,
+                        "next_cursor": data.get("next_cursor"),
                     }
                 )
                 return _json_response(Result.Ok(payload))
@@ -743,15 +861,19 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
                 return _json_response(Result.Ok(payload))
 
             # Browse-all (`*`): merge by mtime for better UX, with chunked streaming merge.
+            # The merge state is kept in a short-lived session addressed by `next_cursor`, so
+            # page N resumes where page N-1 stopped instead of re-merging from offset 0.
             chunk = max(SEARCH_CHUNK_MIN, min(SEARCH_CHUNK_MAX, int(limit) * 2))
-            out_offset = 0
-            in_offset = 0
-            out_buf = []
-            in_buf = []
-            out_i = 0
-            in_i = 0
-            out_total = None
-            in_total = None
+            signature = _merge_signature(query, sort_key, filters, output_root, input_root)
+            session: Optional[_MergeSession] = None
+            session_id = ""
+            if merge_cursor is not None:
+                session_id = merge_cursor[0]
+                session = await _take_merge_session(session_id, signature, offset)
+            if session is None:
+                session = _MergeSession(signature)
+                session_id = secrets.token_urlsafe(12)
+            state = session
 
             def _mtime(item) -> int:
                 try:
@@ -760,99 +882,113 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
                     return 0
 
             async def _fill_out():
-                nonlocal out_total, out_offset
-                if out_total is not None and out_offset >= out_total:
-                    return
+                if state.out_done:
+                    return None
                 res = await svc["index"].search_scoped(
                     "*",
                     roots=[output_root],
                     limit=chunk,
-                    offset=out_offset,
+                    offset=0,
                     filters={**(filters or {}), "source": "output"},
-                    include_total=True,
+                    include_total=state.out_total is None,
                     sort=sort_key,
+                    cursor=state.out_cursor,
                 )
                 if not res.ok:
                     return res
                 data = res.data or {}
                 incoming_total = data.get("total")
                 if incoming_total is not None:
-                    out_total = int(incoming_total or 0)
+                    state.out_total = int(incoming_total or 0)
                 items = data.get("assets") or []
                 for a in items:
                     a["type"] = "output"
-                out_offset += len(items)
-                out_buf.extend(items)
+                state.out_cursor = data.get("next_cursor")
+                state.out_done = not state.out_cursor
+                state.out_buf.extend(items)
                 return None
 
             async def _fill_in():
-                nonlocal in_total, in_offset
-                if in_total is not None and in_offset >= in_total:
-                    return
-                res = await _list_filesystem_assets(Path(input_root), "", "*", chunk, in_offset, asset_type="input", filters=filters or None, sort=sort_key)
+                if state.in_done:
+                    return None
+                res = await _list_filesystem_assets(Path(input_root), "", "*", chunk, state.in_offset, asset_type="input", filters=filters or None, sort=sort_key)
                 if not res.ok:
                     return res
                 data = res.data or {}
-                in_total = int(data.get("total") or 0)
+                state.in_total = int(data.get("total") or 0)
                 items = data.get("assets") or []
-                in_offset += len(items)
-                in_buf.extend(items)
+                state.in_offset += len(items)
+                if not items:
+                    state.in_offset = state.in_total
+                state.in_buf.extend(items)
                 return None
 
-            # Prime buffers (and totals)
-            err = await _fill_out()
-            if err:
-                return _json_response(err)
-            err = await _fill_in()
-            if err:
-                return _json_response(err)
-
-            total = int(out_total or 0) + int(in_total or 0)
+            # Prime buffers (and totals) for a fresh session.
+            if state.out_total is None:
+                err = await _fill_out()
+                if err:
+                    return _json_response(err)
+            if state.in_total is None:
+                err = await _fill_in()
+                if err:
+                    return _json_response(err)
+
+            total = int(state.out_total or 0) + int(state.in_total or 0)
             target = offset + limit
-            produced = 0
             page = []
+            out_i = 0
+            in_i = 0
 
-            while produced < target:
-                if out_i >= len(out_buf) and (out_total is None or out_offset < out_total):
+            while state.produced < target:
+                if out_i >= len(state.out_buf) and not state.out_done:
+                    state.out_buf = state.out_buf[out_i:]
+                    out_i = 0
                     err = await _fill_out()
                     if err:
                         return _json_response(err)
-                if in_i >= len(in_buf) and (in_total is None or in_offset < in_total):
+                if in_i >= len(state.in_buf) and not state.in_done:
+                    state.in_buf = state.in_buf[in_i:]
+                    in_i = 0
                     err = await _fill_in()
                     if err:
                         return _json_response(err)
 
-                if out_i >= len(out_buf) and in_i >= len(in_buf):
+                out_has = out_i < len(state.out_buf)
+                in_has = in_i < len(state.in_buf)
+                if not out_has and not in_has:
                     break
 
                 pick_out = False
-                out_has = out_i < len(out_buf)
-                in_has = in_i < len(in_buf)
                 if out_has and in_has:
-                    pick_out = _mtime(out_buf[out_i]) >= _mtime(in_buf[in_i])
+                    pick_out = _mtime(state.out_buf[out_i]) >= _mtime(state.in_buf[in_i])
                 elif out_has:
                     pick_out = True
 
                 if pick_out:
-                    item = out_buf[out_i]
+                    item = state.out_buf[out_i]
                     out_i += 1
                 else:
-                    item = in_buf[in_i]
+                    item = state.in_buf[in_i]
                     in_i += 1
 
                 # Periodically truncate consumed prefixes to keep buffers small.
-                if out_i > SEARCH_MERGE_TRIM_START and out_i >= len(out_buf) // SEARCH_MERGE_TRIM_RATIO:
-                    out_buf = out_buf[out_i:]
+                if out_i > SEARCH_MERGE_TRIM_START and out_i >= len(state.out_buf) // SEARCH_MERGE_TRIM_RATIO:
+                    state.out_buf = state.out_buf[out_i:]
                     out_i = 0
-                if in_i > SEARCH_MERGE_TRIM_START and in_i >= len(in_buf) // SEARCH_MERGE_TRIM_RATIO:
-                    in_buf = in_buf[in_i:]
+                if in_i > SEARCH_MERGE_TRIM_START and in_i >= len(state.in_buf) // SEARCH_MERGE_TRIM_RATIO:
+                    state.in_buf = state.in_buf[in_i:]
                     in_i = 0
 
-                if produced >= offset:
+                if state.produced >= offset:
                     page.append(item)
-                    if len(page) >= limit:
-                        break
-                produced += 1
+                state.produced += 1
+
+            state.out_buf = state.out_buf[out_i:]
+            state.in_buf = state.in_buf[in_i:]
+            next_cursor = None
+            if limit and len(page) >= limit and not state.exhausted:
+                await _store_merge_session(session_id, state)
+                next_cursor = f"{MERGE_CURSOR_PREFIX}{session_id}.{state.produced}"
 
             if sort_key in ("name_asc", "name_desc", "mtime_asc"):
                 reverse = sort_key == "name_desc"
@@ -860,7 +996,18 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
                     page = sorted(page, key=lambda a: str((a or {}).get("filename") or "").lower(), reverse=reverse)
                 elif sort_key == "mtime_asc":
                     page = sorted(page, key=lambda a: int((a or {}).get("mtime") or 0))
-            payload = _dedupe_result_assets_payload({"assets": page, "total": total, "limit": limit, "offset": offset, "query": query, "scope": scope, "sort": sort_key})
+            payload = _dedupe_result_assets_payload(
+                {
+                    "assets": page,
+                    "total": total,
+                    "limit": limit,
+                    "offset": offset,
+                    "query": query,
+                    "scope": scope,
+                    "sort": sort_key,
+                    "next_cursor": next_cursor,
+                }
+            )
             return _json_response(Result.Ok(payload))
 
         if scope not in ("output", "outputs"):
@@ -876,11 +1023,12 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
             filters=output_filters,
             include_total=include_total,
             sort=sort_key,
+            cursor=cursor,
         )
         # If nothing is indexed yet, fall back to a fast filesystem listing so the grid can populate
         # immediately (old behavior), and kick off a fast background scan to build the DB.
         try:
-            is_initial = query == "*" and offset == 0 and not (filters or None)
+            is_initial = query == "*" and offset == 0 and not cursor and not (filters or None)
             total = int((out_res.data or {}).get("total") or 0) if out_res.ok else 0
             if is_initial and out_res.ok and total == 0:
                 await _kickoff_background_scan(
@@ -943,9 +1091,12 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
             q: Search query
             limit: Max results (default: 50)
             offset: Pagination offset (default: 0)
+            cursor: Opaque keyset cursor from a previous page's `next_cursor` (replaces offset)
             kind: Filter by file kind (image, video, audio, model3d)
             min_rating: Filter by minimum rating (0-5)
             has_workflow: Filter by workflow presence (true/false)
+            model: Filter by model/checkpoint name (case-insensitive exact match)
+            sampler: Filter by sampler name (case-insensitive exact match)
         """
         svc, error_result = await _require_services()
         if error_result:
@@ -971,7 +1122,10 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
 
         limit = max(0, min(MAX_LIST_LIMIT, limit))
         offset = max(0, offset)
-        if offset > MAX_OFFSET:
+        cursor = (request.query.get("cursor") or "").strip() or None
+        if cursor:
+            offset = 0
+        elif offset > MAX_OFFSET:
             return _json_response(Result.Err("INVALID_INPUT", f"Offset must be less than {MAX_OFFSET}"))
 
         # Parse filters
@@ -1020,6 +1174,10 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
             wf_type = str(request.query["workflow_type"] or "").strip().upper()
             if wf_type:
                 filters["workflow_type"] = wf_type
+        for param, key in (("model", "model_name"), ("sampler", "sampler")):
+            value = str(request.query.get(param) or "").strip()
+            if value:
+                filters[key] = value
         if "has_workflow" in request.query:
             filters["has_workflow"] = request.query["has_workflow"].lower() in ("true", "1", "yes")
 
@@ -1033,6 +1191,7 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
             offset,
             filters if filters else None,
             include_total=include_total,
+            cursor=cursor,
         )
         if result.ok and isinstance(result.data, dict):
             result.data = _dedupe_result_assets_payload(result.data)
@@ -1118,7 +1277,7 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
 
             result = await svc["index"].db.aquery(
                 f"""
-                SELECT m.metadata_raw, m.has_workflow
+                SELECT m.workflow_hash, m.metadata_raw, m.has_workflow
                 FROM assets a
                 LEFT JOIN asset_metadata m ON a.id = m.asset_id
                 WHERE {where_clause}
@@ -1128,9 +1287,19 @@ def register_search_routes(routes: web.RouteTableDef) -> None:
             )
 
             if result.ok and result.data and len(result.data) > 0:
+                workflow_hash = result.data[0].get("workflow_hash")
                 metadata_raw = result.data[0].get("metadata_raw")
                 has_workflow = result.data[0].get("has_workflow")
 
+                # Externalized workflow: splice the cached blob text without re-parsing it.
+                if workflow_hash:
+                    workflow_text = await load_blob_text(svc["index"].db, workflow_hash)
+                    if workflow_text:
+                        return web.Response(
+                            text='{"ok":true,"workflow":' + workflow_text + "}",
+                            content_type="application/json",
+                        )
+
                 # Check if we have workflow data in metadata_raw
                 if metadata_raw and (has_workflow or has_workflow is None):
                     try:
@@ -0,0 +1,100 @@
+"""
+Thumbnail endpoint for the asset grid.
+"""
+from __future__ import annotations
+
+import asyncio
+
+from aiohttp import web
+
+from mjr_am_backend.shared import ErrorCode, get_logger
+from ..core import (
+    _check_rate_limit,
+    _is_path_allowed,
+    _is_path_allowed_custom,
+    _normalize_path,
+    _require_services,
+)
+
+logger = get_logger(__name__)
+
+_STATUS_BY_CODE = {
+    ErrorCode.NOT_FOUND: 404,
+    ErrorCode.UNSUPPORTED: 415,
+    ErrorCode.TOOL_MISSING: 415,
+    "THUMB_FAILED": 415,
+}
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def register_thumb_routes(routes: web.RouteTableDef) -> None:
+    @routes.get("/mjr/am/thumb")
+    async def get_thumbnail(request: web.Request) -> web.StreamResponse:
+        """
+        Serve a cached thumbnail.
+
+        Query params:
+          filepath: absolute path within allowed roots
+          size: edge length in px, rounded up to a supported size (default 256)
+          v: optional cache-buster (e.g. the asset mtime); enables long client caching
+        """
+        allowed, retry_after = _check_rate_limit(request, "thumb", max_requests=4000, window_seconds=60)
+        if not allowed:
+            return web.Response(status=429, text=f"Rate limit exceeded. Retry after {retry_after}s")
+
+        filepath = request.query.get("filepath")
+        if not filepath:
+            return web.Response(status=400, text="Missing 'filepath' parameter")
+        candidate = _normalize_path(filepath)
+        if not candidate:
+            return web.Response(status=400, text="Invalid filepath")
+        if not (_is_path_allowed(candidate) or _is_path_allowed_custom(candidate)):
+            return web.Response(status=403, text="Path is not within allowed roots")
+        try:
+            resolved = candidate.resolve(strict=True)
+        except (OSError, RuntimeError, ValueError):
+            return web.Response(status=404, text="File not found")
+
+        svc, error_result = await _require_services()
+        thumbs = svc.get("thumbnails") if isinstance(svc, dict) and not error_result else None
+        if thumbs is None:
+            return web.Response(status=503, text="Thumbnail service unavailable")
+
+        res = await thumbs.get_thumbnail(str(resolved), request.query.get("size"))
+        if not res.ok:
+            return web.Response(status=_STATUS_BY_CODE.get(res.code, 500), text=str(res.error or "Thumbnail unavailable"))
+
+        info = res.data or {}
+        etag = str(info.get("etag") or "")
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, max-age=86400" if request.query.get("v") else "private, no-cache",
+            "X-Content-Type-Options": "nosniff",
+        }
+        if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+            return web.Response(status=304, headers=headers)
+        try:
+            # Thumbnails are small; reading them whole keeps our ETag (FileResponse sets its own).
+            body = await asyncio.to_thread(_read_bytes, str(info.get("path") or ""))
+        except OSError:
+            # Evicted by a concurrent render since the lookup: render it once more.
+            res = await thumbs.get_thumbnail(str(resolved), request.query.get("size"))
+            try:
+                if not res.ok:
+                    raise OSError(res.error)
+                body = await asyncio.to_thread(_read_bytes, str((res.data or {}).get("path") or ""))
+            except OSError:
+                return web.Response(status=404, text="Thumbnail not found")
+        return web.Response(body=body, content_type=str(info.get("mime") or "image/webp"), headers=headers)
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
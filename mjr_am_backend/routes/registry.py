@@ -83,6 +83,7 @@ from .handlers import (
     register_version_routes,
     register_download_routes,
     register_duplicates_routes,
+    register_thumb_routes,
 )
 
 logger = get_logger(__name__)
@@ -285,10 +286,17 @@ def register_all_routes() -> web.RouteTableDef:
     except Exception as e:
         logger.error(f"Failed to register download routes: {e}")
 
+    try:
+        register_thumb_routes(routes)
+        logger.info("  GET /mjr/am/thumb (Added)")
+    except Exception as e:
+        logger.error(f"Failed to register thumbnail route: {e}")
+
     logger.info("=" * 60)
     logger.info("Routes registered:")
     logger.info("  GET /mjr/am/health")
     logger.info("  GET /mjr/am/health/counters")
+    logger.info("  POST /mjr/am/health/counters/reconcile")
     logger.info("  GET /mjr/am/health/db")
     logger.info("  GET /mjr/am/config")
     logger.info("  GET /mjr/am/tools/status")
@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.fs.dir_index import DirIndex
+from mjr_am_backend.shared import Result
+
+
+def _index(rows):
+    return DirIndex.from_rows("/d", rows)
+
+
+def test_dir_index_orders_filters_and_patches_without_resorting():
+    idx = _index([
+        ("b.png", 10, 300),
+        ("A.mp4", 20, 100),
+        ("c.wav", 30, 200),
+        ("notes.txt", 1, 999),
+    ])
+    assert idx.names == ["b.png", "c.wav", "A.mp4"]
+    assert [idx.names[i] for i in idx.ordered("name_asc")] == ["A.mp4", "b.png", "c.wav"]
+    assert [idx.names[i] for i in idx.ordered("name_desc")] == ["c.wav", "b.png", "A.mp4"]
+    assert [idx.names[i] for i in idx.ordered("mtime_asc")] == ["A.mp4", "c.wav", "b.png"]
+    assert [idx.names[i] for i in idx.select("name_asc", kind="video")] == ["A.mp4"]
+    assert [idx.names[i] for i in idx.select("mtime_desc", extensions=["wav", "mp4"], query_lower="a")] == ["c.wav", "A.mp4"]
+    assert [idx.names[i] for i in idx.select("mtime_desc", mtime_start=150, mtime_end=300)] == ["c.wav"]
+
+    entry = idx.entry(2, "sub", "input", None)
+    assert (entry["filepath"], entry["kind"], entry["ext"], entry["mtime"]) == (os.path.join("/d", "A.mp4"), "video", ".mp4", 100)
+
+    patched = idx.patched({"c.wav": None, "b.png": (11, 50), "a0.png": (5, 400), "x.txt": (1, 1)})
+    expected = _index([("A.mp4", 20, 100), ("b.png", 11, 50), ("a0.png", 5, 400)])
+    for attr in ("names", "sizes", "mtimes", "kinds", "exts", "by_name"):
+        assert list(getattr(patched, attr)) == list(getattr(expected, attr)), attr
+    assert idx.names == ["b.png", "c.wav", "A.mp4"]
+
+
+@pytest.mark.asyncio
+async def test_listing_hydrates_only_the_returned_page(monkeypatch, tmp_path):
+    import mjr_am_backend.routes.handlers.filesystem as fs
+
+    for i in range(30):
+        path = tmp_path / f"img_{i:02d}.png"
+        path.write_bytes(b"x")
+        os.utime(path, (1000 + i, 1000 + i))
+    monkeypatch.setattr(fs, "_FS_LIST_CACHE", type(fs._FS_LIST_CACHE)())
+    monkeypatch.setattr(fs, "ensure_fs_list_cache_watching", lambda _p: None)
+
+    class _Index:
+        def __init__(self):
+            self.calls = []
+
+        async def lookup_assets_by_filepaths(self, filepaths):
+            self.calls.append(list(filepaths))
+            return Result.Ok({fp: {"id": 7, "rating": 4 if fp.endswith("3.png") else 0} for fp in filepaths})
+
+    svc = _Index()
+    res = await fs._list_filesystem_assets(Path(tmp_path), "", "*", 5, 10, "input", index_service=svc, sort="name_desc")
+    assert res.ok and res.data["total"] == 30
+    assert [a["filename"] for a in res.data["assets"]] == [f"img_{i:02d}.png" for i in range(19, 14, -1)]
+    assert len(svc.calls) == 1 and len(svc.calls[0]) == 5
+    assert all(a["id"] == 7 for a in res.data["assets"])
+
+    rated = await fs._list_filesystem_assets(Path(tmp_path), "", "*", 2, 0, "input", filters={"min_rating": 3}, index_service=svc)
+    assert rated.data["total"] == 3
+    assert [a["filename"] for a in rated.data["assets"]] == ["img_23.png", "img_13.png"]
+    assert rated.data["assets"][0]["rating"] == 4
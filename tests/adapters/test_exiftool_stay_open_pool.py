@@ -0,0 +1,172 @@
+import os
+import stat
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.tools.exiftool import ExifTool
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="fake exiftool script relies on a POSIX shebang")
+
+
+_FAKE_EXIFTOOL = textwrap.dedent(
+    """\
+    #!{python}
+    import json, os, sys, time
+
+    VALUE_OPTS = {{"-charset", "-echo4"}}
+
+    def run(args):
+        files, echo4, i = [], "", 0
+        while i < len(args):
+            a = args[i]
+            if a in VALUE_OPTS:
+                if a == "-echo4":
+                    echo4 = args[i + 1]
+                i += 2
+                continue
+            if not a.startswith("-"):
+                files.append(a)
+            i += 1
+        out, status = [], 0
+        for f in files:
+            name = os.path.basename(f)
+            if "hang" in name:
+                time.sleep(30)
+            if "crash" in name:
+                os._exit(3)
+            if "missing" in name or not os.path.exists(f):
+                sys.stderr.write("Error: File not found - %s\\n" % f)
+                status = 1
+                continue
+            out.append({{"SourceFile": f, "File:FileName": name, "Pid": os.getpid()}})
+        if out:
+            sys.stdout.write(json.dumps(out) + "\\n")
+        return status, echo4.replace("${{status}}", str(status))
+
+    if sys.argv[1:2] != ["-stay_open"]:
+        sys.exit(run(sys.argv[1:])[0])
+
+    pending = []
+    for line in sys.stdin:
+        line = line.rstrip("\\n")
+        if line.startswith("-execute"):
+            _, echo = run(pending)
+            pending = []
+            sys.stdout.write("{{ready%s}}\\n" % line[len("-execute"):])
+            sys.stdout.flush()
+            sys.stderr.write(echo + "\\n")
+            sys.stderr.flush()
+            continue
+        if pending and pending[-1] == "-stay_open" and line == "False":
+            break
+        pending.append(line)
+    """
+)
+
+
+def _make_fake_exiftool(tmp_path: Path) -> str:
+    script = tmp_path / "bin" / "exiftool"
+    script.parent.mkdir(parents=True, exist_ok=True)
+    script.write_text(_FAKE_EXIFTOOL.format(python=sys.executable), encoding="utf-8")
+    script.chmod(script.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return str(script)
+
+
+def _fail_subprocess_run(*_args, **_kwargs):
+    raise AssertionError("one-shot subprocess should not be used when the pool is healthy")
+
+
+def test_pool_reuses_one_process_for_reads(monkeypatch, tmp_path: Path):
+    tool = ExifTool(bin_name=_make_fake_exiftool(tmp_path), timeout=5, pool_size=1)
+    try:
+        assert tool.is_available()
+        monkeypatch.setattr("mjr_am_backend.adapters.tools.exiftool.subprocess.run", _fail_subprocess_run)
+
+        files = []
+        for name in ("a.png", "b.png", "c.png"):
+            f = tmp_path / name
+            f.write_bytes(b"x")
+            files.append(str(f))
+
+        first = tool.read(files[0])
+        assert first.ok, first.error
+        assert first.data["File:FileName"] == "a.png"
+
+        batch = tool.read_batch(files)
+        assert all(batch[f].ok for f in files)
+        pids = {first.data["Pid"]} | {batch[f].data["Pid"] for f in files}
+        assert len(pids) == 1
+
+        stats = tool.get_pool_stats()
+        assert stats["enabled"] is True
+        assert stats["requests"] == 2
+        assert stats["spawned"] == 1
+        assert stats["alive"] == 1
+    finally:
+        tool.close()
+
+
+def test_pool_keeps_error_contract_for_failed_reads(tmp_path: Path):
+    tool = ExifTool(bin_name=_make_fake_exiftool(tmp_path), timeout=5, pool_size=1)
+    try:
+        bad = tmp_path / "missing.png"
+        bad.write_bytes(b"x")
+        good = tmp_path / "good.png"
+        good.write_bytes(b"x")
+
+        res = tool.read(str(bad))
+        assert not res.ok
+        assert res.code == "EXIFTOOL_ERROR"
+        assert res.meta.get("return_code") == 1
+        assert "File not found" in (res.error or "")
+
+        batch = tool.read_batch([str(bad), str(good)])
+        assert batch[str(good)].ok
+        assert not batch[str(bad)].ok
+        assert batch[str(bad)].code == "PARSE_ERROR"
+    finally:
+        tool.close()
+
+
+def test_pool_restarts_hung_and_crashed_workers(tmp_path: Path):
+    tool = ExifTool(bin_name=_make_fake_exiftool(tmp_path), timeout=1, pool_size=1)
+    try:
+        ok_file = tmp_path / "ok.png"
+        ok_file.write_bytes(b"x")
+        hang_file = tmp_path / "hang.png"
+        hang_file.write_bytes(b"x")
+        crash_file = tmp_path / "crash.png"
+        crash_file.write_bytes(b"x")
+
+        hung = tool.read(str(hang_file))
+        assert not hung.ok
+        assert hung.code == "TIMEOUT"
+
+        after_hang = tool.read(str(ok_file))
+        assert after_hang.ok, after_hang.error
+
+        # A worker that dies mid-request falls back to a one-shot process, which
+        # crashes the same way and surfaces as a regular ExifTool error.
+        crashed = tool.read(str(crash_file))
+        assert not crashed.ok
+
+        recovered = tool.read(str(ok_file))
+        assert recovered.ok, recovered.error
+
+        stats = tool.get_pool_stats()
+        assert stats["timeouts"] >= 1
+        assert stats["restarts"] >= 2
+    finally:
+        tool.close()
+
+
+def test_pool_disabled_with_zero_size(tmp_path: Path):
+    tool = ExifTool(bin_name=_make_fake_exiftool(tmp_path), timeout=5, pool_size=0)
+    f = tmp_path / "a.png"
+    f.write_bytes(b"x")
+    assert tool.get_pool_stats() == {"enabled": False}
+    res = tool.read(str(f))
+    assert res.ok, res.error
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+
+async def _insert_assets(db, root: str, count: int) -> None:
+    # Duplicate mtimes/filenames on purpose so the id tiebreak is exercised.
+    rows = [
+        (f"img_{i % 7:02d}.png", "", f"{root}/img_{i:03d}.png", "output", "image", ".png", 100 + i, 1700000000 + (i // 3))
+        for i in range(count)
+    ]
+    res = await db.aexecutemany(
+        """
+        INSERT INTO assets (filename, subfolder, filepath, source, kind, ext, size, mtime)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    assert res.ok, res.error
+
+
+async def _walk_cursor(fetch, limit: int) -> list:
+    ids, cursor = [], None
+    for _ in range(100):
+        res = await fetch(limit=limit, cursor=cursor)
+        assert res.ok, res.error
+        ids.extend(a["id"] for a in res.data["assets"])
+        cursor = res.data.get("next_cursor")
+        if not cursor:
+            return ids
+    raise AssertionError("cursor pagination did not terminate")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["mtime_desc", "mtime_asc", "name_asc", "name_desc"])
+async def test_scoped_cursor_pages_match_offset_order(services, tmp_path: Path, sort):
+    db = services["db"]
+    index = services["index"]
+    root = str((tmp_path / "cursor_root").resolve())
+    await _insert_assets(db, root, 23)
+
+    full = await index.search_scoped("*", roots=[root], limit=100, offset=0, sort=sort)
+    assert full.ok, full.error
+    expected = [a["id"] for a in full.data["assets"]]
+    assert len(expected) == 23
+    assert full.data["next_cursor"] is None
+
+    async def fetch(limit, cursor):
+        return await index.search_scoped("*", roots=[root], limit=limit, offset=0, sort=sort, cursor=cursor)
+
+    assert await _walk_cursor(fetch, limit=5) == expected
+
+
+@pytest.mark.asyncio
+async def test_browse_search_cursor_and_invalid_cursor(services, tmp_path: Path):
+    db = services["db"]
+    index = services["index"]
+    root = str((tmp_path / "cursor_browse").resolve())
+    await _insert_assets(db, root, 12)
+
+    full = await index.search("*", limit=100, offset=0)
+    assert full.ok, full.error
+    expected = [a["id"] for a in full.data["assets"]]
+
+    async def fetch(limit, cursor):
+        return await index.search("*", limit=limit, offset=0, cursor=cursor)
+
+    assert await _walk_cursor(fetch, limit=4) == expected
+
+    bad = await index.search("*", limit=4, cursor="not-a-cursor")
+    assert not bad.ok
+    assert bad.code == "INVALID_INPUT"
+
+    page = await index.search_scoped("*", roots=[root], limit=4, sort="name_asc")
+    mismatched = await index.search_scoped(
+        "*", roots=[root], limit=4, sort="mtime_desc", cursor=page.data["next_cursor"]
+    )
+    assert not mismatched.ok
+    assert mismatched.code == "INVALID_INPUT"
@@ -0,0 +1,73 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from mjr_am_backend import metrics
+from mjr_am_backend.adapters.db.sqlite import Sqlite
+from mjr_am_backend.observability import ensure_observability
+from mjr_am_backend.routes.handlers.health import register_health_routes
+
+
+def test_registry_renders_cumulative_buckets_and_caps_label_sets(monkeypatch):
+    registry = metrics.MetricsRegistry()
+    hist = registry.histogram("t_seconds", "Test latency.", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value, ('say "hi"',))
+    text = registry.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{op="say \\"hi\\"",le="0.1"} 2' in text
+    assert 't_seconds_bucket{op="say \\"hi\\"",le="1"} 3' in text
+    assert 't_seconds_bucket{op="say \\"hi\\"",le="+Inf"} 4' in text
+    assert 't_seconds_count{op="say \\"hi\\""} 4' in text
+    assert 't_seconds_sum{op="say \\"hi\\""} 3.65' in text
+
+    monkeypatch.setattr(metrics, "MAX_SERIES", 2)
+    total = registry.counter("t_total", "Test total.", ("key",))
+    for key in ("a", "b", "c", "d"):
+        total.inc(1.0, (key,))
+    assert (total.value(("a",)), total.value(("other",))) == (1.0, 2.0)
+
+    assert metrics.statement_template("SELECT *\n  FROM assets WHERE id IN (?, ?,?)") == (
+        "SELECT * FROM assets WHERE id IN (?...)"
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_and_query_latency(tmp_path):
+    db = Sqlite(str(tmp_path / "metrics.db"))
+    template = "SELECT ? AS metrics_probe"
+    before = metrics.DB_QUERY_DURATION.count((template,))
+    assert (await db.aquery(template, (1,))).ok
+    assert metrics.DB_QUERY_DURATION.count((template,)) == before + 1
+    # Autocommit writes go through the group-commit writer and are timed there too.
+    write = "INSERT INTO metadata (key, value) VALUES (?, ?)"
+    write_label = (metrics.statement_template(write),)
+    writes_before = metrics.DB_QUERY_DURATION.count(write_label)
+    assert (await db.aexecute("CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT)")).ok
+    assert (await db.aexecute(write, ("metrics_probe", "1"))).ok
+    assert db._writer_stats["ops"] >= 1
+    assert metrics.DB_QUERY_DURATION.count(write_label) == writes_before + 1
+    await db.aclose()
+
+    routes = web.RouteTableDef()
+    register_health_routes(routes)
+    app = web.Application()
+    ensure_observability(app)
+    app.add_routes(routes)
+    labels = ("GET", "/mjr/am/metrics", "200")
+    served = metrics.HTTP_REQUESTS.value(labels)
+
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        await client.get("/mjr/am/metrics")
+        resp = await client.get("/mjr/am/metrics")
+        assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        text = await resp.text()
+    finally:
+        await client.close()
+
+    assert metrics.HTTP_REQUESTS.value(labels) == served + 2
+    assert 'mjr_am_http_request_duration_seconds_count{method="GET",route="/mjr/am/metrics"}' in text
+    assert 'mjr_am_db_query_duration_seconds_count{statement="SELECT ? AS metrics_probe"}' in text
+    assert "mjr_am_enrich_queue_depth " in text
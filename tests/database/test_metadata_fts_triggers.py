@@ -0,0 +1,103 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.db.schema import init_schema
+from mjr_am_backend.adapters.db.sqlite import Sqlite
+from mjr_am_backend.features.index.metadata_helpers import MetadataHelpers
+from mjr_am_backend.features.index.searcher import IndexSearcher
+from mjr_am_backend.shared import Result
+
+
+async def _fts_segments(db) -> tuple:
+    tags = (await db.aquery("SELECT COUNT(*) AS n, MAX(rowid) AS last FROM asset_metadata_fts_data")).data[0]
+    prompt = (await db.aquery("SELECT COUNT(*) AS n, MAX(rowid) AS last FROM asset_prompt_fts_data")).data[0]
+    return (tags["n"], tags["last"], prompt["n"], prompt["last"])
+
+
+async def _ids(searcher, query: str) -> list:
+    res = await searcher.search(query, limit=50, offset=0)
+    assert res.ok, res.error
+    return [a["id"] for a in res.data["assets"]]
+
+
+@pytest.mark.asyncio
+async def test_rating_writes_skip_fts_and_tag_edits_replace_tokens(tmp_path: Path):
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    res = await db.aexecute(
+        "INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime) "
+        "VALUES ('a.png', '', ?, 'output', 'image', '.png', 1, 1)",
+        (str(tmp_path / "a.png"),),
+    )
+    asset_id = int(res.data)
+    meta = {
+        "tags": ["sunset"],
+        "geninfo": {"positive": {"value": "a lighthouse at dusk"}, "models": {"checkpoint": {"name": "sdxl"}}},
+    }
+    assert (await MetadataHelpers.write_asset_metadata_row(db, asset_id, Result.Ok(meta, quality="full"))).ok
+    searcher = IndexSearcher(db, has_tags_text_column=True)
+    assert await _ids(searcher, "sunset") == [asset_id]
+    assert await _ids(searcher, "lighthouse") == [asset_id]
+
+    before = await _fts_segments(db)
+    await db.aexecute("UPDATE asset_metadata SET rating = 4, has_workflow = 1 WHERE asset_id = ?", (asset_id,))
+    # Re-writing identical metadata sets tags/metadata_text to the same values.
+    assert (await MetadataHelpers.write_asset_metadata_row(db, asset_id, Result.Ok(meta, quality="full"))).ok
+    assert await _fts_segments(db) == before
+
+    await db.aexecute(
+        "UPDATE asset_metadata SET tags = '[\"harbor\"]', tags_text = 'harbor' WHERE asset_id = ?", (asset_id,)
+    )
+    after = await _fts_segments(db)
+    assert after[2:] == before[2:]
+    assert await _ids(searcher, "harbor") == [asset_id]
+    assert await _ids(searcher, "sunset") == []
+    assert await _ids(searcher, "lighthouse") == [asset_id]
+
+    await db.aexecute("DELETE FROM asset_metadata WHERE asset_id = ?", (asset_id,))
+    assert await _ids(searcher, "lighthouse") == []
+    await db.aclose()
+
+
+@pytest.mark.asyncio
+async def test_legacy_metadata_fts_is_split_on_startup(tmp_path: Path):
+    db_path = tmp_path / "legacy.sqlite"
+    db = Sqlite(str(db_path), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    await db.aclose()
+
+    # Recreate the pre-split layout: one contentless table and an unscoped update trigger.
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.executescript(
+            """
+            DROP TRIGGER asset_metadata_fts_insert;
+            DROP TRIGGER asset_metadata_fts_delete;
+            DROP TRIGGER asset_metadata_fts_update;
+            DROP TRIGGER asset_prompt_fts_update;
+            DROP TABLE asset_metadata_fts;
+            DROP TABLE asset_prompt_fts;
+            CREATE VIRTUAL TABLE asset_metadata_fts USING fts5(tags, tags_text, metadata_text, content='');
+            CREATE TRIGGER asset_metadata_fts_update AFTER UPDATE ON asset_metadata BEGIN
+                INSERT INTO asset_metadata_fts(asset_metadata_fts, rowid) VALUES('delete', old.asset_id);
+            END;
+            INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime)
+            VALUES ('b.png', '', '/tmp/b.png', 'output', 'image', '.png', 1, 1);
+            INSERT INTO asset_metadata(asset_id, tags, tags_text, metadata_text)
+            VALUES (1, '["legacy"]', 'legacy', 'misty forest');
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    db = Sqlite(str(db_path), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    trigger = (await db.aquery("SELECT sql FROM sqlite_master WHERE name = 'asset_metadata_fts_update'")).data[0]["sql"]
+    assert "UPDATE OF tags, tags_text" in trigger
+    searcher = IndexSearcher(db, has_tags_text_column=True)
+    assert await _ids(searcher, "legacy") == [1]
+    assert await _ids(searcher, "forest") == [1]
+    await db.aclose()
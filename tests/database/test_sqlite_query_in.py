@@ -69,3 +69,27 @@ async def test_query_in_repairs_whitespace_column(tmp_path):
     assert [row["id"] for row in (res.data or [])] == [1, 2]
     await db.aclose()
 
+
+
+@pytest.mark.asyncio
+async def test_query_in_binds_keys_as_one_json_array_and_reuses_the_statement(tmp_path):
+    db = Sqlite(str(tmp_path / "test.db"))
+    await _init_db(db)
+    template = "SELECT id FROM assets WHERE {IN_CLAUSE} ORDER BY id"
+    # More keys than SQLite accepts as bound variables.
+    many = await db.aquery_in(template, "filepath", ["b.png", *(f"missing_{i}.png" for i in range(40_000))])
+    assert many.ok, many.error
+    assert [row["id"] for row in many.data] == [2]
+
+    before = db.get_runtime_status()["statement_cache"]
+    for keys in ([1], [1, 2], [2, 3, 4]):
+        assert (await db.aquery_in(template, "id", keys)).ok
+    stats = db.get_runtime_status()["statement_cache"]
+    assert stats["misses"] - before["misses"] <= 1
+    assert stats["hits"] - before["hits"] >= 2
+    assert stats["in_lookups_json"] == 4
+
+    # Values without an exact JSON form use expanded placeholders.
+    blob = await db.aquery_in(template, "filepath", [b"a.png"])
+    assert blob.ok and db.get_runtime_status()["statement_cache"]["in_lookups_expanded"] == 1
+    await db.aclose()
@@ -0,0 +1,34 @@
+import pytest
+
+from mjr_am_backend.adapters.db.sqlite import RowSet, Sqlite
+from mjr_am_backend.features.index.searcher import _asset_dicts
+
+
+@pytest.mark.asyncio
+async def test_lean_rows_share_one_column_index_and_build_assets_once(tmp_path):
+    db = Sqlite(str(tmp_path / "test.db"))
+    await db.aexecutescript(
+        """
+        CREATE TABLE assets (id INTEGER PRIMARY KEY, filepath TEXT NOT NULL, tags TEXT);
+        INSERT INTO assets(id, filepath, tags) VALUES (1, 'a.png', '["x","y"]');
+        INSERT INTO assets(id, filepath, tags) VALUES (2, 'b.png', '["x","y"]');
+        INSERT INTO assets(id, filepath, tags) VALUES (3, 'c.png', 'not json');
+        """
+    )
+    res = await db.aquery_rows("SELECT id, filepath, tags FROM assets ORDER BY id")
+    assert res.ok and isinstance(res.data, RowSet)
+    assert res.data.columns == ("id", "filepath", "tags")
+    assert res.data.rows[0] == (1, "a.png", '["x","y"]')
+    assert res.data.value(2, "filepath") == "c.png" and res.data.value(0, "missing") is None
+
+    again = await db.aquery_in("SELECT id, filepath, tags FROM assets WHERE {IN_CLAUSE}", "id", [2], lean=True)
+    assert again.data.index is res.data.index
+    assert again.data.dicts() == [{"id": 2, "filepath": "b.png", "tags": '["x","y"]'}]
+
+    assets = _asset_dicts(res.data)
+    assert [a["tags"] for a in assets] == [["x", "y"], ["x", "y"], []]
+    # Identical tag strings are decoded once, but every asset owns its list.
+    assets[0]["tags"].append("z")
+    assert assets[1]["tags"] == ["x", "y"]
+    assert assets[2]["tags_text"] == ""
+    await db.aclose()
@@ -0,0 +1,83 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from mjr_am_backend.adapters.db.sqlite import Sqlite
+
+
+async def _init_db(db: Sqlite) -> None:
+    await db.aexecutescript(
+        """
+        CREATE TABLE items (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            rating INTEGER DEFAULT 0
+        );
+        """
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_group_committed(tmp_path):
+    db = Sqlite(str(tmp_path / "test.db"), max_connections=2)
+    await _init_db(db)
+
+    results = await asyncio.gather(
+        *(db.aexecute("INSERT INTO items(name) VALUES (?)", (f"item_{i}",)) for i in range(40))
+    )
+    assert all(r.ok for r in results)
+    assert sorted(int(r.data) for r in results) == list(range(1, 41))
+
+    stats = db.get_write_queue_stats()
+    assert stats["ops"] == 40
+    assert stats["batches"] < 40
+    assert stats["max_batch"] > 1
+
+    # Committed before the futures resolve: a pooled reader sees every row.
+    rows = await db.aquery("SELECT COUNT(*) AS n FROM items")
+    assert rows.data[0]["n"] == 40
+    await db.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failing_statement_does_not_fail_its_batch(tmp_path):
+    db = Sqlite(str(tmp_path / "test.db"), max_connections=2)
+    await _init_db(db)
+    await db.aexecute("INSERT INTO items(name) VALUES ('taken')")
+
+    ok_update, duplicate, ok_insert, many = await asyncio.gather(
+        db.aexecute("UPDATE items SET rating = 5 WHERE name = 'taken'"),
+        db.aexecute("INSERT INTO items(name) VALUES ('taken')"),
+        db.aexecute("INSERT INTO items(name) VALUES ('fresh')"),
+        db.aexecutemany("INSERT INTO items(name) VALUES (?)", [("m1",), ("m2",)]),
+    )
+    assert ok_update.ok and ok_insert.ok and many.ok
+    assert not duplicate.ok
+    assert "Integrity" in str(duplicate.error)
+
+    rows = (await db.aquery("SELECT name, rating FROM items ORDER BY id")).data
+    assert [(r["name"], r["rating"]) for r in rows] == [("taken", 5), ("fresh", 0), ("m1", 0), ("m2", 0)]
+    await db.aclose()
+
+
+@pytest.mark.asyncio
+async def test_transactions_bypass_the_queue(tmp_path):
+    db = Sqlite(str(tmp_path / "test.db"), max_connections=2)
+    await _init_db(db)
+
+    async with db.atransaction() as tx:
+        assert tx.ok
+        await db.aexecute("INSERT INTO items(name) VALUES ('in_tx')")
+        # A write from another task (no tx token) is queued and waits for the transaction.
+        outside = contextvars.Context().run(
+            asyncio.ensure_future, db.aexecute("INSERT INTO items(name) VALUES ('outside')")
+        )
+        await asyncio.sleep(0.05)
+        assert not outside.done()
+    assert tx.ok
+    assert (await outside).ok
+
+    rows = (await db.aquery("SELECT name FROM items ORDER BY id")).data
+    assert [r["name"] for r in rows] == ["in_tx", "outside"]
+    await db.aclose()
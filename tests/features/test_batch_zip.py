@@ -64,3 +64,60 @@ async def test_batch_zip_is_flat_and_renames_duplicates(monkeypatch, tmp_path):
         await client.close()
 
 
+@pytest.mark.asyncio
+async def test_batch_zip_streams_and_stores_compressed_media(monkeypatch, tmp_path):
+    out_root = tmp_path / "output"
+    out_root.mkdir()
+    (out_root / "image.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 64)
+    (out_root / "notes.txt").write_bytes(b"prompt text " * 2000)
+    batch_dir = out_root / "_mjr_batch_zips"
+    batch_dir.mkdir()
+    (batch_dir / ".mjr_batch_leftover_token_123.zip").write_bytes(b"old")
+
+    import mjr_am_backend.routes.handlers.batch_zip as mod
+
+    monkeypatch.setattr(mod, "OUTPUT_ROOT_PATH", out_root, raising=True)
+    monkeypatch.setattr(mod, "_BATCH_DIR", batch_dir, raising=True)
+    monkeypatch.setattr(mod, "_LEGACY_SWEPT", False, raising=True)
+
+    routes = web.RouteTableDef()
+    register_batch_zip_routes(routes)
+    app = web.Application()
+    app.add_routes(routes)
+
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        token = "mjr_testtoken_stream01"
+        resp = await client.post(
+            "/mjr/am/batch-zip",
+            data=json.dumps(
+                {
+                    "token": token,
+                    "items": [
+                        {"filename": "image.png", "subfolder": "", "type": "output"},
+                        {"filename": "notes.txt", "subfolder": "", "type": "output"},
+                    ],
+                }
+            ),
+            headers={"Content-Type": "application/json", "X-Requested-With": "XMLHttpRequest"},
+        )
+        assert (await resp.json())["data"]["count"] == 2
+
+        dl = await client.get(f"/mjr/am/batch-zip/{token}")
+        assert dl.status == 200
+        assert dl.headers["Content-Type"] == "application/zip"
+        assert "Content-Length" not in dl.headers
+        body = await dl.read()
+
+        zf = zipfile.ZipFile(io.BytesIO(body), "r")
+        assert zf.testzip() is None
+        infos = {i.filename: i for i in zf.infolist()}
+        assert infos["image.png"].compress_type == zipfile.ZIP_STORED
+        assert infos["notes.txt"].compress_type == zipfile.ZIP_DEFLATED
+        assert infos["notes.txt"].compress_size < infos["notes.txt"].file_size
+        assert zf.read("image.png") == (out_root / "image.png").read_bytes()
+        # Nothing is staged on disk; stale archives from older versions are removed.
+        assert list(batch_dir.iterdir()) == []
+    finally:
+        await client.close()
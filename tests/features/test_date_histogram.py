@@ -2,6 +2,7 @@
 from pathlib import Path
 
 from mjr_am_backend.adapters.db.schema import init_schema, table_has_column
+from mjr_am_backend.adapters.db.scope_roots import scope_root_sql
 from mjr_am_backend.adapters.db.sqlite import Sqlite
 from mjr_am_backend.features.index.searcher import IndexSearcher
 
@@ -66,3 +67,111 @@ async def test_date_histogram_scoped_counts_days(tmp_path: Path):
     assert res_video.data == {"2026-01-05": 1}
     await db.aclose()
 
+
+
+@pytest.mark.asyncio
+async def test_date_histogram_rollup_tracks_index_writes(tmp_path: Path):
+    from mjr_am_backend.adapters.db.schema import ASSET_DAY_STATS_TZ_KEY, rebuild_asset_day_stats
+
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    searcher = IndexSearcher(db, await table_has_column(db, "asset_metadata", "tags_text"))
+    root_dir = (tmp_path / "out").resolve()
+    output, inputs = str(root_dir / "output"), str(root_dir / "input")
+
+    for name, kind, folder, source, mtime in [
+        ("a.png", "image", "output", "output", _ts(2026, 1, 5, 0, 0, 1)),
+        ("b.mp4", "video", "output", "output", _ts(2026, 1, 5, 23, 59, 59)),
+        ("c.png", "image", "output/sub", "output", _ts(2026, 1, 31, 23, 0, 0)),
+        ("d.png", "image", "input", "input", _ts(2026, 1, 7, 12, 0, 0)),
+        # Labelled output but stored in a prefix sibling of the output root: not under it.
+        ("e.png", "image", "output2", "output", _ts(2026, 1, 9, 12, 0, 0)),
+    ]:
+        await db.aexecute(
+            "INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime) VALUES (?, '', ?, ?, ?, 'png', 1, ?)",
+            (name, str(root_dir / folder / name), source, kind, mtime),
+        )
+    month_start, month_end = _ts(2026, 1, 1), _ts(2026, 2, 1)
+
+    # Unstamped rows are only found by the scan's filepath fallback.
+    assert await searcher._date_histogram_from_rollup([output], month_start, month_end, None) is None
+    assert (await searcher.date_histogram_scoped([output], month_start, month_end)).data == {
+        "2026-01-05": 2, "2026-01-31": 1,
+    }
+    assert (await db.aexecute(f"UPDATE assets SET scope_root = {scope_root_sql('assets.filepath')}")).ok
+
+    await db.aexecute("UPDATE assets SET mtime = ? WHERE filename = 'c.png'", (_ts(2026, 2, 1, 0, 30, 0),))
+    await db.aexecute("DELETE FROM assets WHERE filename = 'a.png'")
+
+    async def both(roots, start, end, filters=None):
+        rolled = await searcher._date_histogram_from_rollup(roots, start, end, filters)
+        scanned = await searcher._date_histogram_by_scan(roots, start, end, filters)
+        assert scanned.ok
+        assert rolled == scanned.data
+        return rolled
+
+    assert await both([output], month_start, month_end) == {"2026-01-05": 1}
+    assert await both([output, inputs], month_start, month_end) == {"2026-01-05": 1, "2026-01-07": 1}
+    assert await both([str(root_dir)], month_start, month_end) == {"2026-01-05": 1, "2026-01-07": 1, "2026-01-09": 1}
+    assert await both([output], month_end, _ts(2026, 3, 1), {"kind": "image"}) == {"2026-02-01": 1}
+    # Registering a nested root moves its assets to a new scope key; the parent still counts them.
+    assert await both([str(root_dir / "output" / "sub")], month_end, _ts(2026, 3, 1)) == {"2026-02-01": 1}
+    assert await both([output], month_end, _ts(2026, 3, 1)) == {"2026-02-01": 1}
+
+    # Built for another timezone: the rollup is bypassed until rebuilt.
+    await db.aexecute("UPDATE metadata SET value = 'elsewhere' WHERE key = ?", (ASSET_DAY_STATS_TZ_KEY,))
+    await db.aexecute("UPDATE asset_day_stats SET total = 0")
+    assert (await searcher.date_histogram_scoped([output], month_start, month_end)).data == {"2026-01-05": 1}
+    assert (await rebuild_asset_day_stats(db)).ok
+    assert await both([output], month_start, month_end) == {"2026-01-05": 1}
+    await db.aclose()
+
+
+@pytest.mark.asyncio
+async def test_date_rollup_skips_mtimes_without_a_calendar_day(tmp_path: Path):
+    from mjr_am_backend.adapters.db.schema import rebuild_asset_day_stats
+
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    beyond_9999 = 253402300800
+    inserted = await db.aexecute(
+        "INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime) VALUES ('z.png', '', ?, 'output', 'image', 'png', 1, ?)",
+        (str(tmp_path / "z.png"), beyond_9999),
+    )
+    assert inserted.ok, inserted.error
+    assert (await db.aexecute("UPDATE assets SET mtime = ?", (_ts(2026, 1, 5, 12, 0, 0),))).ok
+    assert (await db.aexecute("UPDATE assets SET mtime = ?", (beyond_9999,))).ok
+    assert (await rebuild_asset_day_stats(db)).ok
+    rows = await db.aquery("SELECT day, total FROM asset_day_stats WHERE total <> 0")
+    assert rows.ok and rows.data == []
+    await db.aclose()
+
+
+@pytest.mark.asyncio
+async def test_source_keyed_day_rollup_is_rekeyed_on_upgrade(tmp_path: Path):
+    from mjr_am_backend.adapters.db.schema import asset_day_stats_rebuild_pending
+
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    await db.aexecutescript(
+        """
+        DROP TABLE asset_day_stats;
+        CREATE TABLE asset_day_stats (
+            source TEXT NOT NULL, root_id TEXT NOT NULL DEFAULT '', kind TEXT NOT NULL,
+            day TEXT NOT NULL, total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, root_id, kind, day)
+        ) WITHOUT ROWID;
+        """
+    )
+    assert (await init_schema(db)).ok
+    assert await table_has_column(db, "asset_day_stats", "scope_root")
+    assert not await table_has_column(db, "asset_day_stats", "source")
+    # Empty index: rebuilt right away; the triggers write the new key.
+    assert not await asset_day_stats_rebuild_pending(db)
+    await db.aexecute(
+        "INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime, scope_root) VALUES ('a.png', '', ?, 'output', 'image', 'png', 1, ?, 'R')",
+        (str(tmp_path / "a.png"), _ts(2026, 1, 5, 12)),
+    )
+    rows = await db.aquery("SELECT scope_root, day, total FROM asset_day_stats")
+    assert rows.data == [{"scope_root": "R", "day": "2026-01-05", "total": 1}]
+    await db.aclose()
@@ -86,3 +86,77 @@ async def test_duplicates_merge_tags(services):
     merged = await dup.merge_tags_for_group(keep_id, [dup_id])
     assert merged.ok
     assert set(merged.data.get("tags") or []) == {"alpha", "beta"}
+
+
+@pytest.mark.asyncio
+async def test_phash_index_pairs_and_neighbors(services):
+    db = services["db"]
+    dup = services["duplicates"]
+
+    base = 0x0F0F_F0F0_3C3C_C3C3
+    hashes = {
+        "base.png": base,
+        "near.png": base ^ 0b111,  # 3 bits
+        "mid.png": base ^ (1 | 1 << 17 | 1 << 33 | 1 << 49 | 1 << 50 | 1 << 63),  # 6 bits, spread over bands
+        "far.png": base ^ ((1 << 20) - 1),  # 20 bits
+    }
+    ids = {}
+    for name, value in hashes.items():
+        res = await db.aexecute(
+            """
+            INSERT INTO assets (filename, subfolder, filepath, source, root_id, kind, ext, size, mtime, phash)
+            VALUES (?, '', ?, 'output', NULL, 'image', '.png', 1, 1, ?)
+            """,
+            (name, f"/tmp/phash/{name}", f"{value:016x}"),
+        )
+        ids[name] = int(res.data)
+
+    assert await dup.phash_index_pending()
+    built = await dup.build_phash_index(batch_size=2)
+    assert built.ok and built.data == 4
+    assert not await dup.phash_index_pending()
+
+    neighbors = await dup.find_similar(ids["base.png"], max_distance=6)
+    assert neighbors.ok
+    assert [(n["id"], n["distance"]) for n in neighbors.data["neighbors"]] == [
+        (ids["near.png"], 3),
+        (ids["mid.png"], 6),
+    ]
+
+    pairs = await dup.list_similar_pairs(max_distance=6)
+    assert pairs.ok
+    assert [(p["left"]["id"], p["right"]["id"], p["distance"]) for p in pairs.data["pairs"]] == [
+        (ids["base.png"], ids["near.png"], 3),
+        (ids["base.png"], ids["mid.png"], 6),
+    ]
+
+    # A changed phash drops stale pairs; deleting the asset cascades.
+    await db.aexecute("UPDATE assets SET phash = ? WHERE id = ?", (f"{hashes['far.png']:016x}", ids["near.png"]))
+    pairs = await dup.list_similar_pairs(max_distance=10)
+    assert [(p["left"]["id"], p["right"]["id"]) for p in pairs.data["pairs"]] == [(ids["base.png"], ids["mid.png"])]
+    await db.aexecute("DELETE FROM assets WHERE id = ?", (ids["mid.png"],))
+    assert (await dup.list_similar_pairs(max_distance=10)).data["pairs"] == []
+
+
+@pytest.mark.asyncio
+async def test_similar_pairs_root_scope_excludes_prefix_siblings(services, tmp_path):
+    db = services["db"]
+    dup = services["duplicates"]
+
+    base = 0x0F0F_F0F0_3C3C_C3C3
+    ids = {}
+    for rel, value in (("out/a.png", base), ("out/b.png", base ^ 0b1), ("out2/c.png", base ^ 0b11)):
+        path = str(tmp_path.resolve() / rel)
+        res = await db.aexecute(
+            """
+            INSERT INTO assets (filename, subfolder, filepath, source, root_id, kind, ext, size, mtime, phash)
+            VALUES (?, '', ?, 'output', NULL, 'image', '.png', 1, 1, ?)
+            """,
+            (Path(rel).name, path, f"{value:016x}"),
+        )
+        ids[rel] = int(res.data)
+    assert (await dup.build_phash_index()).data == 3
+
+    pairs = await dup.list_similar_pairs(roots=[str(tmp_path / "out")], max_distance=6)
+    assert pairs.ok
+    assert [(p["left"]["id"], p["right"]["id"]) for p in pairs.data["pairs"]] == [(ids["out/a.png"], ids["out/b.png"])]
@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.db.schema import asset_stats_reconcile_pending, table_has_column
+from mjr_am_backend.adapters.db.scope_roots import scope_root_sql
+
+async def _add_asset(db, name, folder, kind="image", source="output", root_id=None):
+    filepath = str(Path(folder) / name)
+    await db.aexecute(
+        f"""
+        INSERT INTO assets (filename, subfolder, filepath, source, root_id, kind, ext, size, mtime, scope_root)
+        VALUES (?, '', ?, ?, ?, ?, '.png', 1, 1, {scope_root_sql("?")})
+        """,
+        (name, filepath, source, root_id, kind, filepath),
+    )
+    rows = await db.aquery("SELECT id FROM assets WHERE filename = ?", (name,))
+    return rows.data[0]["id"]
+
+
+def _counts(data):
+    return {k: data[k] for k in ("total_assets", "by_kind", "rated", "with_workflow", "with_generation_data")}
+
+
+async def _stats_match_scan(health, roots):
+    stats = await health._counts_from_stats(roots)
+    assert stats is not None
+    assert stats == await health._counts_by_scan(roots)
+    return stats
+
+
+@pytest.mark.asyncio
+async def test_asset_stats_triggers_track_inserts_updates_and_deletes(services, tmp_path):
+    db = services["db"]
+    health = services["health"]
+    base = tmp_path.resolve() / "roots"
+    out_root, custom_root = str(base / "output"), str(base / "custom" / "r1")
+    # A fresh DB is reconciled at schema time, so counters never scan.
+    assert not await asset_stats_reconcile_pending(db)
+
+    a = await _add_asset(db, "a.png", out_root)
+    b = await _add_asset(db, "b.mp4", out_root, kind="video")
+    c = await _add_asset(db, "c.png", custom_root, source="custom", root_id="r1")
+    # Labelled output but stored in a prefix sibling of the output root: not under it.
+    await _add_asset(db, "e.png", str(base / "output2"))
+    await db.aexecute(
+        "INSERT INTO asset_metadata (asset_id, rating, has_workflow, has_generation_data) VALUES (?, 3, 1, 1)", (a,)
+    )
+    await db.aexecute("INSERT INTO asset_metadata (asset_id, rating, has_workflow) VALUES (?, 0, 1)", (b,))
+    await db.aexecute("INSERT INTO asset_metadata (asset_id, rating) VALUES (?, 5)", (c,))
+
+    out = await health.get_counters(roots=[out_root])
+    assert _counts(out.data) == {
+        "total_assets": 2, "by_kind": {"image": 1, "video": 1}, "rated": 1, "with_workflow": 2, "with_generation_data": 1,
+    }
+    await _stats_match_scan(health, [out_root])
+    custom = await health.get_counters(roots=[custom_root])
+    assert (custom.data["total_assets"], custom.data["rated"]) == (1, 1)
+    assert (await health.get_counters(roots=[str(base / "custom" / "other")])).data["total_assets"] == 0
+    assert (await _stats_match_scan(health, [str(base)]))["total"] == 4
+
+    # Flag changes, moving an asset to another root and deletes (incl. the metadata FK cascade).
+    await db.aexecute("UPDATE asset_metadata SET rating = 0, has_workflow = 0 WHERE asset_id = ?", (a,))
+    moved = str(Path(custom_root) / "b.mp4")
+    await db.aexecute(f"UPDATE assets SET filepath = ?, scope_root = {scope_root_sql('?')} WHERE id = ?", (moved, moved, b))
+    await db.aexecute("DELETE FROM assets WHERE id = ?", (c,))
+    await db.aexecute("DELETE FROM asset_metadata WHERE asset_id = ?", (a,))
+
+    everything = await health.get_counters()
+    scanned = await health._counts_by_scan(None)
+    assert everything.data["total_assets"] == scanned["total"] == 3
+    assert everything.data["by_kind"] == scanned["by_kind"]
+    for key in ("rated", "with_workflow", "with_generation_data"):
+        assert everything.data[key] == scanned[key]
+    for roots in ([out_root], [custom_root], [out_root, custom_root], [str(base)]):
+        await _stats_match_scan(health, roots)
+    assert (await health.get_counters(roots=[custom_root])).data["with_workflow"] == 1
+
+    # Unstamped rows are invisible to the scope keys: counters fall back to the scan.
+    await db.aexecute("UPDATE assets SET scope_root = NULL WHERE id = ?", (a,))
+    assert await health._counts_from_stats([out_root]) is None
+    assert (await health.get_counters(roots=[out_root])).data["total_assets"] == 1
+
+    # Drifted counters are repaired by an on-demand reconcile.
+    await db.aexecute("UPDATE asset_stats SET total = 99")
+    assert (await health.reconcile_counters()).ok
+    assert (await health.get_counters()).data["total_assets"] == 3
+
+
+@pytest.mark.asyncio
+async def test_source_keyed_asset_stats_are_rekeyed_on_upgrade(services, tmp_path):
+    from mjr_am_backend.adapters.db.schema import init_schema
+
+    db = services["db"]
+    out_root = str(tmp_path.resolve() / "output")
+    await _add_asset(db, "a.png", out_root)
+    await db.aexecutescript(
+        """
+        DROP TABLE asset_stats;
+        CREATE TABLE asset_stats (
+            source TEXT NOT NULL, root_id TEXT NOT NULL DEFAULT '', kind TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0, rated INTEGER NOT NULL DEFAULT 0,
+            with_workflow INTEGER NOT NULL DEFAULT 0, with_generation_data INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, root_id, kind)
+        ) WITHOUT ROWID;
+        """
+    )
+    assert (await init_schema(db)).ok
+    assert await table_has_column(db, "asset_stats", "scope_root")
+    # Populated index: counters scan until the startup reconcile rebuilds the table.
+    assert await asset_stats_reconcile_pending(db)
+    assert (await services["health"].reconcile_counters()).ok
+    assert await _stats_match_scan(services["health"], [out_root])
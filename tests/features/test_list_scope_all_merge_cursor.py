@@ -0,0 +1,102 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from mjr_am_backend.routes.handlers.search import register_search_routes
+from mjr_am_backend.shared import Result
+
+
+def _assets(prefix: str, count: int, mtime_base: int) -> list[dict]:
+    return [
+        {"id": i + 1, "filename": f"{prefix}_{i:03d}.png", "filepath": f"/{prefix}/{prefix}_{i:03d}.png", "mtime": mtime_base - 2 * i}
+        for i in range(count)
+    ]
+
+
+class _FakeIndex:
+    def __init__(self, assets: list[dict]):
+        self.assets = assets
+        self.calls: list[tuple[int, str | None]] = []
+
+    async def has_assets_under_root(self, _root):
+        return Result.Ok(False)
+
+    async def search_scoped(self, _query, roots=None, limit=50, offset=0, filters=None, include_total=True, sort=None, cursor=None):
+        self.calls.append((offset, cursor))
+        start = int(cursor) if cursor else offset
+        page = [dict(a) for a in self.assets[start : start + limit]]
+        next_cursor = str(start + len(page)) if limit and len(page) >= limit else None
+        total = len(self.assets) if include_total else None
+        return Result.Ok({"assets": page, "total": total, "limit": limit, "offset": offset, "next_cursor": next_cursor})
+
+
+@pytest.mark.asyncio
+async def test_scope_all_merge_resumes_from_cursor(monkeypatch, tmp_path):
+    import mjr_am_backend.routes.handlers.search as mod
+
+    outputs = _assets("out", 70, 10_000)
+    inputs = _assets("in", 45, 10_001)
+    index = _FakeIndex(outputs)
+    input_offsets: list[int] = []
+
+    async def _fake_list_fs(_root, _subfolder, _query, limit, offset, **_kwargs):
+        input_offsets.append(offset)
+        page = [dict(a) for a in inputs[offset : offset + limit]]
+        return Result.Ok({"assets": page, "total": len(inputs), "limit": limit, "offset": offset})
+
+    async def _mock_require_services():
+        return ({"index": index}, None)
+
+    async def _noop(*_a, **_k):
+        return None
+
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(tmp_path / "output"), raising=True)
+    monkeypatch.setattr(mod, "_require_services", _mock_require_services, raising=True)
+    monkeypatch.setattr(mod, "_kickoff_background_scan", _noop, raising=True)
+    monkeypatch.setattr(mod, "_list_filesystem_assets", _fake_list_fs, raising=True)
+    monkeypatch.setattr(mod, "_check_rate_limit", lambda *_a, **_k: (True, 0), raising=True)
+    mod._MERGE_SESSIONS.clear()
+
+    routes = web.RouteTableDef()
+    register_search_routes(routes)
+    app = web.Application()
+    app.add_routes(routes)
+
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        resp = await client.get("/mjr/am/list?scope=all&q=*&limit=200")
+        full = (await resp.json())["data"]
+        expected = [a["filepath"] for a in full["assets"]]
+        assert len(expected) == 115
+        assert full["next_cursor"] is None
+
+        index.calls.clear()
+        input_offsets.clear()
+        seen: list[str] = []
+        url = "/mjr/am/list?scope=all&q=*&limit=10"
+        for _ in range(20):
+            payload = await (await client.get(url)).json()
+            assert payload["ok"] is True, payload
+            data = payload["data"]
+            seen.extend(a["filepath"] for a in data["assets"])
+            if not data["next_cursor"]:
+                break
+            url = f"/mjr/am/list?scope=all&q=*&limit=10&cursor={data['next_cursor']}"
+
+        assert seen == expected
+        # Each source chunk is fetched once across the whole walk (no re-merge from offset 0).
+        assert input_offsets == [0]
+        assert [c for c in index.calls if c[1] is None] == [(0, None)]
+        assert len(index.calls) == 2
+
+        # An unknown/expired session still returns the right page by position.
+        mod._MERGE_SESSIONS.clear()
+        payload = await (await client.get("/mjr/am/list?scope=all&q=*&limit=10&cursor=m.gone.30")).json()
+        assert [a["filepath"] for a in payload["data"]["assets"]] == expected[30:40]
+
+        bad = await (await client.get("/mjr/am/list?scope=all&q=*&limit=10&cursor=bogus")).json()
+        assert bad["ok"] is False
+        assert bad["code"] == "INVALID_INPUT"
+    finally:
+        await client.close()
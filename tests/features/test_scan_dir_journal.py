@@ -0,0 +1,123 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+
+def _age_dirs(root: Path, seconds: float = 3600) -> None:
+    """Push directory mtimes out of the racy window so the scan journals them."""
+    ts = time.time() - seconds
+    for dirpath, _dirnames, _filenames in os.walk(root):
+        os.utime(dirpath, (ts, ts))
+
+
+@pytest.mark.asyncio
+async def test_incremental_scan_skips_unchanged_directories(tmp_path: Path, monkeypatch):
+    from mjr_am_backend.deps import build_services
+    from mjr_am_backend.features.index import scanner as scanner_mod
+
+    services_res = await build_services(db_path=str(tmp_path / "dir_journal.db"))
+    assert services_res.ok, services_res.error
+    index = services_res.data["index"]
+    db = services_res.data["db"]
+
+    root = tmp_path / "scan_root"
+    for day in ("2024-01-01", "2024-01-02"):
+        (root / day).mkdir(parents=True)
+        for i in range(3):
+            (root / day / f"img_{i}.png").write_bytes(b"not-a-real-file")
+    _age_dirs(root)
+
+    listed: list[str] = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        listed.append(str(path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(scanner_mod.os, "scandir", counting_scandir)
+
+    first = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True)
+    assert first.ok, first.error
+    assert first.data["added"] == 6
+    assert len(listed) == 3
+
+    rows = await db.aquery("SELECT dir_path FROM scan_dir_journal")
+    assert rows.ok
+    assert len(rows.data or []) == 3
+
+    # No-op rescan: nothing is listed, journaled files are reported as skipped.
+    listed.clear()
+    second = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True)
+    assert second.ok, second.error
+    assert listed == []
+    assert second.data["pruned_dirs"] == 3
+    assert second.data["scanned"] == 6
+    assert second.data["skipped"] == 6
+
+    # A new file changes only its directory's mtime; only that directory is relisted.
+    (root / "2024-01-02" / "img_new.png").write_bytes(b"not-a-real-file")
+    _age_dirs(root / "2024-01-02", seconds=60)
+    listed.clear()
+    third = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True)
+    assert third.ok, third.error
+    assert listed == [str(root / "2024-01-02")]
+    assert third.data["added"] == 1
+
+    # Verify mode walks the full tree again.
+    listed.clear()
+    verify = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True, verify=True)
+    assert verify.ok, verify.error
+    assert len(listed) == 3
+    assert verify.data["pruned_dirs"] == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_scan_catches_in_place_overwrites_and_drops_removed_dirs(tmp_path: Path, monkeypatch):
+    from mjr_am_backend.deps import build_services
+    from mjr_am_backend.features.index import scanner as scanner_mod
+
+    services_res = await build_services(db_path=str(tmp_path / "dir_journal_overwrite.db"))
+    assert services_res.ok, services_res.error
+    index = services_res.data["index"]
+    db = services_res.data["db"]
+
+    root = tmp_path / "scan_root"
+    (root / "keep").mkdir(parents=True)
+    (root / "gone" / "nested").mkdir(parents=True)
+    target = root / "keep" / "img.png"
+    target.write_bytes(b"not-a-real-file")
+    (root / "gone" / "nested" / "img.png").write_bytes(b"not-a-real-file")
+    _age_dirs(root)
+
+    first = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True)
+    assert first.ok, first.error
+    assert first.data["added"] == 2
+
+    # Same-name overwrite: the directory mtime is restored, only the file changed.
+    keep_mtime = (root / "keep").stat().st_mtime
+    target.write_bytes(b"regenerated-file-contents")
+    later = time.time() + 5
+    os.utime(target, (later, later))
+    os.utime(root / "keep", (keep_mtime, keep_mtime))
+    # Within the verify interval only the directory mtime is checked.
+    trusted = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True)
+    assert trusted.ok, trusted.error
+    assert trusted.data["updated"] == 0
+    assert trusted.data["pruned_dirs"] == 4
+
+    # Once the interval has elapsed, journaled files are stat'ed and the overwrite is seen.
+    monkeypatch.setattr(scanner_mod, "SCAN_DIR_JOURNAL_VERIFY_INTERVAL_SECONDS", 0.0)
+    await db.aexecute("UPDATE scan_dir_journal SET last_seen = datetime('now', '-1 hour')")
+    second = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True)
+    assert second.ok, second.error
+    assert second.data["updated"] == 1
+
+    for path in (root / "gone" / "nested" / "img.png", root / "gone" / "nested", root / "gone"):
+        path.unlink() if path.is_file() else path.rmdir()
+    _age_dirs(root, seconds=60)
+    third = await index.scan_directory(str(root), recursive=True, incremental=True, fast=True)
+    assert third.ok, third.error
+    rows = await db.aquery("SELECT dir_path FROM scan_dir_journal ORDER BY dir_path")
+    assert [r["dir_path"] for r in rows.data or []] == [str(root.resolve()), str((root / "keep").resolve())]
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from mjr_am_backend.adapters.db.scope_roots import scope_root_sql, scope_roots_where
+
+
+async def _insert(db, filepath, stamp=True):
+    scope = scope_root_sql("?") if stamp else "NULL"
+    await db.aexecute(
+        f"""
+        INSERT INTO assets (filename, subfolder, filepath, scope_root, source, kind, ext, size, mtime)
+        VALUES (?, '', ?, {scope}, 'output', 'image', '.png', 1, ?)
+        """,
+        (os.path.basename(filepath), filepath, *([filepath] if stamp else []), len(filepath)),
+    )
+
+
+async def _scoped(db, roots):
+    where = await scope_roots_where(db, roots)
+    assert where.ok, where.error
+    sql, params = where.data
+    rows = await db.aquery(f"SELECT a.filepath FROM assets a WHERE {sql} ORDER BY a.filepath", tuple(params))
+    return sql, [r["filepath"] for r in rows.data]
+
+
+@pytest.mark.asyncio
+async def test_scope_roots_stamp_nested_roots_and_seek_by_equality(services, tmp_path):
+    db = services["db"]
+    index = services["index"]
+    out = str(tmp_path.resolve() / "out")
+    custom = os.path.join(out, "custom")
+    old = os.path.join(out, "a.png")
+    nested = os.path.join(custom, "sub", "b.png")
+    sibling = str(tmp_path.resolve() / "out2" / "c.png")
+
+    # Rows indexed before v16 have no scope_root; the backfill registers roots and stamps them.
+    await _insert(db, old, stamp=False)
+    await _insert(db, sibling, stamp=False)
+    assert await index.scope_stamp_pending()
+    assert (await index.stamp_scope_roots([out])).ok
+    assert not await index.scope_stamp_pending()
+    rows = await db.aquery("SELECT filepath, scope_root, dir_path FROM assets ORDER BY filepath")
+    assert [(r["scope_root"], r["dir_path"]) for r in rows.data] == [(out, out), ("", os.path.dirname(sibling))]
+
+    # New rows are stamped with the innermost registered root at insert time.
+    sql, found = await _scoped(db, [custom])
+    assert found == [] and "LIKE" not in sql
+    await _insert(db, nested)
+    assert (await db.aquery("SELECT scope_root FROM assets WHERE filepath = ?", (nested,))).data[0]["scope_root"] == custom
+
+    # A root covers the registered roots nested under it, but not siblings sharing its prefix.
+    sql, found = await _scoped(db, [out])
+    assert found == [old, nested] and "LIKE" not in sql
+    assert (await _scoped(db, [custom]))[1] == [nested]
+    assert (await index.has_assets_under_root(str(tmp_path / "out2"))).data is True
+
+    plan = await db.aquery(
+        "EXPLAIN QUERY PLAN SELECT a.id FROM assets a WHERE a.scope_root = ? ORDER BY a.mtime DESC LIMIT 10", (out,)
+    )
+    assert "idx_assets_scope_root_mtime" in " ".join(str(r.get("detail")) for r in plan.data)
+
+    # Unstamped rows (written without scope_root) are still found by prefix.
+    legacy = os.path.join(custom, "d.png")
+    await _insert(db, legacy, stamp=False)
+    sql, found = await _scoped(db, [custom])
+    assert found == [legacy, nested] and "LIKE" in sql
+
+    listing = await index.lookup_assets_in_dir(os.path.dirname(nested))
+    assert list(listing.data) == [nested]
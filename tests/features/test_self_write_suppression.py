@@ -0,0 +1,97 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.fs.write_intents import begin_writes, end_writes, matches_self_write
+from mjr_am_backend.shared import Result
+from mjr_am_backend.features.index.watcher import DebouncedWatchHandler
+
+
+def _self_write(path: Path, extra: bytes) -> None:
+    """What the rating/tags sync does: rewrite the file, then restore its mtime."""
+    begin_writes([str(path)])
+    st = path.stat()
+    with open(path, "ab") as f:
+        f.write(extra)
+    os.utime(path, (st.st_atime, st.st_mtime))
+    end_writes([str(path)])
+
+
+@pytest.mark.asyncio
+async def test_self_writes_refresh_the_journal_without_reindexing(services, tmp_path: Path, monkeypatch):
+    index = services["index"]
+    db = services["db"]
+    root = tmp_path / "out"
+    root.mkdir()
+    f = root / "a.png"
+    f.write_bytes(b"x" * 256)
+
+    first = await index.index_paths([f], str(root))
+    assert first.ok and first.data["added"] == 1
+
+    _self_write(f, b"rating")
+    st = f.stat()
+
+    # A failed journal/asset write keeps the recorded intent for the next scan.
+    scanner = index._scanner
+    real_record = scanner._record_self_write
+
+    async def failing_record(entry, base_dir):
+        return Result.Err("DB_ERROR", "boom")
+
+    monkeypatch.setattr(scanner, "_record_self_write", failing_record)
+    await index.index_paths([f], str(root))
+    assert matches_self_write(str(f), st.st_mtime_ns, st.st_size)
+    monkeypatch.setattr(scanner, "_record_self_write", real_record)
+
+    res = await index.index_paths([f], str(root))
+    assert (res.data["updated"], res.data["skipped"]) == (0, 1)
+    assert not matches_self_write(str(f), st.st_mtime_ns, st.st_size)
+    journal = await db.aquery("SELECT size FROM scan_journal WHERE filepath = ?", (str(f),))
+    assert journal.data[0]["size"] == 256 + len(b"rating")
+    asset = await db.aquery("SELECT size, mtime FROM assets WHERE filepath = ?", (str(f),))
+    assert (asset.data[0]["size"], asset.data[0]["mtime"]) == (st.st_size, st.st_mtime_ns // 1_000_000_000)
+    # The journal now recognises the file on its own.
+    again = await index.index_paths([f], str(root))
+    assert again.data["skipped"] == 1
+
+    # Anyone else's change is indexed as usual.
+    with open(f, "ab") as fh:
+        fh.write(b"external")
+    later = f.stat().st_mtime + 5
+    os.utime(f, (later, later))
+    changed = await index.index_paths([f], str(root))
+    assert changed.data["updated"] == 1
+
+
+@pytest.mark.asyncio
+async def test_watcher_defers_in_flight_writes_and_skips_finished_ones(tmp_path: Path):
+    ready = []
+
+    async def on_files_ready(files):
+        ready.extend(files)
+
+    handler = DebouncedWatchHandler(on_files_ready, None, None, asyncio.get_running_loop(), debounce_ms=10_000)
+    f = tmp_path / "b.png"
+    f.write_bytes(b"x" * 256)
+
+    begin_writes([str(f)])
+    handler._pending[str(f)] = 0.0
+    await handler._flush()
+    assert ready == [] and str(f) in handler._pending
+
+    with open(f, "ab") as fh:
+        fh.write(b"tags")
+    end_writes([str(f)])
+    await handler._flush()
+    assert ready == [] and not handler._pending
+
+    with open(f, "ab") as fh:
+        fh.write(b"external")
+    handler._pending[str(f)] = 0.0
+    await handler._flush()
+    assert ready == [str(f)]
+    if handler._flush_timer:
+        handler._flush_timer.cancel()
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from PIL import Image
+
+from mjr_am_backend.features.thumbs import ThumbnailService
+from mjr_am_backend.routes.handlers.thumbs import register_thumb_routes
+
+
+def _png(path, size=(1200, 800), color=(200, 40, 40)):
+    Image.new("RGB", size, color).save(path, format="PNG")
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_thumbnails_are_cached_by_source_state_and_evicted_lru(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    first = _png(src / "a.png")
+    second = _png(src / "b.png", color=(10, 200, 10))
+    thumbs = ThumbnailService(cache_dir=str(tmp_path / "thumbs"), fmt="jpeg")
+
+    res = await thumbs.get_thumbnail(first, 200)
+    assert res.ok, res.error
+    assert res.data["size"] == 256 and res.data["mime"] == "image/jpeg"
+    with Image.open(res.data["path"]) as im:
+        assert im.size == (256, 171)
+    again = await thumbs.get_thumbnail(first, 256)
+    assert again.data["etag"] == res.data["etag"]
+    stats = thumbs.get_stats()
+    assert (stats["hits"], stats["misses"], stats["generated"]) == (1, 1, 1)
+
+    # Touching the source gives a new key; the old thumbnail is left to age out.
+    os.utime(first, ns=(1_000_000_000, 1_000_000_000))
+    changed = await thumbs.get_thumbnail(first, 256)
+    assert changed.data["etag"] != res.data["etag"]
+
+    # A restart rebuilds the index from disk; shrinking the budget evicts oldest first.
+    restarted = ThumbnailService(cache_dir=str(tmp_path / "thumbs"), fmt="jpeg")
+    restarted.max_bytes = os.path.getsize(changed.data["path"]) + os.path.getsize(res.data["path"]) - 1
+    latest = await restarted.get_thumbnail(second, 256)
+    assert latest.ok
+    assert not os.path.exists(res.data["path"])
+    assert os.path.exists(latest.data["path"])
+    assert restarted.get_stats()["evicted"] >= 1
+
+    assert (await thumbs.get_thumbnail(str(src / "missing.png"))).code == "NOT_FOUND"
+    assert (await thumbs.get_thumbnail(str(tmp_path / "a.wav"))).code == "UNSUPPORTED"
+
+
+@pytest.mark.asyncio
+async def test_budget_below_one_thumbnail_keeps_the_one_just_rendered(tmp_path):
+    thumbs = ThumbnailService(cache_dir=str(tmp_path / "thumbs"), max_bytes=1, fmt="jpeg")
+    first = await thumbs.get_thumbnail(_png(tmp_path / "a.png"), 128)
+    assert first.ok and os.path.exists(first.data["path"])
+    second = await thumbs.get_thumbnail(_png(tmp_path / "b.png", color=(0, 0, 200)), 128)
+    assert second.ok and os.path.exists(second.data["path"])
+    assert not os.path.exists(first.data["path"])
+    assert thumbs.get_stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_thumb_route_serves_strong_etag_and_304(monkeypatch, tmp_path):
+    import mjr_am_backend.routes.handlers.thumbs as mod
+
+    image = _png(tmp_path / "c.png")
+    thumbs = ThumbnailService(cache_dir=str(tmp_path / "thumbs"))
+
+    async def _mock_require_services():
+        return ({"thumbnails": thumbs}, None)
+
+    monkeypatch.setattr(mod, "_require_services", _mock_require_services)
+    monkeypatch.setattr(mod, "_is_path_allowed", lambda _p: True)
+
+    routes = web.RouteTableDef()
+    register_thumb_routes(routes)
+    app = web.Application()
+    app.add_routes(routes)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        resp = await client.get("/mjr/am/thumb", params={"filepath": image, "size": "128", "v": "1"})
+        assert resp.status == 200
+        etag = resp.headers["ETag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+        assert resp.headers["Content-Type"] == f"image/{thumbs.fmt}"
+        assert "max-age" in resp.headers["Cache-Control"]
+        body = await resp.read()
+        assert 0 < len(body) < os.path.getsize(image)
+
+        cached = await client.get("/mjr/am/thumb", params={"filepath": image, "size": "128"}, headers={"If-None-Match": etag})
+        assert cached.status == 304
+
+        missing = await client.get("/mjr/am/thumb", params={"filepath": str(tmp_path / "c.png.wav")})
+        assert missing.status == 404
+    finally:
+        await client.close()
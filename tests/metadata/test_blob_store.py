@@ -0,0 +1,148 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.db.schema import init_schema
+from mjr_am_backend.adapters.db.sqlite import Sqlite
+from mjr_am_backend.features.index import blob_store
+from mjr_am_backend.features.index.metadata_helpers import MetadataHelpers
+from mjr_am_backend.features.index.searcher import IndexSearcher
+from mjr_am_backend.shared import Result
+
+
+def _workflow(seed: int = 1) -> dict:
+    nodes = [{"id": i, "type": "CLIPTextEncode", "widgets_values": [f"a prompt for node {i}"]} for i in range(20)]
+    nodes.append({"id": 99, "type": "KSampler", "widgets_values": [seed, "fixed", 20, 7.0]})
+    return {"nodes": nodes, "links": [], "version": 0.4}
+
+
+async def _insert_asset(db, root: Path, name: str) -> int:
+    res = await db.aexecute(
+        """
+        INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime)
+        VALUES (?, '', ?, 'output', 'image', '.png', 1, 1)
+        """,
+        (name, str(root / name)),
+    )
+    assert res.ok, res.error
+    return int(res.data)
+
+
+def test_externalize_keeps_small_values_inline():
+    meta = {"workflow": _workflow(), "prompt": {"1": {"class_type": "X"}}, "geninfo": {"seed": {"value": 1}}}
+    stripped, blobs, refs = blob_store.externalize_blobs(meta)
+    assert set(refs) == {"workflow"}
+    assert stripped["workflow"] == {"$blob": refs["workflow"]}
+    assert stripped["prompt"] == meta["prompt"]
+    assert stripped["geninfo"] == meta["geninfo"]
+    assert meta["workflow"]["nodes"]  # input untouched
+    assert list(blobs) == [refs["workflow"]]
+    # Key order does not change the hash.
+    reordered = json.loads(json.dumps(meta["workflow"], sort_keys=False))
+    reordered = dict(reversed(list(reordered.items())))
+    assert blob_store.externalize_blobs({"workflow": reordered})[2]["workflow"] == refs["workflow"]
+
+
+@pytest.mark.asyncio
+async def test_identical_workflows_share_one_blob_and_read_back(tmp_path: Path):
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    blob_store.clear_blob_cache()
+    root = tmp_path.resolve()
+
+    first = await _insert_asset(db, root, "a.png")
+    second = await _insert_asset(db, root, "b.png")
+    for asset_id in (first, second):
+        meta = {"workflow": _workflow(), "geninfo": {"seed": {"value": asset_id}}}
+        assert (await MetadataHelpers.write_asset_metadata_row(db, asset_id, Result.Ok(meta, quality="full"))).ok
+    assert (await MetadataHelpers.store_metadata_cache(db, str(root / "a.png"), "s1", Result.Ok({"workflow": _workflow()}))).ok
+
+    blobs = (await db.aquery("SELECT hash, raw_size, length(data) AS stored FROM blobs")).data
+    assert len(blobs) == 1
+    assert blobs[0]["stored"] < blobs[0]["raw_size"]
+
+    rows = (await db.aquery("SELECT workflow_hash, metadata_raw FROM asset_metadata ORDER BY asset_id")).data
+    assert {r["workflow_hash"] for r in rows} == {blobs[0]["hash"]}
+    assert all("CLIPTextEncode" not in r["metadata_raw"] for r in rows)
+
+    searcher = IndexSearcher(db, has_tags_text_column=True)
+    asset = (await searcher.get_asset(first)).data
+    assert asset["workflow"] == _workflow()
+    assert asset["metadata_raw"]["workflow"] == _workflow()
+    assert asset["has_workflow"] == 1
+
+    batch = (await searcher.get_assets([second, first])).data
+    assert [a["workflow"] for a in batch] == [_workflow(), _workflow()]
+
+    cached = await MetadataHelpers.retrieve_cached_metadata(db, str(root / "a.png"), "s1")
+    assert cached.data["workflow"] == _workflow()
+
+    # Once nothing references it, the blob is pruned.
+    await db.aexecute("DELETE FROM assets")
+    await db.aexecute("DELETE FROM metadata_cache")
+    assert (await blob_store.prune_orphan_blobs(db)).data == 1
+    assert (await db.aquery("SELECT COUNT(*) AS n FROM blobs")).data[0]["n"] == 0
+
+    await db.aclose()
+
+
+@pytest.mark.asyncio
+async def test_blobs_and_metadata_row_commit_together(tmp_path: Path):
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    blob_store.clear_blob_cache()
+    root = tmp_path.resolve()
+    asset_id = await _insert_asset(db, root, "a.png")
+
+    # The blob insert joins the caller's transaction and rolls back with the row.
+    with pytest.raises(RuntimeError):
+        async with db.atransaction(mode="immediate") as tx:
+            assert tx.ok
+            meta = Result.Ok({"workflow": _workflow()}, quality="full")
+            assert (await MetadataHelpers.write_asset_metadata_row(db, asset_id, meta)).ok
+            raise RuntimeError("abort")
+    assert (await db.aquery("SELECT COUNT(*) AS n FROM blobs")).data[0]["n"] == 0
+    assert (await db.aquery("SELECT COUNT(*) AS n FROM asset_metadata")).data[0]["n"] == 0
+
+    meta = Result.Ok({"workflow": _workflow()}, quality="full")
+    assert (await MetadataHelpers.write_asset_metadata_row(db, asset_id, meta)).ok
+    assert (await blob_store.prune_orphan_blobs(db)).data == 0
+    assert (await db.aquery("SELECT COUNT(*) AS n FROM blobs")).data[0]["n"] == 1
+
+    await db.aclose()
+
+
+@pytest.mark.asyncio
+async def test_migration_moves_inline_graphs(tmp_path: Path):
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    blob_store.clear_blob_cache()
+    root = tmp_path.resolve()
+
+    asset_id = await _insert_asset(db, root, "legacy.png")
+    legacy = {"workflow": _workflow(7), "prompt": {"9": {"class_type": "KSampler", "inputs": {"seed": 7}}}}
+    await db.aexecute(
+        "INSERT INTO asset_metadata(asset_id, has_workflow, metadata_raw) VALUES (?, 1, ?)",
+        (asset_id, json.dumps(legacy)),
+    )
+    await db.aexecute(
+        "INSERT INTO metadata_cache(filepath, state_hash, metadata_raw) VALUES (?, 's', ?)",
+        (str(root / "legacy.png"), json.dumps(legacy)),
+    )
+
+    assert await MetadataHelpers.blob_migration_pending(db)
+    migrated = await MetadataHelpers.migrate_inline_blobs(db, batch_size=1)
+    assert migrated.ok, migrated.error
+    assert migrated.data == 2
+    assert not await MetadataHelpers.blob_migration_pending(db)
+
+    row = (await db.aquery("SELECT workflow_hash, metadata_raw FROM asset_metadata")).data[0]
+    assert json.loads(row["metadata_raw"])["workflow"] == {"$blob": row["workflow_hash"]}
+
+    searcher = IndexSearcher(db, has_tags_text_column=True)
+    assert (await searcher.get_asset(asset_id)).data["workflow"] == _workflow(7)
+    cached = await MetadataHelpers.retrieve_cached_metadata(db, str(root / "legacy.png"), "s")
+    assert cached.data == legacy
+
+    await db.aclose()
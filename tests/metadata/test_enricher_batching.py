@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.db.schema import init_schema
+from mjr_am_backend.adapters.db.sqlite import Sqlite
+from mjr_am_backend.features.index.enricher import MetadataEnricher
+from mjr_am_backend.features.index.metadata_helpers import MetadataHelpers
+from mjr_am_backend.features.index.scanner import IndexScanner
+from mjr_am_backend.shared import Result
+
+
+class _StubMetadata:
+    def __init__(self):
+        self.calls = []
+
+    async def get_metadata_batch(self, filepaths, scan_id=None):
+        self.calls.append(list(filepaths))
+        return {fp: Result.Ok({"width": 64, "height": 32, "tags": ["fresh"]}, quality="full") for fp in filepaths}
+
+
+@pytest.mark.asyncio
+async def test_enrich_chunk_reads_and_writes_cache_in_bulk(tmp_path: Path):
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    scanner = IndexScanner(db, None, None)
+    metadata = _StubMetadata()
+    enricher = MetadataEnricher(
+        db,
+        metadata,
+        scanner._compute_state_hash,
+        MetadataHelpers.prepare_metadata_fields,
+        MetadataHelpers.metadata_error_payload,
+    )
+
+    paths = []
+    for i in range(6):
+        p = tmp_path / f"img_{i}.png"
+        p.write_bytes(b"x" * (i + 1))
+        paths.append(str(p))
+        await db.aexecute(
+            "INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime) "
+            "VALUES (?, '', ?, 'output', 'image', '.png', 1, 1)",
+            (p.name, str(p)),
+        )
+    # Two files already have a valid cache entry for their current state.
+    cached_meta = Result.Ok({"width": 8, "height": 8, "tags": ["cached"]})
+    for fp in paths[:2]:
+        st = Path(fp).stat()
+        state_hash = scanner._compute_state_hash(fp, st.st_mtime_ns, st.st_size)
+        assert (await MetadataHelpers.store_metadata_cache(db, fp, state_hash, cached_meta)).ok
+
+    cache_queries = []
+    original_aquery = db.aquery
+
+    async def counting_aquery(sql, params=()):
+        if "FROM metadata_cache" in sql:
+            cache_queries.append(sql)
+        return await original_aquery(sql, params)
+
+    db.aquery = counting_aquery
+    try:
+        await enricher._enrich_metadata_chunk(paths)
+    finally:
+        db.aquery = original_aquery
+
+    assert len(cache_queries) == 1
+    assert metadata.calls == [paths[2:]]
+
+    rows = (await db.aquery(
+        "SELECT a.filepath, a.width, m.tags FROM assets a JOIN asset_metadata m ON m.asset_id = a.id ORDER BY a.id"
+    )).data
+    assert [(r["width"], r["tags"]) for r in rows] == [(8, '["cached"]')] * 2 + [(64, '["fresh"]')] * 4
+    cache = await MetadataHelpers.retrieve_cached_metadata_many(
+        db,
+        {fp: scanner._compute_state_hash(fp, Path(fp).stat().st_mtime_ns, Path(fp).stat().st_size) for fp in paths},
+    )
+    assert sorted(cache) == sorted(paths)
+    assert cache[paths[-1]].data["tags"] == ["fresh"]
+    await db.aclose()
@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.db.schema import init_schema
+from mjr_am_backend.adapters.db.sqlite import Sqlite
+from mjr_am_backend.features.index.metadata_helpers import MetadataHelpers
+from mjr_am_backend.features.index.searcher import IndexSearcher
+from mjr_am_backend.shared import Result
+
+
+_GENINFO = {
+    "engine": {"type": "t2i"},
+    "models": {"checkpoint": {"name": "sdxl_base.safetensors", "confidence": "high"}},
+    "sampler": {"name": "dpmpp_2m", "confidence": "high"},
+    "seed": {"value": 123},
+    "steps": {"value": 25},
+    "cfg": {"value": 6.5},
+}
+
+
+def test_extract_generation_columns_from_geninfo():
+    cols = MetadataHelpers.extract_generation_columns({"geninfo": _GENINFO, "generation_time_ms": 4200})
+    assert cols == {
+        "workflow_type": "T2I",
+        "model_name": "sdxl_base.safetensors",
+        "sampler": "dpmpp_2m",
+        "seed": 123,
+        "steps": 25,
+        "cfg": 6.5,
+        "generation_time_ms": 4200,
+    }
+    # Seeds outside SQLite's INTEGER range are dropped rather than failing the write.
+    assert MetadataHelpers.extract_generation_columns({"geninfo": {"seed": {"value": 2 ** 64}}})["seed"] is None
+    assert MetadataHelpers.extract_generation_columns(None)["workflow_type"] is None
+
+
+async def _insert_asset(db, root: Path, name: str) -> int:
+    res = await db.aexecute(
+        """
+        INSERT INTO assets(filename, subfolder, filepath, source, kind, ext, size, mtime)
+        VALUES (?, '', ?, 'output', 'image', '.png', 1, 1)
+        """,
+        (name, str(root / name)),
+    )
+    assert res.ok, res.error
+    return int(res.data)
+
+
+@pytest.mark.asyncio
+async def test_write_row_populates_columns_and_backfill_fills_old_rows(tmp_path: Path):
+    db = Sqlite(str(tmp_path / "assets.sqlite"), max_connections=1, timeout=1.0)
+    assert (await init_schema(db)).ok
+    root = tmp_path.resolve()
+
+    written = await _insert_asset(db, root, "written.png")
+    meta = {"geninfo": _GENINFO, "workflow": {"nodes": [{"type": "KSampler"}]}}
+    assert (await MetadataHelpers.write_asset_metadata_row(db, written, Result.Ok(meta, quality="full"))).ok
+
+    # Row written before the columns existed: only metadata_raw is set.
+    legacy = await _insert_asset(db, root, "legacy.png")
+    legacy_meta = {"workflow_type": "i2v", "model": "wan.safetensors", "generation_time_ms": 900}
+    await db.aexecute(
+        "INSERT INTO asset_metadata(asset_id, metadata_raw) VALUES (?, ?)",
+        (legacy, json.dumps(legacy_meta)),
+    )
+
+    assert await MetadataHelpers.generation_backfill_pending(db)
+    backfill = await MetadataHelpers.backfill_generation_columns(db, batch_size=1)
+    assert backfill.ok, backfill.error
+    assert backfill.data == 2
+    assert not await MetadataHelpers.generation_backfill_pending(db)
+
+    rows = (await db.aquery(
+        "SELECT asset_id, workflow_type, model_name, sampler, steps, generation_time_ms FROM asset_metadata ORDER BY asset_id"
+    )).data
+    assert [(r["workflow_type"], r["model_name"], r["sampler"], r["steps"]) for r in rows] == [
+        ("T2I", "sdxl_base.safetensors", "dpmpp_2m", 25),
+        ("I2V", "wan.safetensors", None, None),
+    ]
+    assert rows[1]["generation_time_ms"] == 900
+
+    searcher = IndexSearcher(db, has_tags_text_column=True)
+    by_type = await searcher.search("*", filters={"workflow_type": "I2V"})
+    assert [a["id"] for a in by_type.data["assets"]] == [legacy]
+    by_model = await searcher.search("*", filters={"model_name": "SDXL_BASE.safetensors"})
+    assert [a["id"] for a in by_model.data["assets"]] == [written]
+
+    plan = await db.aquery(
+        "EXPLAIN QUERY PLAN SELECT asset_id FROM asset_metadata m WHERE m.model_name = ?", ("x",)
+    )
+    assert any("idx_metadata_model_name" in str(r.get("detail")) for r in plan.data)
+
+    await db.aclose()
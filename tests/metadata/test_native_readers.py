@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from mjr_am_backend.features.metadata.native_readers import has_generation_data, read_image_chunks_exif_like
+from mjr_am_backend.features.metadata.service import MetadataService
+from mjr_am_backend.probe_router import pick_probe_backend
+
+
+_WORKFLOW = {"nodes": [{"id": 1, "type": "KSampler"}], "links": []}
+_PROMPT = {
+    "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "model.safetensors"}},
+    "2": {"class_type": "KSampler", "inputs": {"seed": 5, "steps": 20, "model": ["1", 0]}},
+}
+_XMP = (
+    '<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    '<rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/" '
+    'xmp:Rating="4"><dc:subject><rdf:Bag><rdf:li>fox</rdf:li><rdf:li>A &amp; B</rdf:li></rdf:Bag></dc:subject>'
+    "</rdf:Description></rdf:RDF></x:xmpmeta>"
+)
+
+
+def _comfy_png(path: Path) -> Path:
+    info = PngInfo()
+    info.add_text("prompt", json.dumps(_PROMPT))
+    info.add_text("workflow", json.dumps(_WORKFLOW), zip=True)
+    info.add_itxt("XML:com.adobe.xmp", _XMP)
+    Image.new("RGB", (48, 24), "black").save(path, pnginfo=info)
+    return path
+
+
+def test_png_text_chunks_map_to_exiftool_keys(tmp_path: Path):
+    data = read_image_chunks_exif_like(str(_comfy_png(tmp_path / "comfy.png")))
+
+    assert json.loads(data["PNG:Prompt"]) == _PROMPT
+    assert json.loads(data["PNG:Workflow"]) == _WORKFLOW  # zTXt
+    assert data["PNG:ImageWidth"] == 48
+    assert data["PNG:ImageHeight"] == 24
+    assert data["XMP-xmp:Rating"] == 4
+    assert data["XMP-dc:Subject"] == ["fox", "A & B"]
+    assert has_generation_data(data)
+
+
+def test_png_xmp_after_image_data_is_read(tmp_path: Path):
+    # ExifTool writes XMP after IDAT unless PNGEarlyXMP is set.
+    path = tmp_path / "late_xmp.png"
+    info = PngInfo()
+    info.add_text("prompt", json.dumps(_PROMPT))
+    Image.new("RGB", (16, 16), "black").save(path, pnginfo=info)
+    raw = path.read_bytes()
+    body = b"XML:com.adobe.xmp\x00\x00\x00\x00\x00" + _XMP.encode("utf-8")
+    chunk = struct.pack(">I", len(body)) + b"iTXt" + body + struct.pack(">I", zlib.crc32(b"iTXt" + body))
+    iend = raw.rindex(b"IEND") - 4
+    assert raw.index(b"IDAT") < iend
+    path.write_bytes(raw[:iend] + chunk + raw[iend:])
+
+    data = read_image_chunks_exif_like(str(path))
+    assert has_generation_data(data)
+    assert data["XMP-xmp:Rating"] == 4
+    assert data["XMP-dc:Subject"] == ["fox", "A & B"]
+
+
+def test_webp_exif_chunk_maps_make_model(tmp_path: Path):
+    path = tmp_path / "comfy.webp"
+    exif = Image.Exif()
+    exif[0x010F] = "workflow:" + json.dumps(_WORKFLOW)
+    exif[0x0110] = "prompt:" + json.dumps(_PROMPT)
+    Image.new("RGB", (40, 20), "black").save(path, format="WEBP", exif=exif.tobytes())
+
+    data = read_image_chunks_exif_like(str(path))
+    assert data["IFD0:Make"].startswith("workflow:")
+    assert data["IFD0:Model"].startswith("prompt:")
+    assert data["RIFF:ImageWidth"] == 40
+    assert data["RIFF:ImageHeight"] == 20
+    assert has_generation_data(data)
+
+
+def test_plain_and_broken_files_have_no_generation_data(tmp_path: Path):
+    plain = tmp_path / "plain.png"
+    Image.new("RGB", (8, 8), "white").save(plain)
+    empty = tmp_path / "empty.png"
+    empty.write_bytes(b"")
+    truncated = tmp_path / "truncated.png"
+    truncated.write_bytes(_comfy_png(tmp_path / "src.png").read_bytes()[:40])
+
+    assert not has_generation_data(read_image_chunks_exif_like(str(plain)))
+    assert read_image_chunks_exif_like(str(empty)) == {}
+    assert not has_generation_data(read_image_chunks_exif_like(str(truncated)))
+
+
+def test_auto_mode_routes_png_to_native_reader_first(monkeypatch):
+    monkeypatch.setattr("mjr_am_backend.probe_router.has_exiftool", lambda: True)
+    monkeypatch.setattr("mjr_am_backend.probe_router.has_ffprobe", lambda: True)
+
+    assert pick_probe_backend("a.png", settings_override="auto") == ["native", "exiftool"]
+    assert pick_probe_backend("a.jpg", settings_override="auto") == ["exiftool"]
+    assert pick_probe_backend("a.png", settings_override="exiftool") == ["exiftool"]
+
+
+class _SettingsStub:
+    async def get_probe_backend(self) -> str:
+        return "auto"
+
+
+class _RecordingExifTool:
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    async def aread_batch(self, paths):
+        self.batches.append(list(paths))
+        return {}
+
+
+class _EmptyFFProbe:
+    def read_batch(self, paths):
+        return {}
+
+
+@pytest.mark.asyncio
+async def test_metadata_batch_skips_exiftool_for_comfyui_png(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr("mjr_am_backend.probe_router.has_exiftool", lambda: True)
+    monkeypatch.setattr("mjr_am_backend.probe_router.has_ffprobe", lambda: False)
+
+    comfy = str(_comfy_png(tmp_path / "comfy.png"))
+    plain = tmp_path / "plain.png"
+    Image.new("RGB", (8, 8), "white").save(plain)
+
+    exiftool = _RecordingExifTool()
+    svc = MetadataService(exiftool=exiftool, ffprobe=_EmptyFFProbe(), settings=_SettingsStub())
+    results = await svc.get_metadata_batch([comfy, str(plain)])
+
+    assert exiftool.batches == [[str(plain)]]
+    res = results[comfy]
+    assert res.ok, res.error
+    assert res.data["workflow"] == _WORKFLOW
+    assert res.data["prompt"] == _PROMPT
+    assert res.data["rating"] == 4
+    assert results[str(plain)].ok
@@ -0,0 +1,91 @@
+import pytest
+
+from mjr_am_backend.features.geninfo import memo
+from mjr_am_backend.features.geninfo.parser import parse_geninfo_from_prompt
+
+
+def _graph(seed: int, prompt: str = "a red fox in the snow") -> dict:
+    return {
+        "3": {
+            "class_type": "KSampler",
+            "inputs": {
+                "seed": seed,
+                "steps": 25,
+                "cfg": 6.5,
+                "sampler_name": "dpmpp_2m",
+                "scheduler": "karras",
+                "denoise": 1.0,
+                "model": ["4", 0],
+                "positive": ["6", 0],
+                "negative": ["7", 0],
+                "latent_image": ["5", 0],
+            },
+        },
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sdxl_base.safetensors"}},
+        "5": {"class_type": "EmptyLatentImage", "inputs": {"width": 1024, "height": 1024, "batch_size": 1}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": prompt, "clip": ["4", 1]}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "blurry", "clip": ["4", 1]}},
+        "8": {"class_type": "VAEDecode", "inputs": {"samples": ["3", 0], "vae": ["4", 2]}},
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0], "filename_prefix": "ComfyUI"}},
+    }
+
+
+def _workflow(seed: int, pan: float) -> dict:
+    return {
+        "nodes": [{"id": 3, "type": "KSampler", "widgets_values": [seed, "randomize", 25, 6.5, "dpmpp_2m", "karras", 1.0]}],
+        "extra": {"ds": {"scale": 1.0, "offset": [pan, 0]}},
+    }
+
+
+def test_graphs_differing_only_by_seed_share_a_template():
+    first = memo.template_graph(_graph(111), _workflow(111, 0.0))
+    second = memo.template_graph(_graph(222), _workflow(222, 35.5))
+    other = memo.template_graph(_graph(111, "a blue fox"), _workflow(111, 0.0))
+    assert first.key == second.key
+    assert first.key != other.key
+    assert list(second.seeds.values()) == [222]
+    # Inputs are not mutated.
+    graph = _graph(5)
+    memo.template_graph(graph)
+    assert graph["3"]["inputs"]["seed"] == 5
+
+
+@pytest.mark.asyncio
+async def test_memoized_parse_matches_direct_parse():
+    memo.clear_geninfo_memo()
+    for seed in (111, 222, 333):
+        graph, workflow = _graph(seed), _workflow(seed, float(seed))
+        expected = parse_geninfo_from_prompt(graph, workflow=workflow)
+        got = await memo.parse_geninfo_memoized(graph, workflow=workflow)
+        assert got.ok
+        assert got.data == expected.data
+        assert got.data["seed"]["value"] == seed
+
+    stats = memo.geninfo_memo_stats()
+    assert (stats["misses"], stats["hits"]) == (1, 2)
+
+    # Cached results are copies: mutating one does not leak into the next hit.
+    first = await memo.parse_geninfo_memoized(_graph(444))
+    first.data["steps"] = "changed"
+    second = await memo.parse_geninfo_memoized(_graph(555))
+    assert second.data["steps"] != "changed"
+
+
+def test_sentinel_left_in_strings_forces_direct_parse():
+    sentinel = memo._SENTINEL_BASE
+    assert memo.apply_seeds({"seed": {"value": sentinel}}, {sentinel: 7}) == {"seed": {"value": 7}}
+    assert memo.apply_seeds({"label": f"seed {sentinel}"}, {sentinel: 7}) is memo._PARSE_DIRECT
+
+
+@pytest.mark.asyncio
+async def test_stopping_enrichment_shuts_down_the_parse_pool(services, monkeypatch):
+    class _Pool:
+        closed = False
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.closed = True
+
+    pool = _Pool()
+    monkeypatch.setattr(memo, "_POOL", pool)
+    await services["index"].stop_enrichment()
+    assert pool.closed and memo._POOL is None
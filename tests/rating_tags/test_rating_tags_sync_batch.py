@@ -0,0 +1,145 @@
+import os
+import stat
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from mjr_am_backend.adapters.tools.exiftool import ExifTool
+from mjr_am_backend.features.tags.sync import RatingTagsSyncWorker, write_exif_rating_tags_batch
+from mjr_am_backend.routes.registry import PromptServer
+from mjr_am_backend.shared import Result
+
+
+_FAKE_EXIFTOOL = textwrap.dedent(
+    """\
+    #!{python}
+    import os, sys
+
+    VALUE_OPTS = {{"-charset", "-echo3", "-echo4", "-tagsFromFile"}}
+
+    with open(os.path.join(os.path.dirname(sys.argv[0]), "calls.log"), "a") as log:
+        log.write(" ".join(sys.argv[1:]) + "\\n")
+
+    def run(args):
+        files, echo3, echo4, i = [], "", "", 0
+        while i < len(args):
+            a = args[i]
+            if a in VALUE_OPTS:
+                echo3 = args[i + 1] if a == "-echo3" else echo3
+                echo4 = args[i + 1] if a == "-echo4" else echo4
+                i += 2
+                continue
+            if not a.startswith("-"):
+                files.append(a)
+            i += 1
+        status = 0
+        for f in files:
+            if "locked" in os.path.basename(f):
+                sys.stderr.write("Error: Permission denied - %s\\n" % f)
+                status = 1
+            else:
+                sys.stdout.write("    1 image files updated\\n")
+        sys.stdout.write(echo3 + "\\n")
+        sys.stderr.write(echo4.replace("${{status}}", str(status)) + "\\n")
+
+    pending = []
+    for line in sys.stdin.read().splitlines():
+        if line == "-execute":
+            run(pending)
+            pending = []
+        else:
+            pending.append(line)
+    if pending:
+        run(pending)
+    """
+)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="fake exiftool script relies on a POSIX shebang")
+def test_batch_write_uses_one_exiftool_process_and_reports_per_file(tmp_path: Path):
+    script = tmp_path / "bin" / "exiftool"
+    script.parent.mkdir()
+    script.write_text(_FAKE_EXIFTOOL.format(python=sys.executable), encoding="utf-8")
+    script.chmod(script.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    tool = ExifTool(bin_name=str(script), timeout=5, pool_size=0)
+
+    files = []
+    for name in ("a.png", "locked.png", "c.png"):
+        f = tmp_path / name
+        f.write_bytes(b"x")
+        os.utime(f, (1_000_000, 1_000_000))
+        files.append(str(f))
+    missing = str(tmp_path / "gone.png")
+
+    res = write_exif_rating_tags_batch(tool, [(f, 3, ["x"]) for f in files] + [(missing, 1, [])])
+    assert res[files[0]].ok and res[files[2]].ok
+    assert not res[files[1]].ok and "Permission denied" in (res[files[1]].error or "")
+    assert res[missing].code == "NOT_FOUND"
+    assert os.path.getmtime(files[0]) == 1_000_000
+
+    calls = (script.parent / "calls.log").read_text(encoding="utf-8").splitlines()
+    assert calls == ["-@ -"]
+
+
+class _BatchCapture:
+    def __init__(self):
+        self.calls = []
+        self.writing = set()
+        self.overlap = False
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return True
+
+    def write_batch(self, items, preserve_workflow: bool = True):
+        paths = [p for p, _ in items]
+        with self.lock:
+            self.overlap |= bool(self.writing & set(paths))
+            self.writing |= set(paths)
+            self.calls.append({p: meta["XMP:Rating"] for p, meta in items})
+        if "a.png" in paths[0]:
+            self.release.wait(5)
+        with self.lock:
+            self.writing -= set(paths)
+        return {p: Result.Ok(True) for p in paths}
+
+
+def test_worker_drains_groups_without_writing_one_file_twice_at_once(monkeypatch, tmp_path: Path):
+    events = []
+    monkeypatch.setattr(PromptServer.instance, "send_sync", lambda event, data: events.append((event, data)))
+    files = []
+    for name in ("a.png", "b.png", "c.png", "d.png"):
+        f = tmp_path / name
+        f.write_bytes(b"x")
+        files.append(str(f))
+
+    ex = _BatchCapture()
+    worker = RatingTagsSyncWorker(ex, concurrency=2, batch_size=2)
+    try:
+        worker.enqueue(files[0], 1, [], "on")
+        deadline = time.monotonic() + 5
+        while not ex.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # a.png is being written: its newer update must wait for that write to finish.
+        worker.enqueue(files[0], 5, [], "on")
+        for f in files[1:]:
+            worker.enqueue(f, 2, [], "on")
+        time.sleep(0.1)
+        ex.release.set()
+        while (not events or events[-1][1]["active"]) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+
+    assert not ex.overlap
+    assert all(len(call) <= 2 for call in ex.calls)
+    ratings_a = [call[files[0]] for call in ex.calls if files[0] in call]
+    assert ratings_a == [1, 5]
+    assert {p for call in ex.calls for p in call} == set(files)
+    assert {e for e, _ in events} == {"mjr-rating-tags-sync"}
+    assert events[-1][1] == {"active": False, "done": 5, "failed": 0, "pending": 0}
@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("watchdog")
+
+import mjr_am_backend.adapters.fs.list_cache_watcher as watcher
+import mjr_am_backend.routes.handlers.filesystem as fs
+
+
+async def _wait_for_change(directory, since, name, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if name in (watcher.get_fs_list_cache_changes(str(directory), since) or []):
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"no watch event for {name}")
+
+
+@pytest.mark.asyncio
+async def test_listing_is_patched_per_directory_from_the_event_journal(monkeypatch, tmp_path):
+    root = tmp_path / "input"
+    busy = root / "renders"
+    busy.mkdir(parents=True)
+    for i in range(3):
+        (root / f"img_{i}.png").write_bytes(b"x")
+        os.utime(root / f"img_{i}.png", (1000 + i, 1000 + i))
+
+    builds = []
+    scan = fs.scan_dir_index
+
+    def _counting_scan(dirpath):
+        builds.append(dirpath)
+        return scan(dirpath)
+
+    monkeypatch.setattr(fs, "scan_dir_index", _counting_scan)
+    monkeypatch.setattr(fs, "_FS_LIST_CACHE", type(fs._FS_LIST_CACHE)())
+    base = root.resolve()
+    try:
+        first = await fs._fs_cache_get_or_build(base, base, "input", None)
+        assert first.data["index"].names == ["img_2.png", "img_1.png", "img_0.png"]
+        assert watcher.is_fs_list_cache_watched(str(base))
+
+        # Writes in another directory of the same root do not touch this listing.
+        since = watcher.get_fs_list_cache_seq()
+        (busy / "render_0001.png").write_bytes(b"x")
+        await _wait_for_change(busy.resolve(), since, "render_0001.png")
+        assert watcher.get_fs_list_cache_changes(str(base), since) == []
+        again = await fs._fs_cache_get_or_build(base, base, "input", None)
+        assert again.data["index"] is first.data["index"]
+
+        # Create + delete in the listed directory are applied as a patch, newest first.
+        since = watcher.get_fs_list_cache_seq()
+        (root / "img_1.png").unlink()
+        (root / "new.png").write_bytes(b"y")
+        await _wait_for_change(base, since, "img_1.png")
+        await _wait_for_change(base, since, "new.png")
+        patched = await fs._fs_cache_get_or_build(base, base, "input", None)
+        assert patched.data["index"].names == ["new.png", "img_2.png", "img_0.png"]
+        assert builds == [str(base)]
+        # The list handed to the earlier request is left untouched.
+        assert len(first.data["index"]) == 3
+    finally:
+        watcher.stop_global_fs_list_cache_watcher()
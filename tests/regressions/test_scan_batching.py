@@ -62,3 +62,34 @@ async def test_scan_uses_batched_transactions(tmp_path: Path):
     assert c.ok
     assert int((c.data or [{}])[0].get("c") or 0) == len(files)
 
+
+
+@pytest.mark.asyncio
+async def test_scan_reuses_walk_stat_results(tmp_path: Path, monkeypatch):
+    """Directory scans take mtime/size from the walk records instead of stat'ing each file again."""
+    from mjr_am_backend.deps import build_services
+    from mjr_am_backend.features.index.scanner import IndexScanner
+
+    services_res = await build_services(db_path=str(tmp_path / "walk_stat.db"))
+    assert services_res.ok, services_res.error
+    index = services_res.data["index"]
+    db = services_res.data["db"]
+
+    scan_dir = tmp_path / "scan_root"
+    (scan_dir / "sub").mkdir(parents=True, exist_ok=True)
+    for i in range(10):
+        (scan_dir / ("sub" if i % 2 else "") / f"f_{i:02d}.png").write_bytes(b"not-a-real-file")
+
+    async def _no_per_file_stat(self, file_path):
+        raise AssertionError(f"per-file stat for {file_path}")
+
+    monkeypatch.setattr(IndexScanner, "_stat_with_retry", _no_per_file_stat)
+    res = await index.scan_directory(str(scan_dir), recursive=True, incremental=False, fast=True)
+    assert res.ok, res.error
+    assert res.data["added"] == 10
+    assert res.data["errors"] == 0
+
+    rows = await db.aquery("SELECT filepath, size, mtime FROM assets ORDER BY filepath")
+    for row in rows.data:
+        st = Path(row["filepath"]).stat()
+        assert (row["size"], row["mtime"]) == (st.st_size, int(st.st_mtime))
@@ -32,6 +32,6 @@ def test_iter_files_recursive_includes_symlinked_files(tmp_path: Path):
         pytest.skip("Symlink creation is not permitted in this environment")
 
     files = list(scanner._iter_files(tmp_path, recursive=True))
-    names = {p.name for p in files}
+    names = {f.path.name for f in files}
     assert "real.png" in names
     assert "link.png" in names